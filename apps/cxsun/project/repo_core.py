@@ -1,10 +1,11 @@
 from __future__ import annotations
-from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+from typing import Any, Dict, List, Mapping, Optional, Tuple
 import uuid
 from dataclasses import asdict
 
 from prefiq.http.context import get_current_context
 from prefiq.database import get_engine
+from prefiq.database.engines.row_mapper import compile_mapper
 from .meta import now_sql, Project, can_transition
 from .repo_utils import adapt_params_for_engine, dumps_json, loads_json, roles_set
 # If you already have is_mariadb_engine in repo_utils, import it; otherwise inline a tiny helper:
@@ -21,12 +22,8 @@ COLUMNS: List[str] = [
     "tags", "meta", "created_at", "updated_at",
 ]
 
-def _row_to_dict(row: Iterable[Any]) -> Dict[str, Any]:
-    tup = list(row)
-    out: Dict[str, Any] = dict(zip(COLUMNS, tup))
-    out["tags"] = loads_json(out.get("tags"))
-    out["meta"] = loads_json(out.get("meta"))
-    return out
+# Every SELECT here lists COLUMNS in order, so one compiled mapper fits all engines
+_ROWS = compile_mapper(COLUMNS, "dict", {"tags": loads_json, "meta": loads_json})
 
 class DBRepository:
     TABLE = "projects"
@@ -42,13 +39,13 @@ class DBRepository:
         row = eng.fetchone(sql2) if p2 is None else eng.fetchone(sql2, p2)
         if not row:
             return None
-        return _row_to_dict(row)
+        return _ROWS.one(row)
 
     def _fetchall(self, sql: str, params: Optional[Mapping[str, Any]] = None) -> List[Dict[str, Any]]:
         eng = get_engine()
         sql2, p2 = adapt_params_for_engine(eng, sql, params)
         rows = eng.fetchall(sql2) if p2 is None else eng.fetchall(sql2, p2)
-        return [_row_to_dict(r) for r in rows]
+        return _ROWS.many(rows)
     # ──────────────────────────────────────────────────────────────────────
     # CRUD / workflow
     # ──────────────────────────────────────────────────────────────────────
@@ -1,32 +1,26 @@
 from __future__ import annotations
 from typing import Any, Dict, Mapping, Tuple, Optional, List
-import re
 import json
 
-_param_rx = re.compile(r":([a-zA-Z_]\w*)")
+from prefiq.database.statements import compile_statement, paramstyle_for
 
 def is_mariadb_engine(engine) -> bool:
     return "mariadb" in (type(engine).__module__ or "").lower()
 
-def adapt_params_for_engine(engine, sql: str, params: Optional[Mapping[str, Any]]) -> Tuple[str, Optional[List[Any]] | Dict[str, Any]]:
+def adapt_params_for_engine(engine, sql: str, params: Optional[Mapping[str, Any]]) -> Tuple[str, Optional[Tuple[Any, ...]] | Dict[str, Any]]:
     """
-    For MariaDB (mariadb connector), convert :named placeholders to '?' and return
-    a positional list of values in order of appearance. For non-MariaDB, return
-    the original SQL and a plain dict.
+    Convert :named placeholders to the engine's paramstyle (? / %s / $n) and
+    return the values positionally, in placeholder order. Engines with no
+    known paramstyle keep the named SQL and get a plain dict.
+    The translation is compiled once per (paramstyle, sql) and cached.
     """
     if params is None:
         return sql, None
-
-    if is_mariadb_engine(engine):
-        # Find names in order of appearance and replace with '?'
-        names = _param_rx.findall(sql)
-        sql_qmark = _param_rx.sub("?", sql)
-        # Build a positional list aligned to those names
-        seq = [params[n] if n in params else None for n in names]
-        return sql_qmark, seq
-
-    # Default: keep named placeholders and pass a real dict with string keys
-    return sql, {str(k): v for k, v in dict(params).items()}
+    style = paramstyle_for(engine)
+    if style == "named" and is_mariadb_engine(engine):
+        style = "qmark"
+    stmt = compile_statement(style, sql)
+    return stmt.sql, stmt.bind(params)
 
 def roles_set(ctx) -> set[str]:
     raw = getattr(ctx, "roles", []) or []
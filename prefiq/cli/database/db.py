@@ -0,0 +1,229 @@
+# prefiq/cli/database/db.py
+
+from __future__ import annotations
+
+import csv
+import inspect
+import sys
+import time
+from pathlib import Path
+from typing import Any, Iterator, List, Optional, Sequence
+
+import typer
+
+from prefiq.core.logger import get_logger
+
+log = get_logger("prefiq.run.db")
+db_app = typer.Typer(help="Database bulk load / unload (CSV) and maintenance")
+
+
+def _resolve(x: Any) -> Any:
+    """Await coroutines from async engines on the shared database loop."""
+    if inspect.isawaitable(x):
+        from prefiq.database.loop_bridge import run_sync
+        return run_sync(x)
+    return x
+
+
+def _split_columns(columns: Optional[str]) -> List[str]:
+    return [c.strip() for c in (columns or "").split(",") if c.strip()]
+
+
+def _read_header(path: Path) -> List[str]:
+    with path.open(newline="", encoding="utf-8") as fh:
+        return [c.strip() for c in next(csv.reader(fh), [])]
+
+
+def _csv_rows(path: Path, *, header: bool, null: str) -> Iterator[tuple]:
+    with path.open(newline="", encoding="utf-8") as fh:
+        reader = csv.reader(fh)
+        if header:
+            next(reader, None)
+        for rec in reader:
+            yield tuple(None if v == null else v for v in rec)
+
+
+def _load(engine: Any, table: str, cols: Sequence[str], path: Path, *, header: bool, null: str, batch: int) -> int:
+    # Prefer the engine's native loader: server-side CSV parsing, then typed COPY, then multi-row INSERT
+    copy_in_csv = getattr(engine, "copy_in_csv", None)
+    if copy_in_csv is not None:
+        return int(_resolve(copy_in_csv(table, cols, str(path), header=header, null=null)))
+    rows = _csv_rows(path, header=header, null=null)
+    copy_in = getattr(engine, "copy_in", None)
+    if copy_in is not None:
+        return int(_resolve(copy_in(table, cols, rows)))
+    from prefiq.database.schemas import queries
+    return sum(queries.insert_many(table, (dict(zip(cols, r)) for r in rows), chunk_size=batch))
+
+
+@db_app.command("load")
+def load(
+    table: str = typer.Argument(..., help="Target table (schema.table allowed)"),
+    path: Path = typer.Argument(..., exists=True, dir_okay=False, readable=True, help="CSV file"),
+    columns: Optional[str] = typer.Option(None, "--columns", "-c", help="Comma-separated columns (default: CSV header)"),
+    header: bool = typer.Option(True, "--header/--no-header", help="First line is a header row"),
+    null: str = typer.Option("", "--null", help="Field value loaded as NULL"),
+    batch: int = typer.Option(5000, "--batch", help="Rows per INSERT when no native loader exists"),
+):
+    """
+    Bulk-load a CSV file with the engine's native loader
+    (Postgres COPY, MariaDB LOAD DATA LOCAL INFILE, SQLite one-transaction insert).
+
+    --null follows COPY on Postgres: only an unquoted field equal to it is NULL,
+    so with the default "" a quoted "" stays an empty string. LOAD DATA (and the
+    SQLite / INSERT fallback) see fields after unquoting, so there "" is NULL too.
+    """
+    from prefiq.database.connection import get_engine
+
+    cols = _split_columns(columns) or (_read_header(path) if header else [])
+    if not cols:
+        typer.echo("❌ --columns is required when the CSV has no header.")
+        raise typer.Exit(code=2)
+
+    t0 = time.time()
+    log.info("db_load_start", extra={"table": table, "path": str(path)})
+    count = _load(get_engine(), table, cols, path, header=header, null=null, batch=batch)
+    elapsed = time.time() - t0
+    log.info("db_load_done", extra={"table": table, "rows": count, "elapsed_ms": int(elapsed * 1000)})
+    typer.echo(f"✅ Loaded {count} rows into {table} in {elapsed:.2f}s")
+
+
+@db_app.command("unload")
+def unload(
+    source: str = typer.Argument(..., help="Table name or a SELECT statement"),
+    path: str = typer.Argument("-", help="Output CSV file ('-' for stdout)"),
+    columns: Optional[str] = typer.Option(None, "--columns", "-c", help="Comma-separated columns (table source only)"),
+    header: bool = typer.Option(False, "--header/--no-header", help="Write the column names first (needs --columns)"),
+):
+    """Stream a table or query out as CSV via the engine's copy_out()."""
+    from prefiq.database.connection import get_engine
+    from prefiq.database.loop_bridge import iter_sync
+    from prefiq.database.schemas.router import impl
+
+    source = source.strip()
+    if not source:
+        typer.echo("❌ SOURCE must be a table name or a SELECT statement.")
+        raise typer.Exit(code=2)
+    cols = _split_columns(columns)
+    if header and not cols:
+        typer.echo("❌ --header needs --columns.")
+        raise typer.Exit(code=2)
+
+    if source.split(None, 1)[0].lower() in ("select", "with", "table", "values"):
+        query = source
+    else:
+        q = impl()[2].q
+        query = f"SELECT {', '.join(q(c) for c in cols) if cols else '*'} FROM {q(source)}"
+
+    engine = get_engine()
+    copy_out = getattr(engine, "copy_out", None)
+    if copy_out is None:
+        typer.echo(f"❌ {type(engine).__name__} does not support copy_out().")
+        raise typer.Exit(code=2)
+    chunks = copy_out(query)
+    if hasattr(chunks, "__aiter__"):
+        chunks = iter_sync(chunks, chunk=8)
+
+    out = sys.stdout.buffer if path == "-" else open(path, "wb")
+    nbytes = 0
+    try:
+        if header:
+            out.write((",".join(cols) + "\n").encode("utf-8"))
+        for chunk in chunks:
+            out.write(chunk)
+            nbytes += len(chunk)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+    log.info("db_unload_done", extra={"source": source, "bytes": nbytes})
+    if path != "-":
+        typer.echo(f"✅ Wrote {nbytes} bytes to {path}")
+
+
+def _sqlite_path(path: Optional[str]) -> str:
+    """--path, else the configured engine's SQLite file; exits unless one exists."""
+    if path is None:
+        from prefiq.database.connection import get_engine
+        engine = get_engine()
+        if getattr(engine, "engine_label", "") != "sqlite":
+            typer.echo("❌ This command applies to SQLite databases (pass --path for a file).")
+            raise typer.Exit(code=2)
+        path = engine.db_path
+    if path == ":memory:" or not Path(path).exists():
+        typer.echo(f"❌ No SQLite database at {path}.")
+        raise typer.Exit(code=2)
+    return path
+
+
+@db_app.command("maintain")
+def maintain(
+    path: Optional[str] = typer.Option(None, "--path", help="SQLite file (default: the configured engine's)"),
+    optimize: bool = typer.Option(True, "--optimize/--no-optimize", help="Run PRAGMA optimize"),
+    vacuum_pages: Optional[int] = typer.Option(None, "--vacuum-pages", help="incremental_vacuum pages (default DB_SQLITE_VACUUM_PAGES, 0 = skip)"),
+):
+    """Checkpoint (TRUNCATE) the WAL, refresh planner stats and vacuum free pages of a SQLite database now."""
+    from prefiq.database.engines.sqlite.maintenance import MaintenanceScheduler
+    from prefiq.settings.get_settings import load_settings
+
+    s = load_settings()
+    path = _sqlite_path(path)
+    sched = MaintenanceScheduler(path, vacuum_pages=getattr(s, "DB_SQLITE_VACUUM_PAGES", 256))
+    report = sched.run_once(optimize=optimize, vacuum_pages=vacuum_pages)
+    typer.echo(
+        f"✅ {path}: checkpoint={report['checkpoint']} "
+        f"wal {report['wal_bytes_before']}→{report['wal_bytes_after']} bytes, "
+        f"optimize={'yes' if report.get('optimize') else 'no'}, "
+        f"vacuumed {report['vacuumed_pages']} pages"
+    )
+
+
+@db_app.command("backup")
+def backup(
+    archive: Optional[str] = typer.Argument(None, help="Archive file (default: DB_SQLITE_BACKUP_DIR or ./, timestamped .db.gz)"),
+    path: Optional[str] = typer.Option(None, "--path", help="SQLite file (default: the configured engine's)"),
+    pages: Optional[int] = typer.Option(None, "--pages", help="Pages per step (default DB_SQLITE_BACKUP_PAGES, 0 = all at once)"),
+    rate_mb: Optional[float] = typer.Option(None, "--rate-mb", help="Copy rate limit in MB/s (default DB_SQLITE_BACKUP_RATE_MB)"),
+):
+    """Online, throttled backup of a SQLite database into a gzip archive."""
+    from prefiq.database.engines.sqlite.maintenance import backup_archive, archive_name
+    from prefiq.settings.get_settings import load_settings
+
+    s = load_settings()
+    path = _sqlite_path(path)
+    if archive is None:
+        archive = str(Path(getattr(s, "DB_SQLITE_BACKUP_DIR", "") or ".") / archive_name(path))
+    step = getattr(s, "DB_SQLITE_BACKUP_PAGES", 1024) if pages is None else pages
+    rate = getattr(s, "DB_SQLITE_BACKUP_RATE_MB", 0.0) if rate_mb is None else rate_mb
+
+    shown = [-1]
+
+    def _progress(done: int, total: int) -> None:
+        pct = 100 * done // total if total else 100
+        if pct // 10 != shown[0] // 10:
+            shown[0] = pct
+            typer.echo(f"  {pct:3d}% ({done}/{total} pages)", err=True)
+
+    t0 = time.time()
+    size = backup_archive(path, archive, pages=step or -1, rate_limit_mb=rate, progress=_progress)
+    typer.echo(f"✅ Backed up {path} to {archive} ({size} bytes) in {time.time() - t0:.2f}s")
+
+
+@db_app.command("restore")
+def restore(
+    archive: Path = typer.Argument(..., exists=True, dir_okay=False, readable=True, help="Archive from `db backup`"),
+    path: Optional[str] = typer.Option(None, "--path", help="SQLite file to overwrite (default: the configured engine's)"),
+    yes: bool = typer.Option(False, "--yes", "-y", help="Do not ask for confirmation"),
+):
+    """Verify a backup archive and copy it over a SQLite database."""
+    from prefiq.database.engines.sqlite.maintenance import restore_archive
+
+    if path is None:
+        path = _sqlite_path(None)
+    if not yes and not typer.confirm(f"Replace the contents of {path} with {archive}?"):
+        raise typer.Exit(code=1)
+    try:
+        restore_archive(str(archive), path)
+    except ValueError as e:
+        typer.echo(f"❌ {e}")
+        raise typer.Exit(code=1)
+    typer.echo(f"✅ Restored {archive} into {path}")
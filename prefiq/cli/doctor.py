@@ -210,11 +210,8 @@ def _first_value(row: Any) -> Any:
 
 def _await_if_needed(x: Any, timeout: float | None) -> Any:
     if inspect.isawaitable(x):
-        try: loop = asyncio.get_running_loop()
-        except RuntimeError:
-            return asyncio.run(asyncio.wait_for(x, timeout)) if timeout else asyncio.run(x)
-        else:
-            return loop.run_until_complete(asyncio.wait_for(x, timeout)) if timeout else loop.run_until_complete(x)
+        from prefiq.database.loop_bridge import run_sync
+        return run_sync(asyncio.wait_for(x, timeout)) if timeout else run_sync(x)
     return x
 
 
@@ -307,6 +304,58 @@ def cmd_database_all(verbose: bool = typer.Option(False, "--verbose", "-v"), str
     raise typer.Exit(worst_code)
 
 
+# ──────────────────────────────────────────────
+# Query statistics (from a running server)
+# ──────────────────────────────────────────────
+
+def _fetch_query_stats(url: str, token: str, order_by: str, limit: int, reset: bool, timeout: float = 5.0) -> Dict[str, Any]:
+    import json
+    import urllib.parse
+    import urllib.request
+
+    qs = urllib.parse.urlencode({"order_by": order_by, "limit": limit, "reset": str(reset).lower()})
+    req = urllib.request.Request(f"{url.rstrip('/')}/_debug/queries?{qs}", headers={"X-Debug-Token": token})
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        return json.loads(resp.read().decode("utf-8"))
+
+
+def _short_sql(sql: str, width: int = 80) -> str:
+    return sql if len(sql) <= width else sql[: width - 1] + "…"
+
+
+@app.command("queries")
+def cmd_queries(
+    url: str = typer.Option(
+        f"http://127.0.0.1:{os.getenv('SERVER_PORT', '5001')}", "--url", help="Base URL of the running server"
+    ),
+    token: Optional[str] = typer.Option(None, "--token", help="Debug token (default: DB_DEBUG_TOKEN)"),
+    order_by: str = typer.Option("total_ms", "--order-by", "-o", help="total_ms | mean_ms | calls | p95_ms | p99_ms | max_ms | rows | errors"),
+    limit: int = typer.Option(20, "--limit", "-n"),
+    reset: bool = typer.Option(False, "--reset", help="Clear the server's statistics after reading"),
+) -> None:
+    """Top statements by fingerprint from a running server's /_debug/queries."""
+    token = token or getattr(load_settings(), "DB_DEBUG_TOKEN", "")
+    if not token:
+        log.error("%s", failx("DB_DEBUG_TOKEN is not set (the server only exposes /_debug/queries with a token)"))
+        raise typer.Exit(2)
+    try:
+        data = _fetch_query_stats(url, token, order_by, limit, reset)
+    except Exception as e:
+        log.error("%s", failx(f"Could not read {url}/_debug/queries: {e}"))
+        raise typer.Exit(1)
+
+    rows = data.get("statements", [])
+    log.info("%s", banner(f"=== Top {len(rows)} statements by {order_by} ===", color="cyan", blank_before=True))
+    log.info("%8s %10s %9s %9s %9s %9s %9s  %-8s %s", "calls", "total_ms", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms", "engine", "query")
+    for r in rows:
+        log.info(
+            "%8d %10.1f %9.2f %9.2f %9.2f %9.2f %9.2f  %-8s %s",
+            r["calls"], r["total_ms"], r["mean_ms"], r["p50_ms"], r["p95_ms"], r["p99_ms"], r["max_ms"],
+            r["engine"], _short_sql(r["query"]),
+        )
+    log.info("tracked=%s evicted=%s%s", data.get("tracked"), data.get("evicted"), " (reset)" if reset else "")
+
+
 # ──────────────────────────────────────────────
 # Migration diagnostics
 # ──────────────────────────────────────────────
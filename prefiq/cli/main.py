@@ -38,6 +38,10 @@ def _mount_optional_groups() -> None:
         run_app.command("clear-cache")(clear_cache)   # prefiq run clear-cache
         app.add_typer(run_app, name="run")
 
+    if "db" in argv:
+        from prefiq.cli.database.db import db_app
+        app.add_typer(db_app, name="db")           # prefiq db load|unload|maintain|backup|restore ...
+
     if "devmeta" in argv:
         # optional third-party/dev module
         try:
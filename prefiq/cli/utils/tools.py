@@ -17,8 +17,8 @@ def _maybe_await(x):
     try:
         import inspect
         if inspect.isawaitable(x):
-            import asyncio
-            return asyncio.run(x)
+            from prefiq.database.loop_bridge import run_sync
+            return run_sync(x)
     except (ValueError, TypeError):
         pass
     return x
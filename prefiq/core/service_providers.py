@@ -16,6 +16,11 @@ try:
 except (ValueError, TypeError):
     DatabaseProvider = None  # type: ignore[misc]
 
+try:
+    from prefiq.providers.maintenance_provider import MaintenanceProvider  # type: ignore
+except (ValueError, TypeError):
+    MaintenanceProvider = None  # type: ignore[misc]
+
 try:
     from prefiq.providers.migration_provider import MigrationProvider  # type: ignore
 except (ValueError, TypeError):
@@ -29,7 +34,7 @@ except Exception:
 
 def _hardcoded_providers() -> List[Type[Provider]]:
     core: List[Type[Provider]] = []
-    for cls in (ConfigProvider, DatabaseProvider, MigrationProvider):
+    for cls in (ConfigProvider, DatabaseProvider, MaintenanceProvider, MigrationProvider):
         if cls is not None:
             core.append(cls)  # type: ignore[arg-type]
     return core
@@ -49,7 +54,7 @@ def _uniq_in_order(classes: Iterable[Type[Provider]]) -> List[Type[Provider]]:
 
 def get_service_providers() -> List[Type[Provider]]:
     """
-    1) Hardcoded core (config → database → migration)
+    1) Hardcoded core (config → database → maintenance → migration)
     2) Discovered (apps, roots)
     3) Stable de-dupe (hardcoded precedence)
     """
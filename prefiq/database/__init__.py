@@ -20,6 +20,12 @@ from .connection import (
     engine_env,
 )
 
+from .engine_config import (
+    EngineConfig,
+    engine_config,
+    reset_engine_config,
+)
+
 from .connection_manager import (
     ConnectionManager,
     connection_manager,
@@ -27,12 +33,21 @@ from .connection_manager import (
     analytics_connection_manager,
 )
 
+from .session import (
+    db_session,
+    db_session_dependency,
+    named_db_session_dependency,
+)
+
 __all__ = [
     # core engine
     "get_engine", "reset_engine", "reload_engine_from_env", "swap_engine",
     # named engines
     "get_engine_named", "reset_engine_named", "swap_engine_named", "engine_env",
+    "EngineConfig", "engine_config", "reset_engine_config",
     # connection manager
     "ConnectionManager", "connection_manager",
     "dev_connection_manager", "analytics_connection_manager",
+    # request / session connection affinity
+    "db_session", "db_session_dependency", "named_db_session_dependency",
 ]
@@ -0,0 +1,271 @@
+# =============================================================
+# Columnar Fetch & Vectorized Aggregation (columnar.py)
+# file path: prefiq/database/columnar.py
+#
+# Purpose:
+#   - engine.fetch_columns(sql, params) / await engine.afetch_columns(...):
+#     a reporting query as {column name: array} instead of a list of rows.
+#     Numeric columns become NumPy float64 / int64 arrays, everything else
+#     an object array. Without NumPy: array.array('q' / 'd') and lists.
+#   - group_by(keys, values): count / sum / mean per key with np.unique +
+#     np.bincount, e.g. revenue by category:
+#         cols = engine.fetch_columns(
+#             "SELECT category, quantity * price AS revenue FROM sales")
+#         report = group_by(cols["category"], cols["revenue"])
+#         # {"key": [...], "count": [...], "sum": [...], "mean": [...]}
+#
+# Notes for Developers:
+#   - Rows are pulled through the engine's streaming iterate() / aiterate()
+#     and transposed batch by batch (zip(*batch)); each batch becomes a
+#     typed array chunk right away, so only compact chunks are held (never
+#     row objects or per-value Python lists) and build() concatenates them.
+#   - Column names come from the cursor: iterate(describe=...) reports
+#     cursor.description before the first row. Keyed rows (sqlite3.Row)
+#     and columns=[...] work too.
+#   - NULL in a numeric column becomes NaN (int columns widen to float64);
+#     group_by skips NaN values in sum / mean but counts the row.
+# =============================================================
+
+from __future__ import annotations
+
+import math
+from array import array
+from decimal import Decimal
+from itertools import islice, repeat
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np  # pip install numpy (optional)
+except Exception:  # pragma: no cover
+    np = None
+
+_NUMERIC = (int, float, Decimal)
+
+
+def has_numpy() -> bool:
+    return np is not None
+
+
+# ---------- building columns ----------
+
+def _kind(values: Sequence[Any]) -> str:
+    """'int', 'float' or 'object' for one column's values (None allowed)."""
+    kind = "int"
+    for v in values:
+        if v is None:
+            kind = "float"
+        elif type(v) is int or type(v) is bool:
+            continue
+        elif isinstance(v, _NUMERIC):
+            kind = "float"
+        else:
+            return "object"
+    return kind
+
+
+def to_array(values: Sequence[Any]) -> Any:
+    """One column's values as the tightest array available."""
+    if np is not None:
+        arr = np.array(values)
+        if arr.ndim == 1 and arr.dtype.kind in "biuf":
+            return arr
+        if arr.dtype.kind == "O" and len(values) and _kind(values) != "object":
+            # NULLs / Decimals in an otherwise numeric column
+            return np.array([math.nan if v is None else float(v) for v in values], dtype=np.float64)
+        out = np.empty(len(values), dtype=object)
+        out[:] = values
+        return out
+    kind = _kind(values) if len(values) else "object"
+    if kind == "int":
+        return array("q", values)
+    if kind == "float":
+        return array("d", [math.nan if v is None else float(v) for v in values])
+    return list(values)
+
+
+def _is_object(chunk: Any) -> bool:
+    if np is not None:
+        return chunk.dtype.kind == "O"
+    return isinstance(chunk, list)
+
+
+def _as_objects(chunk: Any) -> List[Any]:
+    # A numeric chunk joining an object column: NaN there stood for NULL
+    return [None if v != v else v for v in chunk.tolist()]
+
+
+def _concat(chunks: List[Any]) -> Any:
+    """Join one column's per-batch arrays, widening int -> float -> object as needed."""
+    if not chunks:
+        return to_array([])
+    if len(chunks) == 1:
+        return chunks[0]
+    if any(_is_object(c) for c in chunks):
+        values: List[Any] = []
+        for c in chunks:
+            values.extend(c if _is_object(c) else _as_objects(c))
+        if np is None:
+            return values
+        out = np.empty(len(values), dtype=object)
+        out[:] = values
+        return out
+    if np is not None:
+        return np.concatenate(chunks)
+    joined = array("q" if all(c.typecode == "q" for c in chunks) else "d")
+    for c in chunks:
+        if c.typecode == joined.typecode:
+            joined.extend(c)
+        else:
+            joined.extend(map(float, c))
+    return joined
+
+
+class ColumnBuilder:
+    """
+    Accumulates row batches column-wise as typed array chunks; build()
+    returns {name: array}. Names come from `columns`, describe() (the
+    cursor, via iterate(describe=...)) or keyed rows, in that order.
+    """
+
+    def __init__(self, columns: Optional[Sequence[str]] = None) -> None:
+        self.columns: Optional[Tuple[str, ...]] = tuple(columns) if columns else None
+        self._chunks: Optional[List[List[Any]]] = None
+
+    def describe(self, names: Sequence[str]) -> None:
+        """Column names reported by the cursor (ignored when columns=[...] was given)."""
+        if self.columns is None and names:
+            self.columns = tuple(names)
+
+    def add(self, rows: Sequence[Any]) -> None:
+        if not rows:
+            return
+        if self._chunks is None:
+            first = rows[0]
+            if self.columns is None:
+                if not hasattr(first, "keys"):
+                    raise ValueError("Rows carry no column names; pass columns=[...] to fetch_columns()")
+                self.columns = tuple(first.keys())
+            if len(first) != len(self.columns):
+                raise ValueError(f"{len(self.columns)} column names for {len(first)}-column rows")
+            self._chunks = [[] for _ in self.columns]
+        for chunks, values in zip(self._chunks, zip(*rows)):
+            chunks.append(to_array(values))
+
+    def build(self) -> Dict[str, Any]:
+        if self.columns is None:
+            return {}
+        chunks = self._chunks or [[] for _ in self.columns]
+        return {name: _concat(parts) for name, parts in zip(self.columns, chunks)}
+
+
+def from_rows(
+    rows: Iterable[Any],
+    columns: Optional[Sequence[str]] = None,
+    *,
+    batch_size: int = 1000,
+    builder: Optional[ColumnBuilder] = None,
+) -> Dict[str, Any]:
+    """Transpose a (streaming) row iterator into columns, `batch_size` rows at a time."""
+    builder = builder or ColumnBuilder(columns)
+    it: Iterator[Any] = iter(rows)
+    while True:
+        batch = list(islice(it, batch_size))
+        if not batch:
+            break
+        builder.add(batch)
+    return builder.build()
+
+
+async def afrom_rows(
+    rows: AsyncIterator[Any],
+    columns: Optional[Sequence[str]] = None,
+    *,
+    batch_size: int = 1000,
+    builder: Optional[ColumnBuilder] = None,
+) -> Dict[str, Any]:
+    builder = builder or ColumnBuilder(columns)
+    batch: List[Any] = []
+    async for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            builder.add(batch)
+            batch = []
+    builder.add(batch)
+    return builder.build()
+
+
+# ---------- aggregation ----------
+
+def group_by(keys: Sequence[Any], values: Optional[Sequence[Any]] = None) -> Dict[str, Any]:
+    """
+    Count (and with `values`: sum / mean) per distinct key.
+    Keys come back sorted when they are orderable, else in first-seen order.
+    """
+    if np is not None:
+        return _group_by_numpy(keys, values)
+    return _group_by_python(keys, values)
+
+
+def _group_by_numpy(keys: Sequence[Any], values: Optional[Sequence[Any]]) -> Dict[str, Any]:
+    k = keys if isinstance(keys, np.ndarray) else to_array(list(keys))
+    try:
+        uniq, inv = np.unique(k, return_inverse=True)
+    except TypeError:
+        # Unorderable object keys (e.g. NULL next to text): hash-factorize instead
+        index: Dict[Any, int] = {}
+        inv = np.fromiter((index.setdefault(x, len(index)) for x in k), dtype=np.intp, count=len(k))
+        uniq = np.empty(len(index), dtype=object)
+        uniq[:] = list(index)
+    inv = inv.reshape(-1)
+    n = len(uniq)
+    out: Dict[str, Any] = {"key": uniq, "count": np.bincount(inv, minlength=n)}
+    if values is not None:
+        v = values if isinstance(values, np.ndarray) and values.dtype.kind in "biuf" else to_array(list(values))
+        v = np.asarray(v, dtype=np.float64)
+        valid = ~np.isnan(v)
+        sums = np.bincount(inv, weights=np.where(valid, v, 0.0), minlength=n)
+        seen = np.bincount(inv, weights=valid.astype(np.float64), minlength=n)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out["sum"] = sums
+            out["mean"] = sums / seen
+    return out
+
+
+def _group_by_python(keys: Sequence[Any], values: Optional[Sequence[Any]]) -> Dict[str, Any]:
+    index: Dict[Any, int] = {}
+    count: List[int] = []
+    sums: List[float] = []
+    seen: List[int] = []
+    for key, v in zip(keys, values if values is not None else repeat(None)):
+        i = index.get(key)
+        if i is None:
+            i = index[key] = len(count)
+            count.append(0)
+            sums.append(0.0)
+            seen.append(0)
+        count[i] += 1
+        if v is not None and v == v:  # skip NULL / NaN
+            sums[i] += float(v)
+            seen[i] += 1
+
+    uniq = list(index)
+    order = list(range(len(uniq)))
+    try:
+        order.sort(key=uniq.__getitem__)
+    except TypeError:
+        pass
+    out: Dict[str, Any] = {"key": [uniq[i] for i in order], "count": array("q", [count[i] for i in order])}
+    if values is not None:
+        out["sum"] = array("d", [sums[i] for i in order])
+        out["mean"] = array("d", [sums[i] / seen[i] if seen[i] else math.nan for i in order])
+    return out
+
+
+__all__ = [
+    "ColumnBuilder",
+    "afrom_rows",
+    "from_rows",
+    "group_by",
+    "has_numpy",
+    "to_array",
+]
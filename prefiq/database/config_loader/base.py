@@ -68,7 +68,7 @@ class DatabaseConfig(BaseModel):
             host=host or settings.DB_HOST,
             port=port or settings.DB_PORT,
             database=database or settings.DB_NAME,
-            pool_size=pool_size or 5,
+            pool_size=pool_size or getattr(settings, "DB_POOL_SIZE", 5),
             autocommit=autocommit if autocommit is not None else True,
             uri=uri,
         )
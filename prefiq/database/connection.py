@@ -9,6 +9,8 @@ from contextlib import contextmanager
 from typing import Optional, Any, Dict
 
 from prefiq.settings.get_settings import load_settings, clear_settings_cache
+from prefiq.database.engine_config import EngineConfig, engine_config, reset_engine_config
+from prefiq.database.loop_bridge import run_sync
 
 # -------- existing default singleton (backwards compatible) ------------------
 
@@ -32,27 +34,32 @@ def _normalize(name: str | None) -> str:
     return aliases.get(n, n)
 
 
-def _create_engine_for(engine: str, mode: str) -> Any:
+def _create_engine_for(engine: str, mode: str, config: Optional[EngineConfig] = None) -> Any:
     """
     Construct an engine instance for a specific (engine, mode) pair without
-    consulting Settings again.
+    consulting Settings again. With `config` (named engines) the engine
+    connects with exactly those settings instead of the active DB_* ones.
     """
     eng = _normalize(engine)
+    kwargs: Dict[str, Any] = {} if config is None else {"config": config}
     if eng == "mariadb":
         if _is_async(mode):
             from prefiq.database.engines.mariadb.async_engine import AsyncMariaDBEngine
-            return AsyncMariaDBEngine()
+            return AsyncMariaDBEngine(**kwargs)
         from prefiq.database.engines.mariadb.sync_engine import SyncMariaDBEngine
-        return SyncMariaDBEngine()
+        return SyncMariaDBEngine(**kwargs)
     if eng == "postgres":
         if _is_async(mode):
             from prefiq.database.engines.postgres.async_engine import AsyncPostgresEngine
-            return AsyncPostgresEngine()
+            return AsyncPostgresEngine(**kwargs)
         from prefiq.database.engines.postgres.sync_engine import SyncPostgresEngine
-        return SyncPostgresEngine()
+        return SyncPostgresEngine(**kwargs)
     if eng == "sqlite":
+        if _is_async(mode):
+            from prefiq.database.engines.sqlite.async_engine import AsyncSQLiteEngine
+            return AsyncSQLiteEngine(**kwargs)
         from prefiq.database.engines.sqlite.sync_engine import SQLiteEngine
-        return SQLiteEngine()
+        return SQLiteEngine(**kwargs)
     raise RuntimeError(f"Unsupported DB engine {engine!r}")
 
 
@@ -63,6 +70,10 @@ def _make_engine() -> Any:
     s = load_settings()
     eng = _normalize(getattr(s, "DB_ENGINE", None))
     mode = getattr(s, "DB_MODE", "sync")
+    if getattr(s, "DB_READ_ROUTING", False):
+        # Writes to PRIMARY_DB_* (or this DB_* engine), reads over the replicas
+        from prefiq.database.routing import routing_from_settings
+        return routing_from_settings(s, lambda: _create_engine_for(eng, mode))
     return _create_engine_for(eng, mode)
 
 
@@ -85,7 +96,8 @@ def _close_safely(obj: Any) -> None:
             try:
                 asyncio.get_running_loop()
             except RuntimeError:
-                asyncio.run(res)
+                # Sync callers' pools live on the shared bridge loop
+                run_sync(res)
             else:
                 asyncio.create_task(res)
     except (ValueError, TypeError):
@@ -110,6 +122,7 @@ def reload_engine_from_env(*, force_refresh: bool = True) -> Any:
     """
     if force_refresh:
         clear_settings_cache()
+        reset_engine_config()
     reset_engine()
     return get_engine()
 
@@ -128,7 +141,8 @@ def swap_engine(engine: str, *, mode: str | None = None) -> Any:
 
 # Registry of named engines (e.g., "DEV", "PRIMARY", "ANALYTICS")
 _named_engines: Dict[str, Any] = {}
-_ENV_KEYS = ("DB_ENGINE", "DB_MODE", "DB_HOST", "DB_PORT", "DB_USER", "DB_PASS", "DB_NAME", "DB_POOL_WARMUP")
+_ENV_KEYS = ("DB_ENGINE", "DB_MODE", "DB_HOST", "DB_PORT", "DB_USER", "DB_PASS", "DB_NAME", "DB_POOL_SIZE",
+             "DB_POOL_WARMUP", "DB_SQLITE_PROFILE")
 
 
 def _read_named_env(name: str) -> Dict[str, str]:
@@ -172,9 +186,10 @@ def engine_env(name: str):
     Temporarily patch process env with this engine's (name_) variables mapped to
     base DB_* names — and refresh Settings on enter/exit.
 
-    NOTE: This is scoped and intended for *short* critical sections (e.g.,
-    during connection establishment or a transaction). Avoid overlap across
-    threads.
+    NOTE: Named engines no longer need this (they are built from a frozen
+    EngineConfig, see engine_config()). It remains for code that wants the
+    *whole* default stack (Settings, migrations) pointed at a named
+    database. Avoid overlap across threads.
     """
     overrides = _read_named_env(name)
     if not overrides:
@@ -212,27 +227,16 @@ def get_engine_named(name: str) -> Any:
     if key in _named_engines:
         return _named_engines[key]
 
-    overrides = _read_named_env(key)
-    if "DB_ENGINE" not in overrides:
-        raise RuntimeError(
-            f"No engine configured for {key!r}. Set {key.upper()}_DB_ENGINE and friends in your .env."
-        )
-    engine_name = overrides.get("DB_ENGINE", "sqlite")
-    mode_name = overrides.get("DB_MODE", "sync")
-
-    # Build the engine while the overrides are active, so any engine that reads
-    # Settings/env during connect/pool creation sees the right config.
-    with engine_env(key):
-        eng = _create_engine_for(engine_name, mode_name)
-        # Try to establish/prime immediately for sync engines so the connection captures
-        # the intended config right now (engines that lazy-connect will still be OK as
-        # ConnectionManager wraps operations in engine_env()).
-        try:
-            if hasattr(eng, "connect") and not _is_async(mode_name):
-                eng.connect()  # type: ignore[call-arg]
-        except (ValueError, TypeError):
-            # Let the caller handle connection failures later if needed
-            pass
+    # Resolved once; the engine (and its pool) connect with exactly this config,
+    # so nothing here patches os.environ or reloads Settings
+    cfg = engine_config(key)
+    eng = _create_engine_for(cfg.engine, cfg.mode, cfg)
+    try:
+        if hasattr(eng, "connect") and not cfg.is_async:
+            eng.connect()  # type: ignore[call-arg]
+    except (ValueError, TypeError):
+        # Let the caller handle connection failures later if needed
+        pass
 
     _named_engines[key] = eng
     return eng
@@ -240,6 +244,7 @@ def get_engine_named(name: str) -> Any:
 
 def reset_engine_named(name: str) -> None:
     eng = _named_engines.pop(name, None)
+    reset_engine_config(name)
     _close_safely(eng)
 
 
@@ -7,7 +7,8 @@ import inspect
 from contextlib import contextmanager, asynccontextmanager
 from typing import Any, Generator, AsyncGenerator, Optional
 
-from prefiq.database.connection import get_engine, get_engine_named, engine_env
+from prefiq.database.connection import get_engine, get_engine_named
+from prefiq.database.loop_bridge import run_sync
 
 
 class ConnectionManager:
@@ -54,11 +55,12 @@ class ConnectionManager:
                 return
             res = eng.close()
             if inspect.isawaitable(res):
-                # If we're in a plain CLI/atexit (no running loop), use asyncio.run
+                # Plain CLI/atexit (no running loop): close on the shared bridge loop,
+                # which is where sync callers' pools live
                 try:
                     asyncio.get_running_loop()
                 except RuntimeError:
-                    asyncio.run(res)
+                    run_sync(res)
                 else:
                     # If a loop is already running, fire-and-forget is the safest here.
                     asyncio.create_task(res)
@@ -73,28 +75,26 @@ class ConnectionManager:
         Synchronous transaction context. If the engine exposes a context-managed
         .transaction(), we delegate to it. Otherwise we emulate with begin/commit/rollback.
         """
-        # Ensure any engine that consults Settings/env at call time sees the right values
-        ctx = engine_env(self._engine_name) if self._engine_name else _NOOP_CONTEXT()
-        with ctx:  # type: ignore[misc]
-            eng = self.get_engine()
-
-            # Prefer engine-provided context manager
-            if hasattr(eng, "transaction"):
-                with eng.transaction() as res:  # type: ignore[attr-defined]
-                    yield res
-                return
+        # Named engines carry their own frozen EngineConfig: no env patching here
+        eng = self.get_engine()
 
-            # Fallback to manual flow
+        # Prefer engine-provided context manager
+        if hasattr(eng, "transaction"):
+            with eng.transaction() as res:  # type: ignore[attr-defined]
+                yield res
+            return
+
+        # Fallback to manual flow
+        try:
+            eng.begin()
+            yield eng
+            eng.commit()
+        except (ValueError, TypeError):
             try:
-                eng.begin()
-                yield eng
-                eng.commit()
-            except (ValueError, TypeError):
-                try:
-                    eng.rollback()
-                finally:
-                    pass
-                raise
+                eng.rollback()
+            finally:
+                pass
+            raise
 
     # ---- async transactions -------------------------------------------------
 
@@ -104,44 +104,30 @@ class ConnectionManager:
         Asynchronous transaction context for async engines.
         For sync engines (e.g., SQLite), this will raise NotImplementedError.
         """
-        ctx = engine_env(self._engine_name) if self._engine_name else _NOOP_ASYNC_CONTEXT()
-        async with ctx:  # type: ignore[misc]
-            eng = self.get_engine()
-
-            if not (hasattr(eng, "begin") and hasattr(eng, "commit")):
-                raise NotImplementedError("Async transactions not supported by this engine")
-
-            # If engine implements an async context manager, prefer that.
-            if hasattr(eng, "transaction"):
-                cm = eng.transaction()  # may be async CM
-                if hasattr(cm, "__aenter__"):
-                    async with cm:  # type: ignore[misc]
-                        yield cm  # engine’s CM often yields a cursor
-                    return
-
-            # Manual async flow (begin/commit/rollback are awaitables on async engine)
-            try:
-                await eng.begin()
-                yield eng
-                await eng.commit()
-            except (ValueError, TypeError):
-                try:
-                    await eng.rollback()
-                finally:
-                    pass
-                raise
-
-
-# --- tiny helpers to keep context-manager logic tidy -------------------------
+        eng = self.get_engine()
 
-@contextmanager
-def _NOOP_CONTEXT():
-    yield
+        if not (hasattr(eng, "begin") and hasattr(eng, "commit")):
+            raise NotImplementedError("Async transactions not supported by this engine")
 
+        # If engine implements an async context manager, prefer that.
+        if hasattr(eng, "transaction"):
+            cm = eng.transaction()  # may be async CM
+            if hasattr(cm, "__aenter__"):
+                async with cm:  # type: ignore[misc]
+                    yield cm  # engine’s CM often yields a cursor
+                return
 
-@asynccontextmanager
-async def _NOOP_ASYNC_CONTEXT():
-    yield
+        # Manual async flow (begin/commit/rollback are awaitables on async engine)
+        try:
+            await eng.begin()
+            yield eng
+            await eng.commit()
+        except (ValueError, TypeError):
+            try:
+                await eng.rollback()
+            finally:
+                pass
+            raise
 
 
 # convenient singletons (backwards-compatible default + examples for named)
@@ -2,7 +2,8 @@
 
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import Any, Iterable, Tuple
+import json
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 class Dialect(ABC):
     """
@@ -10,6 +11,7 @@ class Dialect(ABC):
       - normalize_params(sql, params): translate from internal '%s' placeholders
       - list_tables_sql(): SQL to enumerate user tables
       - create_table_suffix(): optional suffix for CREATE TABLE
+      - explain_sql(sql) / plan_flags(rows): plan capture for slow statements
     """
 
     @abstractmethod
@@ -35,3 +37,39 @@ class Dialect(ABC):
         Default: backticks (MySQL-style). Override where needed.
         """
         return f"`{name}`"
+
+    def explain_sql(self, sql: str) -> Optional[str]:
+        """EXPLAIN statement for `sql` (same parameters), or None if unsupported."""
+        return None
+
+    def plan_flags(self, rows: Sequence[Any]) -> List[str]:
+        """
+        Problems worth flagging in an EXPLAIN result: 'full_scan:<table>',
+        'filesort', 'temp_table'. Default: none recognised.
+        """
+        return []
+
+
+def json_plan(rows: Sequence[Any]) -> Any:
+    """The JSON document of a one-row, one-column EXPLAIN ... FORMAT JSON result."""
+    if not rows:
+        return None
+    cell = rows[0]
+    if isinstance(cell, dict):
+        cell = next(iter(cell.values()), None)
+    elif isinstance(cell, (tuple, list)) or hasattr(cell, "keys"):
+        cell = cell[0]
+    if isinstance(cell, (bytes, bytearray)):
+        cell = cell.decode("utf-8")
+    return json.loads(cell) if isinstance(cell, str) else cell
+
+
+def walk_json(node: Any) -> Iterator[dict]:
+    """Every dict in a nested JSON plan, depth first."""
+    if isinstance(node, dict):
+        yield node
+        for v in node.values():
+            yield from walk_json(v)
+    elif isinstance(node, list):
+        for v in node:
+            yield from walk_json(v)
@@ -1,8 +1,8 @@
 # prefiq/database/dialects/mariadb.py
 
 from __future__ import annotations
-from typing import Any, Tuple
-from prefiq.database.dialects.base import Dialect
+from typing import Any, List, Optional, Sequence, Tuple
+from prefiq.database.dialects.base import Dialect, json_plan, walk_json
 
 class MariaDBDialect(Dialect):
     def name(self) -> str: return "mariadb"
@@ -16,3 +16,17 @@ class MariaDBDialect(Dialect):
 
     def create_table_suffix(self) -> str:
         return " ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;"
+
+    def explain_sql(self, sql: str) -> Optional[str]:
+        return f"EXPLAIN FORMAT=JSON {sql}"
+
+    def plan_flags(self, rows: Sequence[Any]) -> List[str]:
+        flags: List[str] = []
+        for node in walk_json(json_plan(rows)):
+            if node.get("access_type") == "ALL":
+                flags.append(f"full_scan:{node.get('table_name', '?')}")
+            if node.get("using_filesort") or "filesort" in node:
+                flags.append("filesort")
+            if node.get("using_temporary_table") or "temporary_table" in node:
+                flags.append("temp_table")
+        return list(dict.fromkeys(flags))
@@ -3,6 +3,7 @@
 from __future__ import annotations
 from typing import Any, Tuple
 from prefiq.database.dialects.base import Dialect
+from prefiq.database.dialects.mariadb import MariaDBDialect
 
 class MySQLDialect(Dialect):
     def name(self) -> str: return "mysql"
@@ -16,3 +17,7 @@ class MySQLDialect(Dialect):
 
     def create_table_suffix(self) -> str:
         return " ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;"
+
+    # Same EXPLAIN FORMAT=JSON plan shape as MariaDB
+    explain_sql = MariaDBDialect.explain_sql
+    plan_flags = MariaDBDialect.plan_flags
@@ -1,28 +1,18 @@
 # prefiq/database/dialects/postgres.py
 
 from __future__ import annotations
-from typing import Any, Tuple
-from prefiq.database.dialects.base import Dialect
+from typing import Any, List, Optional, Sequence, Tuple
+from prefiq.database.dialects.base import Dialect, json_plan, walk_json
+from prefiq.database.statements import compile_statement
 
 class PostgresDialect(Dialect):
     def name(self) -> str: return "postgres"
 
     def normalize_params(self, sql: str, params: Tuple[Any, ...] | None):
-        # Convert %s → $1,$2,... (basic passthrough; assumes no literal %s in SQL text)
+        # Convert %s → $1,$2,... (cached per statement; quoted text is left alone)
         if not params:
             return sql, params
-        out = []
-        idx = 1
-        i = 0
-        while i < len(sql):
-            if sql[i:i+2] == "%s":
-                out.append(f"${idx}")
-                idx += 1
-                i += 2
-            else:
-                out.append(sql[i])
-                i += 1
-        return "".join(out), params
+        return compile_statement("numeric", sql).sql, params
 
     def quote_ident(self, name: str) -> str:
         return f'"{name}"'
@@ -33,3 +23,19 @@ class PostgresDialect(Dialect):
             "SELECT tablename FROM pg_catalog.pg_tables "
             "WHERE schemaname NOT IN ('pg_catalog','information_schema')"
         )
+
+    def explain_sql(self, sql: str) -> Optional[str]:
+        # Plain EXPLAIN (no ANALYZE): plans the statement without running it
+        return f"EXPLAIN (FORMAT JSON) {sql}"
+
+    def plan_flags(self, rows: Sequence[Any]) -> List[str]:
+        flags: List[str] = []
+        for node in walk_json(json_plan(rows)):
+            kind = node.get("Node Type")
+            if kind == "Seq Scan":
+                flags.append(f"full_scan:{node.get('Relation Name', '?')}")
+            elif kind in ("Sort", "Incremental Sort"):
+                flags.append("filesort")
+            elif kind in ("Materialize", "CTE Scan"):
+                flags.append("temp_table")
+        return list(dict.fromkeys(flags))
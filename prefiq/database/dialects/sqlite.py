@@ -1,24 +1,35 @@
 # prefiq/database/dialects/sqlite.py
 
 from __future__ import annotations
-import re
-from typing import Any, Tuple
+from typing import Any, List, Optional, Sequence, Tuple
 from prefiq.database.dialects.base import Dialect
-
-# simple, safe conversion: replace each %s with ?
-_PERC_S = re.compile(r"%s")
+from prefiq.database.statements import compile_statement
 
 class SQLiteDialect(Dialect):
     def name(self) -> str: return "sqlite"
 
     def normalize_params(self, sql: str, params: Tuple[Any, ...] | None):
-        # Convert %s placeholders to ? for sqlite3
-        # NOTE: does not inspect literals; keep SQL from builder paramized properly.
-        converted = _PERC_S.sub("?", sql)
-        return converted, params
+        # Convert %s placeholders to ? for sqlite3 (cached per statement; quoted text is left alone)
+        return compile_statement("qmark", sql).sql, params
 
     def quote_ident(self, name: str) -> str:
         return f'"{name}"'  # standard SQL quoting
 
     def list_tables_sql(self) -> str:
         return "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'"
+
+    def explain_sql(self, sql: str) -> Optional[str]:
+        return f"EXPLAIN QUERY PLAN {sql}"
+
+    def plan_flags(self, rows: Sequence[Any]) -> List[str]:
+        # rows: (id, parent, notused, detail)
+        flags: List[str] = []
+        for row in rows:
+            detail = str(row[-1])
+            if detail.startswith("SCAN ") and " INDEX " not in detail:
+                flags.append(f"full_scan:{detail.split()[1]}")
+            elif "TEMP B-TREE FOR ORDER BY" in detail:
+                flags.append("filesort")
+            elif "TEMP B-TREE" in detail or detail.startswith("MATERIALIZE"):
+                flags.append("temp_table")
+        return list(dict.fromkeys(flags))
@@ -0,0 +1,149 @@
+# =============================================================
+# Immutable Engine Configuration (engine_config.py)
+# file path: prefiq/database/engine_config.py
+#
+# Purpose:
+#   - EngineConfig: the frozen connection settings of one engine
+#     (driver, mode, host / port / credentials / database, SQLite profile).
+#   - engine_config(name): the config of a named engine, resolved once from
+#     <NAME>_DB_* (OS env first, then .env extras) over the base DB_*
+#     settings and cached per name.
+#   - get_engine_named() hands it straight to the engine constructor, so
+#     neither building a named engine nor running a transaction on it
+#     touches os.environ or reloads Settings.
+#
+# Notes for Developers:
+#   - The cache is dropped by reset_engine_named / swap_engine_named /
+#     reload_engine_from_env (see prefiq.database.connection); call
+#     reset_engine_config() after changing <NAME>_DB_* yourself.
+#   - engine_env() stays for legacy callers (e.g. the devmeta CLI, which
+#     points the whole default stack at DEV); engines no longer need it.
+# =============================================================
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, Mapping, Optional
+
+from prefiq.settings.get_settings import load_settings
+
+_DEFAULT_PORTS = {"mariadb": 3306, "mysql": 3306, "postgres": 5432}
+
+
+@dataclass(frozen=True)
+class EngineConfig:
+    name: str = ""
+    engine: str = "sqlite"
+    mode: str = "sync"
+    host: str = "localhost"
+    port: int = 3306
+    user: str = ""
+    password: str = field(default="", repr=False)
+    database: str = ""
+    pool_size: int = 5
+    pool_warmup: int = 0
+    sqlite_profile: str = "oltp"
+
+    @classmethod
+    def from_settings(cls, s: Any = None, *, name: str = "", overrides: Optional[Mapping[str, str]] = None) -> "EngineConfig":
+        """Base DB_* settings with `overrides` (DB_* keys, string values) on top."""
+        s = s or load_settings()
+        o = dict(overrides or {})
+
+        def pick(key: str, default: Any) -> Any:
+            val = o.get(key)
+            return val if val is not None else getattr(s, key, default)
+
+        from prefiq.database.connection import _normalize
+
+        engine = _normalize(str(pick("DB_ENGINE", "sqlite")))
+        port = int(pick("DB_PORT", 0) or 0)
+        if "DB_PORT" not in o and engine == "postgres" and port in (0, 3306):
+            port = 5432  # same default as Settings for postgres
+        return cls(
+            name=name.upper(),
+            engine=engine,
+            mode=str(pick("DB_MODE", "sync") or "sync").strip().lower(),
+            host=str(pick("DB_HOST", "localhost") or "").strip(),
+            port=port or _DEFAULT_PORTS.get(engine, 0),
+            user=str(pick("DB_USER", "") or ""),
+            password=str(pick("DB_PASS", "") or ""),
+            database=str(pick("DB_NAME", "") or ""),
+            pool_size=int(pick("DB_POOL_SIZE", 5) or 5),
+            pool_warmup=int(pick("DB_POOL_WARMUP", 0) or 0),
+            sqlite_profile=str(pick("DB_SQLITE_PROFILE", "oltp") or "oltp"),
+        )
+
+    @property
+    def is_async(self) -> bool:
+        return self.mode == "async"
+
+    @property
+    def sqlite_path(self) -> str:
+        # Same fallback as the sqlite config driver
+        return self.database or ":memory:"
+
+    def mariadb_params(self) -> Dict[str, Any]:
+        """mariadb.connect() / async pool config (the config_loader mariadb shape)."""
+        return {
+            "user": self.user,
+            "password": self.password,
+            "host": self.host,
+            "port": self.port,
+            "database": self.database,
+            "pool_name": f"{(self.name or 'default').lower()}_async_pool",
+            "pool_size": self.pool_size,
+            "autocommit": True,
+        }
+
+    def postgres_params(self) -> Dict[str, Any]:
+        """host / port / user / password / database (asyncpg naming; psycopg2 wants dbname)."""
+        return {
+            "host": self.host,
+            "port": self.port,
+            "user": self.user,
+            "password": self.password,
+            "database": self.database,
+        }
+
+    def with_changes(self, **changes: Any) -> "EngineConfig":
+        return replace(self, **changes)
+
+
+_configs: Dict[str, EngineConfig] = {}
+_lock = threading.Lock()
+
+
+def engine_config(name: str) -> EngineConfig:
+    """The cached config of named engine `name` (RuntimeError if <NAME>_DB_ENGINE is unset)."""
+    key = name.strip().upper()
+    cfg = _configs.get(key)
+    if cfg is not None:
+        return cfg
+    from prefiq.database.connection import _read_named_env
+
+    overrides = _read_named_env(key)
+    if "DB_ENGINE" not in overrides:
+        raise RuntimeError(
+            f"No engine configured for {name!r}. Set {key}_DB_ENGINE and friends in your .env."
+        )
+    cfg = EngineConfig.from_settings(name=key, overrides=overrides)
+    with _lock:
+        return _configs.setdefault(key, cfg)
+
+
+def reset_engine_config(name: Optional[str] = None) -> None:
+    """Forget one cached config (or all of them)."""
+    with _lock:
+        if name is None:
+            _configs.clear()
+        else:
+            _configs.pop(name.strip().upper(), None)
+
+
+__all__ = [
+    "EngineConfig",
+    "engine_config",
+    "reset_engine_config",
+]
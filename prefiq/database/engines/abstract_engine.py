@@ -13,16 +13,28 @@
 # Notes for Developers:
 #   - All concrete engines (sync/async) must inherit and implement these methods.
 #   - Hooks can be used for logging, metrics, or debugging.
+#   - Statements are bracketed by _before() / _after(): the legacy single
+#     hooks and the instrumentation bus (any number of subscribers, see
+#     prefiq.database.instrumentation; query metrics are one of them).
+#     With neither registered, _after() returns without doing any work.
 # =============================================================
 
+import inspect
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Callable, Optional, Sequence, TypeVar, Generic
+from typing import Any, AsyncIterator, Callable, Iterator, Optional, Sequence, TypeVar, Generic
+
+from prefiq.database import columnar
+from prefiq.database.instrumentation import BUS
 
 T = TypeVar('T')  # NEW: Generic type for query results
 
 # Type alias for query hooks: function(query, params, stage)
 HookType = Optional[Callable[[str, Optional[tuple], str], None]]
 
+# iterate(describe=...): called once with the result's column names (cursor.description)
+DescribeHook = Optional[Callable[[Sequence[str]], None]]
+
 
 class AbstractEngine(ABC, Generic[T]):
     """
@@ -30,6 +42,9 @@ class AbstractEngine(ABC, Generic[T]):
     Includes hook support and method declarations for full DB lifecycle.
     """
 
+    # Label on query metrics and instrumentation events
+    engine_label = "db"
+
     def __init__(self):
         self.before_execute_hook: HookType = None
         self.after_execute_hook: HookType = None
@@ -54,6 +69,37 @@ class AbstractEngine(ABC, Generic[T]):
         if hook:
             hook(query, params, stage)
 
+    def _before(self, query: str, params: Any = None) -> int:
+        """
+        Start of a statement: run the before hook / subscribers and return
+        the perf_counter_ns() start to hand back to _after().
+        """
+        hook = self.before_execute_hook
+        if hook:
+            hook(query, params, "before")
+        if BUS.before:
+            BUS.emit_before(self.engine_label, query, params, self)
+        return time.perf_counter_ns()
+
+    def _after(
+        self,
+        query: str,
+        params: Any,
+        started: int,
+        rowcount: int = -1,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        """End of a statement (successful or not): after hook, subscribers."""
+        hook = self.after_execute_hook
+        subscribers = BUS.after
+        if not (subscribers or hook):
+            return
+        elapsed_ns = time.perf_counter_ns() - started
+        if hook and error is None:
+            hook(query, params, "after")
+        if subscribers:
+            BUS.emit_after(self.engine_label, query, params, elapsed_ns, rowcount, error, self)
+
     @abstractmethod
     def connect(self) -> None:
         """Establish a database connection."""
@@ -65,8 +111,8 @@ class AbstractEngine(ABC, Generic[T]):
         ...
 
     @abstractmethod
-    def execute(self, query: str, params: Optional[tuple] = None) -> None:
-        """Execute a write operation (INSERT, UPDATE, DELETE)."""
+    def execute(self, query: str, params: Optional[tuple] = None) -> int:
+        """Execute a write operation (INSERT, UPDATE, DELETE); returns the affected row count."""
         ...
 
     @abstractmethod
@@ -79,9 +125,87 @@ class AbstractEngine(ABC, Generic[T]):
         """Execute a SELECT query and return all results."""
         ...
 
+    def iterate(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        *,
+        batch_size: int = 1000,
+        describe: DescribeHook = None,
+    ) -> Iterator[T]:
+        """
+        Stream a SELECT's rows, holding at most `batch_size` rows in memory.
+        Engines override this with server-side / unbuffered cursors; the default
+        falls back to fetchall() (correct, but not memory-bounded).
+        `describe`, if given, receives the column names before the first row
+        (the default has no cursor: only keyed rows carry names).
+        """
+        rows = self.fetchall(query, params)
+        if inspect.isawaitable(rows):
+            if inspect.iscoroutine(rows):
+                rows.close()
+            raise TypeError(f"{type(self).__name__} is async; use aiterate()")
+        yield from rows
+
+    async def aiterate(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        *,
+        batch_size: int = 1000,
+        describe: DescribeHook = None,
+    ) -> AsyncIterator[T]:
+        """
+        Async counterpart of iterate(). Async engines override this with a
+        streaming cursor; the default awaits fetchall() if needed.
+        """
+        rows = self.fetchall(query, params)
+        if inspect.isawaitable(rows):
+            rows = await rows
+        for row in rows:
+            yield row
+
+    def fetch_columns(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        *,
+        columns: Optional[Sequence[str]] = None,
+        batch_size: int = 1000,
+    ) -> dict[str, Any]:
+        """
+        A SELECT as {column: array} (NumPy when installed), streamed through
+        iterate() in `batch_size` batches. Column names come from the cursor
+        unless `columns` is given. See prefiq.database.columnar.
+        """
+        builder = columnar.ColumnBuilder(columns)
+        rows = self.iterate(query, params, batch_size=batch_size, describe=builder.describe)
+        return columnar.from_rows(rows, builder=builder, batch_size=batch_size)
+
+    async def afetch_columns(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        *,
+        columns: Optional[Sequence[str]] = None,
+        batch_size: int = 1000,
+    ) -> dict[str, Any]:
+        """Async counterpart of fetch_columns(), over aiterate()."""
+        builder = columnar.ColumnBuilder(columns)
+        rows = self.aiterate(query, params, batch_size=batch_size, describe=builder.describe)
+        return await columnar.afrom_rows(rows, builder=builder, batch_size=batch_size)
+
+    def fetch_plan(self, explain_sql: str, params: Optional[tuple] = None) -> list[T]:
+        """
+        Run an EXPLAIN statement for the slow-query plan capture (called from a
+        background thread). Engines whose connection is bound to one thread
+        override this; async engines return an awaitable like fetchall().
+        """
+        return self.fetchall(explain_sql, params)
+
     @abstractmethod
-    def executemany(self, query: str, param_list: Sequence[tuple]) -> None:
-        """Execute a bulk write operation with multiple param sets."""
+    def executemany(self, query: str, param_list: Sequence[tuple]) -> int:
+        """Execute a bulk write operation with multiple param sets; returns the affected row count."""
         ...
 
     @abstractmethod
@@ -0,0 +1,628 @@
+# =============================================================
+# Async Connection Pool (async_pool.py)
+# file path: prefiq/database/engines/async_pool.py
+#
+# Purpose:
+#   - Driver-agnostic, bounded connection pool for thread-offloaded
+#     DB-API drivers (mariadb, pymysql, ...).
+#   - One pool object lives on exactly one event loop; per-loop
+#     registries live in the driver pool modules.
+#
+# Behaviour:
+#   - At most `max_size` connections are checked out at once; callers
+#     beyond that wait in a FIFO queue, bounded by `acquire_timeout`.
+#   - Idle connections are reused most-recently-used first and only
+#     pinged when they sat idle longer than `ping_after` seconds.
+#   - A background reaper evicts connections past `max_lifetime` or
+#     idle longer than `idle_timeout`, and keeps `min_idle` warm.
+#   - `pinned()` binds one checked-out connection to a ContextVar so a
+#     whole request / session / transaction reuses it.
+#   - Blocking driver calls run on the pool's own executor, sized to
+#     `max_size`, so database work never queues behind (or starves) the
+#     loop's default executor. `run()` is the single-hop entry point: the
+#     engines pass it a whole unit of work (cursor -> execute -> fetch ->
+#     commit -> close) as one blocking function.
+# =============================================================
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import time
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Mapping, Optional, Tuple, Type, Union
+
+from prefiq.core.logger import get_logger
+from prefiq.database import metrics
+
+LOG = get_logger("prefiq.database.pool")
+
+# Keys understood by the pool; never forwarded to the driver's connect().
+POOL_KEYS = (
+    "pool_name",
+    "pool_size",
+    "max_size",
+    "min_idle",
+    "acquire_timeout",
+    "max_lifetime",
+    "idle_timeout",
+    "ping_after",
+    "reap_interval",
+)
+
+
+class PoolTimeoutError(TimeoutError):
+    """Raised when no connection became available within the acquire timeout."""
+
+
+class PoolClosedError(RuntimeError):
+    """Raised when acquiring from a pool that has been closed."""
+
+
+def _cfg_float(cfg: Mapping[str, Any], key: str, default: float) -> float:
+    """Get a float from cfg[key], falling back to default; robust for strings/ints."""
+    val = cfg.get(key, default)
+    try:
+        if val is None:
+            return float(default)
+        return float(val)
+    except (TypeError, ValueError):
+        return float(default)
+
+
+def _cfg_int(cfg: Mapping[str, Any], key: str, default: int) -> int:
+    """Get an int from cfg[key], falling back to default; robust for strings/floats."""
+    val = cfg.get(key, default)
+    try:
+        if val is None:
+            return int(default)
+        return int(val)
+    except (TypeError, ValueError):
+        return int(default)
+
+
+@dataclass(frozen=True)
+class PoolOptions:
+    max_size: int = 10
+    min_idle: int = 0
+    acquire_timeout: float = 30.0
+    max_lifetime: float = 3600.0
+    idle_timeout: float = 600.0
+    ping_after: float = 30.0
+    reap_interval: float = 30.0
+
+    @classmethod
+    def from_config(cls, cfg: Mapping[str, Any]) -> "PoolOptions":
+        """
+        Build options from a driver config dict. Explicit keys win; anything
+        missing falls back to the DB_POOL_* settings.
+        """
+        from prefiq.settings.get_settings import load_settings
+
+        s = load_settings()
+        defaults = {
+            "max_size": cfg.get("pool_size", getattr(s, "DB_POOL_SIZE", cls.max_size)),
+            "min_idle": getattr(s, "DB_POOL_MIN_IDLE", cls.min_idle),
+            "acquire_timeout": getattr(s, "DB_POOL_ACQUIRE_TIMEOUT", cls.acquire_timeout),
+            "max_lifetime": getattr(s, "DB_POOL_MAX_LIFETIME", cls.max_lifetime),
+            "idle_timeout": getattr(s, "DB_POOL_IDLE_TIMEOUT", cls.idle_timeout),
+            "ping_after": getattr(s, "DB_POOL_PING_AFTER", cls.ping_after),
+            "reap_interval": getattr(s, "DB_POOL_REAP_INTERVAL", cls.reap_interval),
+        }
+        max_size = max(1, _cfg_int(cfg, "max_size", _cfg_int(defaults, "max_size", cls.max_size)))
+        return cls(
+            max_size=max_size,
+            min_idle=min(max_size, max(0, _cfg_int(cfg, "min_idle", _cfg_int(defaults, "min_idle", 0)))),
+            acquire_timeout=_cfg_float(cfg, "acquire_timeout", _cfg_float(defaults, "acquire_timeout", cls.acquire_timeout)),
+            max_lifetime=_cfg_float(cfg, "max_lifetime", _cfg_float(defaults, "max_lifetime", cls.max_lifetime)),
+            idle_timeout=_cfg_float(cfg, "idle_timeout", _cfg_float(defaults, "idle_timeout", cls.idle_timeout)),
+            ping_after=_cfg_float(cfg, "ping_after", _cfg_float(defaults, "ping_after", cls.ping_after)),
+            reap_interval=_cfg_float(cfg, "reap_interval", _cfg_float(defaults, "reap_interval", cls.reap_interval)),
+        )
+
+
+def connect_kwargs(cfg: Mapping[str, Any]) -> Dict[str, Any]:
+    """Strip pool-only keys so the rest can be passed to the driver's connect()."""
+    return {k: v for k, v in cfg.items() if k not in POOL_KEYS}
+
+
+# One pool per (host, port, user, database) on each loop: named engines never share
+PoolKey = Tuple[str, int, str, str]
+
+
+def pool_key(cfg: Mapping[str, Any], default_port: int) -> PoolKey:
+    return (
+        str(cfg.get("host", "")),
+        int(cfg.get("port", default_port) or default_port),
+        str(cfg.get("user", "")),
+        str(cfg.get("database", "")),
+    )
+
+
+class _Slot:
+    """Bookkeeping for one physical connection."""
+
+    __slots__ = ("raw", "created_at", "last_used")
+
+    def __init__(self, raw: Any, now: float) -> None:
+        self.raw = raw
+        self.created_at = now
+        self.last_used = now
+
+
+BlockingRunner = Callable[..., Awaitable[Any]]
+
+# Every live pool, for the metrics scrape (gauges are sampled, not pushed)
+_live_pools: "weakref.WeakSet[AsyncConnectionPool]" = weakref.WeakSet()
+
+
+def _live_stats() -> List[Dict[str, Any]]:
+    return [p.stats() for p in list(_live_pools) if not p.closed]
+
+
+metrics.register_pool_source(_live_stats)
+
+
+class AsyncConnectionPool:
+    """
+    Bounded async pool around a blocking DB-API driver.
+
+    All driver calls (connect / ping / close, and the engines' work through
+    run()) execute on a ThreadPoolExecutor owned by the pool with one worker
+    per connection. Pass `run_blocking` to substitute another runner (tests).
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        *,
+        ping: Callable[[Any], Any],
+        close: Callable[[Any], Any],
+        errors: Tuple[Type[BaseException], ...],
+        run_blocking: Optional[BlockingRunner] = None,
+        options: Optional[PoolOptions] = None,
+        name: str = "pool",
+    ) -> None:
+        self.name = name
+        self.options = options or PoolOptions()
+        self._connect = connect
+        self._ping = ping
+        self._close = close
+        self._errors = errors
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if run_blocking is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.options.max_size, thread_name_prefix=f"prefiq-{name}"
+            )
+            run_blocking = self._run_on_executor
+        self._run_blocking = run_blocking
+
+        self._idle: Deque[_Slot] = deque()
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._checked_out: Dict[int, _Slot] = {}
+        self._in_use = 0  # slots handed out (bounded by max_size)
+        self._closed = False
+        self._reaper: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        _live_pools.add(self)
+
+    # ---------- introspection ----------
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "max_size": self.options.max_size,
+            "size": len(self._idle) + len(self._checked_out),
+            "idle": len(self._idle),
+            "in_use": self._in_use,
+            "waiters": sum(1 for w in self._waiters if not w.done()),
+            "threads": len(getattr(self._executor, "_threads", ())),
+        }
+
+    # ---------- blocking work ----------
+
+    async def _run_on_executor(self, func: Callable[..., Any], *args: Any) -> Any:
+        # After close() the executor is gone; late releases fall back to the default one
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def run(self, func: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Any:
+        """Run one blocking call on the pool's executor (one thread hop)."""
+        if kwargs:
+            func = functools.partial(func, **kwargs)
+        return await self._run_blocking(func, *args)
+
+    def _shutdown_executor(self) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    # ---------- slot accounting (FIFO) ----------
+
+    async def _take_slot(self, timeout: Optional[float]) -> None:
+        while self._waiters and self._waiters[0].done():
+            self._waiters.popleft()
+        if self._in_use < self.options.max_size and not self._waiters:
+            self._in_use += 1
+            return
+
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            async with asyncio.timeout(timeout):
+                await fut
+        except (TimeoutError, asyncio.CancelledError) as e:
+            if fut.done() and not fut.cancelled() and fut.exception() is None:
+                # The slot was handed to us right as we gave up; pass it on.
+                self._give_slot()
+            else:
+                fut.cancel()
+            if isinstance(e, TimeoutError):
+                metrics.POOL_TIMEOUTS.inc(self.name)
+                raise PoolTimeoutError(
+                    f"{self.name}: no connection available within {timeout:.1f}s "
+                    f"(max_size={self.options.max_size})"
+                ) from None
+            raise
+
+    def _give_slot(self) -> None:
+        """Hand a freed slot to the oldest live waiter, or return it."""
+        while self._waiters:
+            w = self._waiters.popleft()
+            if not w.done():
+                w.set_result(None)
+                return
+        self._in_use -= 1
+
+    # ---------- lifecycle ----------
+
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is None:
+            self._loop = loop
+        elif self._loop is not loop:
+            raise RuntimeError(f"{self.name}: pool is bound to a different event loop")
+        if self._reaper is None and not self._closed:
+            self._reaper = loop.create_task(self._reap_forever(), name=f"{self.name}-reaper")
+
+    async def _open(self) -> _Slot:
+        raw = await self._run_blocking(self._connect)
+        metrics.POOL_CONNECTS.inc(self.name)
+        return _Slot(raw, time.monotonic())
+
+    async def _discard(self, slot: _Slot, reason: Optional[str] = None) -> None:
+        metrics.POOL_CLOSES.inc(self.name)
+        if reason is not None:
+            metrics.POOL_EVICTIONS.inc(self.name, reason)
+        try:
+            await self._run_blocking(self._close, slot.raw)
+        except self._errors:
+            pass
+        except (OSError, ValueError, TypeError):
+            pass
+
+    def _expired(self, slot: _Slot, now: float) -> bool:
+        return now - slot.created_at >= self.options.max_lifetime
+
+    async def acquire(self, timeout: Optional[float] = None) -> Any:
+        """Check out a live connection; waits FIFO when the pool is exhausted."""
+        if self._closed:
+            raise PoolClosedError(f"{self.name}: pool is closed")
+        self._bind_loop()
+        t0 = time.monotonic()
+        await self._take_slot(self.options.acquire_timeout if timeout is None else timeout)
+
+        try:
+            slot = await self._checkout()
+        except BaseException:
+            self._give_slot()
+            raise
+        self._checked_out[id(slot.raw)] = slot
+        metrics.observe_checkout(self.name, time.monotonic() - t0)
+        return slot.raw
+
+    async def _checkout(self) -> _Slot:
+        while self._idle:
+            slot = self._idle.pop()  # most recently used first
+            now = time.monotonic()
+            if self._expired(slot, now):
+                await self._discard(slot, "lifetime")
+                continue
+            if now - slot.last_used >= self.options.ping_after:
+                try:
+                    await self._run_blocking(self._ping, slot.raw)
+                except self._errors:
+                    metrics.POOL_PING_FAILURES.inc(self.name)
+                    await self._discard(slot, "ping")
+                    continue
+            return slot
+        return await self._open()
+
+    async def release(self, conn: Any, *, discard: bool = False) -> None:
+        """Return a connection. Broken connections should be passed with discard=True."""
+        slot = self._checked_out.pop(id(conn), None)
+        if slot is None:
+            # Not ours (or already released): just make sure it is closed.
+            await self._discard(_Slot(conn, 0.0))
+            return
+        try:
+            now = time.monotonic()
+            if discard:
+                await self._discard(slot, "broken")
+            elif self._expired(slot, now):
+                await self._discard(slot, "lifetime")
+            elif self._closed:
+                await self._discard(slot)
+            else:
+                slot.last_used = now
+                self._idle.append(slot)
+        finally:
+            self._give_slot()
+            if self._closed and not self._checked_out:
+                self._shutdown_executor()
+
+    async def prewarm(self, count: int) -> None:
+        """Open up to `count` idle connections (bounded by max_size)."""
+        self._bind_loop()
+        target = min(max(0, count), self.options.max_size)
+        while len(self._idle) + len(self._checked_out) < target and not self._closed:
+            self._idle.appendleft(await self._open())
+
+    async def close(self) -> None:
+        """Close idle connections, stop the reaper and fail pending waiters."""
+        self._closed = True
+        reaper, self._reaper = self._reaper, None
+        if reaper is not None and not reaper.done():
+            reaper.cancel()
+            try:
+                await reaper
+            except (asyncio.CancelledError, RuntimeError):
+                pass
+        while self._waiters:
+            w = self._waiters.popleft()
+            if not w.done():
+                w.set_exception(PoolClosedError(f"{self.name}: pool is closed"))
+        idle: List[_Slot] = list(self._idle)
+        self._idle.clear()
+        for slot in idle:
+            await self._discard(slot)
+        if not self._checked_out:
+            self._shutdown_executor()
+
+    # ---------- background maintenance ----------
+
+    async def reap(self) -> None:
+        """One maintenance pass: evict stale idle connections, then top up min_idle."""
+        now = time.monotonic()
+        opts = self.options
+        keep: Deque[_Slot] = deque()
+        evict: List[Tuple[_Slot, str]] = []
+        # Oldest-idle first (left side) so we keep the warmest ones.
+        surplus = len(self._idle) - opts.min_idle
+        for slot in self._idle:
+            if self._expired(slot, now):
+                evict.append((slot, "lifetime"))
+            elif surplus > 0 and now - slot.last_used >= opts.idle_timeout:
+                evict.append((slot, "idle"))
+                surplus -= 1
+            else:
+                keep.append(slot)
+        self._idle = keep
+        for slot, reason in evict:
+            await self._discard(slot, reason)
+
+        while (
+            not self._closed
+            and len(self._idle) < opts.min_idle
+            and len(self._idle) + len(self._checked_out) < opts.max_size
+        ):
+            try:
+                self._idle.appendleft(await self._open())
+            except self._errors as e:
+                LOG.warning("pool_min_idle_connect_failed", extra={"pool": self.name, "error": str(e)})
+                break
+
+    async def _reap_forever(self) -> None:
+        interval = max(0.05, self.options.reap_interval)
+        while not self._closed:
+            await asyncio.sleep(interval)
+            try:
+                await self.reap()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:  # never let the reaper die silently
+                LOG.warning("pool_reap_failed", extra={"pool": self.name, "error": f"{type(e).__name__}: {e}"})
+
+
+# =============================================================
+# Single-hop units of work (run in the pool's worker thread)
+# =============================================================
+
+# None (rowcount) | "one" | "all" | fetch(cursor) -> result
+Fetch = Union[None, str, Callable[[Any], Any]]
+
+def run_statement(
+    conn: Any,
+    query: str,
+    params: Any = None,
+    *,
+    fetch: Fetch = None,
+    many: bool = False,
+    cursor_args: Tuple[Any, ...] = (),
+) -> Any:
+    """
+    cursor -> execute(many) -> fetch -> close as one blocking call.
+    fetch: None (returns rowcount) | "one" | "all" | a callable reading the
+    executed cursor (row_mapper.row_fetcher(), which sees its description).
+    """
+    cur = conn.cursor(*cursor_args)
+    try:
+        if many:
+            cur.executemany(query, params)
+        elif params is not None:
+            cur.execute(query, params)
+        else:
+            cur.execute(query)
+        if fetch is None:
+            return cur.rowcount
+        if fetch == "one":
+            return cur.fetchone()
+        if fetch == "all":
+            return cur.fetchall()
+        return fetch(cur)
+    finally:
+        cur.close()
+
+
+def open_stream(conn: Any, query: str, params: Any, size: int, cursor_args: Tuple[Any, ...] = (), cursor_kwargs: Optional[Dict[str, Any]] = None) -> Tuple[Any, List[Any]]:
+    """Open a streaming cursor, execute and fetch the first batch in one hop."""
+    cur = conn.cursor(*cursor_args, **(cursor_kwargs or {}))
+    try:
+        if params is not None:
+            cur.execute(query, params)
+        else:
+            cur.execute(query)
+        return cur, list(cur.fetchmany(size))
+    except BaseException:
+        cur.close()
+        raise
+
+
+def next_batch(cur: Any, size: int) -> List[Any]:
+    """Fetch the next batch; closes the cursor once it is exhausted (same hop)."""
+    rows = list(cur.fetchmany(size))
+    if not rows:
+        cur.close()
+    return rows
+
+
+# =============================================================
+# Connection affinity (session / transaction pinning)
+# =============================================================
+
+class PinnedConnection:
+    """
+    One pooled connection bound to the current context.
+
+    `in_tx` is set by the engine between BEGIN and COMMIT/ROLLBACK; a pin that
+    is released with a transaction still open is discarded rather than pooled,
+    so the server rolls it back when the socket closes. `tx` holds the
+    driver's transaction object for drivers that manage their own (asyncpg).
+
+    Tasks spawned inside the scope (asyncio.gather, create_task) inherit the
+    pin, but a DB-API connection serves one statement at a time: every hop on
+    `raw` goes through exclusive(), which queues the other tasks.
+    """
+
+    __slots__ = ("pool", "raw", "in_tx", "tx", "broken", "implicit", "_token", "_lock", "_owner")
+
+    def __init__(self, pool: AsyncConnectionPool, raw: Any, *, implicit: bool = False) -> None:
+        self.pool = pool
+        self.raw = raw
+        self.in_tx = False
+        self.tx: Any = None
+        self.broken = False
+        self.implicit = implicit  # opened by begin() outside any session
+        self._token: Optional[Token] = None
+        self._lock = asyncio.Lock()
+        self._owner: Optional[asyncio.Task] = None
+
+    @asynccontextmanager
+    async def exclusive(self) -> AsyncIterator[Any]:
+        """
+        Hold the connection for one statement (or one open stream); yields `raw`.
+        Other tasks sharing the pin wait; the holder's own task re-entering
+        (a statement issued while its stream is still open) raises instead of
+        deadlocking.
+        """
+        task = asyncio.current_task()
+        if task is not None and self._owner is task:
+            raise RuntimeError(
+                f"{self.pool.name}: the session connection is busy with an open stream in this task; "
+                "finish (or aclose()) the iteration before running another statement"
+            )
+        async with self._lock:
+            self._owner = task
+            try:
+                yield self.raw
+            finally:
+                self._owner = None
+
+    async def release(self) -> None:
+        await self.pool.release(self.raw, discard=self.broken or self.in_tx)
+
+    async def replace(self) -> None:
+        """Swap a broken connection for a fresh one (never inside a transaction)."""
+        await self.pool.release(self.raw, discard=True)
+        self.raw = await self.pool.acquire()
+        self.broken = False
+
+
+def current_pin(var: ContextVar[Optional[PinnedConnection]], pool: AsyncConnectionPool) -> Optional[PinnedConnection]:
+    """The connection pinned in this context for `pool`, if any."""
+    pin = var.get()
+    if pin is not None and pin.pool is pool:
+        return pin
+    return None
+
+
+@asynccontextmanager
+async def pinned(
+    var: ContextVar[Optional[PinnedConnection]],
+    pool: AsyncConnectionPool,
+) -> AsyncIterator[PinnedConnection]:
+    """
+    Pin one connection from `pool` for the duration of the block. Nested
+    scopes on the same pool reuse the outer pin instead of checking out again.
+    """
+    pin = current_pin(var, pool)
+    if pin is not None:
+        yield pin
+        return
+
+    pin = PinnedConnection(pool, await pool.acquire())
+    token = var.set(pin)
+    try:
+        yield pin
+    except pool._errors:
+        pin.broken = True
+        raise
+    finally:
+        try:
+            var.reset(token)
+        except ValueError:
+            # Exited in a different Context (e.g. an async generator closed elsewhere)
+            var.set(None)
+        await pin.release()
+
+
+async def pin_implicit(var: ContextVar[Optional[PinnedConnection]], pool: AsyncConnectionPool) -> PinnedConnection:
+    """
+    Pin a connection without a surrounding block (begin() outside a session).
+    The caller must hand it back with unpin_implicit() on commit/rollback.
+    """
+    pin = PinnedConnection(pool, await pool.acquire(), implicit=True)
+    pin._token = var.set(pin)
+    return pin
+
+
+async def unpin_implicit(var: ContextVar[Optional[PinnedConnection]], pin: PinnedConnection) -> None:
+    """Release a pin created by pin_implicit() and clear it from the context."""
+    token, pin._token = pin._token, None
+    try:
+        if token is not None:
+            var.reset(token)
+        else:
+            var.set(None)
+    except ValueError:
+        # Token created in a different Context (e.g. begin() ran in another task)
+        var.set(None)
+    await pin.release()
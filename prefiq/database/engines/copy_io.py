@@ -0,0 +1,221 @@
+# =============================================================
+# Bulk Copy Helpers (copy_io.py)
+# file path: prefiq/database/engines/copy_io.py
+#
+# Purpose:
+#   - Shared plumbing for the engines' copy_in() / copy_out() fast paths:
+#     streaming CSV encoding, a file-like reader over byte chunks (for
+#     psycopg2 copy_expert), temp-file spooling and the LOAD DATA LOCAL
+#     INFILE statement used by MariaDB / MySQL.
+#
+# Notes for Developers:
+#   - CSV follows the Postgres convention: NULL is an unquoted empty field,
+#     an empty string is "" (quoted). MariaDB/MySQL spool files use an
+#     unquoted NULL word instead (see encode_csv(null=...)).
+#   - Nothing here materializes the whole input; rows are encoded batch by
+#     batch as the consumer reads.
+# =============================================================
+
+from __future__ import annotations
+
+import os
+import tempfile
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Optional, Sequence
+
+
+def quote_ident(name: str, quote: str = '"') -> str:
+    """Quote a (possibly schema-qualified) identifier: a.b -> "a"."b"."""
+    return ".".join(quote + part.replace(quote, quote * 2) + quote for part in name.split("."))
+
+
+def copy_target(table: str, columns: Sequence[str], quote: str = '"') -> str:
+    """COPY / LOAD DATA target: table (col, ...), or just the table without columns."""
+    cols = ", ".join(quote_ident(c, quote) for c in columns)
+    return f"{quote_ident(table, quote)} ({cols})" if cols else quote_ident(table, quote)
+
+
+def split_table(name: str) -> tuple[Optional[str], str]:
+    """'schema.table' -> ('schema', 'table'); 'table' -> (None, 'table')."""
+    schema, dot, table = name.rpartition(".")
+    return (schema or None) if dot else None, table
+
+
+def _needs_quotes(s: str, null: str) -> bool:
+    return s == "" or s == null or any(ch in s for ch in ',"\r\n')
+
+
+def encode_field(value: Any, *, null: str = "", true: str = "t", false: str = "f") -> str:
+    if value is None:
+        return null
+    if value is True:
+        return true
+    if value is False:
+        return false
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        s = "\\x" + bytes(value).hex()
+    elif hasattr(value, "isoformat"):
+        s = value.isoformat()
+    else:
+        s = str(value)
+    if _needs_quotes(s, null):
+        return '"' + s.replace('"', '""') + '"'
+    return s
+
+
+def encode_csv(
+    rows: Iterable[Sequence[Any]],
+    *,
+    batch: int = 1000,
+    null: str = "",
+    true: str = "t",
+    false: str = "f",
+) -> Iterator[bytes]:
+    """Encode rows as UTF-8 CSV, yielding one bytes chunk per `batch` rows."""
+    it = iter(rows)
+    batch = max(1, int(batch))
+    while True:
+        chunk = list(islice(it, batch))
+        if not chunk:
+            return
+        lines: List[str] = []
+        for row in chunk:
+            lines.append(",".join(encode_field(v, null=null, true=true, false=false) for v in row))
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class ChunkReader:
+    """Minimal read-only file object over an iterator of byte chunks."""
+
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        self._it = iter(chunks)
+        self._buf = b""
+        self._pos = 0
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            out = self._buf[self._pos:] + b"".join(self._it)
+            self._buf, self._pos = b"", 0
+            return out
+        while len(self._buf) - self._pos < size:
+            nxt = next(self._it, None)
+            if nxt is None:
+                break
+            self._buf = self._buf[self._pos:] + nxt
+            self._pos = 0
+        out = self._buf[self._pos:self._pos + size]
+        self._pos += len(out)
+        return out
+
+
+class CountingIter:
+    """Pass rows through unchanged, counting them (for row totals after a load)."""
+
+    def __init__(self, rows: Iterable[Any]) -> None:
+        self._it = iter(rows)
+        self.count = 0
+
+    def __iter__(self) -> "CountingIter":
+        return self
+
+    def __next__(self) -> Any:
+        row = next(self._it)
+        self.count += 1
+        return row
+
+
+def spool_csv(rows: Iterable[Sequence[Any]], **encode: Any) -> str:
+    """Stream rows into a temporary CSV file and return its path (caller deletes it)."""
+    fd, path = tempfile.mkstemp(prefix="prefiq-copy-", suffix=".csv")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            for chunk in encode_csv(rows, **encode):
+                fh.write(chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path
+
+
+def status_count(status: Any) -> int:
+    """Row count from a driver status tag like 'COPY 42' (0 if absent)."""
+    tail = str(status or "").rsplit(" ", 1)[-1]
+    return int(tail) if tail.isdigit() else 0
+
+
+# ---------- MariaDB / MySQL ----------
+
+def _sql_literal(value: str) -> str:
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def sniff_line_ending(path: str) -> str:
+    with open(path, "rb") as fh:
+        head = fh.read(65536)
+    return "\r\n" if b"\r\n" in head else "\n"
+
+
+def load_data_sql(
+    table: str,
+    columns: Sequence[str],
+    path: str,
+    *,
+    skip_lines: int = 0,
+    null: Optional[str] = None,
+    line_ending: str = "\n",
+) -> str:
+    """
+    LOAD DATA LOCAL INFILE statement for a comma-separated, '"'-enclosed file.
+    With `null` set, each column goes through a user variable so fields equal
+    to that token load as NULL; otherwise only the unquoted word NULL does.
+    The comparison sees the field after unquoting, so unlike Postgres COPY
+    (where only an unquoted match is NULL) null="" also turns a quoted ""
+    into NULL: LOAD DATA gives no way to tell the two apart.
+    The file name is inlined: LOAD DATA cannot be a prepared statement.
+    """
+    cols = [quote_ident(c, "`") for c in columns]
+    eol = line_ending.replace("\r", "\\r").replace("\n", "\\n")
+    sql = (
+        f"LOAD DATA LOCAL INFILE {_sql_literal(path)} INTO TABLE {quote_ident(table, '`')} "
+        "CHARACTER SET utf8mb4 "
+        "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '' "
+        f"LINES TERMINATED BY '{eol}'"
+    )
+    if skip_lines:
+        sql += f" IGNORE {int(skip_lines)} LINES"
+    if null is None:
+        return sql + f" ({', '.join(cols)})"
+    names = [f"@c{i}" for i in range(len(cols))]
+    sets = ", ".join(f"{c} = NULLIF({v}, {_sql_literal(null)})" for c, v in zip(cols, names))
+    return sql + f" ({', '.join(names)}) SET {sets}"
+
+
+def run_load_data(conn: Any, sql: str) -> int:
+    """Execute a LOAD DATA statement on a dedicated connection, commit and close it."""
+    try:
+        cur = conn.cursor()
+        try:
+            cur.execute(sql)
+            count = cur.rowcount
+        finally:
+            cur.close()
+        conn.commit()
+        return max(int(count or 0), 0)
+    finally:
+        conn.close()
+
+
+__all__ = [
+    "ChunkReader",
+    "CountingIter",
+    "copy_target",
+    "encode_csv",
+    "encode_field",
+    "load_data_sql",
+    "quote_ident",
+    "run_load_data",
+    "sniff_line_ending",
+    "split_table",
+    "spool_csv",
+    "status_count",
+]
@@ -1,213 +1,267 @@
 # =============================================================
 # MariaDB Connection Pool (pool.py) - Pure Python
+#
+# One AsyncConnectionPool per (running event loop, server/database), like
+# the Postgres pools: every helper takes an optional connection config
+# (EngineConfig.mariadb_params()), so named engines each get their own
+# pool; without one the active thread-local DatabaseConfig is used. There
+# is no module-wide default: the engines resolve their config once and
+# pass it on every call. The pool object owns sizing, FIFO waiting, idle
+# pings and lifetime eviction; this module only wires the mariadb driver
+# into it (get_connection / run / prewarm / close_pool).
+#
+# Inside session() every get_connection() reuses the connection pinned to
+# the current context instead of checking one out per statement.
+#
+# Blocking calls run on the pool's own executor (one thread per
+# connection). run() executes a whole unit of work in a single hop; the
+# engine uses it for every statement.
 # =============================================================
 
 import asyncio
-import time
+import weakref
 from contextlib import asynccontextmanager
-from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar, ParamSpec, Mapping
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Mapping, Optional, Tuple, TypeVar, ParamSpec
 
 import mariadb
 
 from prefiq.database.config_loader.base import use_thread_config
+from prefiq.database.loop_bridge import on_shutdown
+from prefiq.database.engines.async_pool import (
+    AsyncConnectionPool,
+    PinnedConnection,
+    PoolKey,
+    PoolOptions,
+    connect_kwargs,
+    current_pin,
+    pin_implicit,
+    pinned,
+    pool_key,
+    unpin_implicit,
+)
 
 T = TypeVar("T")
 P = ParamSpec("P")
 
 # Pool management
-_pool_config: Optional[Dict[str, Any]] = None
-_connection_pool: List[mariadb.Connection] = []
-_connection_times: Dict[mariadb.Connection, float] = {}
-_pool_lock = asyncio.Lock()
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[PoolKey, AsyncConnectionPool]]" = weakref.WeakKeyDictionary()
+_pinned: ContextVar[Optional[PinnedConnection]] = ContextVar("prefiq_mariadb_pin", default=None)
 
 
-def init_pool(config: Dict[str, Any]) -> None:
-    """
-    Initialize connection pool with configuration.
+# ---------- typing-safe thread runner ----------
 
-    Args:
-        config: Dictionary containing:
-            - max_lifetime: Maximum connection lifetime in seconds (default: 3600)
-            - pool_size: Maximum pool size (default: 10)
-            - Standard MariaDB connection parameters
+async def _run_in_thread(func: Callable[P, T], /, *args: P.args, **kwargs: P.kwargs) -> T:
     """
-    global _pool_config
-    _pool_config = {
-        **config,
-        "max_lifetime": config.get("max_lifetime", 3600.0),  # ensure numeric defaults
-        "pool_size": config.get("pool_size", 10),
-    }
+    Run a blocking driver call on the executor of the thread-local config's pool.
+    Prefer run() for statement work: it does cursor/execute/fetch/commit in one hop.
+    """
+    return await get_pool().run(func, *args, **kwargs)
 
 
-# ---------- typing-safe thread runner ----------
+# ---------- per-loop pool registry ----------
 
-def _apply(func: Callable[P, T], args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> T:
-    """Adapter executed inside the worker thread."""
-    return func(*args, **kwargs)
+def _new_pool(cfg: Dict[str, Any]) -> AsyncConnectionPool:
+    kwargs = connect_kwargs(cfg)
+    return AsyncConnectionPool(
+        lambda: mariadb.connect(**kwargs),
+        ping=lambda conn: conn.ping(),
+        close=lambda conn: conn.close(),
+        errors=(mariadb.Error,),
+        options=PoolOptions.from_config(cfg),
+        name="mariadb",
+    )
 
-async def _run_in_thread(func: Callable[P, T], /, *args: P.args, **kwargs: P.kwargs) -> T:
+
+def _config(config: Optional[Mapping[str, Any]] = None) -> Mapping[str, Any]:
     """
-    Run a blocking function in a thread, with precise typing that satisfies type checkers.
-    We pass an adapter (_apply) to run_in_executor, along with func, args, kwargs.
+    `config` (MariaDB connection parameters plus pool_size, min_idle,
+    acquire_timeout, max_lifetime, idle_timeout, ping_after, reap_interval:
+    see PoolOptions), else the active thread-local config.
     """
-    loop = asyncio.get_running_loop()
-    return await loop.run_in_executor(None, _apply, func, tuple(args), dict(kwargs))
+    return config if config is not None else use_thread_config().get_config_dict()
 
 
-# ---------- small helpers to keep type-checkers happy ----------
+def get_pool(config: Optional[Mapping[str, Any]] = None) -> AsyncConnectionPool:
+    """Return the pool for `config` bound to the running event loop, creating it on first use."""
+    cfg = _config(config)
+    loop = asyncio.get_running_loop()
+    per_loop = _pools.get(loop)
+    if per_loop is None:
+        per_loop = _pools[loop] = {}
+    key = pool_key(cfg, 3306)
+    pool = per_loop.get(key)
+    if pool is None or pool.closed:
+        pool = per_loop[key] = _new_pool(dict(cfg))
+    return pool
 
-def _cfg_float(cfg: Mapping[str, Any], key: str, default: float) -> float:
-    """Get a float from cfg[key], falling back to default; robust for strings/ints."""
-    val = cfg.get(key, default)
-    try:
-        if val is None:
-            return float(default)
-        return float(val)
-    except (TypeError, ValueError):
-        return float(default)
-
-def _cfg_int(cfg: Mapping[str, Any], key: str, default: int) -> int:
-    """Get an int from cfg[key], falling back to default; robust for strings/floats."""
-    val = cfg.get(key, default)
-    try:
-        if val is None:
-            return int(default)
-        return int(val)
-    except (TypeError, ValueError):
-        return int(default)
 
+def connect_dedicated(config: Optional[Mapping[str, Any]] = None, **overrides: Any) -> mariadb.Connection:
+    """Open an unpooled connection with the pool's settings (e.g. local_infile=True)."""
+    return mariadb.connect(**{**connect_kwargs(_config(config)), **overrides})
 
-async def _clean_expired_connections() -> None:
-    """Remove expired or broken connections from the pool."""
-    if _pool_config is None:
-        return
 
-    async with _pool_lock:
-        now = time.time()
-        max_lifetime = _cfg_float(_pool_config, "max_lifetime", 3600.0)
-
-        valid: List[mariadb.Connection] = []
-        for conn in _connection_pool:
-            created_at = _connection_times.get(conn, 0.0)
-            if now - created_at < max_lifetime:
-                try:
-                    await _run_in_thread(conn.ping)
-                    valid.append(conn)
-                except mariadb.Error:
-                    await _run_in_thread(conn.close)
-            else:
-                await _run_in_thread(conn.close)
-
-        _connection_pool[:] = valid
-        _connection_times.clear()
-        _connection_times.update({c: now for c in valid})
-
-
-async def _get_connection() -> mariadb.Connection:
-    """Get a connection from pool or create new one."""
-    await _clean_expired_connections()
-    if _pool_config is None:
-        # Initialize from the active (thread/async-local) config if not set yet
-        config = use_thread_config().get_config_dict()
-        init_pool(config)
-
-    cfg = _pool_config  # local alias for type-checkers
-    assert cfg is not None
-
-    async with _pool_lock:
-        # Try to get connection from pool
-        while _connection_pool:
-            conn = _connection_pool.pop()
-            try:
-                await _run_in_thread(conn.ping)
-                return conn
-            except mariadb.Error:
-                await _run_in_thread(conn.close)
+def _open(per_loop: Mapping[PoolKey, AsyncConnectionPool]) -> Iterator[Tuple[PoolKey, AsyncConnectionPool]]:
+    for key, pool in list(per_loop.items()):
+        if not pool.closed:
+            yield key, pool
 
-        # Create new connection if pool is empty
-        config = {k: v for k, v in cfg.items() if k not in ("max_lifetime", "pool_size")}
-        return await _run_in_thread(mariadb.connect, **config)
 
+def pool_stats() -> Dict[str, Any]:
+    """Stats of every pool on the current loop, by host:port/database."""
+    try:
+        per_loop = _pools.get(asyncio.get_running_loop()) or {}
+    except RuntimeError:
+        return {}
+    return {f"{host}:{port}/{database}": pool.stats() for (host, port, _u, database), pool in _open(per_loop)}
+
+
+def _unit(conn: mariadb.Connection, work: Callable[[mariadb.Connection], T], commit: bool) -> T:
+    """Executed in the worker thread: the work plus its commit, in one hop."""
+    result = work(conn)
+    if commit:
+        conn.commit()
+    return result
+
+
+async def run(
+    work: Callable[[mariadb.Connection], T],
+    *,
+    commit: bool = True,
+    config: Optional[Mapping[str, Any]] = None,
+) -> T:
+    """
+    Run `work(conn)` as one blocking call on the executor of `config`'s pool.
 
-async def _return_connection(conn: mariadb.Connection) -> None:
-    """Return connection to the pool, or close it if pool is full or dead."""
-    cfg = _pool_config
-    assert cfg is not None
+    Uses the connection pinned to this context if there is one (no commit
+    while it has an open transaction), otherwise checks one out for the call.
+    A driver error marks the connection broken exactly like get_connection().
+    """
+    pool = get_pool(config)
+    pin = current_pin(_pinned, pool)
+    if pin is not None:
+        # One statement at a time on the pinned connection (gathered tasks share it)
+        async with pin.exclusive():
+            try:
+                return await pool.run(_unit, pin.raw, work, commit and not pin.in_tx)
+            except mariadb.Error:
+                pin.broken = True
+                if not pin.in_tx:
+                    await pin.replace()
+                raise
 
-    async with _pool_lock:
-        try:
-            await _run_in_thread(conn.ping)
-            pool_size = _cfg_int(cfg, "pool_size", 10)
-            if len(_connection_pool) < pool_size:
-                _connection_pool.append(conn)
-                _connection_times[conn] = time.time()
-            else:
-                await _run_in_thread(conn.close)
-        except mariadb.Error:
-            await _run_in_thread(conn.close)
+    conn = await pool.acquire()
+    broken = False
+    try:
+        return await pool.run(_unit, conn, work, commit)
+    except mariadb.Error:
+        broken = True
+        raise
+    finally:
+        await pool.release(conn, discard=broken)
 
 
 @asynccontextmanager
-async def get_connection(autocommit: bool = True):
+async def get_connection(autocommit: bool = True, config: Optional[Mapping[str, Any]] = None):
     """
     Async context manager for MariaDB connections with pooling.
 
+    Inside session() the pinned connection is reused; otherwise one is
+    checked out for the duration of the block. No commit is issued while
+    the pinned connection has an open transaction.
+
     Usage:
         async with get_connection() as cursor:
             # All cursor/connection methods are blocking; use _run_in_thread on them
             await _run_in_thread(cursor.execute, "SELECT 1")
     """
-    if _pool_config is None:
-        config = use_thread_config().get_config_dict()
-        init_pool(config)
+    pool = get_pool(config)
+    pin = current_pin(_pinned, pool)
+    if pin is not None:
+        try:
+            async with pin.exclusive() as raw:
+                cursor = await pool.run(raw.cursor)
+            try:
+                yield cursor
+                if autocommit and not pin.in_tx:
+                    async with pin.exclusive() as raw:
+                        await pool.run(raw.commit)
+            finally:
+                async with pin.exclusive():
+                    await pool.run(cursor.close)
+        except mariadb.Error:
+            pin.broken = True
+            if not pin.in_tx:
+                # Keep the session usable (and retries meaningful) on a fresh connection
+                async with pin.exclusive():
+                    await pin.replace()
+            raise
+        return
 
-    conn = await _get_connection()
+    conn = await pool.acquire()
+    broken = False
     try:
-        cursor = await _run_in_thread(conn.cursor)
+        cursor = await pool.run(conn.cursor)
         try:
             yield cursor
             # Commit at the end of the context (autocommit-like)
             if autocommit:
-                await _run_in_thread(conn.commit)
+                await pool.run(conn.commit)
         finally:
-            await _run_in_thread(cursor.close)
-            await _return_connection(conn)
-    except (ValueError, TypeError):
-        # If anything goes wrong, ensure the connection is closed (not returned to pool)
-        await _run_in_thread(conn.close)
+            await pool.run(cursor.close)
+    except mariadb.Error:
+        # Driver-level failure: don't hand a possibly broken connection to the next caller
+        broken = True
         raise
+    finally:
+        await pool.release(conn, discard=broken)
+
+
+@asynccontextmanager
+async def session(config: Optional[Mapping[str, Any]] = None):
+    """
+    Pin one pooled connection to the current context for the whole block.
+    Nested sessions reuse the outer connection.
+    """
+    async with pinned(_pinned, get_pool(config)) as pin:
+        yield pin
+
 
-async def prewarm(count: int = 1) -> None:
+def current_session(config: Optional[Mapping[str, Any]] = None) -> Optional[PinnedConnection]:
+    """The connection of `config`'s pool pinned in this context (None outside session/transaction)."""
+    return current_pin(_pinned, get_pool(config))
+
+
+async def begin_session(config: Optional[Mapping[str, Any]] = None) -> PinnedConnection:
+    """Pin a connection for begin() called outside any session block."""
+    return await pin_implicit(_pinned, get_pool(config))
+
+
+async def end_session(pin: PinnedConnection) -> None:
+    """Release a connection pinned by begin_session()."""
+    await unpin_implicit(_pinned, pin)
+
+
+async def prewarm(count: int = 1, config: Optional[Mapping[str, Any]] = None) -> None:
     """
-    Proactively open `count` connections and return them to the pool.
+    Proactively open `count` connections and park them in the pool.
     Useful at boot so the first query doesn't pay init cost.
     """
     if count <= 0:
         return
+    await get_pool(config).prewarm(count)
 
-    # ensure pool is initialized (re-using your current init-on-demand)
-    if _pool_config is None:
-        config = use_thread_config().get_config_dict()
-        init_pool(config)
 
-    # open connections, then put them back
-    conns: list[mariadb.Connection] = []
+async def close_pool() -> None:
+    """Close every pool bound to the running loop and forget them."""
     try:
-        for _ in range(count):
-            conns.append(await _get_connection())
-    finally:
-        for c in conns:
-            # pretend we used the conn; just return to pool
-            await _return_connection(c)
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    per_loop = _pools.pop(loop, None) or {}
+    for pool in per_loop.values():
+        await pool.close()
 
 
-async def close_pool() -> None:
-    """Close all pooled connections and clear state."""
-    async with _pool_lock:
-        for conn in _connection_pool:
-            try:
-                await _run_in_thread(conn.close)
-            except mariadb.Error:
-                pass
-        _connection_pool.clear()
-        _connection_times.clear()
+# Pools created by sync callers live on the shared bridge loop; close them there.
+on_shutdown(close_pool)
@@ -1,16 +1,19 @@
 # prefiq/database/engines/mariadb/sync_engine.py
 from __future__ import annotations
 
-import time
+import os
 from contextlib import contextmanager
-from typing import Optional, Sequence, Any
+from typing import Iterable, Iterator, Mapping, Optional, Sequence, Any
 
 import mariadb
 
-from prefiq.database.engines.abstract_engine import AbstractEngine
+from prefiq.database.engines.abstract_engine import AbstractEngine, DescribeHook
+from prefiq.database.engines.copy_io import encode_csv, load_data_sql, run_load_data, sniff_line_ending, spool_csv
 from prefiq.database.engines.mariadb.retry import with_retry
-from prefiq.database.engines.mariadb.logger import log_query
+from prefiq.database.engines.row_mapper import Converter, RowFormat, columns_of, row_fetcher
+from prefiq.database.engines.statement_cache import prepared_cache_size, run_cached
 from prefiq.database.config_loader.base import use_thread_config
+from prefiq.database.engine_config import EngineConfig
 
 
 class SyncMariaDBEngine(AbstractEngine[Any]):
@@ -19,15 +22,21 @@ class SyncMariaDBEngine(AbstractEngine[Any]):
     Automatically fetches config from the active thread-local DatabaseConfig.
     """
 
-    def __init__(self) -> None:
+    engine_label = "mariadb"
+
+    def __init__(self, config: Optional[EngineConfig] = None) -> None:
         super().__init__()
         self.conn: Optional[mariadb.Connection] = None
+        # Named engines connect with their own frozen config; else the thread-local one
+        self._config = config
+        # Per-connection prepared cursor LRU size (0 = text protocol only)
+        self._prepared = prepared_cache_size()
 
     # -------- lifecycle --------
 
     def connect(self) -> None:
-        """Establish a new MariaDB connection using the latest thread-local config."""
-        config = use_thread_config().get_config_dict()
+        """Establish a new MariaDB connection (own config, else the latest thread-local one)."""
+        config = self._connect_config()
         self.conn = mariadb.connect(**config)
         # Prefer autocommit for single statements
         try:
@@ -35,6 +44,11 @@ class SyncMariaDBEngine(AbstractEngine[Any]):
         except (ValueError, TypeError):
             pass
 
+    def _connect_config(self) -> dict[str, Any]:
+        if self._config is not None:
+            return self._config.mariadb_params()
+        return use_thread_config().get_config_dict()
+
     def close(self) -> None:
         """Safely close the connection."""
         conn = self.conn
@@ -133,7 +147,8 @@ class SyncMariaDBEngine(AbstractEngine[Any]):
         try:
             yield cur
             with_retry(_commit)
-        except (ValueError, TypeError):
+        except Exception:
+            # Any failure inside the block (driver errors included) undoes the whole unit
             with_retry(_rollback)
             raise
         finally:
@@ -144,81 +159,175 @@ class SyncMariaDBEngine(AbstractEngine[Any]):
 
     # -------- queries --------
 
-    def execute(self, query: str, params: Optional[Sequence[Any]] = None) -> None:
-        """Run a single write query (INSERT/UPDATE/DELETE)."""
+    def execute(self, query: str, params: Optional[Sequence[Any]] = None) -> int:
+        """Run a single write query (INSERT/UPDATE/DELETE); returns the affected row count."""
         conn = self._validate_connection()
-        self._run_hooks("before", query, params)
-        t0 = time.time()
+        started = self._before(query, params)
         tup = tuple(params) if params is not None else None
 
         def action():
-            with conn.cursor() as cur:
-                if tup is not None:
-                    cur.execute(query, tup)
-                else:
-                    cur.execute(query)
+            rowcount = run_cached(conn, query, tup, engine="mariadb", capacity=self._prepared)
             conn.commit()
+            return rowcount
 
-        with_retry(action)
-        log_query(query, t0)
-        self._run_hooks("after", query, params)
+        try:
+            rowcount = with_retry(action)
+        except Exception as e:
+            self._after(query, params, started, error=e)
+            raise
+        self._after(query, params, started, rowcount)
+        return rowcount
 
-    def executemany(self, query: str, param_list: Sequence[Sequence[Any]]) -> None:
-        """Run bulk insert/update with many param sets."""
+    def executemany(self, query: str, param_list: Sequence[Sequence[Any]]) -> int:
+        """Run bulk insert/update with many param sets; returns the affected row count."""
         conn = self._validate_connection()
-        self._run_hooks("before", query, None)
-        t0 = time.time()
+        started = self._before(query, None)
 
         def action():
             with conn.cursor() as cur:
                 # executemany expects a sequence of sequences
                 cur.executemany(query, [tuple(p) for p in param_list])
+                rowcount = cur.rowcount
             conn.commit()
+            return rowcount
 
-        with_retry(action)
-        log_query(query, t0)
-        self._run_hooks("after", query, None)
-
-    def fetchone(self, query: str, params: Optional[Sequence[Any]] = None) -> Any:
-        """Fetch a single row from the result set."""
+        try:
+            rowcount = with_retry(action)
+        except Exception as e:
+            self._after(query, None, started, error=e)
+            raise
+        self._after(query, None, started, rowcount)
+        return rowcount
+
+    def fetchone(
+        self,
+        query: str,
+        params: Optional[Sequence[Any]] = None,
+        *,
+        row_format: Optional[RowFormat] = None,
+        converters: Optional[Mapping[str, Converter]] = None,
+    ) -> Any:
+        """Fetch a single row, shaped by `row_format` / `converters` if given (see row_mapper)."""
         conn = self._validate_connection()
-        self._run_hooks("before", query, params)
-        t0 = time.time()
+        started = self._before(query, params)
         tup = tuple(params) if params is not None else None
+        fetch = row_fetcher(row_format, converters, one=True)
 
         def action():
-            with conn.cursor() as cur:
-                if tup is not None:
-                    cur.execute(query, tup)
-                else:
-                    cur.execute(query)
-                return cur.fetchone()
-
-        result = with_retry(action)
-        log_query(query, t0)
-        self._run_hooks("after", query, params)
+            return run_cached(conn, query, tup, engine="mariadb", capacity=self._prepared, fetch=fetch)
+
+        try:
+            result = with_retry(action)
+        except Exception as e:
+            self._after(query, params, started, error=e)
+            raise
+        self._after(query, params, started, 0 if result is None else 1)
         return result
 
-    def fetchall(self, query: str, params: Optional[Sequence[Any]] = None) -> list[Any]:
-        """Fetch all rows from the result set."""
+    def fetchall(
+        self,
+        query: str,
+        params: Optional[Sequence[Any]] = None,
+        *,
+        row_format: Optional[RowFormat] = None,
+        converters: Optional[Mapping[str, Converter]] = None,
+    ) -> list[Any]:
+        """Fetch all rows, shaped by `row_format` / `converters` if given (see row_mapper)."""
         conn = self._validate_connection()
-        self._run_hooks("before", query, params)
-        t0 = time.time()
+        started = self._before(query, params)
         tup = tuple(params) if params is not None else None
+        fetch = row_fetcher(row_format, converters)
 
         def action():
-            with conn.cursor() as cur:
-                if tup is not None:
-                    cur.execute(query, tup)
-                else:
-                    cur.execute(query)
-                return list(cur.fetchall())
-
-        result = with_retry(action)
-        log_query(query, t0)
-        self._run_hooks("after", query, params)
+            return list(run_cached(conn, query, tup, engine="mariadb", capacity=self._prepared, fetch=fetch))
+
+        try:
+            result = with_retry(action)
+        except Exception as e:
+            self._after(query, params, started, error=e)
+            raise
+        self._after(query, params, started, len(result))
         return result
 
+    def iterate(
+        self,
+        query: str,
+        params: Optional[Sequence[Any]] = None,
+        *,
+        batch_size: int = 1000,
+        describe: DescribeHook = None,
+    ) -> Iterator[Any]:
+        """
+        Stream rows through an unbuffered cursor, `batch_size` rows per fetch.
+        The connection is busy until the iterator is exhausted or closed.
+        """
+        conn = self._validate_connection()
+        started = self._before(query, params)
+        tup = tuple(params) if params is not None else None
+        count = 0
+
+        cur = conn.cursor(buffered=False)
+        try:
+            if tup is not None:
+                cur.execute(query, tup)
+            else:
+                cur.execute(query)
+            if describe is not None:
+                describe(columns_of(cur))
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                count += len(rows)
+                yield from rows
+        except Exception as e:
+            self._after(query, params, started, count, e)
+            raise
+        finally:
+            cur.close()
+        self._after(query, params, started, count)
+
+    # -------- bulk copy --------
+
+    def _load_data(self, sql: str) -> int:
+        # LOCAL INFILE must be enabled per connection: use a dedicated one
+        config = self._connect_config()
+        started = self._before(sql)
+        try:
+            count = run_load_data(mariadb.connect(**{**config, "local_infile": True}), sql)
+        except Exception as e:
+            self._after(sql, None, started, error=e)
+            raise
+        self._after(sql, None, started, count)
+        return count
+
+    def copy_in(self, table: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> int:
+        """
+        Bulk-load rows (tuples in `columns` order) with LOAD DATA LOCAL INFILE,
+        fed from a temp CSV file streamed from `rows`. Returns rows loaded.
+        """
+        path = spool_csv(rows, null="NULL", true="1", false="0")
+        try:
+            count = self._load_data(load_data_sql(table, columns, path))
+        finally:
+            os.unlink(path)
+        return count
+
+    def copy_in_csv(self, table: str, columns: Sequence[str], path: str, *, header: bool = True, null: str = "") -> int:
+        """
+        Load a CSV file as-is with LOAD DATA; fields equal to `null` load as NULL,
+        quoted or not (with null="" a quoted "" is NULL too, unlike Postgres COPY).
+        """
+        sql = load_data_sql(
+            table, columns, os.path.abspath(path),
+            skip_lines=1 if header else 0, null=null, line_ending=sniff_line_ending(path),
+        )
+        return self._load_data(sql)
+
+    def copy_out(self, query: str, params: Optional[Sequence[Any]] = None, *, batch_size: int = 1000) -> Iterator[bytes]:
+        """Stream a SELECT as CSV chunks (NULL = empty field) over an unbuffered cursor."""
+        return encode_csv(self.iterate(query, params, batch_size=batch_size), batch=batch_size, true="1", false="0")
+
     # -------- health --------
 
     def test_connection(self) -> bool:
@@ -1,14 +1,32 @@
 # prefiq/database/engines/mysql/async_engine.py
 
+import asyncio
+import os
+from contextlib import AsyncExitStack, asynccontextmanager, suppress
+from typing import AsyncIterator, Iterable, Mapping, Optional, Any, Sequence
 
-import time
-from contextlib import asynccontextmanager, suppress
-from typing import Optional, Any, Sequence
+import pymysql
+import pymysql.cursors
 
-from prefiq.database.engines.abstract_engine import AbstractEngine
-from prefiq.database.engines.mysql.logger import log_query
-from prefiq.database.engines.mysql.pool import get_connection, close_pool, _run_in_thread
+from prefiq.database.config_loader.base import use_thread_config
+from prefiq.database.engines.abstract_engine import AbstractEngine, DescribeHook
+from prefiq.database.engine_config import EngineConfig
+from prefiq.database.engines.copy_io import encode_csv, load_data_sql, run_load_data, sniff_line_ending, spool_csv
+from prefiq.database.engines.mysql.pool import (
+    get_connection,
+    close_pool,
+    pool_stats,
+    session,
+    current_session,
+    get_pool,
+    begin_session,
+    connect_dedicated,
+    end_session,
+    run,
+)
+from prefiq.database.engines.async_pool import next_batch, open_stream, run_statement
 from prefiq.database.engines.mysql.retry import with_retry_async
+from prefiq.database.engines.row_mapper import Converter, RowFormat, columns_of, row_fetcher
 
 
 class AsyncMysqlEngine(AbstractEngine[Any]):
@@ -16,135 +34,324 @@ class AsyncMysqlEngine(AbstractEngine[Any]):
     Asynchronous Mysql engine.
     Executes queries through connection pool with retry, logging, and lifecycle hooks.
     All blocking driver calls are offloaded to a thread.
+
+    Calls made inside `async with engine.session()` (or a transaction) share one
+    pinned connection; begin/commit/rollback always act on that connection.
     """
 
-    def __init__(self):
+    engine_label = "mysql"
+
+    def __init__(self, config: Optional[EngineConfig] = None):
         super().__init__()
+        # Connection config of this engine's pools (None: resolved on first use)
+        self._conn_params = config.mariadb_params() if config is not None else None
+
+    @property
+    def _params(self) -> dict[str, Any]:
+        # Own frozen config; else the thread-local one, resolved once (not per statement)
+        if self._conn_params is None:
+            self._conn_params = use_thread_config().get_config_dict()
+        return self._conn_params
 
     async def connect(self) -> None:
         """
-        No-op since we rely on connection pool initialization.
-        The pool should be started via init_pool() elsewhere.
+        No-op: the per-loop pool is created lazily on first checkout, from
+        this engine's EngineConfig (or the thread-local config without one).
         """
         return None
 
     async def close(self) -> None:
-        """Close the global async pool."""
+        """Close the pools bound to the running event loop."""
         await close_pool()
 
-    # Transaction helpers issue SQL statements via the pooled cursor.
+    def pool_stats(self) -> dict[str, Any]:
+        """Size / idle / in-use / waiters of the current loop's pools, by host:port/database."""
+        return pool_stats()
+
+    @asynccontextmanager
+    async def session(self):
+        """
+        Pin one pooled connection for every engine call inside the block.
+        Usage:
+            async with db.session():
+                await db.execute("INSERT ...")
+                row = await db.fetchone("SELECT ...")
+        """
+        async with session(self._params):
+            yield self
+
+    async def _retry(self, action):
+        # Re-running a statement is only safe outside an open transaction
+        pin = current_session(self._params)
+        if pin is not None and pin.in_tx:
+            return await action()
+        return await with_retry_async(action)
+
+    # ------------------------ transaction helpers ------------------------
+
     async def begin(self) -> None:
+        """START TRANSACTION on the pinned connection (pins one if needed)."""
+        pin = current_session(self._params)
+        if pin is None:
+            pin = await begin_session(self._params)
+
         async def action():
-            async with get_connection(autocommit=False) as cur:
-                await _run_in_thread(cur.execute, "START TRANSACTION")
-        await with_retry_async(action)
+            await run(lambda conn: run_statement(conn, "START TRANSACTION"), commit=False, config=self._params)
+
+        try:
+            await with_retry_async(action)
+        except BaseException:
+            if pin.implicit:
+                await end_session(pin)
+            raise
+        pin.in_tx = True
+
+    async def _finish(self, statement: str) -> None:
+        pin = current_session(self._params)
+        if pin is None or not pin.in_tx:
+            # Nothing open on this context; statements already autocommitted.
+            return
+        try:
+            await run(lambda conn: run_statement(conn, statement), commit=False, config=self._params)
+            pin.in_tx = False
+        finally:
+            if pin.implicit:
+                await end_session(pin)
 
     async def commit(self) -> None:
-        async def action():
-            async with get_connection(autocommit=False) as cur:
-                await _run_in_thread(cur.execute, "COMMIT")
-        await with_retry_async(action)
+        await self._finish("COMMIT")
 
     async def rollback(self) -> None:
-        async def action():
-            async with get_connection(autocommit=False) as cur:
-                await _run_in_thread(cur.execute, "ROLLBACK")
-        await with_retry_async(action)
+        await self._finish("ROLLBACK")
 
-    async def execute(self, query: str, params: Optional[tuple] = None) -> None:
-        """Run a non-returning query (INSERT/UPDATE/DELETE)."""
-        self._run_hooks('before', query, params)
-        start_time = time.time()
+    # ------------------------ query primitives ---------------------------
+    #
+    # Each statement is one unit of work (cursor -> execute -> fetch ->
+    # commit -> close) run in a single hop on the pool's executor.
+
+    async def execute(self, query: str, params: Optional[Sequence[Any]] = None) -> int:
+        """Run a non-returning query (INSERT/UPDATE/DELETE); returns the affected row count."""
+        started = self._before(query, params)
+        tup = tuple(params) if params else None
 
         async def action():
-            async with get_connection() as cur:
-                await _run_in_thread(cur.execute, query, *(params or ()))
-                # Commit after write (safe even if autocommit is on)
-                if getattr(cur, "connection", None):
-                    await _run_in_thread(cur.connection.commit)
+            # run() commits after the statement unless a transaction is open
+            return await run(lambda conn: run_statement(conn, query, tup), config=self._params)
 
-        await with_retry_async(action)
-        log_query(query, start_time)
-        self._run_hooks('after', query, params)
+        try:
+            rowcount = await self._retry(action)
+        except Exception as e:
+            self._after(query, params, started, error=e)
+            raise
+        self._after(query, params, started, rowcount)
+        return rowcount
 
-    async def fetchone(self, query: str, params: Optional[tuple] = None) -> Any:
-        """Run SELECT and return the first row."""
-        self._run_hooks('before', query, params)
-        start_time = time.time()
+    async def fetchone(
+        self,
+        query: str,
+        params: Optional[Sequence[Any]] = None,
+        *,
+        row_format: Optional[RowFormat] = None,
+        converters: Optional[Mapping[str, Converter]] = None,
+    ) -> Any:
+        """Run SELECT and return the first row, shaped by `row_format` / `converters` if given."""
+        started = self._before(query, params)
+        tup = tuple(params) if params else None
+        fetch = row_fetcher(row_format, converters, one=True)
 
         async def action():
-            async with get_connection() as cur:
-                await _run_in_thread(cur.execute, query, *(params or ()))
-                row = await _run_in_thread(cur.fetchone)
-                return row
+            return await run(lambda conn: run_statement(conn, query, tup, fetch=fetch), config=self._params)
 
-        result = await with_retry_async(action)
-        log_query(query, start_time)
-        self._run_hooks('after', query, params)
-        return result
+        try:
+            row = await self._retry(action)
+        except Exception as e:
+            self._after(query, params, started, error=e)
+            raise
+        self._after(query, params, started, 0 if row is None else 1)
+        return row
 
-    async def fetchall(self, query: str, params: Optional[tuple] = None) -> list[Any]:
-        """Run SELECT and return all rows."""
-        self._run_hooks('before', query, params)
-        start_time = time.time()
+    async def fetchall(
+        self,
+        query: str,
+        params: Optional[Sequence[Any]] = None,
+        *,
+        row_format: Optional[RowFormat] = None,
+        converters: Optional[Mapping[str, Converter]] = None,
+    ) -> list[Any]:
+        """Run SELECT and return all rows, shaped by `row_format` / `converters` if given."""
+        started = self._before(query, params)
+        tup = tuple(params) if params else None
+        fetch = row_fetcher(row_format, converters)
 
         async def action():
-            async with get_connection() as cur:
-                await _run_in_thread(cur.execute, query, *(params or ()))
-                rows = await _run_in_thread(cur.fetchall)
-                return rows
+            return await run(lambda conn: run_statement(conn, query, tup, fetch=fetch), config=self._params)
 
-        result = await with_retry_async(action)
-        log_query(query, start_time)
-        self._run_hooks('after', query, params)
-        return result
+        try:
+            rows = await self._retry(action)
+        except Exception as e:
+            self._after(query, params, started, error=e)
+            raise
+        self._after(query, params, started, len(rows))
+        return rows
 
-    async def executemany(self, query: str, param_list: Sequence[tuple]) -> None:
+    async def aiterate(
+        self,
+        query: str,
+        params: Optional[Sequence[Any]] = None,
+        *,
+        batch_size: int = 1000,
+        describe: DescribeHook = None,
+    ) -> AsyncIterator[Any]:
+        """
+        Stream rows through an unbuffered SSCursor, `batch_size` rows per thread hop.
+        Runs on the session's pinned connection if there is one, otherwise on a
+        checkout held until the iterator finishes (use contextlib.aclosing()
+        when breaking out early so it is returned promptly).
+        """
+        started = self._before(query, params)
+        tup = tuple(params) if params else None
+
+        pin = current_session(self._params)
+        pool = get_pool(self._params)
+        async with AsyncExitStack() as held:
+            # A pinned connection is held for the whole stream: other tasks sharing it wait
+            conn = await held.enter_async_context(pin.exclusive()) if pin is not None else await pool.acquire()
+            broken = False
+            cur = None
+            count = 0
+            try:
+                cur, rows = await pool.run(open_stream, conn, query, tup, batch_size, (pymysql.cursors.SSCursor,))
+                if describe is not None:
+                    describe(columns_of(cur))
+                while rows:
+                    count += len(rows)
+                    for row in rows:
+                        yield row
+                    rows = await pool.run(next_batch, cur, batch_size)
+                cur = None  # next_batch closed it
+            except Exception as e:
+                broken = isinstance(e, pymysql.Error)
+                self._after(query, params, started, count, e)
+                raise
+            finally:
+                if cur is not None:
+                    with suppress(pymysql.Error):
+                        await pool.run(cur.close)
+                if pin is None:
+                    await pool.release(conn, discard=broken)
+        self._after(query, params, started, count)
+
+    async def executemany(self, query: str, param_list: Sequence[Sequence[Any]]) -> int:
         """Run bulk INSERT/UPDATE with many parameters."""
-        self._run_hooks('before', query)
-        start_time = time.time()
+        started = self._before(query, None)
+        # executemany expects a list/tuple of tuples/lists
+        rows = list(map(tuple, param_list))
 
         async def action():
-            async with get_connection() as cur:
-                await _run_in_thread(cur.executemany, query, param_list)
-                if getattr(cur, "connection", None):
-                    await _run_in_thread(cur.connection.commit)
+            return await run(lambda conn: run_statement(conn, query, rows, many=True), config=self._params)
+
+        try:
+            rowcount = await self._retry(action)
+        except Exception as e:
+            self._after(query, None, started, error=e)
+            raise
+        self._after(query, None, started, rowcount)
+        return rowcount
 
-        await with_retry_async(action)
-        log_query(query, start_time)
-        self._run_hooks('after', query)
+    # ------------------------ transaction context ------------------------
 
     @asynccontextmanager
     async def transaction(self):
         """
         Pin one pooled connection for a multi-statement transaction.
+        Engine calls made inside the block run on the same connection.
         Usage:
             async with db.transaction() as cur:
                 await _run_in_thread(cur.execute, "INSERT ...")
-                await _run_in_thread(cur.execute, "UPDATE ...")
+                await db.execute("UPDATE ...")
         """
-        async with get_connection(autocommit=False) as cur:
-            # BEGIN with retry
-            await with_retry_async(lambda: _run_in_thread(cur.execute, "START TRANSACTION"))
-            try:
-                yield cur
-                # COMMIT with retry
-                await with_retry_async(lambda: _run_in_thread(cur.execute, "COMMIT"))
-            except (ValueError, TypeError):
-                # ROLLBACK with retry (best-effort)
-                with suppress(Exception):
-                    await with_retry_async(lambda: _run_in_thread(cur.execute, "ROLLBACK"))
-                raise
+        async with session(self._params) as pin:
+            async with get_connection(autocommit=False, config=self._params) as cur:
+                if pin.in_tx:
+                    # Nested: join the outer transaction
+                    yield cur
+                    return
+
+                async def statement(sql: str) -> None:
+                    async with pin.exclusive():
+                        await pin.pool.run(cur.execute, sql)
+
+                # BEGIN with retry
+                await with_retry_async(lambda: statement("START TRANSACTION"))
+                pin.in_tx = True
+                try:
+                    yield cur
+                    await statement("COMMIT")
+                    pin.in_tx = False
+                except BaseException:
+                    # ROLLBACK (best-effort); a failed rollback leaves in_tx set and the
+                    # connection is discarded instead of pooled
+                    with suppress(Exception):
+                        await statement("ROLLBACK")
+                        pin.in_tx = False
+                    raise
+
+    # ------------------------ bulk copy ----------------------------------
+
+    async def _load_data(self, sql: str) -> int:
+        # LOCAL INFILE must be enabled per connection: use a dedicated one
+        started = self._before(sql)
+        try:
+            count = await asyncio.to_thread(lambda: run_load_data(connect_dedicated(self._params, local_infile=True), sql))
+        except Exception as e:
+            self._after(sql, None, started, error=e)
+            raise
+        self._after(sql, None, started, count)
+        return count
+
+    async def copy_in(self, table: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> int:
+        """
+        Bulk-load rows (tuples in `columns` order) with LOAD DATA LOCAL INFILE,
+        fed from a temp CSV file streamed from `rows`. Returns rows loaded.
+        """
+        path = await asyncio.to_thread(spool_csv, rows, null="NULL", true="1", false="0")
+        try:
+            count = await self._load_data(load_data_sql(table, columns, path))
+        finally:
+            os.unlink(path)
+        return count
+
+    async def copy_in_csv(self, table: str, columns: Sequence[str], path: str, *, header: bool = True, null: str = "") -> int:
+        """
+        Load a CSV file as-is with LOAD DATA; fields equal to `null` load as NULL,
+        quoted or not (with null="" a quoted "" is NULL too, unlike Postgres COPY).
+        """
+        sql = load_data_sql(
+            table, columns, os.path.abspath(path),
+            skip_lines=1 if header else 0, null=null, line_ending=sniff_line_ending(path),
+        )
+        return await self._load_data(sql)
+
+    async def copy_out(self, query: str, params: Optional[Sequence[Any]] = None, *, batch_size: int = 1000) -> AsyncIterator[bytes]:
+        """Stream a SELECT as CSV chunks (NULL = empty field), `batch_size` rows each."""
+        batch: list[Any] = []
+        async for row in self.aiterate(query, params, batch_size=batch_size):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                for chunk in encode_csv(batch, batch=batch_size, true="1", false="0"):
+                    yield chunk
+                batch = []
+        for chunk in encode_csv(batch, batch=batch_size, true="1", false="0"):
+            yield chunk
+
+    # ------------------------ diagnostics --------------------------------
 
     async def test_connection(self) -> bool:
         """Simple connectivity check."""
         try:
             async def action():
-                async with get_connection() as cur:
-                    await _run_in_thread(cur.execute, "SELECT 1")
-                    row = await _run_in_thread(cur.fetchone)
-                    return row is not None
-
+                row = await run(lambda conn: run_statement(conn, "SELECT 1", fetch="one"), commit=False, config=self._params)
+                return row is not None
             return bool(await with_retry_async(action))
         except (ValueError, TypeError):
             return False
@@ -5,6 +5,8 @@ import asyncio
 import inspect
 from typing import Any, Optional
 
+from prefiq.database.loop_bridge import run_sync
+
 async def _awaitable(x: Any) -> Any:
     if inspect.iscoroutine(x):
         return await x
@@ -27,22 +29,14 @@ def is_healthy(engine, timeout: Optional[float] = 3.0) -> bool:
 
     timeout: seconds for async engines (None = no timeout).
     """
-    # If we're already in an event loop, do it fully async.
-    try:
-        loop = asyncio.get_running_loop()
-    except RuntimeError:
-        loop = None
-
-    if loop and loop.is_running():
-        # Caller is async; schedule as a task and let them await it if they want.
-        # For convenience, run-to-completion here (small, self-contained probe).
-        return loop.run_until_complete(_is_healthy_async(engine, timeout))  # type: ignore[call-arg]
-
-    # No loop → run an event loop if needed
+    # Async engines run the probe on the shared bridge loop (safe whether or not
+    # the caller's thread already has a running loop).
     try:
         res = engine.test_connection()
         if inspect.isawaitable(res):
-            return asyncio.run(_is_healthy_async(engine, timeout))
+            if inspect.iscoroutine(res):
+                res.close()  # the probe below calls test_connection() again
+            return run_sync(_is_healthy_async(engine, timeout))
         return bool(res)
     except (ValueError, TypeError):
         return False
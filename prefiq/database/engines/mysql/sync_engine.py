@@ -2,15 +2,19 @@
 
 from __future__ import annotations
 
-import time
+import os
 from contextlib import contextmanager
-from typing import Optional, Sequence, Any, cast
+from typing import Iterable, Iterator, Mapping, Optional, Sequence, Any, cast
 
 import pymysql
+import pymysql.cursors
 
-from prefiq.database.engines.abstract_engine import AbstractEngine
+from prefiq.database.engine_config import EngineConfig
+from prefiq.database.engines.abstract_engine import AbstractEngine, DescribeHook
+from prefiq.database.engines.async_pool import connect_kwargs
+from prefiq.database.engines.copy_io import encode_csv, load_data_sql, run_load_data, sniff_line_ending, spool_csv
 from prefiq.database.engines.mysql.retry import with_retry
-from prefiq.database.engines.mysql.logger import log_query
+from prefiq.database.engines.row_mapper import Converter, RowFormat, columns_of, fetch_mapped
 from prefiq.database.config_loader.base import use_thread_config
 
 
@@ -20,15 +24,19 @@ class SyncMysqlEngine(AbstractEngine[Any]):
     Automatically fetches config from the active thread-local DatabaseConfig.
     """
 
-    def __init__(self) -> None:
+    engine_label = "mysql"
+
+    def __init__(self, config: Optional[EngineConfig] = None) -> None:
         super().__init__()
         self.conn: Optional[pymysql.Connection] = None
+        # Named engines connect with their own frozen config; else the thread-local one
+        self._config = config
 
     # -------- lifecycle --------
 
     def connect(self) -> None:
-        """Establish a new mysql connection using the latest thread-local config."""
-        config = use_thread_config().get_config_dict()
+        """Establish a new mysql connection (own config, else the latest thread-local one)."""
+        config = self._connect_config()
         self.conn = pymysql.connect(**config)
         # Prefer autocommit for single statements
         try:
@@ -36,6 +44,12 @@ class SyncMysqlEngine(AbstractEngine[Any]):
         except (ValueError, TypeError):
             pass
 
+    def _connect_config(self) -> dict[str, Any]:
+        # pymysql.connect() rejects the pool keys (pool_name / pool_size) of the shared shape
+        if self._config is not None:
+            return connect_kwargs(self._config.mariadb_params())
+        return connect_kwargs(use_thread_config().get_config_dict())
+
     def close(self) -> None:
         """Safely close the connection."""
         conn = self.conn
@@ -140,7 +154,8 @@ class SyncMysqlEngine(AbstractEngine[Any]):
         try:
             yield cur
             with_retry(_commit)
-        except (ValueError, TypeError):
+        except Exception:
+            # Any failure inside the block (driver errors included) undoes the whole unit
             with_retry(_rollback)
             raise
         finally:
@@ -151,68 +166,179 @@ class SyncMysqlEngine(AbstractEngine[Any]):
 
     # -------- queries --------
 
-    def execute(self, query: str, params: Optional[tuple] = None) -> None:
-        """Run a single write query (INSERT/UPDATE/DELETE)."""
+    def execute(self, query: str, params: Optional[tuple] = None) -> int:
+        """Run a single write query (INSERT/UPDATE/DELETE); returns the affected row count."""
         conn = self._validate_connection()
-        self._run_hooks("before", query, params)
-        start_time = time.time()
+        started = self._before(query, params)
 
         def action():
             with conn.cursor() as cur:
                 cur.execute(query, params or ())
+                rowcount = cur.rowcount
             conn.commit()
+            return rowcount
 
-        with_retry(action)
-        log_query(query, start_time)
-        self._run_hooks("after", query, params)
+        try:
+            rowcount = with_retry(action)
+        except Exception as e:
+            self._after(query, params, started, error=e)
+            raise
+        self._after(query, params, started, rowcount)
+        return rowcount
 
-    def executemany(self, query: str, param_list: Sequence[tuple]) -> None:
-        """Run bulk insert/update with many param sets."""
+    def executemany(self, query: str, param_list: Sequence[tuple]) -> int:
+        """Run bulk insert/update with many param sets; returns the affected row count."""
         conn = self._validate_connection()
-        self._run_hooks("before", query, None)
-        start_time = time.time()
+        started = self._before(query, None)
 
         def action():
             with conn.cursor() as cur:
                 cur.executemany(query, list(param_list))
+                rowcount = cur.rowcount
             conn.commit()
+            return rowcount
 
-        with_retry(action)
-        log_query(query, start_time)
-        self._run_hooks("after", query, None)
-
-    def fetchone(self, query: str, params: Optional[tuple] = None) -> Any:
-        """Fetch a single row from the result set."""
+        try:
+            rowcount = with_retry(action)
+        except Exception as e:
+            self._after(query, None, started, error=e)
+            raise
+        self._after(query, None, started, rowcount)
+        return rowcount
+
+    def fetchone(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        *,
+        row_format: Optional[RowFormat] = None,
+        converters: Optional[Mapping[str, Converter]] = None,
+    ) -> Any:
+        """Fetch a single row, shaped by `row_format` / `converters` if given (see row_mapper)."""
         conn = self._validate_connection()
-        self._run_hooks("before", query, params)
-        start_time = time.time()
+        started = self._before(query, params)
 
         def action():
             with conn.cursor() as cur:
                 cur.execute(query, params or ())
-                return cur.fetchone()
+                if row_format is None and not converters:
+                    return cur.fetchone()
+                return fetch_mapped(cur, row_format or "tuple", converters, one=True)
 
-        result = with_retry(action)
-        log_query(query, start_time)
-        self._run_hooks("after", query, params)
+        try:
+            result = with_retry(action)
+        except Exception as e:
+            self._after(query, params, started, error=e)
+            raise
+        self._after(query, params, started, 0 if result is None else 1)
         return result
 
-    def fetchall(self, query: str, params: Optional[tuple] = None) -> list[Any]:
-        """Fetch all rows from the result set."""
+    def fetchall(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        *,
+        row_format: Optional[RowFormat] = None,
+        converters: Optional[Mapping[str, Converter]] = None,
+    ) -> list[Any]:
+        """Fetch all rows, shaped by `row_format` / `converters` if given (see row_mapper)."""
         conn = self._validate_connection()
-        self._run_hooks("before", query, params)
-        start_time = time.time()
+        started = self._before(query, params)
 
         def action():
             with conn.cursor() as cur:
                 cur.execute(query, params or ())
-                return list(cur.fetchall())
+                if row_format is None and not converters:
+                    return list(cur.fetchall())
+                return fetch_mapped(cur, row_format or "tuple", converters)
 
-        result = with_retry(action)
-        log_query(query, start_time)
-        self._run_hooks("after", query, params)
+        try:
+            result = with_retry(action)
+        except Exception as e:
+            self._after(query, params, started, error=e)
+            raise
+        self._after(query, params, started, len(result))
         return result
 
+    def iterate(
+        self,
+        query: str,
+        params: Optional[Sequence[Any]] = None,
+        *,
+        batch_size: int = 1000,
+        describe: DescribeHook = None,
+    ) -> Iterator[Any]:
+        """
+        Stream rows through an unbuffered SSCursor, `batch_size` rows per fetch.
+        The connection is busy until the iterator is exhausted or closed.
+        """
+        conn = self._validate_connection()
+        started = self._before(query, params)
+        tup = tuple(params) if params is not None else None
+        count = 0
+
+        cur = conn.cursor(pymysql.cursors.SSCursor)
+        try:
+            if tup is not None:
+                cur.execute(query, tup)
+            else:
+                cur.execute(query)
+            if describe is not None:
+                describe(columns_of(cur))
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                count += len(rows)
+                yield from rows
+        except Exception as e:
+            self._after(query, params, started, count, e)
+            raise
+        finally:
+            cur.close()
+        self._after(query, params, started, count)
+
+    # -------- bulk copy --------
+
+    def _load_data(self, sql: str) -> int:
+        # LOCAL INFILE must be enabled per connection: use a dedicated one
+        config = self._connect_config()
+        started = self._before(sql)
+        try:
+            count = run_load_data(pymysql.connect(**{**config, "local_infile": True}), sql)
+        except Exception as e:
+            self._after(sql, None, started, error=e)
+            raise
+        self._after(sql, None, started, count)
+        return count
+
+    def copy_in(self, table: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> int:
+        """
+        Bulk-load rows (tuples in `columns` order) with LOAD DATA LOCAL INFILE,
+        fed from a temp CSV file streamed from `rows`. Returns rows loaded.
+        """
+        path = spool_csv(rows, null="NULL", true="1", false="0")
+        try:
+            count = self._load_data(load_data_sql(table, columns, path))
+        finally:
+            os.unlink(path)
+        return count
+
+    def copy_in_csv(self, table: str, columns: Sequence[str], path: str, *, header: bool = True, null: str = "") -> int:
+        """
+        Load a CSV file as-is with LOAD DATA; fields equal to `null` load as NULL,
+        quoted or not (with null="" a quoted "" is NULL too, unlike Postgres COPY).
+        """
+        sql = load_data_sql(
+            table, columns, os.path.abspath(path),
+            skip_lines=1 if header else 0, null=null, line_ending=sniff_line_ending(path),
+        )
+        return self._load_data(sql)
+
+    def copy_out(self, query: str, params: Optional[Sequence[Any]] = None, *, batch_size: int = 1000) -> Iterator[bytes]:
+        """Stream a SELECT as CSV chunks (NULL = empty field) over an unbuffered cursor."""
+        return encode_csv(self.iterate(query, params, batch_size=batch_size), batch=batch_size, true="1", false="0")
+
     # -------- health --------
 
     def test_connection(self) -> bool:
@@ -2,9 +2,27 @@
 from __future__ import annotations
 
 import asyncio
-from typing import Any, Optional, Sequence, Tuple, Dict
+from contextlib import asynccontextmanager, nullcontext, suppress
+from typing import Any, AsyncIterator, Iterable, Iterator, Mapping, Optional, Sequence, Tuple, Dict
 
 from prefiq.settings.get_settings import load_settings
+from prefiq.database.engines.abstract_engine import AbstractEngine, DescribeHook
+from prefiq.database.engine_config import EngineConfig
+from prefiq.database.loop_bridge import iter_sync, run_sync
+from prefiq.database.engines.copy_io import copy_target, split_table, status_count
+from prefiq.database.engines.row_mapper import Converter, RowFormat, columns_of, compile_mapper, map_records
+from prefiq.database.engines.statement_cache import cache_for, prepared_cache_size, track
+from prefiq.database.engines.postgres.pool import (
+    begin_session,
+    close_pool,
+    connection,
+    current_session,
+    end_session,
+    get_pool,
+    pool_stats,
+    prewarm,
+    session,
+)
 
 try:
     import asyncpg  # pip install asyncpg
@@ -15,39 +33,49 @@ else:
     _IMPORT_ERR = None
 
 
-class AsyncPostgresEngine:
+class AsyncPostgresEngine(AbstractEngine[Any]):
     """
     Minimal async Postgres engine built on asyncpg.
 
     IMPORTANT:
-      * No shared pool — each call opens/closes its own connection.
-      * This avoids cross-event-loop issues when sync wrappers call asyncio.run()
-        multiple times in the same process (e.g., CLI tools), which can cause
-        'another operation is in progress' with pooled connections.
+      * Queries run on a per-event-loop asyncpg pool (see postgres/pool.py), so
+        a pool is never shared across loops.
+      * The sync facade runs each call on the shared bridge loop
+        (prefiq.database.loop_bridge), which owns one long-lived pool.
+      * Calls inside `async with engine.session()` share one pinned connection.
     """
 
     dialect_name = "postgres"
     name = "postgres"
     driver = "asyncpg"
+    engine_label = "postgres"
 
-    def __init__(self) -> None:
+    def __init__(self, config: Optional[EngineConfig] = None) -> None:
+        super().__init__()
         if asyncpg is None:
             raise RuntimeError(
                 "asyncpg is required for AsyncPostgresEngine. "
                 f"Original import error: {_IMPORT_ERR!r}"
             )
-        s = load_settings()
-        host = (getattr(s, "DB_HOST", "localhost") or "").strip()
-        port = int(getattr(s, "DB_PORT", 5432))
-        user = getattr(s, "DB_USER", "postgres")
-        password = getattr(s, "DB_PASS", "")
-        database = getattr(s, "DB_NAME", "postgres")
+        if config is not None:
+            host, port, user = config.host, config.port, config.user or "postgres"
+            password, database = config.password, config.database or "postgres"
+        else:
+            s = load_settings()
+            host = (getattr(s, "DB_HOST", "localhost") or "").strip()
+            port = int(getattr(s, "DB_PORT", 5432))
+            user = getattr(s, "DB_USER", "postgres")
+            password = getattr(s, "DB_PASS", "")
+            database = getattr(s, "DB_NAME", "postgres")
 
         # Store connection params for connect()
         self._params: Dict[str, Any] = dict(
             host=host, port=port, user=user, password=password, database=database
         )
 
+        # asyncpg prepares per connection itself; this mirrors its LRU for hit/miss metrics
+        self._prepared = prepared_cache_size()
+
         # Display URL for diagnostics (mask password)
         self.url = f"postgresql://{user}:*****@{host}:{port}/{database}"
 
@@ -65,73 +93,352 @@ class AsyncPostgresEngine:
 
     # ---------- public API (async) ----------
 
-    async def aexecute(self, sql: str, params: Sequence[Any] | None = None) -> Any:
-        conn = await asyncpg.connect(**self._params)
-        try:
-            return await conn.execute(sql, *(params or ()))
-        finally:
-            await conn.close()
+    async def aexecute(self, sql: str, params: Sequence[Any] | None = None) -> int:
+        """Run a write; returns the affected row count (parsed from the command status)."""
+        async with connection(self._params) as conn:
+            started = self._before(sql, params)
+            track(cache_for(conn, "postgres", self._prepared), sql, params)
+            try:
+                status = await conn.execute(sql, *(params or ()))
+            except Exception as e:
+                self._after(sql, params, started, error=e)
+                raise
+            rowcount = status_count(status)
+            self._after(sql, params, started, rowcount)
+            return rowcount
+
+    async def aexecutemany(self, sql: str, param_list: Sequence[Sequence[Any]]) -> int:
+        """Run one statement per parameter set (atomic); returns the number of sets."""
+        params = [tuple(p) for p in param_list]
+        async with connection(self._params) as conn:
+            started = self._before(sql, None)
+            track(cache_for(conn, "postgres", self._prepared), sql, params[0] if params else None)
+            try:
+                await conn.executemany(sql, params)
+            except Exception as e:
+                self._after(sql, None, started, error=e)
+                raise
+            self._after(sql, None, started, len(params))
+            return len(params)
+
+    async def afetchone(
+        self,
+        sql: str,
+        params: Sequence[Any] | None = None,
+        *,
+        row_format: Optional[RowFormat] = None,
+        converters: Optional[Mapping[str, Converter]] = None,
+    ) -> Optional[Any]:
+        async with connection(self._params) as conn:
+            started = self._before(sql, params)
+            track(cache_for(conn, "postgres", self._prepared), sql, params)
+            try:
+                rec = await conn.fetchrow(sql, *(params or ()))
+            except Exception as e:
+                self._after(sql, params, started, error=e)
+                raise
+            self._after(sql, params, started, 0 if rec is None else 1)
+            if rec is None:
+                return None
+            if row_format is None and not converters:
+                return self._row_to_tuple(rec)
+            return compile_mapper(rec.keys(), row_format or "tuple", converters).one(rec)
+
+    async def afetchall(
+        self,
+        sql: str,
+        params: Sequence[Any] | None = None,
+        *,
+        row_format: Optional[RowFormat] = None,
+        converters: Optional[Mapping[str, Converter]] = None,
+    ) -> list[Any]:
+        async with connection(self._params) as conn:
+            started = self._before(sql, params)
+            track(cache_for(conn, "postgres", self._prepared), sql, params)
+            try:
+                rows = await conn.fetch(sql, *(params or ()))
+            except Exception as e:
+                self._after(sql, params, started, error=e)
+                raise
+            self._after(sql, params, started, len(rows))
+            if row_format is None and not converters:
+                return [self._row_to_tuple(r) for r in rows]
+            # Records index positionally: shaped straight from them, no tuple pass first
+            return map_records(rows, row_format or "tuple", converters)
+
+    async def aiterate(
+        self,
+        sql: str,
+        params: Sequence[Any] | None = None,
+        *,
+        batch_size: int = 1000,
+        describe: DescribeHook = None,
+    ) -> AsyncIterator[Tuple[Any, ...]]:
+        """
+        Stream rows through a server-side cursor, `batch_size` rows per round trip.
+        Inside a session other statements may run between batches; each round
+        trip takes its turn on the pinned connection.
+        """
+        async with connection(self._params, hold=False) as conn:
+            pin = current_session(await get_pool(self._params))
+            turn = pin.exclusive if pin is not None else nullcontext
+            started = self._before(sql, params)
+            count = 0
+            try:
+                # asyncpg cursors only live inside a transaction (a savepoint if one is open)
+                tx = conn.transaction()
+                async with turn():
+                    await tx.start()
+                try:
+                    async with turn():
+                        cur = await conn.cursor(sql, *(params or ()))
+                    while True:
+                        async with turn():
+                            recs = await cur.fetch(max(1, batch_size))
+                        if not recs:
+                            break
+                        if count == 0 and describe is not None:
+                            describe(columns_of(recs[0]))
+                        count += len(recs)
+                        for rec in recs:
+                            yield self._row_to_tuple(rec)
+                except BaseException:
+                    async with turn():
+                        await tx.rollback()
+                    raise
+                async with turn():
+                    await tx.commit()
+            except Exception as e:
+                self._after(sql, params, started, count, e)
+                raise
+            self._after(sql, params, started, count)
+
+    # ---------- bulk copy (async) ----------
+
+    async def acopy_in(self, table: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> int:
+        """
+        Bulk-load rows (tuples in `columns` order, Python-typed) with binary
+        COPY via copy_records_to_table. Returns rows loaded.
+        """
+        schema, name = split_table(table)
+        sql = f"COPY {copy_target(table, columns)} FROM STDIN (FORMAT binary)"
+        async with connection(self._params) as conn:
+            started = self._before(sql)
+            try:
+                status = await conn.copy_records_to_table(
+                    name, records=rows, columns=list(columns) or None, schema_name=schema
+                )
+            except Exception as e:
+                self._after(sql, None, started, error=e)
+                raise
+        count = status_count(status)
+        self._after(sql, None, started, count)
+        return count
+
+    async def acopy_in_csv(self, table: str, columns: Sequence[str], path: str, *, header: bool = True, null: str = "") -> int:
+        """Load a CSV file as-is (server-side parsing); fields equal to `null` load as NULL."""
+        schema, name = split_table(table)
+        sql = f"COPY {copy_target(table, columns)} FROM STDIN (FORMAT csv)"
+        async with connection(self._params) as conn:
+            started = self._before(sql)
+            try:
+                status = await conn.copy_to_table(
+                    name, source=path, columns=list(columns) or None, schema_name=schema,
+                    format="csv", header=header, null=null,
+                )
+            except Exception as e:
+                self._after(sql, None, started, error=e)
+                raise
+        count = status_count(status)
+        self._after(sql, None, started, count)
+        return count
+
+    async def acopy_out(self, sql: str, params: Sequence[Any] | None = None) -> AsyncIterator[bytes]:
+        """
+        Stream a query's result as CSV chunks via COPY (...) TO STDOUT.
+        A bounded queue applies backpressure to the server while the consumer lags.
+        """
+        async with connection(self._params) as conn:
+            started = self._before(sql, params)
+            chunks: "asyncio.Queue[Any]" = asyncio.Queue(maxsize=16)
+            done = object()
+
+            async def _pump() -> None:
+                try:
+                    await conn.copy_from_query(sql, *(params or ()), output=chunks.put, format="csv")
+                except asyncio.CancelledError:
+                    raise
+                except BaseException as e:
+                    await chunks.put(e)
+                    return
+                await chunks.put(done)
+
+            task = asyncio.ensure_future(_pump())
+            try:
+                while True:
+                    item = await chunks.get()
+                    if item is done:
+                        break
+                    if isinstance(item, BaseException):
+                        raise item
+                    yield item
+            except Exception as e:
+                self._after(sql, params, started, error=e)
+                raise
+            finally:
+                if not task.done():
+                    task.cancel()
+                    with suppress(BaseException):
+                        await task
+            self._after(sql, params, started)
+
+    async def aconnect(self) -> None:
+        """Create this loop's pool now instead of on the first statement."""
+        await get_pool(self._params)
 
-    async def afetchone(self, sql: str, params: Sequence[Any] | None = None) -> Optional[Tuple[Any, ...]]:
-        conn = await asyncpg.connect(**self._params)
+    async def aclose(self) -> None:
+        """Close the pools bound to the running event loop."""
+        await close_pool()
+
+    async def prewarm(self, count: int = 1) -> None:
+        """Open `count` pooled connections up front (bounded by pool size)."""
+        await prewarm(count, self._params)
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Size / idle / in-use of the current loop's pools."""
+        return pool_stats()
+
+    # ---------- connection affinity / transactions (async) ----------
+
+    @asynccontextmanager
+    async def session(self):
+        """
+        Pin one pooled connection for every a* call inside the block.
+        Usage:
+            async with db.session():
+                await db.aexecute("INSERT ...")
+                row = await db.afetchone("SELECT ...")
+        """
+        async with session(self._params):
+            yield self
+
+    @asynccontextmanager
+    async def transaction(self):
+        """
+        Run the block in one transaction on a pinned connection; yields the
+        asyncpg connection. Nested blocks become savepoints (asyncpg semantics).
+        """
+        async with session(self._params) as pin:
+            outer = pin.tx is None
+            async with pin.exclusive() as conn:
+                tx = conn.transaction()
+                await tx.start()
+            if outer:
+                pin.tx, pin.in_tx = tx, True
+            try:
+                yield pin.raw
+            except BaseException:
+                async with pin.exclusive():
+                    await tx.rollback()
+                raise
+            else:
+                async with pin.exclusive():
+                    await tx.commit()
+            finally:
+                if outer:
+                    pin.tx, pin.in_tx = None, False
+
+    async def begin(self) -> None:
+        """Start a transaction on the pinned connection (pins one if needed)."""
+        pool = await get_pool(self._params)
+        pin = current_session(pool)
+        if pin is None:
+            pin = await begin_session(self._params)
+        if pin.tx is not None:
+            return
         try:
-            rec = await conn.fetchrow(sql, *(params or ()))
-            return self._row_to_tuple(rec) if rec is not None else None
-        finally:
-            await conn.close()
+            async with pin.exclusive() as conn:
+                tx = conn.transaction()
+                await tx.start()
+        except BaseException:
+            if pin.implicit:
+                await end_session(pin)
+            raise
+        pin.tx, pin.in_tx = tx, True
 
-    async def afetchall(self, sql: str, params: Sequence[Any] | None = None) -> list[Tuple[Any, ...]]:
-        conn = await asyncpg.connect(**self._params)
+    async def _finish(self, commit: bool) -> None:
+        pool = await get_pool(self._params)
+        pin = current_session(pool)
+        if pin is None or pin.tx is None:
+            # Nothing open on this context; statements already autocommitted.
+            return
         try:
-            rows = await conn.fetch(sql, *(params or ()))
-            return [self._row_to_tuple(r) for r in rows]
+            async with pin.exclusive():
+                await (pin.tx.commit() if commit else pin.tx.rollback())
+            pin.tx, pin.in_tx = None, False
         finally:
-            await conn.close()
+            if pin.implicit:
+                await end_session(pin)
 
-    async def aclose(self) -> None:
-        # no shared pool; nothing to close
-        return None
+    async def commit(self) -> None:
+        await self._finish(True)
+
+    async def rollback(self) -> None:
+        await self._finish(False)
 
     # ---------- sync facade (for callers that don't await) ----------
 
     def _run(self, coro):
-        # If there is *no* running loop, use asyncio.run (simple & safe)
-        try:
-            asyncio.get_running_loop()
-        except RuntimeError:
-            return asyncio.run(coro)
-        # If a loop is already running in this thread, create a new loop
-        # in a temporary thread for this call (avoid blocking the running loop)
-        from concurrent.futures import ThreadPoolExecutor
-
-        def _runner() -> Any:
-            loop = asyncio.new_event_loop()
-            try:
-                asyncio.set_event_loop(loop)
-                return loop.run_until_complete(coro)
-            finally:
-                try:
-                    loop.run_until_complete(asyncio.sleep(0))
-                except (ValueError, TypeError):
-                    pass
-                loop.close()
-
-        with ThreadPoolExecutor(max_workers=1) as ex:
-            fut = ex.submit(_runner)
-            return fut.result()
+        # Blocking calls run on the shared bridge loop, so its asyncpg pool
+        # persists across calls instead of dying with a throwaway loop.
+        return run_sync(coro)
 
     # Synchronous wrappers expected by queries/builder:
-    def execute(self, sql: str, params: Sequence[Any] | None = None) -> Any:
+    def connect(self) -> None:
+        self._run(self.aconnect())
+
+    def execute(self, sql: str, params: Sequence[Any] | None = None) -> int:
         return self._run(self.aexecute(sql, params))
 
-    def fetchone(self, sql: str, params: Sequence[Any] | None = None) -> Optional[Tuple[Any, ...]]:
-        return self._run(self.afetchone(sql, params))
+    def executemany(self, sql: str, param_list: Sequence[Sequence[Any]]) -> int:
+        return self._run(self.aexecutemany(sql, param_list))
+
+    def fetchone(self, sql: str, params: Sequence[Any] | None = None, **shape: Any) -> Optional[Any]:
+        return self._run(self.afetchone(sql, params, **shape))
 
-    def fetchall(self, sql: str, params: Sequence[Any] | None = None) -> list[Tuple[Any, ...]]:
-        return self._run(self.afetchall(sql, params))
+    def fetchall(self, sql: str, params: Sequence[Any] | None = None, **shape: Any) -> list[Any]:
+        return self._run(self.afetchall(sql, params, **shape))
+
+    def iterate(
+        self,
+        sql: str,
+        params: Sequence[Any] | None = None,
+        *,
+        batch_size: int = 1000,
+        describe: DescribeHook = None,
+    ) -> Iterator[Tuple[Any, ...]]:
+        """Sync streaming over aiterate(), one bridge hop per batch."""
+        return iter_sync(self.aiterate(sql, params, batch_size=batch_size, describe=describe), chunk=batch_size)
+
+    def copy_in(self, table: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> int:
+        return self._run(self.acopy_in(table, columns, rows))
+
+    def copy_in_csv(self, table: str, columns: Sequence[str], path: str, *, header: bool = True, null: str = "") -> int:
+        return self._run(self.acopy_in_csv(table, columns, path, header=header, null=null))
+
+    def copy_out(self, sql: str, params: Sequence[Any] | None = None) -> Iterator[bytes]:
+        """Sync streaming over acopy_out(), a few chunks per bridge hop."""
+        return iter_sync(self.acopy_out(sql, params), chunk=8)
 
     def close(self) -> None:
         try:
             self._run(self.aclose())
         except (ValueError, TypeError):
             pass
+
+    def test_connection(self) -> bool:
+        """Simple connectivity check."""
+        try:
+            return self.fetchone("SELECT 1") is not None
+        except (asyncpg.PostgresError, asyncio.TimeoutError, OSError):
+            return False
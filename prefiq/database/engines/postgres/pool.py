@@ -0,0 +1,348 @@
+# =============================================================
+# Postgres Connection Pool (pool.py)
+# file path: prefiq/database/engines/postgres/pool.py
+#
+# Purpose:
+#   - One asyncpg pool per (running event loop, server/database), created
+#     lazily on first use, so no query pays TCP/auth/TLS setup.
+#   - Sizing and recycling come from the same DB_POOL_* settings as the
+#     MariaDB pool; statement caching from DB_PREPARED_CACHE_SIZE when
+#     DB_PREPARED_STATEMENTS is on, else DB_PG_STATEMENT_CACHE_SIZE.
+#   - Connections older than max_lifetime are closed on release instead
+#     of being returned (asyncpg reconnects that slot on demand).
+#   - session() pins one connection to the current context with the shared
+#     helpers from async_pool, exactly like the MariaDB / MySQL pools.
+# =============================================================
+
+from __future__ import annotations
+
+import asyncio
+import time
+import weakref
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, Iterator, Mapping, Optional, Tuple
+
+from prefiq.core.logger import get_logger
+from prefiq.database import metrics
+from prefiq.database.engines.async_pool import (
+    PinnedConnection,
+    PoolKey,
+    PoolOptions,
+    current_pin,
+    pin_implicit,
+    pinned,
+    pool_key,
+    unpin_implicit,
+)
+from prefiq.database.engines.statement_cache import prepared_cache_size
+from prefiq.database.loop_bridge import on_shutdown
+from prefiq.settings.get_settings import load_settings
+
+try:
+    import asyncpg  # pip install asyncpg
+except Exception as e:  # pragma: no cover
+    asyncpg = None
+    _IMPORT_ERR = e
+else:
+    _IMPORT_ERR = None
+
+LOG = get_logger("prefiq.database.pool")
+
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[PoolKey, asyncio.Future]]" = weakref.WeakKeyDictionary()
+# asyncpg.Pool has __slots__ and no max-lifetime knob: keep our options by id(pool)
+_pool_options: Dict[int, PoolOptions] = {}
+
+
+if asyncpg is not None:
+    class _PooledConnection(asyncpg.Connection):  # type: ignore[misc,valid-type]
+        """asyncpg connection that remembers when it was opened (for lifetime recycling)."""
+
+        def __init__(self, *args: Any, **kwargs: Any) -> None:
+            super().__init__(*args, **kwargs)
+            self._prefiq_created = time.monotonic()
+            metrics.POOL_CONNECTS.inc("postgres")
+else:  # pragma: no cover
+    _PooledConnection = None  # type: ignore[assignment,misc]
+
+
+def _require_asyncpg() -> None:
+    if asyncpg is None:
+        raise RuntimeError(
+            "asyncpg is required for the Postgres pool. "
+            f"Original import error: {_IMPORT_ERR!r}"
+        )
+
+
+def _config(config: Optional[Mapping[str, Any]] = None) -> Dict[str, Any]:
+    """
+    `config` (host/port/user/password/database plus optional pool_size,
+    min_idle, max_lifetime, idle_timeout, acquire_timeout,
+    statement_cache_size), else the DB_* settings.
+    """
+    if config is not None:
+        return dict(config)
+    s = load_settings()
+    return dict(
+        host=(getattr(s, "DB_HOST", "localhost") or "").strip(),
+        port=int(getattr(s, "DB_PORT", 5432)),
+        user=getattr(s, "DB_USER", "postgres"),
+        password=getattr(s, "DB_PASS", ""),
+        database=getattr(s, "DB_NAME", "postgres"),
+    )
+
+
+def _key(cfg: Mapping[str, Any]) -> PoolKey:
+    return pool_key(cfg, 5432)
+
+
+def _statement_cache_size(cfg: Mapping[str, Any]) -> int:
+    val = cfg.get("statement_cache_size")
+    if val is None:
+        # DB_PREPARED_STATEMENTS sizes asyncpg's per-connection cache like the other engines'
+        val = prepared_cache_size() or getattr(load_settings(), "DB_PG_STATEMENT_CACHE_SIZE", 100)
+    try:
+        return max(0, int(val))
+    except (TypeError, ValueError):
+        return 100
+
+
+async def _create(cfg: Dict[str, Any]) -> Any:
+    _require_asyncpg()
+    opts = PoolOptions.from_config(cfg)
+    pool = await asyncpg.create_pool(
+        host=cfg.get("host"),
+        port=cfg.get("port"),
+        user=cfg.get("user"),
+        password=cfg.get("password"),
+        database=cfg.get("database"),
+        min_size=opts.min_idle,
+        max_size=opts.max_size,
+        max_inactive_connection_lifetime=opts.idle_timeout,
+        statement_cache_size=_statement_cache_size(cfg),
+        connection_class=_PooledConnection,
+    )
+    _pool_options[id(pool)] = opts
+    LOG.info(
+        "pg_pool_created",
+        extra={"host": cfg.get("host"), "database": cfg.get("database"), "max_size": opts.max_size},
+    )
+    return pool
+
+
+async def get_pool(config: Optional[Mapping[str, Any]] = None) -> Any:
+    """Return the asyncpg pool for `config` on the running loop, creating it once."""
+    cfg = _config(config)
+    loop = asyncio.get_running_loop()
+    per_loop = _pools.get(loop)
+    if per_loop is None:
+        per_loop = _pools[loop] = {}
+    key = _key(cfg)
+    fut = per_loop.get(key)
+    if fut is None or (fut.done() and (fut.cancelled() or fut.exception() is not None)):
+        # Concurrent first callers share one creation task
+        fut = per_loop[key] = loop.create_task(_create(cfg))
+    return await asyncio.shield(fut)
+
+
+def _options(pool: Any) -> PoolOptions:
+    return _pool_options.get(id(pool)) or PoolOptions()
+
+
+async def _acquire(pool: Any) -> Any:
+    t0 = time.monotonic()
+    try:
+        conn = await pool.acquire(timeout=_options(pool).acquire_timeout)
+    except asyncio.TimeoutError:
+        metrics.POOL_TIMEOUTS.inc("postgres")
+        raise
+    metrics.observe_checkout("postgres", time.monotonic() - t0)
+    return conn
+
+
+def _evicted(reason: str) -> None:
+    metrics.POOL_EVICTIONS.inc("postgres", reason)
+    metrics.POOL_CLOSES.inc("postgres")
+
+
+async def _release(pool: Any, conn: Any) -> None:
+    opts = _options(pool)
+    created = getattr(conn, "_prefiq_created", None)
+    if created is not None and time.monotonic() - created >= opts.max_lifetime:
+        # Past its lifetime: close it; asyncpg refills the slot on the next acquire
+        _evicted("lifetime")
+        try:
+            await conn.close(timeout=5)
+        except Exception:
+            conn.terminate()
+    await pool.release(conn)
+
+
+def _stats(pool: Any) -> Dict[str, Any]:
+    return {
+        "name": "postgres",
+        "max_size": pool.get_max_size(),
+        "size": pool.get_size(),
+        "idle": pool.get_idle_size(),
+        "in_use": pool.get_size() - pool.get_idle_size(),
+    }
+
+
+def _ready(per_loop: Mapping[PoolKey, asyncio.Future]) -> Iterator[Tuple[PoolKey, Any]]:
+    for key, fut in list(per_loop.items()):
+        if fut.done() and not fut.cancelled() and fut.exception() is None:
+            yield key, fut.result()
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Size / idle / max of every pool on the current loop."""
+    try:
+        per_loop = _pools.get(asyncio.get_running_loop()) or {}
+    except RuntimeError:
+        return {}
+    return {f"{host}:{port}/{database}": _stats(pool) for (host, port, _u, database), pool in _ready(per_loop)}
+
+
+def _live_stats() -> list:
+    # Scrape-time sampler: every pool on every loop (the metrics thread has no loop)
+    return [_stats(pool) for per_loop in list(_pools.values()) for _, pool in _ready(per_loop)]
+
+
+metrics.register_pool_source(_live_stats)
+
+
+# ---------- connection affinity ----------
+
+class _Checkouts:
+    """
+    An asyncpg pool behind the acquire() / release() interface the shared
+    pin helpers (prefiq.database.engines.async_pool) expect, so sessions
+    behave exactly like the MariaDB / MySQL ones.
+    """
+
+    __slots__ = ("pool", "name", "_errors")
+
+    def __init__(self, pool: Any) -> None:
+        self.pool = pool
+        self.name = "postgres"
+        # Errors that leave the connection unusable (SQL errors do not)
+        self._errors: Tuple[type, ...] = (
+            (asyncpg.PostgresConnectionError, asyncpg.ConnectionDoesNotExistError, OSError)
+            if asyncpg is not None else (OSError,)
+        )
+
+    async def acquire(self) -> Any:
+        return await _acquire(self.pool)
+
+    async def release(self, conn: Any, *, discard: bool = False) -> None:
+        if discard:
+            # Broken, or left mid-transaction: close so the server rolls it back
+            _evicted("broken")
+            try:
+                await conn.close(timeout=5)
+            except Exception:
+                conn.terminate()
+        await _release(self.pool, conn)
+
+
+# One adapter per asyncpg pool: pins are matched to their pool by identity
+_checkouts: Dict[int, _Checkouts] = {}
+_pinned: ContextVar[Optional[PinnedConnection]] = ContextVar("prefiq_pg_pin", default=None)
+
+
+def _checkouts_for(pool: Any) -> _Checkouts:
+    adapter = _checkouts.get(id(pool))
+    if adapter is None or adapter.pool is not pool:
+        adapter = _checkouts[id(pool)] = _Checkouts(pool)
+    return adapter
+
+
+def current_session(pool: Any) -> Optional[PinnedConnection]:
+    """The connection pinned in this context for `pool`, if any."""
+    return current_pin(_pinned, _checkouts_for(pool))
+
+
+@asynccontextmanager
+async def connection(config: Optional[Mapping[str, Any]] = None, *, hold: bool = True) -> AsyncIterator[Any]:
+    """
+    Yield the connection pinned in this context, or check one out for the block.
+    A pinned connection is held exclusively for the block (gathered tasks take
+    turns); hold=False leaves that to the caller, per round trip.
+    """
+    pool = await get_pool(config)
+    pin = current_session(pool)
+    if pin is not None:
+        if not hold:
+            yield pin.raw
+            return
+        async with pin.exclusive() as conn:
+            yield conn
+        return
+    conn = await _acquire(pool)
+    try:
+        yield conn
+    finally:
+        await _release(pool, conn)
+
+
+@asynccontextmanager
+async def session(config: Optional[Mapping[str, Any]] = None) -> AsyncIterator[PinnedConnection]:
+    """Pin one pooled connection to the current context; nested sessions reuse it."""
+    pool = await get_pool(config)
+    async with pinned(_pinned, _checkouts_for(pool)) as pin:
+        yield pin
+
+
+async def begin_session(config: Optional[Mapping[str, Any]] = None) -> PinnedConnection:
+    """Pin a connection for begin() called outside any session block."""
+    pool = await get_pool(config)
+    return await pin_implicit(_pinned, _checkouts_for(pool))
+
+
+async def end_session(pin: PinnedConnection) -> None:
+    """Release a connection pinned by begin_session()."""
+    await unpin_implicit(_pinned, pin)
+
+
+# ---------- lifecycle ----------
+
+async def prewarm(count: int = 1, config: Optional[Mapping[str, Any]] = None) -> None:
+    """
+    Open `count` connections (bounded by max_size) and park them in the pool.
+    Useful at boot so the first query doesn't pay connection setup.
+    """
+    if count <= 0:
+        return
+    pool = await get_pool(config)
+    count = min(count, pool.get_max_size())
+    conns = []
+    try:
+        for _ in range(count):
+            conns.append(await _acquire(pool))
+    finally:
+        for c in conns:
+            await pool.release(c)
+
+
+async def close_pool() -> None:
+    """Close every pool bound to the running loop and forget them."""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    per_loop = _pools.pop(loop, None) or {}
+    for fut in per_loop.values():
+        try:
+            pool = await fut
+        except Exception:
+            continue
+        _pool_options.pop(id(pool), None)
+        _checkouts.pop(id(pool), None)
+        try:
+            await asyncio.wait_for(pool.close(), timeout=10)
+        except Exception:
+            pool.terminate()
+
+
+# Pools created by sync callers live on the shared bridge loop; close them there.
+on_shutdown(close_pool)
@@ -1,19 +1,506 @@
+# =============================================================
+# SyncPostgresEngine
+# file path: prefiq/database/engines/postgres/sync_engine.py
+#
+# Purpose:
+#   - True synchronous Postgres engine implementing AbstractEngine[Any]
+#     on psycopg2 (no event loop, no asyncio.run per statement).
+#   - Thread-safe ThreadedConnectionPool; callers beyond max size wait
+#     (bounded by DB_POOL_ACQUIRE_TIMEOUT) instead of failing.
+#   - Native `%s` placeholders (paramstyle "format"), so the $n mapping
+#     used for asyncpg is skipped on this path.
+#
+# Notes for Developers:
+#   - Single statements run in autocommit mode.
+#   - transaction() / begin() pin one connection to the calling thread
+#     until commit/rollback; every engine call on that thread reuses it.
+#   - iterate() streams large results through a named (server-side) cursor
+#     on its own checkout (or the pinned connection inside a transaction).
+#   - copy_in() / copy_out() use COPY ... FROM STDIN / TO STDOUT (CSV).
+# =============================================================
+
 from __future__ import annotations
 
-from typing import Any, Optional, Sequence, Tuple
+import itertools
+import queue
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, Mapping, Optional, Sequence
+
+from prefiq.database import metrics
+from prefiq.database.engines.abstract_engine import AbstractEngine, DescribeHook
+from prefiq.database.engine_config import EngineConfig
+from prefiq.database.engines.async_pool import PoolOptions, PoolTimeoutError
+from prefiq.database.engines.copy_io import ChunkReader, copy_target, encode_csv
+from prefiq.database.engines.row_mapper import Converter, RowFormat, columns_of, fetch_mapped
+from prefiq.settings.get_settings import load_settings
+
+try:
+    import psycopg2  # pip install psycopg2-binary
+    import psycopg2.pool
+except Exception as e:  # pragma: no cover
+    psycopg2 = None
+    _IMPORT_ERR = e
+else:
+    _IMPORT_ERR = None
+
+
+_cursor_ids = itertools.count(1)
+_COPY_DONE = object()
+_live_engines: "weakref.WeakSet[SyncPostgresEngine]" = weakref.WeakSet()
+
 
-# Reuse the async engine under the hood and provide a sync-looking API.
-# This keeps the placeholder style ($1) consistent with our PostgresDialect.
-from .async_engine import AsyncPostgresEngine
+def _live_stats() -> list:
+    return [s for s in (e.pool_stats() for e in list(_live_engines)) if s]
 
 
-class SyncPostgresEngine(AsyncPostgresEngine):
+metrics.register_pool_source(_live_stats)
+
+
+def _null_option(null: str) -> str:
+    return "NULL '" + null.replace("'", "''") + "'"
+
+
+class SyncPostgresEngine(AbstractEngine[Any]):
     """
-    Sync facade backed by AsyncPostgresEngine.
-    Public methods are the same: execute(), fetchone(), fetchall(), close().
+    Synchronous Postgres engine backed by a psycopg2 ThreadedConnectionPool.
+    Public methods match the other sync engines: execute(), executemany(),
+    fetchone(), fetchall(), begin/commit/rollback, transaction(), close().
     """
 
-    driver = "asyncpg(sync-wrapper)"  # for diagnostics
+    dialect_name = "postgres"
+    name = "postgres"
+    driver = "psycopg2"
+    engine_label = "postgres"
+    paramstyle = "format"  # %s placeholders, passed to the driver as-is
+
+    def __init__(self, config: Optional[EngineConfig] = None) -> None:
+        super().__init__()
+        if psycopg2 is None:
+            raise RuntimeError(
+                "psycopg2 is required for SyncPostgresEngine. "
+                f"Original import error: {_IMPORT_ERR!r}"
+            )
+        if config is not None:
+            host, port, user = config.host, config.port, config.user or "postgres"
+            password, database = config.password, config.database or "postgres"
+        else:
+            s = load_settings()
+            host = (getattr(s, "DB_HOST", "localhost") or "").strip()
+            port = int(getattr(s, "DB_PORT", 5432))
+            user = getattr(s, "DB_USER", "postgres")
+            password = getattr(s, "DB_PASS", "")
+            database = getattr(s, "DB_NAME", "postgres")
+
+        self._params: Dict[str, Any] = dict(
+            host=host, port=port, user=user, password=password, dbname=database
+        )
+        self._options = PoolOptions.from_config({})
+
+        # Display URL for diagnostics (mask password)
+        self.url = f"postgresql://{user}:*****@{host}:{port}/{database}"
+
+        self._pool: Optional[Any] = None
+        self._pool_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self._options.max_size)
+        self._local = threading.local()  # .conn: connection pinned to this thread
+        _live_engines.add(self)
+
+    # -------- lifecycle --------
+
+    def connect(self) -> None:
+        """Create the connection pool (idempotent)."""
+        if self._pool is not None:
+            return
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = psycopg2.pool.ThreadedConnectionPool(
+                    self._options.min_idle, self._options.max_size, **self._params
+                )
+
+    def close(self) -> None:
+        """Close every pooled connection."""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            try:
+                pool.closeall()
+            except psycopg2.Error:
+                pass
+
+    def pool_stats(self) -> Dict[str, Any]:
+        pool = self._pool
+        if pool is None:
+            return {}
+        idle = len(getattr(pool, "_pool", ()))
+        in_use = len(getattr(pool, "_used", {}))
+        return {
+            "name": "postgres",
+            "max_size": self._options.max_size,
+            "size": idle + in_use,
+            "idle": idle,
+            "in_use": in_use,
+        }
+
+    # -------- connection checkout / pinning --------
+
+    def _getconn(self) -> Any:
+        self.connect()
+        t0 = time.monotonic()
+        if not self._slots.acquire(timeout=self._options.acquire_timeout):
+            metrics.POOL_TIMEOUTS.inc("postgres")
+            raise PoolTimeoutError(
+                f"postgres: no connection available within {self._options.acquire_timeout:.1f}s "
+                f"(max_size={self._options.max_size})"
+            )
+        try:
+            assert self._pool is not None
+            conn = self._pool.getconn()
+            if conn.closed:
+                self._pool.putconn(conn, close=True)
+                conn = self._pool.getconn()
+            conn.autocommit = True
+            metrics.observe_checkout("postgres", time.monotonic() - t0)
+            return conn
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _putconn(self, conn: Any, *, broken: bool = False) -> None:
+        try:
+            pool = self._pool
+            if broken or conn.closed:
+                metrics.POOL_EVICTIONS.inc("postgres", "broken")
+                metrics.POOL_CLOSES.inc("postgres")
+            if pool is not None:
+                pool.putconn(conn, close=broken or bool(conn.closed))
+            else:
+                conn.close()
+        except psycopg2.Error:
+            pass
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def _connection(self) -> Iterator[Any]:
+        """Yield this thread's pinned connection, or check one out for the block."""
+        pinned = getattr(self._local, "conn", None)
+        if pinned is not None:
+            yield pinned
+            return
+        conn = self._getconn()
+        broken = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            self._putconn(conn, broken=broken)
+
+    def _pin(self) -> Any:
+        conn = self._getconn()
+        self._local.conn = conn
+        return conn
+
+    def _unpin(self, *, broken: bool = False) -> None:
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            self._putconn(conn, broken=broken)
+
+    # -------- transactions --------
+
+    def begin(self) -> None:
+        """Pin a connection to this thread and open a transaction on it."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._pin()
+        if not conn.autocommit:
+            return  # already inside a transaction
+        conn.autocommit = False  # psycopg2 issues BEGIN on the next statement
+
+    def commit(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            return  # nothing pinned: statements already autocommitted
+        try:
+            conn.commit()
+        finally:
+            self._unpin(broken=bool(conn.closed))
+
+    def rollback(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            return
+        try:
+            conn.rollback()
+        finally:
+            self._unpin(broken=bool(conn.closed))
+
+    @contextmanager
+    def transaction(self):
+        """
+        Pin one connection for a multi-statement transaction.
+        Engine calls made on this thread inside the block use the same connection.
+        Usage:
+            with db.transaction() as cur:
+                cur.execute("INSERT ...", (...,))
+                db.execute("UPDATE ...", (...,))
+        """
+        if getattr(self._local, "conn", None) is not None:
+            # Nested: join the outer transaction
+            with self._local.conn.cursor() as cur:
+                yield cur
+            return
+
+        conn = self._pin()
+        broken = False
+        try:
+            conn.autocommit = False
+            with conn.cursor() as cur:
+                yield cur
+            conn.commit()
+        except BaseException as e:
+            broken = isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError))
+            if not conn.closed:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    broken = True
+            raise
+        finally:
+            self._unpin(broken=broken)
+
+    # -------- queries --------
+
+    def execute(self, query: str, params: Optional[Sequence[Any]] = None) -> int:
+        """Run a single write query (INSERT/UPDATE/DELETE); returns the affected row count."""
+        started = self._before(query, params)
+        try:
+            with self._connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(query, tuple(params) if params is not None else None)
+                    rowcount = cur.rowcount
+        except Exception as e:
+            self._after(query, params, started, error=e)
+            raise
+        self._after(query, params, started, rowcount)
+        return rowcount
+
+    def executemany(self, query: str, param_list: Sequence[Sequence[Any]]) -> int:
+        """Run bulk insert/update with many param sets (atomic); returns the affected row count."""
+        started = self._before(query, None)
+        try:
+            with self.transaction() as cur:
+                cur.executemany(query, [tuple(p) for p in param_list])
+                rowcount = cur.rowcount
+        except Exception as e:
+            self._after(query, None, started, error=e)
+            raise
+        self._after(query, None, started, rowcount)
+        return rowcount
+
+    def fetchone(
+        self,
+        query: str,
+        params: Optional[Sequence[Any]] = None,
+        *,
+        row_format: Optional[RowFormat] = None,
+        converters: Optional[Mapping[str, Converter]] = None,
+    ) -> Optional[Any]:
+        started = self._before(query, params)
+        try:
+            with self._connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(query, tuple(params) if params is not None else None)
+                    if row_format is None and not converters:
+                        row = cur.fetchone()
+                    else:
+                        row = fetch_mapped(cur, row_format or "tuple", converters, one=True)
+        except Exception as e:
+            self._after(query, params, started, error=e)
+            raise
+        self._after(query, params, started, 0 if row is None else 1)
+        return row
+
+    def fetchall(
+        self,
+        query: str,
+        params: Optional[Sequence[Any]] = None,
+        *,
+        row_format: Optional[RowFormat] = None,
+        converters: Optional[Mapping[str, Converter]] = None,
+    ) -> list[Any]:
+        started = self._before(query, params)
+        try:
+            with self._connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(query, tuple(params) if params is not None else None)
+                    if row_format is None and not converters:
+                        rows = list(cur.fetchall())
+                    else:
+                        rows = fetch_mapped(cur, row_format or "tuple", converters)
+        except Exception as e:
+            self._after(query, params, started, error=e)
+            raise
+        self._after(query, params, started, len(rows))
+        return rows
+
+    def iterate(
+        self,
+        query: str,
+        params: Optional[Sequence[Any]] = None,
+        *,
+        batch_size: int = 1000,
+        describe: DescribeHook = None,
+    ) -> Iterator[Any]:
+        """
+        Stream rows through a named (server-side) cursor, `batch_size` rows per
+        round trip, so large reads never materialize in client memory.
+        Inside a transaction the stream joins it; otherwise it runs on its own
+        checkout, held until the iterator finishes or is closed. That connection
+        is never pinned to the thread: the generator may resume on other threads
+        (e.g. Starlette's iterate_in_threadpool), and writes made on this thread
+        meanwhile must not join the stream's transaction.
+        """
+        started = self._before(query, params)
+        pinned = getattr(self._local, "conn", None)
+        conn = pinned if pinned is not None else self._getconn()
+        ok = broken = False
+        count = 0
+        try:
+            if pinned is None:
+                conn.autocommit = False  # named cursors need a transaction
+            with conn.cursor(name=f"prefiq_cur_{next(_cursor_ids)}") as cur:
+                cur.itersize = max(1, int(batch_size))
+                cur.execute(query, tuple(params) if params is not None else None)
+                for row in cur:
+                    if count == 0 and describe is not None:
+                        # A named cursor's description is only known after the first fetch
+                        describe(columns_of(cur))
+                    count += 1
+                    yield row
+            ok = True
+        except Exception as e:
+            broken = isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError))
+            self._after(query, params, started, count, e)
+            raise
+        finally:
+            if pinned is None:
+                # Only the stream ran on this connection: closing early just ends its read
+                try:
+                    if ok and not conn.closed:
+                        conn.commit()
+                    elif not conn.closed:
+                        conn.rollback()
+                except psycopg2.Error:
+                    broken = True
+                finally:
+                    self._putconn(conn, broken=broken)
+        self._after(query, params, started, count)
+
+    # -------- bulk copy --------
+
+    def copy_in(self, table: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> int:
+        """
+        Bulk-load rows (tuples in `columns` order) with COPY ... FROM STDIN.
+        Rows are CSV-encoded as the server reads them; returns rows loaded.
+        """
+        sql = f"COPY {copy_target(table, columns)} FROM STDIN WITH (FORMAT csv)"
+        started = self._before(sql)
+        try:
+            with self.transaction() as cur:
+                cur.copy_expert(sql, ChunkReader(encode_csv(rows)))
+                count = max(cur.rowcount, 0)
+        except Exception as e:
+            self._after(sql, None, started, error=e)
+            raise
+        self._after(sql, None, started, count)
+        return count
+
+    def copy_in_csv(self, table: str, columns: Sequence[str], path: str, *, header: bool = True, null: str = "") -> int:
+        """Load a CSV file as-is (server-side parsing); fields equal to `null` load as NULL."""
+        opts = f"FORMAT csv, HEADER {'true' if header else 'false'}, {_null_option(null)}"
+        sql = f"COPY {copy_target(table, columns)} FROM STDIN WITH ({opts})"
+        started = self._before(sql)
+        try:
+            with open(path, "rb") as fh, self.transaction() as cur:
+                cur.copy_expert(sql, fh)
+                count = max(cur.rowcount, 0)
+        except Exception as e:
+            self._after(sql, None, started, error=e)
+            raise
+        self._after(sql, None, started, count)
+        return count
+
+    def copy_out(self, query: str, params: Optional[Sequence[Any]] = None) -> Iterator[bytes]:
+        """
+        Stream a SELECT as CSV chunks via COPY (...) TO STDOUT.
+        COPY runs on its own pooled connection in a worker thread; a bounded
+        queue keeps it at most a few chunks ahead of the consumer. Closing the
+        iterator early aborts the COPY and discards that connection.
+        """
+        chunks: "queue.Queue[Any]" = queue.Queue(maxsize=16)
+        stop = threading.Event()
+
+        def _offer(item: Any) -> bool:
+            while not stop.is_set():
+                try:
+                    chunks.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        class _Sink:
+            def write(self, data: Any) -> None:
+                if not _offer(bytes(data)):
+                    raise InterruptedError("copy_out consumer went away")
+
+        def _pump() -> None:
+            ok = False
+            conn = None
+            try:
+                conn = self._getconn()
+                with conn.cursor() as cur:
+                    sql = query
+                    if params is not None:
+                        sql = cur.mogrify(query, tuple(params)).decode("utf-8")
+                    cur.copy_expert(f"COPY ({sql}) TO STDOUT WITH (FORMAT csv)", _Sink())
+                ok = True
+                _offer(_COPY_DONE)
+            except BaseException as e:
+                _offer(e)
+            finally:
+                if conn is not None:
+                    self._putconn(conn, broken=not ok)
+
+        started = self._before(query, params)
+        worker = threading.Thread(target=_pump, name="prefiq-pg-copy-out", daemon=True)
+        worker.start()
+        try:
+            while True:
+                item = chunks.get()
+                if item is _COPY_DONE:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        except Exception as e:
+            self._after(query, params, started, error=e)
+            raise
+        finally:
+            stop.set()
+        self._after(query, params, started)
+
+    # -------- health --------
 
-    # All behavior is inherited; the asyncpg-backed _run() provides blocking calls.
-    # If later you prefer psycopg (true sync), swap the parent implementation accordingly.
+    def test_connection(self) -> bool:
+        """Simple connectivity check."""
+        try:
+            return self.fetchone("SELECT 1") is not None
+        except (psycopg2.Error, PoolTimeoutError, OSError):
+            return False
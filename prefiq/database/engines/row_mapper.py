@@ -0,0 +1,266 @@
+# =============================================================
+# Compiled Row Mappers (row_mapper.py)
+# file path: prefiq/database/engines/row_mapper.py
+#
+# Purpose:
+#   - Shape result rows once, in the engine, instead of per row in every
+#     repository: fetchone()/fetchall(..., row_format=...) on every engine,
+#     or compile_mapper(columns, ...) directly.
+#       row_format   "tuple" | "dict" | "namedtuple" | a dataclass (or any
+#                    class taking the columns as keyword arguments)
+#       converters   {column: "json" | "datetime" | "date" | "decimal" | callable}
+#   - A mapper is generated as Python source for one column layout and
+#     cached (LRU) on (columns, row_format, converters), so a page of rows is
+#     built by a single list comprehension with no per-row zip / dict
+#     updates.
+#
+# Notes for Developers:
+#   - Column names come from cursor.description (DB-API) or Record.keys()
+#     (asyncpg). Duplicate names: the last one wins for dicts and keyword
+#     classes; namedtuple renames them (_1, _2, ...).
+#   - Dataclass targets only receive the columns that are fields; other
+#     columns are dropped, missing required fields raise TypeError.
+#   - Converters are part of the cache key: pass module-level functions,
+#     not a fresh lambda per call.
+#   - Built-in converters pass None through and leave unparsable values
+#     as-is (same behaviour as the repositories' loads_json()).
+# =============================================================
+
+from __future__ import annotations
+
+import dataclasses
+import json
+from collections import namedtuple
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache, partial
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+RowFormat = Union[str, type]
+Converter = Union[str, Callable[[Any], Any]]
+
+ROW_FORMATS = ("tuple", "dict", "namedtuple")
+
+_CACHE_SIZE = 256
+
+
+# ---------- converters ----------
+
+def to_json(value: Any) -> Any:
+    if value is None or isinstance(value, (dict, list)):
+        return value
+    try:
+        return json.loads(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def to_datetime(value: Any) -> Any:
+    if value is None or isinstance(value, datetime):
+        return value
+    if isinstance(value, bytes):
+        value = value.decode()
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def to_date(value: Any) -> Any:
+    if value is None or (isinstance(value, date) and not isinstance(value, datetime)):
+        return value
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, bytes):
+        value = value.decode()
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except (TypeError, ValueError):
+        return value
+
+
+def to_decimal(value: Any) -> Any:
+    if value is None or isinstance(value, Decimal):
+        return value
+    try:
+        # str() first so floats keep their shortest repr (0.1, not 0.1000000000000000055...)
+        return Decimal(str(value) if isinstance(value, float) else value)
+    except (TypeError, ValueError, InvalidOperation):
+        return value
+
+
+CONVERTERS: Dict[str, Callable[[Any], Any]] = {
+    "json": to_json,
+    "datetime": to_datetime,
+    "date": to_date,
+    "decimal": to_decimal,
+}
+
+
+def _converter(conv: Converter) -> Callable[[Any], Any]:
+    if callable(conv):
+        return conv
+    try:
+        return CONVERTERS[str(conv).lower()]
+    except KeyError:
+        raise ValueError(f"Unknown converter {conv!r}; expected a callable or one of {', '.join(CONVERTERS)}") from None
+
+
+# ---------- mapper ----------
+
+class RowMapper:
+    """Compiled shaping for one column layout: one(row) and many(rows)."""
+
+    __slots__ = ("columns", "row_format", "one", "many")
+
+    def __init__(
+        self,
+        columns: Tuple[str, ...],
+        row_format: RowFormat,
+        one: Callable[[Sequence[Any]], Any],
+        many: Callable[[Iterable[Sequence[Any]]], List[Any]],
+    ) -> None:
+        self.columns = columns
+        self.row_format = row_format
+        self.one = one
+        self.many = many
+
+    def __repr__(self) -> str:
+        fmt = self.row_format if isinstance(self.row_format, str) else self.row_format.__name__
+        return f"RowMapper({fmt}, {len(self.columns)} columns)"
+
+
+def _cell(i: int, convs: Mapping[int, str]) -> str:
+    return f"{convs[i]}(r[{i}])" if i in convs else f"r[{i}]"
+
+
+def _build(columns: Tuple[str, ...], row_format: RowFormat, conv_items: Tuple[Tuple[str, Callable], ...]) -> RowMapper:
+    ns: Dict[str, Any] = {}
+    convs: Dict[int, str] = {}
+    by_name = dict(conv_items)
+    for i, col in enumerate(columns):
+        if col in by_name:
+            ns[f"_c{i}"] = by_name[col]
+            convs[i] = f"_c{i}"
+
+    if row_format == "tuple":
+        if convs:
+            expr = "(" + "".join(_cell(i, convs) + ", " for i in range(len(columns))) + ")"
+        else:
+            expr = "tuple(r)"
+    elif row_format == "dict":
+        expr = "{" + ", ".join(f"{col!r}: {_cell(i, convs)}" for i, col in enumerate(columns)) + "}"
+    elif row_format == "namedtuple":
+        ns["_T"] = namedtuple("Row", columns, rename=True)
+        ns["_new"] = tuple.__new__
+        cells = "".join(_cell(i, convs) + ", " for i in range(len(columns)))
+        expr = f"_new(_T, ({cells}))"
+    elif isinstance(row_format, type):
+        if dataclasses.is_dataclass(row_format):
+            fields = {f.name for f in dataclasses.fields(row_format) if f.init}
+            picked = {col: i for i, col in enumerate(columns) if col in fields}
+        else:
+            picked = {col: i for i, col in enumerate(columns) if col.isidentifier()}
+        ns["_T"] = row_format
+        # **{...} keeps any column name legal; later duplicates win as in dict()
+        expr = "_T(**{" + ", ".join(f"{col!r}: {_cell(i, convs)}" for col, i in picked.items()) + "})"
+    else:
+        raise ValueError(f"Unknown row_format {row_format!r}; expected one of {', '.join(ROW_FORMATS)} or a class")
+
+    src = (
+        f"def one(r):\n    return {expr}\n"
+        f"def many(rows):\n    return [{expr} for r in rows]\n"
+    )
+    exec(compile(src, f"<row_mapper {len(columns)} columns>", "exec"), ns)
+    return RowMapper(columns, row_format, ns["one"], ns["many"])
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _compiled(columns: Tuple[str, ...], row_format: RowFormat, conv_items: Tuple[Tuple[str, Callable], ...]) -> RowMapper:
+    return _build(columns, row_format, conv_items)
+
+
+def compile_mapper(
+    columns: Sequence[str],
+    row_format: RowFormat = "tuple",
+    converters: Optional[Mapping[str, Converter]] = None,
+) -> RowMapper:
+    """
+    The cached mapper for this column layout.
+        mapper = compile_mapper(["id", "meta"], "dict", {"meta": "json"})
+        page = mapper.many(rows)
+    """
+    if isinstance(row_format, str):
+        row_format = row_format.lower()
+    conv_items = tuple(sorted(((str(c), _converter(v)) for c, v in (converters or {}).items()), key=lambda kv: kv[0]))
+    return _compiled(tuple(str(c) for c in columns), row_format, conv_items)
+
+
+def columns_of(source: Any) -> Tuple[str, ...]:
+    """Column names from a DB-API cursor / description or a keyed row (sqlite3.Row, asyncpg.Record)."""
+    desc = getattr(source, "description", source)
+    if hasattr(desc, "keys") and not isinstance(desc, (list, tuple)):
+        return tuple(desc.keys())
+    return tuple(d[0] if not hasattr(d, "name") else d.name for d in desc or ())
+
+
+def fetch_mapped(
+    cursor: Any,
+    row_format: RowFormat,
+    converters: Optional[Mapping[str, Converter]] = None,
+    *,
+    one: bool = False,
+) -> Any:
+    """Fetch from an executed DB-API cursor straight into `row_format`."""
+    mapper = compile_mapper(columns_of(cursor), row_format, converters)
+    if one:
+        row = cursor.fetchone()
+        return None if row is None else mapper.one(row)
+    return mapper.many(cursor.fetchall())
+
+
+def row_fetcher(
+    row_format: Optional[RowFormat],
+    converters: Optional[Mapping[str, Converter]] = None,
+    *,
+    one: bool = False,
+) -> Union[str, Callable[[Any], Any]]:
+    """
+    The `fetch` argument for async_pool.run_statement() / run_cached():
+    "one" / "all" for plain rows, else fetch_mapped() bound to the format.
+    """
+    if row_format is None and not converters:
+        return "one" if one else "all"
+    return partial(fetch_mapped, row_format=row_format or "tuple", converters=converters, one=one)
+
+
+def map_records(
+    records: Sequence[Any],
+    row_format: RowFormat,
+    converters: Optional[Mapping[str, Converter]] = None,
+) -> List[Any]:
+    """Shape keyed records (asyncpg.Record, sqlite3.Row); the layout is read off the first one."""
+    if not records:
+        return []
+    return compile_mapper(columns_of(records[0]), row_format, converters).many(records)
+
+
+def cache_info() -> Any:
+    return _compiled.cache_info()
+
+
+__all__ = [
+    "CONVERTERS",
+    "ROW_FORMATS",
+    "RowMapper",
+    "cache_info",
+    "columns_of",
+    "compile_mapper",
+    "fetch_mapped",
+    "map_records",
+    "row_fetcher",
+    "to_date",
+    "to_datetime",
+    "to_decimal",
+    "to_json",
+]
@@ -6,30 +6,75 @@
 # Created: 2025-08-18
 #
 # Purpose:
-#   - Asynchronous SQLite engine with an API paralleling AbstractEngine,
-#     but using async methods (does not subclass AbstractEngine).
-#   - Hook-aware (before/after), PRAGMAs applied on connect.
+#   - Asynchronous SQLite engine: the same API as the other async engines
+#     (await execute / fetchone / fetchall, aiterate, transaction()),
+#     returned by the engine factory for DB_ENGINE=sqlite + DB_MODE=async.
+#   - Hook-aware (before/after), PRAGMAs applied on connect from the
+#     DB_SQLITE_PROFILE tuning profile (see sqlite/tuning.py).
+#
+# Notes for Developers:
+#   - No sqlite3 call ever runs on the event loop. Writes go to one writer
+#     thread (sqlite/wal.py) and are awaited through its futures; reads
+#     run in worker threads on a small pool of read-only WAL connections
+#     (DB_SQLITE_READERS, at least 2 here; ":memory:" uses the writer only).
+#   - Connects lazily on first use; connect() just does that up front.
+#   - The writer and pool are threads, not loop objects, so one engine can
+#     serve several event loops (the serving loop and the sync bridge).
+#   - transaction() / begin() bind the transaction to the current context
+#     (contextvar), like the MariaDB session pin: it owns the writer until
+#     COMMIT / ROLLBACK and its reads go there too. Tasks that inherit the
+#     context (gather(), wait_for()) join it and take turns under a lock;
+#     other tasks' writes queue without blocking the loop. Nested blocks
+#     join the outer transaction.
+#   - Group commit (DB_SQLITE_GROUP_COMMIT_MS) works as in the sync engine.
 # =============================================================
 
 from __future__ import annotations
 
+import asyncio
+import contextvars
 import os
+import sqlite3
+import threading
 import time
-from typing import Any, Optional, Sequence, List
 from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Iterable, List, Mapping, Optional, Sequence
 
 from prefiq.database.config_loader.base import use_thread_config
+from prefiq.database.engine_config import EngineConfig
 from prefiq.core.logger import get_logger
+from prefiq.database import metrics
+from prefiq.database.engines.abstract_engine import AbstractEngine, DescribeHook
+from prefiq.database.engines.copy_io import CountingIter, encode_csv, quote_ident
+from prefiq.database.engines.row_mapper import Converter, RowFormat, columns_of, fetch_mapped
+from prefiq.database.engines.statement_cache import StatementCache, prepared_cache_size, track
+from prefiq.database.engines.sqlite import tuning
+from prefiq.database.engines.sqlite.sync_engine import _groupable, _run_write, _setting
+from prefiq.database.engines.sqlite.wal import Channel, ReaderPool, WriterThread
 
 LOG = get_logger("prefiq.database.sqlite.async")
 
-try:
-    import aiosqlite  # type: ignore
-except (ValueError, TypeError):  # pragma: no cover
-    aiosqlite = None
-
 _DEFAULT_PATH = os.path.join(".prefiq", "devmeta.sqlite")
 
+# Readers when DB_SQLITE_READERS is 0 (the sync engine's "single connection")
+_MIN_READERS = 2
+
+Work = Callable[[sqlite3.Connection], Any]
+
+
+class _Tx:
+    """An open transaction: the writer serves `chan` (only) until it ends."""
+
+    __slots__ = ("chan", "done", "lock", "open")
+
+    def __init__(self, chan: Channel, done: Any) -> None:
+        self.chan = chan
+        self.done = done  # the writer job serving chan
+        # Tasks sharing the transaction take turns; COMMIT waits for the statement in flight
+        self.lock = asyncio.Lock()
+        self.open = True
+
 
 def _resolve_sqlite_path() -> str:
     cfg = {}
@@ -45,138 +90,403 @@ def _resolve_sqlite_path() -> str:
     return _DEFAULT_PATH
 
 
-async def _apply_pragmas(conn: "aiosqlite.Connection") -> None:  # type: ignore[name-defined]
-    await conn.executescript(
-        """
-        PRAGMA journal_mode=WAL;
-        PRAGMA foreign_keys=ON;
-        PRAGMA synchronous=NORMAL;
-        PRAGMA temp_store=MEMORY;
-        """
-    )
-
-
-class AsyncSQLiteEngine:
+class AsyncSQLiteEngine(AbstractEngine[Any]):
     """
     Async SQLite engine with an API similar to AbstractEngine, using async methods.
 
     Methods:
-        await connect(), await close()
+        await connect(), await close()          (connect is optional: lazy)
         await execute(), await executemany()
         await fetchone(), await fetchall()
+        async for row in aiterate(): ...
         async with transaction(): ...
         await begin()/commit()/rollback()
+        await copy_in(), async for chunk in copy_out(): ...
         await test_connection()
 
     Hooks:
         set_before_execute_hook(func)
         set_after_execute_hook(func)
         (func signature: hook(query: str, params: Optional[tuple], stage: str) -> None)
+        or subscribe to prefiq.database.instrumentation for every engine.
     """
 
-    def __init__(self, db_path: Optional[str] = None) -> None:
-        if aiosqlite is None:
-            raise RuntimeError("AsyncSQLiteEngine requires 'aiosqlite' to be installed")
-        self._db_path = db_path
-        self.conn: Optional["aiosqlite.Connection"] = None  # type: ignore[name-defined]
-        self.before_execute_hook = None
-        self.after_execute_hook = None
-
-    # ---- hooks ----
-    def set_before_execute_hook(self, hook): self.before_execute_hook = hook
-    def set_after_execute_hook(self, hook): self.after_execute_hook = hook
-    def _run_hooks(self, stage: str, query: str, params: Optional[tuple] = None) -> None:
-        hook = self.before_execute_hook if stage == "before" else self.after_execute_hook
-        if hook:
-            hook(query, params, stage)
+    engine_label = "sqlite"
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        *,
+        readers: Optional[int] = None,
+        group_commit_ms: Optional[float] = None,
+        profile: Optional[str] = None,
+        config: Optional[EngineConfig] = None,
+    ) -> None:
+        super().__init__()
+        if config is not None:
+            db_path = db_path or config.sqlite_path
+            profile = profile or config.sqlite_profile
+        # Resolved now so the engine never depends on the config active later
+        self._db_path = db_path or _resolve_sqlite_path()
+        self._profile = profile or tuning.profile_from_settings()
+        tuning.get_profile(self._profile)
+        # sqlite3 keeps compiled statements per connection (cached_statements);
+        # _stmts mirrors that LRU for the hit/miss metrics
+        self._prepared = prepared_cache_size()
+        self._stmts: Optional[StatementCache] = None
+        if readers is None:
+            readers = int(_setting("DB_SQLITE_READERS", 0)) or _MIN_READERS
+        self._readers = max(0, int(readers))
+        self._group_ms = _setting("DB_SQLITE_GROUP_COMMIT_MS", 0.0) if group_commit_ms is None else max(0.0, group_commit_ms)
+        self._group_max = int(_setting("DB_SQLITE_GROUP_COMMIT_MAX", 200)) or 200
+        self._writer: Optional[WriterThread] = None
+        self._pool: Optional[ReaderPool] = None
+        # The open transaction of this context (shared with the tasks it spawns)
+        self._tx: contextvars.ContextVar[Optional[_Tx]] = contextvars.ContextVar(
+            f"prefiq_sqlite_tx_{id(self)}", default=None
+        )
+        self._lock = threading.Lock()
+        self._writes = 0  # statements sent to the writer (see activity())
+
+    @property
+    def db_path(self) -> str:
+        """The database file this engine opens."""
+        return self._db_path
+
+    # ---- connections (opened on the writer / worker threads) ----
+
+    def _open(self, path: str, **kwargs: Any) -> sqlite3.Connection:
+        if self._prepared:
+            kwargs["cached_statements"] = self._prepared
+        conn = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES, **kwargs)
+        metrics.POOL_CONNECTS.inc("sqlite")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _open_writer(self, path: str) -> sqlite3.Connection:
+        conn = self._open(path)
+        tuning.apply_profile(conn, self._profile)
+        return conn
+
+    def _open_reader(self, path: str) -> sqlite3.Connection:
+        conn = self._open(f"{Path(path).resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+        conn.execute("PRAGMA query_only=ON")
+        tuning.apply_profile(conn, self._profile, readonly=True)
+        return conn
 
     # ---- lifecycle ----
+
+    def _start(self) -> None:
+        path = self.db_path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        writer = WriterThread(
+            lambda: self._open_writer(path),
+            name="prefiq-sqlite-async-writer",
+            group_window=self._group_ms / 1000.0,
+            group_max=self._group_max,
+        )
+        writer.start()
+        self._stmts = StatementCache("sqlite", self._prepared) if self._prepared else None
+        if self._readers and path != ":memory:":
+            self._pool = ReaderPool(lambda: self._open_reader(path), self._readers)
+        self._writer = writer
+
+    def _ensure_started(self) -> WriterThread:
+        # Called on a worker thread the first time (opening the file may block)
+        if self._writer is None:
+            with self._lock:
+                if self._writer is None:
+                    self._start()
+        assert self._writer is not None
+        return self._writer
+
+    async def _ensure(self) -> WriterThread:
+        writer = self._writer
+        if writer is not None:
+            return writer
+        return await asyncio.to_thread(self._ensure_started)
+
     async def connect(self) -> None:
-        assert aiosqlite is not None
-        path = self._db_path or _resolve_sqlite_path()
-        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
-        self.conn = await aiosqlite.connect(path)
-        self.conn.row_factory = aiosqlite.Row  # type: ignore[attr-defined]
-        await _apply_pragmas(self.conn)
+        """Open the writer (and reader pool) now instead of on the first statement."""
+        await self._ensure()
 
     async def close(self) -> None:
-        if self.conn is not None:
-            try:
-                await self.conn.close()
-            finally:
-                self.conn = None
+        writer, self._writer = self._writer, None
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.close()
+        if writer is not None:
+            await asyncio.to_thread(writer.close)
+
+    def pool_stats(self) -> dict[str, Any]:
+        """Size / idle / in-use of the reader pool (empty before the first read)."""
+        return self._pool.stats() if self._pool is not None else {}
+
+    def activity(self) -> int:
+        """Statements sent to the writer so far; moves with every write (MaintenanceScheduler's idle check)."""
+        return self._writes
+
+    # ---- routing ----
 
-    def _ensure_conn(self) -> "aiosqlite.Connection":  # type: ignore[name-defined]
-        if self.conn is None:
-            raise RuntimeError("AsyncSQLiteEngine is not connected. Call await connect() first.")
-        return self.conn
+    def _current_tx(self) -> Optional[_Tx]:
+        # Tasks spawned inside a transaction inherit the contextvar and join it while it is open
+        tx = self._tx.get()
+        return tx if tx is not None and tx.open else None
+
+    async def _write(self, fn: Work, *, group: bool = False) -> Any:
+        """fn(conn) on the writer: the context's transaction, else the writer's queue."""
+        self._writes += 1
+        tx = self._current_tx()
+        if tx is not None:
+            async with tx.lock:
+                if tx.open:
+                    return await asyncio.wrap_future(tx.chan.submit(fn))
+            # Ended while this call waited its turn: runs on its own, like any other write
+        writer = await self._ensure()
+        return await asyncio.wrap_future(writer.submit(fn, group=group))
+
+    def _read_blocking(self, fn: Work) -> Any:
+        with self._pool.connection() as conn:  # type: ignore[union-attr]
+            return fn(conn)
+
+    async def _read(self, fn: Work) -> Any:
+        """fn(conn) on a pooled reader in a worker thread (the writer inside a transaction)."""
+        if self._current_tx() is None:
+            await self._ensure()
+            if self._pool is not None:
+                return await asyncio.to_thread(self._read_blocking, fn)
+        return await self._write(fn)
 
     # ---- transactions ----
+
+    async def _tx_begin(self) -> None:
+        writer = await self._ensure()
+        chan = Channel()
+        # The writer serves this channel (and nothing else) until the transaction ends
+        done = writer.submit(chan.serve)
+        self._tx.set(_Tx(chan, done))
+        try:
+            await self._write(lambda conn: conn.execute("BEGIN"))
+        except BaseException:
+            await self._tx_end(None)
+            raise
+
+    async def _tx_end(self, commit: Optional[bool]) -> None:
+        tx = self._tx.get()
+        assert tx is not None
+        self._tx.set(None)
+
+        async def run(fn: Work) -> Any:
+            return await asyncio.wrap_future(tx.chan.submit(fn))
+
+        try:
+            async with tx.lock:
+                # Closed under the lock: no sibling statement lands after COMMIT
+                tx.open = False
+                if commit is not None:
+                    try:
+                        await run(lambda conn: conn.commit() if commit else conn.rollback())
+                    except BaseException:
+                        if commit:
+                            await run(lambda conn: conn.rollback())
+                        raise
+        finally:
+            tx.open = False
+            tx.chan.stop()
+            await asyncio.wrap_future(tx.done)
+
     async def begin(self) -> None:
-        await self._ensure_conn().execute("BEGIN")
+        """Start a transaction bound to the current context (no-op if one is open)."""
+        if self._current_tx() is None:
+            await self._tx_begin()
 
     async def commit(self) -> None:
-        await self._ensure_conn().commit()
+        if self._current_tx() is not None:
+            await self._tx_end(True)
 
     async def rollback(self) -> None:
-        await self._ensure_conn().rollback()
+        if self._current_tx() is not None:
+            await self._tx_end(False)
 
     @asynccontextmanager
     async def transaction(self):
-        conn = self._ensure_conn()
+        """
+        Run the block in one transaction; engine calls made inside it (tasks
+        it spawns included) share it. Nested blocks join the outer transaction.
+        Usage:
+            async with db.transaction():
+                await db.execute("INSERT ...")
+                await db.execute("UPDATE ...")
+        """
+        if self._current_tx() is not None:
+            yield self
+            return
+        await self._tx_begin()
+        ok = False
         try:
-            await conn.execute("BEGIN")
-            yield
-            await conn.commit()
-        except (ValueError, TypeError):
-            await conn.rollback()
-            raise
+            yield self
+            ok = True
+        finally:
+            await self._tx_end(ok)
 
     # ---- queries ----
-    async def execute(self, query: str, params: Optional[tuple] = None) -> None:
-        conn = self._ensure_conn()
-        self._run_hooks("before", query, params)
-        t0 = time.time()
-        await conn.execute(query, params or ())
-        await conn.commit()
-        self._run_hooks("after", query, params)
-        LOG.debug("sqlite_async_execute", extra={"elapsed_ms": int((time.time() - t0) * 1000)})
-
-    async def executemany(self, query: str, param_list: Sequence[tuple]) -> None:
-        conn = self._ensure_conn()
-        self._run_hooks("before", query, None)
-        t0 = time.time()
-        await conn.executemany(query, list(param_list))
-        await conn.commit()
-        self._run_hooks("after", query, None)
-        LOG.debug("sqlite_async_executemany", extra={"elapsed_ms": int((time.time() - t0) * 1000)})
-
-    async def fetchone(self, query: str, params: Optional[tuple] = None) -> Optional[Any]:
-        conn = self._ensure_conn()
-        self._run_hooks("before", query, params)
-        t0 = time.time()
-        cur = await conn.execute(query, params or ())
-        row = await cur.fetchone()
-        self._run_hooks("after", query, params)
-        LOG.debug("sqlite_async_fetchone", extra={"elapsed_ms": int((time.time() - t0) * 1000)})
+
+    async def execute(self, query: str, params: Optional[tuple] = None) -> int:
+        """Run a write; returns the affected row count. Joins an open transaction."""
+        started = self._before(query, params)
+        track(self._stmts, query, params)
+        try:
+            rowcount = await self._write(lambda conn: _run_write(conn, query, params or ()), group=_groupable(query))
+        except Exception as e:
+            self._after(query, params, started, error=e)
+            raise
+        self._after(query, params, started, rowcount)
+        return rowcount
+
+    async def executemany(self, query: str, param_list: Sequence[tuple]) -> int:
+        started = self._before(query, None)
+        try:
+            rowcount = await self._write(lambda conn: _run_write(conn, query, param_list, many=True), group=_groupable(query))
+        except Exception as e:
+            self._after(query, None, started, error=e)
+            raise
+        self._after(query, None, started, rowcount)
+        return rowcount
+
+    async def fetchone(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        *,
+        row_format: Optional[RowFormat] = None,
+        converters: Optional[Mapping[str, Converter]] = None,
+    ) -> Optional[Any]:
+        """First row as sqlite3.Row, or shaped by `row_format` / `converters` (see row_mapper)."""
+        started = self._before(query, params)
+        track(self._stmts, query, params)
+        try:
+            if row_format is None and not converters:
+                row = await self._read(lambda conn: conn.execute(query, params or ()).fetchone())
+            else:
+                fmt = row_format or "tuple"
+                row = await self._read(lambda conn: fetch_mapped(conn.execute(query, params or ()), fmt, converters, one=True))
+        except Exception as e:
+            self._after(query, params, started, error=e)
+            raise
+        self._after(query, params, started, 0 if row is None else 1)
         return row
 
-    async def fetchall(self, query: str, params: Optional[tuple] = None) -> List[Any]:
-        conn = self._ensure_conn()
-        self._run_hooks("before", query, params)
-        t0 = time.time()
-        cur = await conn.execute(query, params or ())
-        rows = await cur.fetchall()
-        self._run_hooks("after", query, params)
-        LOG.debug("sqlite_async_fetchall", extra={"elapsed_ms": int((time.time() - t0) * 1000)})
+    async def fetchall(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        *,
+        row_format: Optional[RowFormat] = None,
+        converters: Optional[Mapping[str, Converter]] = None,
+    ) -> List[Any]:
+        """All rows; with `row_format` / `converters` they are shaped in one pass on the reading thread."""
+        started = self._before(query, params)
+        track(self._stmts, query, params)
+        try:
+            if row_format is None and not converters:
+                rows = await self._read(lambda conn: conn.execute(query, params or ()).fetchall())
+            else:
+                fmt = row_format or "tuple"
+                rows = await self._read(lambda conn: fetch_mapped(conn.execute(query, params or ()), fmt, converters))
+        except Exception as e:
+            self._after(query, params, started, error=e)
+            raise
+        self._after(query, params, started, len(rows))
         return list(rows)
 
+    async def aiterate(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        *,
+        batch_size: int = 1000,
+        describe: DescribeHook = None,
+    ) -> AsyncIterator[Any]:
+        """
+        Stream rows with fetchmany(), holding at most `batch_size` rows at a time.
+        A pooled reader stays checked out until the iterator finishes.
+        """
+        started = self._before(query, params)
+        count = 0
+        try:
+            await self._ensure()
+            if self._current_tx() is not None or self._pool is None:
+                # The writer thread owns the cursor; each batch is one hop
+                cur = await self._write(lambda conn: conn.execute(query, params or ()))
+                run: Callable[[Work], Any] = self._write
+                release = None
+            else:
+                # Reader checked out (and later returned) from worker threads
+                release = self._pool.connection()
+                conn = await asyncio.to_thread(release.__enter__)
+                run = lambda fn: asyncio.to_thread(fn, conn)  # noqa: E731
+                try:
+                    cur = await run(lambda c: c.execute(query, params or ()))
+                except BaseException:
+                    await asyncio.to_thread(release.__exit__, None, None, None)
+                    raise
+            try:
+                if describe is not None:
+                    describe(columns_of(cur))
+                while True:
+                    rows = await run(lambda _c: cur.fetchmany(batch_size))
+                    if not rows:
+                        break
+                    count += len(rows)
+                    for row in rows:
+                        yield row
+            finally:
+                try:
+                    await run(lambda _c: cur.close())
+                finally:
+                    if release is not None:
+                        await asyncio.to_thread(release.__exit__, None, None, None)
+        except Exception as e:
+            self._after(query, params, started, count, e)
+            raise
+        self._after(query, params, started, count)
+
+    # ---- bulk copy ----
+
+    async def copy_in(self, table: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> int:
+        """
+        Bulk-load rows (tuples in `columns` order): one executemany() in a
+        single transaction on the writer thread. Returns rows loaded.
+        """
+        cols = list(columns)
+        sql = (
+            f"INSERT INTO {quote_ident(table)} ({', '.join(quote_ident(c) for c in cols)}) "
+            f"VALUES ({', '.join('?' * len(cols))})"
+        )
+        counted = CountingIter(rows)
+        t0 = time.time()
+        async with self.transaction():
+            await self.executemany(sql, counted)
+        LOG.debug("sqlite_copy_in", extra={"rows": counted.count, "elapsed_ms": int((time.time() - t0) * 1000)})
+        return counted.count
+
+    async def copy_out(self, query: str, params: Optional[tuple] = None, *, batch_size: int = 1000) -> AsyncIterator[bytes]:
+        """Stream a SELECT as CSV chunks (NULL = empty field), `batch_size` rows each."""
+        batch: List[Any] = []
+        async for row in self.aiterate(query, params, batch_size=batch_size):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                for chunk in encode_csv(batch, batch=batch_size):
+                    yield chunk
+                batch = []
+        for chunk in encode_csv(batch, batch=batch_size):
+            yield chunk
+
     # ---- health ----
+
     async def test_connection(self) -> bool:
         try:
-            conn = self._ensure_conn()
-            cur = await conn.execute("SELECT 1")
-            row = await cur.fetchone()
-            return row is not None
-        except (ValueError, TypeError):
+            return await self._read(lambda conn: conn.execute("SELECT 1").fetchone()) is not None
+        except (sqlite3.Error, ValueError, TypeError):
             return False
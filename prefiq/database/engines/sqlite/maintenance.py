@@ -1,5 +1,5 @@
 # =============================================================
-# SQLite Maintenance (backup / integrity / rebuild)
+# SQLite Maintenance (backup / integrity / rebuild / routine upkeep)
 # file path: prefiq/database/engines/sqlite/maintenance.py
 #
 # Author: Sundar
@@ -22,14 +22,43 @@
 #   - Backup API can run while DB is in use (online backup).
 #   - Place rebuilt file in the same directory for atomic rename semantics.
 #   - WAL/SHM of the *old* DB are preserved alongside .old for forensic fallback.
+#
+# Archives (backup_archive / restore_archive):
+#   - Paged backup (`pages` per step, source released in between) with an
+#     optional MB/s rate limit and progress callback, gzip-compressed into
+#     <name>-YYYYmmdd-HHMMSS.db.gz; restore verifies the archive (gzip CRC +
+#     integrity_check) before copying it into the live database.
+#
+# Routine upkeep (MaintenanceScheduler):
+#   - WAL checkpoint once the -wal file passes DB_SQLITE_WAL_LIMIT_MB:
+#     PASSIVE first (never blocks anyone); when that caught up with the
+#     whole log, TRUNCATE resets the file to zero bytes.
+#   - PRAGMA optimize every DB_SQLITE_OPTIMIZE_EVERY_S seconds, so the
+#     planner's statistics follow the data.
+#   - incremental_vacuum(DB_SQLITE_VACUUM_PAGES) per tick while the
+#     engine is idle (no writes since the previous tick, going by the
+#     engine's own activity() counter; without one the vacuum never runs
+#     from tick()); needs auto_vacuum=INCREMENTAL, which the tuning
+#     profiles set on new files.
+#   - Runs on its own short-lived connection with a short busy_timeout,
+#     so a tick gives way to application writes instead of queueing.
+#   - With DB_SQLITE_BACKUP_DIR set, a compressed archive every
+#     DB_SQLITE_BACKUP_EVERY_S, keeping the newest DB_SQLITE_BACKUP_KEEP.
+#   - The serving loop drives tick() through a worker thread (see
+#     providers/maintenance_provider.py); `prefiq db maintain` runs once.
+#     A failing tick is logged and the loop carries on.
 # =============================================================
 
 from __future__ import annotations
 
+import asyncio
+import gzip
 import os
+import shutil
 import sqlite3
 import time
-from typing import Optional, Tuple
+from contextlib import closing
+from typing import Any, Callable, Dict, Optional, Tuple
 
 from prefiq.core.logger import get_logger
 
@@ -63,16 +92,40 @@ def integrity_check(conn: sqlite3.Connection) -> Tuple[bool, str]:
         return False, f"integrity_check_error: {type(e).__name__}: {e}"
 
 
-def backup_sqlite(src_path: str, dst_path: str, *, timeout: float = 60.0) -> None:
+Progress = Callable[[int, int], Any]
+
+
+def _step_sleep(pages: int, page_size: int, sleep: float, rate_limit_mb: float) -> float:
+    # Pause per step so that `pages` pages per step stay under the byte rate
+    if pages <= 0 or rate_limit_mb <= 0:
+        return sleep
+    return max(sleep, pages * page_size / (rate_limit_mb * 1024 * 1024))
+
+
+def backup_sqlite(
+    src_path: str,
+    dst_path: str,
+    *,
+    timeout: float = 60.0,
+    pages: int = -1,
+    sleep: float = 0.0,
+    rate_limit_mb: float = 0.0,
+    progress: Optional[Progress] = None,
+) -> None:
     """
     Perform an online backup from src_path (read-only) into dst_path.
     Uses sqlite3 backup API (Python 3.7+).
+
+    pages > 0 copies that many pages per step and releases the source
+    between steps (sleeping `sleep` seconds, or longer to stay under
+    `rate_limit_mb` MB/s), so writers are not stalled for the whole copy.
+    progress(copied_pages, total_pages) is called after every step.
     """
     os.makedirs(os.path.dirname(dst_path) or ".", exist_ok=True)
 
     # Open source in read-only via URI, with a generous timeout to wait out locks.
     src_uri = _as_uri_ro(os.path.abspath(src_path))
-    LOG.info("backup_start", extra={"src": src_path, "dst": dst_path})
+    LOG.info("backup_start", extra={"src": src_path, "dst": dst_path, "pages": pages})
 
     t0 = time.time()
     with sqlite3.connect(src_uri, uri=True, timeout=timeout, detect_types=sqlite3.PARSE_DECLTYPES) as src, \
@@ -85,15 +138,130 @@ def backup_sqlite(src_path: str, dst_path: str, *, timeout: float = 60.0) -> Non
             PRAGMA foreign_keys=ON;
         """)
 
-        # Run the online backup; this copies the entire database ('main' pages).
-        # source.backup(target)
-        src.backup(dst)  # type: ignore[attr-defined]
+        page_size = src.execute("PRAGMA page_size").fetchone()[0]
+        pause = _step_sleep(pages, page_size, sleep, rate_limit_mb)
+
+        def _progress(status: int, remaining: int, total: int) -> None:
+            if progress is not None:
+                progress(total - remaining, total)
+            # backup(sleep=) only applies to busy retries; the source is not
+            # locked between steps, so this is where writers get their turn
+            if remaining and pause:
+                time.sleep(pause)
+
+        # Run the online backup; this copies the entire database ('main' pages),
+        # `pages` at a time when paged.
+        src.backup(dst, pages=pages, progress=_progress)  # type: ignore[attr-defined]
 
         dst.commit()
 
     LOG.info("backup_done", extra={"elapsed_ms": int((time.time() - t0) * 1000)})
 
 
+# ---------- compressed archives ----------
+
+_CHUNK = 1024 * 1024
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def backup_archive(
+    src_path: str,
+    archive_path: str,
+    *,
+    pages: int = 1024,
+    sleep: float = 0.0,
+    rate_limit_mb: float = 0.0,
+    progress: Optional[Progress] = None,
+    level: int = 6,
+) -> int:
+    """
+    Paged online backup of src_path streamed through gzip into archive_path
+    (written as .part, renamed when complete). Returns the archive size.
+
+    The backup API needs a database as its target, so the pages land in a
+    scratch file next to the archive first; it is compressed in 1 MB chunks
+    and removed, and only the archive remains.
+    """
+    archive_path = os.path.abspath(archive_path)
+    os.makedirs(os.path.dirname(archive_path), exist_ok=True)
+    scratch = f"{archive_path}.db.tmp"
+    part = f"{archive_path}.part"
+    try:
+        backup_sqlite(src_path, scratch, pages=pages, sleep=sleep, rate_limit_mb=rate_limit_mb, progress=progress)
+        with open(scratch, "rb") as fin, gzip.open(part, "wb", compresslevel=level) as fout:
+            shutil.copyfileobj(fin, fout, _CHUNK)
+        os.replace(part, archive_path)
+    finally:
+        _remove_quietly(scratch)
+        _remove_quietly(part)
+    size = os.path.getsize(archive_path)
+    LOG.info("backup_archive_done", extra={"src": src_path, "archive": archive_path, "bytes": size})
+    return size
+
+
+def restore_archive(archive_path: str, db_path: str, *, timeout: float = 60.0) -> None:
+    """
+    Verified restore of a backup_archive() file into db_path.
+
+    The archive is decompressed into a scratch file (gzip's CRC check fails
+    on a damaged archive), which must pass PRAGMA integrity_check; only then
+    is it copied into db_path with the backup API, so connections already
+    open on db_path see the restored content. Raises ValueError when the
+    archive does not verify; db_path is untouched in that case.
+    """
+    db_path = os.path.abspath(db_path)
+    d, base = _dir_and_names(db_path)
+    os.makedirs(d, exist_ok=True)
+    scratch = os.path.join(d, f".restore.{base}.tmp")
+    try:
+        try:
+            with gzip.open(archive_path, "rb") as fin, open(scratch, "wb") as fout:
+                shutil.copyfileobj(fin, fout, _CHUNK)
+        except (OSError, EOFError) as e:
+            raise ValueError(f"{archive_path}: not a readable backup archive ({e})") from e
+        with closing(sqlite3.connect(scratch, timeout=timeout)) as src:
+            try:
+                ok, msg = integrity_check(src)
+            except sqlite3.DatabaseError as e:
+                ok, msg = False, str(e)
+            if not ok:
+                raise ValueError(f"{archive_path}: integrity check failed: {msg}")
+            with closing(sqlite3.connect(db_path, timeout=timeout)) as dst:
+                src.backup(dst)  # type: ignore[attr-defined]
+    finally:
+        _remove_quietly(scratch)
+    LOG.info("restore_done", extra={"archive": archive_path, "db": db_path})
+
+
+def prune_archives(directory: str, stem: str, keep: int) -> int:
+    """Delete all but the newest `keep` archives named <stem>-*.db.gz; returns how many went."""
+    names = sorted(n for n in os.listdir(directory) if n.startswith(f"{stem}-") and n.endswith(".db.gz"))
+    doomed = names[:-keep] if keep > 0 else []
+    for n in doomed:
+        _remove_quietly(os.path.join(directory, n))
+    return len(doomed)
+
+
+def _newest_archive_mtime(directory: str, db_path: str) -> float:
+    stem = os.path.splitext(os.path.basename(db_path))[0]
+    try:
+        names = [n for n in os.listdir(directory) if n.startswith(f"{stem}-") and n.endswith(".db.gz")]
+    except OSError:
+        return 0.0
+    return max((os.path.getmtime(os.path.join(directory, n)) for n in names), default=0.0)
+
+
+def archive_name(db_path: str, when: Optional[float] = None) -> str:
+    stem = os.path.splitext(os.path.basename(db_path))[0]
+    return f"{stem}-{time.strftime('%Y%m%d-%H%M%S', time.localtime(when))}.db.gz"
+
+
 def optimize_sqlite(db_path: str) -> None:
     """
     Optionally optimize the rebuilt DB: VACUUM + ANALYZE.
@@ -197,3 +365,186 @@ def rebuild_sqlite_database(
         except OSError:
             pass
         return False
+
+
+# ---------- routine upkeep ----------
+
+def wal_size(db_path: str) -> int:
+    """Size of the database's -wal file in bytes (0 when there is none)."""
+    try:
+        return os.path.getsize(f"{db_path}-wal")
+    except OSError:
+        return 0
+
+
+def checkpoint(conn: sqlite3.Connection, mode: str = "PASSIVE") -> Tuple[int, int, int]:
+    """PRAGMA wal_checkpoint(mode) -> (busy, log_frames, checkpointed_frames)."""
+    mode = mode.upper()
+    if mode not in ("PASSIVE", "FULL", "RESTART", "TRUNCATE"):
+        raise ValueError(f"Unknown checkpoint mode: {mode!r}")
+    busy, log, done = conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+    return int(busy), int(log), int(done)
+
+
+def incremental_vacuum(conn: sqlite3.Connection, pages: int) -> int:
+    """Return up to `pages` free pages to the filesystem; pages freed (0 unless auto_vacuum=INCREMENTAL)."""
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        return 0
+    before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    if not before:
+        return 0
+    # execute() steps the pragma once (one page); executescript() runs it to completion
+    conn.executescript(f"PRAGMA incremental_vacuum({max(1, int(pages))});")
+    return before - conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+
+class MaintenanceScheduler:
+    """
+    Periodic WAL checkpoint / PRAGMA optimize / incremental vacuum for one
+    database file. tick() does whatever is due; run() loops it on the
+    current event loop, in a worker thread, every `interval` seconds.
+    `activity` returns a counter that moves whenever the engine writes
+    (SQLiteEngine.activity); the vacuum only runs when it stood still.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        *,
+        interval: float = 60.0,
+        wal_limit_mb: float = 64.0,
+        optimize_every: float = 3600.0,
+        vacuum_pages: int = 256,
+        busy_timeout_ms: int = 250,
+        backup_dir: Optional[str] = None,
+        backup_every: float = 86400.0,
+        backup_keep: int = 7,
+        backup_pages: int = 1024,
+        backup_rate_mb: float = 0.0,
+        activity: Optional[Callable[[], int]] = None,
+    ) -> None:
+        self.db_path = os.path.abspath(db_path)
+        self.interval = max(0.1, float(interval))
+        self.wal_limit = int(max(0.0, float(wal_limit_mb)) * 1024 * 1024)
+        self.optimize_every = max(0.0, float(optimize_every))
+        self.vacuum_pages = max(0, int(vacuum_pages))
+        self.busy_timeout_ms = max(0, int(busy_timeout_ms))
+        self.backup_dir = os.path.abspath(backup_dir) if backup_dir else None
+        self.backup_every = max(0.0, float(backup_every))
+        self.backup_keep = max(0, int(backup_keep))
+        self.backup_pages = int(backup_pages) or -1
+        self.backup_rate_mb = max(0.0, float(backup_rate_mb))
+        self._activity = activity
+        self._last_activity: Optional[int] = None
+        self._last_optimize = time.monotonic()
+        self._last_backup: Optional[float] = None  # wall clock, comparable with archive mtimes
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout_ms / 1000.0, isolation_level=None)
+        conn.execute(f"PRAGMA busy_timeout={self.busy_timeout_ms}")
+        return conn
+
+    def _idle(self) -> bool:
+        if self._activity is None:
+            return False  # nothing to tell idle from busy by
+        seen = self._activity()
+        idle = seen == self._last_activity
+        self._last_activity = seen
+        return idle
+
+    def tick(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Run the tasks that are due; returns what was done (for logs and the CLI)."""
+        now = time.monotonic() if now is None else now
+        report: Dict[str, Any] = {}
+        if not os.path.exists(self.db_path):
+            return report
+        idle = self._idle()
+        with closing(self._connect()) as conn:
+            if wal_size(self.db_path) > self.wal_limit:
+                report["checkpoint"] = self._checkpoint(conn)
+            if self.optimize_every and now - self._last_optimize >= self.optimize_every:
+                conn.execute("PRAGMA optimize")
+                self._last_optimize = now
+                report["optimize"] = True
+            if idle and self.vacuum_pages:
+                freed = incremental_vacuum(conn, self.vacuum_pages)
+                if freed:
+                    report["vacuumed_pages"] = freed
+        if self._backup_due():
+            report["backup"] = self.backup()
+        if report:
+            LOG.info("sqlite_maintenance", extra={"db": self.db_path, **report})
+        return report
+
+    def _checkpoint(self, conn: sqlite3.Connection, *, force: bool = False) -> str:
+        busy, log, done = checkpoint(conn, "PASSIVE")
+        if (busy or done < log) and not force:
+            return "passive"  # readers still need older frames; truncate on a later tick
+        busy, _, _ = checkpoint(conn, "TRUNCATE")
+        return "busy" if busy else "truncate"
+
+    def run_once(self, *, optimize: bool = True, vacuum_pages: Optional[int] = None) -> Dict[str, Any]:
+        """Everything now, regardless of thresholds (`prefiq db maintain`)."""
+        report: Dict[str, Any] = {"wal_bytes_before": wal_size(self.db_path)}
+        with closing(self._connect()) as conn:
+            report["checkpoint"] = self._checkpoint(conn, force=True)
+            if optimize:
+                conn.execute("PRAGMA optimize")
+                self._last_optimize = time.monotonic()
+                report["optimize"] = True
+            pages = self.vacuum_pages if vacuum_pages is None else vacuum_pages
+            report["vacuumed_pages"] = incremental_vacuum(conn, pages) if pages else 0
+        report["wal_bytes_after"] = wal_size(self.db_path)
+        LOG.info("sqlite_maintenance", extra={"db": self.db_path, **report})
+        return report
+
+    def _backup_due(self) -> bool:
+        if not (self.backup_dir and self.backup_every):
+            return False
+        if self._last_backup is None:
+            # After a restart, the newest archive on disk counts
+            self._last_backup = _newest_archive_mtime(self.backup_dir, self.db_path)
+        return time.time() - self._last_backup >= self.backup_every
+
+    def backup(self, archive_path: Optional[str] = None, *, progress: Optional[Progress] = None) -> str:
+        """Write a compressed archive (default: a timestamped one in backup_dir) and prune old ones."""
+        if archive_path is None:
+            if not self.backup_dir:
+                raise ValueError("no backup_dir configured")
+            archive_path = os.path.join(self.backup_dir, archive_name(self.db_path))
+        backup_archive(
+            self.db_path, archive_path,
+            pages=self.backup_pages, rate_limit_mb=self.backup_rate_mb, progress=progress,
+        )
+        if self.backup_dir and os.path.dirname(os.path.abspath(archive_path)) == self.backup_dir:
+            stem = os.path.splitext(os.path.basename(self.db_path))[0]
+            prune_archives(self.backup_dir, stem, self.backup_keep)
+            self._last_backup = time.time()
+        return archive_path
+
+    # ---------- serving-loop task ----------
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await asyncio.to_thread(self.tick)
+            except Exception as e:
+                # A failed tick (locked file, full disk on a backup) must not end the loop
+                LOG.warning("sqlite_maintenance_failed", extra={"db": self.db_path, "error": f"{type(e).__name__}: {e}"})
+
+    def start(self) -> "asyncio.Task[None]":
+        """Schedule run() on the running loop (idempotent)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+        return self._task
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
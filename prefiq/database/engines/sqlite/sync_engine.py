@@ -8,20 +8,38 @@
 # Purpose:
 #   - Synchronous SQLite engine implementing AbstractEngine[Any]
 #   - Hook-aware (before/after)
-#   - Pragmas tuned for local/dev usage
+#   - PRAGMAs from a tuning profile (DB_SQLITE_PROFILE: oltp / read_heavy /
+#     bulk_load, see sqlite/tuning.py); bulk_load() switches the writer
+#     into import pragmas for a block
+#   - Reader-pool mode (DB_SQLITE_READERS > 0, file databases only):
+#     fetches run on a bounded pool of read-only WAL connections and
+#     writes on one writer thread fed by a queue (see sqlite/wal.py),
+#     so sync handlers on a threadpool can share the engine.
+#   - Group commit (DB_SQLITE_GROUP_COMMIT_MS > 0): autocommit writes from
+#     concurrent callers share one transaction per window; implies the
+#     writer thread (with one reader if DB_SQLITE_READERS is 0).
 # =============================================================
 
 from __future__ import annotations
 
 import os
+import threading
 import time
 import sqlite3
+from pathlib import Path
 from contextlib import contextmanager
-from typing import Any, Optional, Sequence, List
+from typing import Any, Callable, Iterable, Iterator, List, Mapping, Optional, Sequence
 
-from prefiq.database.engines.abstract_engine import AbstractEngine
+from prefiq.database.engines.abstract_engine import AbstractEngine, DescribeHook
+from prefiq.database.engines.copy_io import CountingIter, encode_csv, quote_ident
+from prefiq.database.engines.row_mapper import Converter, RowFormat, columns_of, fetch_mapped
+from prefiq.database.engines.statement_cache import StatementCache, prepared_cache_size, track
+from prefiq.database.engines.sqlite import tuning
+from prefiq.database.engines.sqlite.wal import Channel, ReaderPool, WriterThread
 from prefiq.database.config_loader.base import use_thread_config
+from prefiq.database.engine_config import EngineConfig
 from prefiq.core.logger import get_logger
+from prefiq.database import metrics
 
 LOG = get_logger("prefiq.database.sqlite.sync")
 
@@ -47,43 +65,150 @@ def _resolve_sqlite_path() -> str:
     return _DEFAULT_PATH
 
 
-def _apply_pragmas(conn: sqlite3.Connection) -> None:
-    conn.executescript(
-        """
-        PRAGMA journal_mode=WAL;
-        PRAGMA foreign_keys=ON;
-        PRAGMA synchronous=NORMAL;
-        PRAGMA temp_store=MEMORY;
-        """
-    )
+def _apply_pragmas(conn: sqlite3.Connection, profile: Optional[str] = None) -> None:
+    tuning.apply_profile(conn, profile)
+
+
+def _setting(name: str, default: float) -> float:
+    from prefiq.settings.get_settings import load_settings
+    try:
+        return max(0.0, float(getattr(load_settings(), name, default) or 0))
+    except (TypeError, ValueError):
+        return default
+
+
+_GROUPABLE = frozenset({"insert", "update", "delete", "replace"})
+
+
+def _groupable(query: str) -> bool:
+    # Plain DML only: VACUUM, PRAGMAs and the like cannot run inside a transaction
+    return metrics.sql_verb(query) in _GROUPABLE
+
+
+def _run_write(conn: sqlite3.Connection, query: str, params: Any, many: bool = False) -> int:
+    run = conn.executemany if many else conn.execute
+    if conn.in_transaction:
+        # Inside begin()/transaction(): the caller decides when to commit
+        return run(query, params).rowcount
+    with conn:
+        return run(query, params).rowcount
+
+
+def _fetch_described(conn: sqlite3.Connection, query: str, params: Any) -> tuple:
+    cur = conn.execute(query, params or ())
+    return columns_of(cur), cur.fetchall()
 
 
 class SQLiteEngine(AbstractEngine[Any]):
     """
     Synchronous SQLite engine implementing AbstractEngine.
+
+    With `readers` > 0 (default DB_SQLITE_READERS) and a file database, reads
+    use a pool of that many read-only connections and writes go through a
+    single writer thread; otherwise one connection serves everything.
+    `group_commit_ms` > 0 (default DB_SQLITE_GROUP_COMMIT_MS) lets that
+    writer coalesce autocommit writes into one transaction per window.
+    `profile` (default DB_SQLITE_PROFILE) names the PRAGMA tuning profile.
+    `config` (named engines) supplies the path and profile when not given.
     """
 
-    def __init__(self, db_path: Optional[str] = None) -> None:
+    engine_label = "sqlite"
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        *,
+        readers: Optional[int] = None,
+        group_commit_ms: Optional[float] = None,
+        profile: Optional[str] = None,
+        config: Optional[EngineConfig] = None,
+    ) -> None:
         super().__init__()
+        if config is not None:
+            db_path = db_path or config.sqlite_path
+            profile = profile or config.sqlite_profile
         self._db_path = db_path
+        self._profile = profile or tuning.profile_from_settings()
+        tuning.get_profile(self._profile)  # fail fast on a typo
         self.conn: Optional[sqlite3.Connection] = None
+        # sqlite3 keeps compiled statements per connection (cached_statements);
+        # _stmts mirrors that LRU for the hit/miss metrics
+        self._prepared = prepared_cache_size()
+        self._stmts: Optional[StatementCache] = None
+        self._readers = int(_setting("DB_SQLITE_READERS", 0)) if readers is None else max(0, int(readers))
+        self._group_ms = _setting("DB_SQLITE_GROUP_COMMIT_MS", 0.0) if group_commit_ms is None else max(0.0, group_commit_ms)
+        self._group_max = int(_setting("DB_SQLITE_GROUP_COMMIT_MAX", 200)) or 200
+        if self._group_ms and not self._readers:
+            self._readers = 1  # group commit needs the writer thread
+        self._writer: Optional[WriterThread] = None
+        self._pool: Optional[ReaderPool] = None
+        self._local = threading.local()  # .tx: this thread's open transaction channel
+        self._lock = threading.Lock()
+        self._writes = 0  # statements sent to the writing connection (see activity())
 
     # -------- lifecycle --------
 
+    def _path(self) -> str:
+        return self._db_path or _resolve_sqlite_path()
+
+    @property
+    def db_path(self) -> str:
+        """The database file this engine opens (":memory:" for an in-memory database)."""
+        return self._path()
+
+    def activity(self) -> int:
+        """Statements sent to the writing connection so far; moves with every write (MaintenanceScheduler's idle check)."""
+        return self._writes
+
+    def _open(self, path: str, **kwargs: Any) -> sqlite3.Connection:
+        if self._prepared:
+            kwargs["cached_statements"] = self._prepared
+        conn = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES, **kwargs)
+        metrics.POOL_CONNECTS.inc("sqlite")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _open_writer(self, path: str) -> sqlite3.Connection:
+        conn = self._open(path)
+        _apply_pragmas(conn, self._profile)
+        return conn
+
+    def _open_reader(self, path: str) -> sqlite3.Connection:
+        conn = self._open(f"{Path(path).resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+        conn.execute("PRAGMA query_only=ON")
+        tuning.apply_profile(conn, self._profile, readonly=True)
+        return conn
+
     def connect(self) -> None:
-        path = self._db_path or _resolve_sqlite_path()
+        path = self._path()
         os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
-        self.conn = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES)
-        self.conn.row_factory = sqlite3.Row
-        _apply_pragmas(self.conn)
+        self._stmts = StatementCache("sqlite", self._prepared) if self._prepared else None
+        if self._readers and path != ":memory:":
+            writer = WriterThread(
+                lambda: self._open_writer(path),
+                group_window=self._group_ms / 1000.0,
+                group_max=self._group_max,
+            )
+            writer.start()
+            self._writer = writer
+            self._pool = ReaderPool(lambda: self._open_reader(path), self._readers)
+            return
+        self.conn = self._open_writer(path)
 
     def close(self) -> None:
+        writer, self._writer = self._writer, None
+        pool, self._pool = self._pool, None
+        if writer is not None:
+            writer.close()
+        if pool is not None:
+            pool.close()
         conn = self.conn
         if conn is not None:
             try:
                 conn.close()
             finally:
                 self.conn = None
+                metrics.POOL_CLOSES.inc("sqlite")
 
     # -------- connection guard --------
 
@@ -93,16 +218,105 @@ class SQLiteEngine(AbstractEngine[Any]):
         assert self.conn is not None, "Failed to establish SQLite connection"
         return self.conn
 
+    def _connected(self) -> bool:
+        return self.conn is not None or self._writer is not None
+
+    def _ensure(self) -> None:
+        if not self._connected():
+            with self._lock:
+                if not self._connected():
+                    self.connect()
+
+    def _write(self, fn: Callable[[sqlite3.Connection], Any], *, group: bool = False) -> Any:
+        """
+        Run fn(conn) on the writing connection: this thread's transaction, the
+        writer thread, or the single connection. `group`: an autocommit write
+        the writer may batch with others (group commit).
+        """
+        self._writes += 1
+        tx: Optional[Channel] = getattr(self._local, "tx", None)
+        if tx is not None:
+            return tx.call(fn)
+        self._ensure()
+        writer = self._writer
+        if writer is not None:
+            return writer.call(fn, group=group)
+        return fn(self._get_conn())
+
+    @contextmanager
+    def _reading(self) -> Iterator[Optional[sqlite3.Connection]]:
+        """
+        A connection for reads on this thread: a pooled reader, or the single
+        connection. Yields None inside a reader-pool transaction, whose reads
+        must go to the writer (it holds the uncommitted changes).
+        """
+        if getattr(self._local, "tx", None) is not None:
+            yield None
+            return
+        self._ensure()
+        pool = self._pool
+        if pool is None:
+            yield self._get_conn()
+            return
+        with pool.connection() as conn:
+            yield conn
+
+    def _read(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        with self._reading() as conn:
+            return self._write(fn) if conn is None else fn(conn)
+
     # -------- transactions --------
 
+    def _tx_begin(self) -> None:
+        self._ensure()
+        writer = self._writer
+        assert writer is not None
+        chan = Channel()
+        # The writer serves this channel (and nothing else) until the transaction ends
+        done = writer.submit(chan.serve)
+        self._local.tx, self._local.tx_done = chan, done
+        try:
+            chan.call(lambda conn: conn.execute("BEGIN"))
+        except BaseException:
+            self._tx_end(None)
+            raise
+
+    def _tx_end(self, commit: Optional[bool]) -> None:
+        chan, done = self._local.tx, self._local.tx_done
+        self._local.tx = self._local.tx_done = None
+        try:
+            if commit is not None:
+                try:
+                    chan.call(lambda conn: conn.commit() if commit else conn.rollback())
+                except BaseException:
+                    if commit:
+                        chan.call(lambda conn: conn.rollback())
+                    raise
+        finally:
+            chan.stop()
+            done.result()
+
+    def _pooled(self) -> bool:
+        self._ensure()
+        return self._writer is not None
+
     def begin(self) -> None:
-        self._get_conn().execute("BEGIN")
+        if not self._pooled():
+            self._get_conn().execute("BEGIN")
+        elif getattr(self._local, "tx", None) is None:
+            self._tx_begin()
 
     def commit(self) -> None:
-        self._get_conn().commit()
+        if not self._pooled():
+            self._get_conn().commit()
+        elif getattr(self._local, "tx", None) is not None:
+            self._tx_end(True)
 
     def rollback(self) -> None:
-        self._get_conn().rollback()
+        if not self._pooled():
+            self._get_conn().rollback()
+        elif getattr(self._local, "tx", None) is not None:
+            self._tx_end(False)
 
     @contextmanager
     def transaction(self):
@@ -113,61 +327,202 @@ class SQLiteEngine(AbstractEngine[Any]):
             with engine.transaction():
                 engine.execute("INSERT ...", (...,))
                 engine.execute("UPDATE ...", (...,))
+
+        In reader-pool mode the block owns the writer until it ends; its
+        statements (reads included) run there and other writers queue.
         """
+        if self._pooled():
+            if getattr(self._local, "tx", None) is not None:
+                yield  # nested: join the outer transaction
+                return
+            self._tx_begin()
+            ok = False
+            try:
+                yield
+                ok = True
+            finally:
+                self._tx_end(ok)
+            return
+
         conn = self._get_conn()
         try:
             conn.execute("BEGIN")
             yield
             conn.commit()
-        except (ValueError, TypeError):
+        except Exception:
             conn.rollback()
             raise
 
     # -------- queries --------
 
-    def execute(self, query: str, params: Optional[tuple] = None) -> None:
-        conn = self._get_conn()
-        self._run_hooks("before", query, params)
-        t0 = time.time()
-        with conn:
-            conn.execute(query, params or ())
-        self._run_hooks("after", query, params)
-        LOG.debug("sqlite_execute", extra={"elapsed_ms": int((time.time() - t0) * 1000)})
+    def execute(self, query: str, params: Optional[tuple] = None) -> int:
+        """Run a write; returns the affected row count. Joins an open transaction."""
+        started = self._before(query, params)
+        track(self._stmts, query, params)
+        try:
+            rowcount = self._write(lambda conn: _run_write(conn, query, params or ()), group=_groupable(query))
+        except Exception as e:
+            self._after(query, params, started, error=e)
+            raise
+        self._after(query, params, started, rowcount)
+        return rowcount
 
-    def executemany(self, query: str, param_list: Sequence[tuple]) -> None:
-        conn = self._get_conn()
-        self._run_hooks("before", query, None)
-        t0 = time.time()
-        with conn:
-            conn.executemany(query, list(param_list))
-        self._run_hooks("after", query, None)
-        LOG.debug("sqlite_executemany", extra={"elapsed_ms": int((time.time() - t0) * 1000)})
+    def executemany(self, query: str, param_list: Sequence[tuple]) -> int:
+        started = self._before(query, None)
+        try:
+            # sqlite3 consumes any iterable lazily; no need to copy the parameters
+            rowcount = self._write(lambda conn: _run_write(conn, query, param_list, many=True), group=_groupable(query))
+        except Exception as e:
+            self._after(query, None, started, error=e)
+            raise
+        self._after(query, None, started, rowcount)
+        return rowcount
 
-    def fetchone(self, query: str, params: Optional[tuple] = None) -> Optional[Any]:
-        conn = self._get_conn()
-        self._run_hooks("before", query, params)
-        t0 = time.time()
-        cur = conn.execute(query, params or ())
-        row = cur.fetchone()
-        self._run_hooks("after", query, params)
-        LOG.debug("sqlite_fetchone", extra={"elapsed_ms": int((time.time() - t0) * 1000)})
+    def fetchone(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        *,
+        row_format: Optional[RowFormat] = None,
+        converters: Optional[Mapping[str, Converter]] = None,
+    ) -> Optional[Any]:
+        """First row as sqlite3.Row, or shaped by `row_format` / `converters` (see row_mapper)."""
+        started = self._before(query, params)
+        track(self._stmts, query, params)
+        try:
+            if row_format is None and not converters:
+                row = self._read(lambda conn: conn.execute(query, params or ()).fetchone())
+            else:
+                fmt = row_format or "tuple"
+                row = self._read(lambda conn: fetch_mapped(conn.execute(query, params or ()), fmt, converters, one=True))
+        except Exception as e:
+            self._after(query, params, started, error=e)
+            raise
+        self._after(query, params, started, 0 if row is None else 1)
         return row
 
-    def fetchall(self, query: str, params: Optional[tuple] = None) -> List[Any]:
-        conn = self._get_conn()
-        self._run_hooks("before", query, params)
-        t0 = time.time()
-        cur = conn.execute(query, params or ())
-        rows = cur.fetchall()
-        self._run_hooks("after", query, params)
-        LOG.debug("sqlite_fetchall", extra={"elapsed_ms": int((time.time() - t0) * 1000)})
+    def fetchall(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        *,
+        row_format: Optional[RowFormat] = None,
+        converters: Optional[Mapping[str, Converter]] = None,
+    ) -> List[Any]:
+        """All rows; with `row_format` / `converters` they are shaped in one pass on the reading thread."""
+        started = self._before(query, params)
+        track(self._stmts, query, params)
+        try:
+            if row_format is None and not converters:
+                rows = self._read(lambda conn: conn.execute(query, params or ()).fetchall())
+            else:
+                fmt = row_format or "tuple"
+                rows = self._read(lambda conn: fetch_mapped(conn.execute(query, params or ()), fmt, converters))
+        except Exception as e:
+            self._after(query, params, started, error=e)
+            raise
+        self._after(query, params, started, len(rows))
         return list(rows)
 
+    def iterate(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        *,
+        batch_size: int = 1000,
+        describe: DescribeHook = None,
+    ) -> Iterator[Any]:
+        """
+        Stream rows with fetchmany(), holding at most `batch_size` rows at a time.
+        A pooled reader stays checked out until the iterator finishes.
+        """
+        started = self._before(query, params)
+        count = 0
+        try:
+            with self._reading() as conn:
+                if conn is None:
+                    # Inside a reader-pool transaction: the writer thread owns the cursor
+                    names, rows = self._write(lambda c: _fetch_described(c, query, params))
+                    if describe is not None:
+                        describe(names)
+                    count = len(rows)
+                    yield from rows
+                else:
+                    cur = conn.execute(query, params or ())
+                    try:
+                        if describe is not None:
+                            describe(columns_of(cur))
+                        while True:
+                            rows = cur.fetchmany(batch_size)
+                            if not rows:
+                                break
+                            count += len(rows)
+                            yield from rows
+                    finally:
+                        cur.close()
+        except Exception as e:
+            self._after(query, params, started, count, e)
+            raise
+        self._after(query, params, started, count)
+
+    def fetch_plan(self, explain_sql: str, params: Optional[tuple] = None) -> List[Any]:
+        """EXPLAIN on a read-only connection (sqlite3 connections are thread-bound)."""
+        if self._pool is not None:
+            with self._pool.connection() as conn:
+                return conn.execute(explain_sql, params or ()).fetchall()
+        path = self._path()
+        if path == ":memory:":
+            return []  # a fresh connection would see an empty database
+        conn = sqlite3.connect(f"{Path(path).resolve().as_uri()}?mode=ro", uri=True)
+        try:
+            return conn.execute(explain_sql, params or ()).fetchall()
+        finally:
+            conn.close()
+
+    # -------- bulk copy --------
+
+    def copy_in(self, table: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> int:
+        """
+        Bulk-load rows (tuples in `columns` order). SQLite has no COPY, so this
+        is one executemany() inside a single transaction. Returns rows loaded.
+        """
+        cols = list(columns)
+        sql = (
+            f"INSERT INTO {quote_ident(table)} ({', '.join(quote_ident(c) for c in cols)}) "
+            f"VALUES ({', '.join('?' * len(cols))})"
+        )
+        counted = CountingIter(rows)
+        t0 = time.time()
+        with self.transaction():
+            self.executemany(sql, counted)
+        LOG.debug("sqlite_copy_in", extra={"rows": counted.count, "elapsed_ms": int((time.time() - t0) * 1000)})
+        return counted.count
+
+    @contextmanager
+    def bulk_load(self, tables: Sequence[str] = ()) -> Iterator["SQLiteEngine"]:
+        """
+        Import pragmas (synchronous=OFF, large cache) on the writer connection
+        for the block, with the secondary indexes of `tables` dropped and
+        rebuilt afterwards; the profile's settings are restored on exit.
+        Use outside a transaction:
+            with engine.bulk_load(tables=["activity_logs"]):
+                engine.copy_in("activity_logs", cols, rows)
+        """
+        self._ensure()
+        state = self._write(lambda conn: tuning.enter_bulk(conn, tables))
+        try:
+            yield self
+        finally:
+            self._write(lambda conn: tuning.exit_bulk(conn, state))
+
+    def copy_out(self, query: str, params: Optional[tuple] = None, *, batch_size: int = 1000) -> Iterator[bytes]:
+        """Stream a SELECT's rows as CSV chunks (NULL = empty field), `batch_size` rows each."""
+        return encode_csv(self.iterate(query, params, batch_size=batch_size), batch=batch_size)
+
     # -------- health --------
 
     def test_connection(self) -> bool:
         try:
-            cur = self._get_conn().execute("SELECT 1")
-            return cur.fetchone() is not None
+            return self._read(lambda conn: conn.execute("SELECT 1").fetchone()) is not None
         except (ValueError, TypeError):
             return False
@@ -0,0 +1,191 @@
+# =============================================================
+# SQLite Tuning Profiles (tuning.py)
+# file path: prefiq/database/engines/sqlite/tuning.py
+#
+# Purpose:
+#   - Named PRAGMA profiles applied when an engine opens a connection:
+#       oltp        small transactions, many writers (default)
+#       read_heavy  large page cache and mmap for scan / report workloads
+#       bulk_load   imports: synchronous=OFF, very large cache
+#     Selected by DB_SQLITE_PROFILE (per named engine: <NAME>_DB_SQLITE_PROFILE).
+#   - bulk_load(conn): scoped switch into import pragmas, optionally
+#     dropping a table's secondary indexes and rebuilding them afterwards,
+#     with the previous settings restored on exit.
+#
+# Notes for Developers:
+#   - page_size and auto_vacuum only take effect on a new (empty)
+#     database, so they are applied only then, before journal_mode.
+#     auto_vacuum=INCREMENTAL lets the maintenance scheduler hand free
+#     pages back in small incremental_vacuum slices.
+#   - Read-only connections get the cache / mmap / timeout pragmas only.
+#   - synchronous=OFF trades durability for speed: a power loss during the
+#     import can lose it (WAL keeps the file itself consistent).
+# =============================================================
+
+from __future__ import annotations
+
+import sqlite3
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Mapping, Sequence, Tuple
+
+DEFAULT_PROFILE = "oltp"
+
+PROFILES: Dict[str, Dict[str, Any]] = {
+    "oltp": {
+        "page_size": 4096,
+        "auto_vacuum": "INCREMENTAL",
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "foreign_keys": "ON",
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+        "cache_size": -16000,           # KiB (~16 MB)
+        "mmap_size": 128 * 1024 * 1024,
+        "wal_autocheckpoint": 1000,     # pages
+    },
+    "read_heavy": {
+        "page_size": 8192,
+        "auto_vacuum": "INCREMENTAL",
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "foreign_keys": "ON",
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+        "cache_size": -65536,           # ~64 MB
+        "mmap_size": 1024 * 1024 * 1024,
+        "wal_autocheckpoint": 4000,
+    },
+    "bulk_load": {
+        "page_size": 8192,
+        "auto_vacuum": "INCREMENTAL",
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "foreign_keys": "ON",
+        "temp_store": "MEMORY",
+        "busy_timeout": 30000,
+        "cache_size": -262144,          # ~256 MB
+        "mmap_size": 256 * 1024 * 1024,
+        "wal_autocheckpoint": 10000,
+    },
+}
+
+# Only honoured before the first table exists
+_FRESH_ONLY_KEYS = ("page_size", "auto_vacuum")
+
+# Safe (and useful) on mode=ro connections
+_READ_ONLY_KEYS = ("busy_timeout", "cache_size", "mmap_size", "temp_store")
+
+# Switched by bulk_load() and restored afterwards
+BULK_PRAGMAS: Dict[str, Any] = {
+    "synchronous": "OFF",
+    "cache_size": -262144,
+    "temp_store": "MEMORY",
+}
+
+
+def get_profile(name: str | None) -> Dict[str, Any]:
+    key = (name or DEFAULT_PROFILE).strip().lower()
+    try:
+        return PROFILES[key]
+    except KeyError:
+        raise ValueError(f"Unknown SQLite profile {name!r}; expected one of {', '.join(PROFILES)}") from None
+
+
+def profile_from_settings() -> str:
+    from prefiq.settings.get_settings import load_settings
+    return str(getattr(load_settings(), "DB_SQLITE_PROFILE", DEFAULT_PROFILE) or DEFAULT_PROFILE)
+
+
+def pragma_statements(name: str | None, *, fresh: bool = False, readonly: bool = False) -> List[str]:
+    """PRAGMA statements for profile `name`; `fresh` = empty database (page_size / auto_vacuum apply)."""
+    pragmas = get_profile(name)
+    out = []
+    for key, value in pragmas.items():
+        if readonly and key not in _READ_ONLY_KEYS:
+            continue
+        if key in _FRESH_ONLY_KEYS and not fresh:
+            continue
+        out.append(f"PRAGMA {key}={value}")
+    return out
+
+
+def apply_profile(conn: sqlite3.Connection, name: str | None = None, *, readonly: bool = False) -> None:
+    fresh = not readonly and conn.execute("PRAGMA page_count").fetchone()[0] == 0
+    for stmt in pragma_statements(name, fresh=fresh, readonly=readonly):
+        conn.execute(stmt)
+
+
+# ---------- scoped bulk-load switching ----------
+
+def _read_pragmas(conn: sqlite3.Connection, keys: Sequence[str]) -> Dict[str, Any]:
+    return {k: conn.execute(f"PRAGMA {k}").fetchone()[0] for k in keys}
+
+
+def _secondary_indexes(conn: sqlite3.Connection, tables: Sequence[str]) -> List[Tuple[str, str]]:
+    # Explicit CREATE INDEX statements only (sql IS NULL = PRIMARY KEY / UNIQUE autoindexes)
+    marks = ", ".join("?" * len(tables))
+    rows = conn.execute(
+        f"SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL AND tbl_name IN ({marks})",
+        tuple(tables),
+    ).fetchall()
+    return [(r[0], r[1]) for r in rows]
+
+
+def enter_bulk(
+    conn: sqlite3.Connection,
+    tables: Sequence[str] = (),
+    pragmas: Mapping[str, Any] = BULK_PRAGMAS,
+) -> Dict[str, Any]:
+    """Switch `conn` to bulk pragmas and drop `tables`' secondary indexes; returns the state for exit_bulk()."""
+    state: Dict[str, Any] = {"pragmas": _read_pragmas(conn, list(pragmas)), "indexes": []}
+    for key, value in pragmas.items():
+        conn.execute(f"PRAGMA {key}={value}")
+    if tables:
+        indexes = _secondary_indexes(conn, tables)
+        with conn:
+            for name, _ in indexes:
+                conn.execute(f'DROP INDEX "{name}"')
+        state["indexes"] = indexes
+    return state
+
+
+def exit_bulk(conn: sqlite3.Connection, state: Mapping[str, Any]) -> None:
+    """Rebuild the dropped indexes (one pass over the loaded data each) and restore the pragmas."""
+    try:
+        if state.get("indexes"):
+            with conn:
+                for _, sql in state["indexes"]:
+                    conn.execute(sql)
+    finally:
+        for key, value in state.get("pragmas", {}).items():
+            conn.execute(f"PRAGMA {key}={value}")
+
+
+@contextmanager
+def bulk_load(conn: sqlite3.Connection, tables: Sequence[str] = ()) -> Iterator[sqlite3.Connection]:
+    """
+    Import pragmas for the duration of the block, restored afterwards.
+    Secondary indexes on `tables` are dropped first and rebuilt at the end
+    (even when the block fails).
+        with bulk_load(conn, tables=["activity_logs"]):
+            conn.executemany("INSERT INTO activity_logs ...", rows)
+    """
+    state = enter_bulk(conn, tables)
+    try:
+        yield conn
+    finally:
+        exit_bulk(conn, state)
+
+
+__all__ = [
+    "BULK_PRAGMAS",
+    "DEFAULT_PROFILE",
+    "PROFILES",
+    "apply_profile",
+    "bulk_load",
+    "enter_bulk",
+    "exit_bulk",
+    "get_profile",
+    "pragma_statements",
+    "profile_from_settings",
+]
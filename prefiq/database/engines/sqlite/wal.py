@@ -0,0 +1,333 @@
+# =============================================================
+# SQLite WAL Concurrency (wal.py)
+# file path: prefiq/database/engines/sqlite/wal.py
+#
+# Purpose:
+#   - Building blocks for SQLiteEngine's reader-pool mode: a bounded pool
+#     of read-only connections for fetches, and one writer connection
+#     owned by a dedicated thread and fed by a queue.
+#   - With WAL, readers never block the writer (or each other), so reads
+#     scale across threads while writes stay serialized, which is what
+#     SQLite wants anyway.
+#
+# Notes for Developers:
+#   - Reader connections are opened with a `mode=ro` URI and
+#     `PRAGMA query_only`, and check_same_thread=False: each one is used by
+#     one thread at a time (checked out per call), never concurrently.
+#   - The writer connection is created on, and only touched by, the
+#     writer thread. Callers hand it work as `fn(conn)` and block on the
+#     result; exceptions are re-raised in the caller.
+#   - A transaction owns the writer for its whole duration: the writer
+#     runs Channel.serve() as one job, and the transaction's statements are
+#     fed to that channel until COMMIT / ROLLBACK.
+#   - Group commit (opt-in, group_window > 0): autocommit writes queued
+#     within the window (or up to group_max of them) share one transaction
+#     and one fsync. Each runs under its own SAVEPOINT, so a failing
+#     statement only fails its caller; every caller's future resolves
+#     after the shared COMMIT. When the shared transaction itself is lost
+#     (COMMIT fails, or an error aborts it), the other callers each get
+#     their own GroupCommitError chained to the original error.
+# =============================================================
+
+from __future__ import annotations
+
+import queue
+import sqlite3
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from prefiq.database import metrics
+
+Work = Callable[[sqlite3.Connection], Any]
+
+
+class Channel:
+    """A queue of `fn(conn)` calls executed by whichever thread runs serve()."""
+
+    __slots__ = ("_q",)
+
+    def __init__(self) -> None:
+        self._q: "queue.SimpleQueue[Optional[tuple]]" = queue.SimpleQueue()
+
+    def submit(self, fn: Work, *, group: bool = False) -> Future:
+        fut: Future = Future()
+        self._q.put((fn, fut, group))
+        return fut
+
+    def call(self, fn: Work, *, group: bool = False) -> Any:
+        """Run `fn(conn)` on the serving thread and return its result (or raise its error)."""
+        return self.submit(fn, group=group).result()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[tuple]:
+        return self._q.get(timeout=timeout)
+
+    def stop(self) -> None:
+        self._q.put(None)
+
+    def serve(self, conn: sqlite3.Connection) -> None:
+        while True:
+            item = self._q.get()
+            if item is None:
+                return
+            run_one(conn, item)
+
+
+def run_one(conn: sqlite3.Connection, item: tuple) -> None:
+    fn, fut = item[0], item[1]
+    if not fut.set_running_or_notify_cancel():
+        return
+    try:
+        fut.set_result(fn(conn))
+    except BaseException as e:
+        fut.set_exception(e)
+
+
+_STOP = object()
+
+
+class GroupCommitError(sqlite3.OperationalError):
+    """
+    A write that succeeded on its own was rolled back because the group
+    transaction it shared failed; __cause__ is that failure.
+    """
+
+
+class WriterThread:
+    """The single writer connection and the thread that owns it."""
+
+    def __init__(
+        self,
+        connect: Callable[[], sqlite3.Connection],
+        *,
+        name: str = "prefiq-sqlite-writer",
+        group_window: float = 0.0,
+        group_max: int = 200,
+    ) -> None:
+        self._connect = connect
+        self._channel = Channel()
+        self.group_window = max(0.0, float(group_window))
+        self.group_max = max(1, int(group_max))
+        self.commits = 0  # group commits issued (a batch of one counts too)
+        self.grouped = 0  # writes committed through group commit
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._ready: Future = Future()
+
+    def start(self) -> None:
+        """Start the thread and wait until its connection is open (re-raises connect errors)."""
+        self._thread.start()
+        self._ready.result()
+
+    def _run(self) -> None:
+        try:
+            conn = self._connect()
+        except BaseException as e:
+            self._ready.set_exception(e)
+            return
+        self._ready.set_result(None)
+        try:
+            if self.group_window > 0:
+                self._serve_grouped(conn)
+            else:
+                self._channel.serve(conn)
+        finally:
+            conn.close()
+            metrics.POOL_CLOSES.inc("sqlite")
+
+    # ---------- group commit ----------
+
+    def _serve_grouped(self, conn: sqlite3.Connection) -> None:
+        chan = self._channel
+        while True:
+            item = chan.get()
+            if item is None:
+                return
+            if not item[2]:
+                run_one(conn, item)
+                continue
+            after = self._batch(conn, item)
+            if after is None:
+                return
+            if after is not _STOP:
+                run_one(conn, after)
+
+    def _batch(self, conn: sqlite3.Connection, item: tuple) -> Any:
+        """
+        Run `item` plus the group writes that follow within the window in one
+        transaction. Returns the item that ended the batch (None = shutdown,
+        _STOP = window / size limit reached).
+        """
+        done: List[Tuple[Future, Any]] = []
+        current = [item]
+        ended: Any = _STOP
+        deadline = time.monotonic() + self.group_window
+        try:
+            conn.execute("BEGIN")
+            ended = self._fill(conn, current, done, deadline)
+            conn.commit()
+        except BaseException as e:
+            # COMMIT (or the batch bookkeeping itself) failed: nothing in it persisted
+            if conn.in_transaction:
+                conn.rollback()
+            _fail(done, e)
+            fut = current[0][1]
+            if not fut.done():
+                fut.set_exception(e)
+            return ended
+        self.commits += 1
+        self.grouped += len(done)
+        for fut, result in done:
+            fut.set_result(result)
+        return ended
+
+    def _fill(self, conn: sqlite3.Connection, current: List[tuple], done: List[Tuple[Future, Any]], deadline: float) -> Any:
+        while True:
+            fn, fut = current[0][0], current[0][1]
+            if fut.set_running_or_notify_cancel():
+                conn.execute("SAVEPOINT prefiq_group")
+                try:
+                    result = fn(conn)
+                except BaseException as e:
+                    if not self._undo_one(conn):
+                        # The error took the whole transaction with it
+                        _fail(done, e)
+                        done.clear()
+                        conn.execute("BEGIN")
+                    fut.set_exception(e)
+                else:
+                    conn.execute("RELEASE prefiq_group")
+                    done.append((fut, result))
+            if len(done) >= self.group_max:
+                return _STOP
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return _STOP
+            try:
+                nxt = self._channel.get(timeout=remaining)
+            except queue.Empty:
+                return _STOP
+            if nxt is None or not nxt[2]:
+                return nxt
+            current[0] = nxt
+
+    @staticmethod
+    def _undo_one(conn: sqlite3.Connection) -> bool:
+        """Roll back to the statement's savepoint; False if the transaction is gone."""
+        if not conn.in_transaction:
+            return False
+        try:
+            conn.execute("ROLLBACK TO prefiq_group")
+            conn.execute("RELEASE prefiq_group")
+            return True
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.rollback()
+            return False
+
+    @property
+    def alive(self) -> bool:
+        return self._thread.is_alive()
+
+    def call(self, fn: Work, *, group: bool = False) -> Any:
+        """Run fn(conn) on the writer; `group` marks an autocommit write that may share a commit."""
+        return self._channel.call(fn, group=group)
+
+    def submit(self, fn: Work, *, group: bool = False) -> Future:
+        return self._channel.submit(fn, group=group)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Finish queued work, close the connection and stop the thread."""
+        if self._thread.is_alive():
+            self._channel.stop()
+            if threading.current_thread() is not self._thread:
+                self._thread.join(timeout)
+
+
+def _fail(done: List[Tuple[Future, Any]], error: BaseException) -> None:
+    # One exception per caller: they are raised on different threads
+    for fut, _ in done:
+        lost = GroupCommitError(f"group commit rolled back: {type(error).__name__}: {error}")
+        lost.__cause__ = error
+        fut.set_exception(lost)
+
+
+# Every live reader pool, for the metrics scrape (pool gauges are sampled)
+_live_pools: "weakref.WeakSet[ReaderPool]" = weakref.WeakSet()
+
+
+def _live_stats() -> List[Dict[str, Any]]:
+    return [p.stats() for p in list(_live_pools) if not p.closed]
+
+
+metrics.register_pool_source(_live_stats)
+
+
+class ReaderPool:
+    """Bounded LIFO pool of read-only connections, checked out per call."""
+
+    def __init__(self, connect: Callable[[], sqlite3.Connection], size: int, *, name: str = "sqlite") -> None:
+        self.name = name
+        self.size = max(1, int(size))
+        self._connect = connect
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._open: List[sqlite3.Connection] = []
+        self._in_use = 0
+        self._closed = False
+        _live_pools.add(self)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Check out a reader for the block; waits while all `size` readers are busy."""
+        if self._closed:
+            raise RuntimeError(f"{self.name}: reader pool is closed")
+        self._slots.acquire()
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+                metrics.POOL_CONNECTS.inc(self.name)
+                with self._lock:
+                    self._open.append(conn)
+            with self._lock:
+                self._in_use += 1
+            try:
+                yield conn
+            finally:
+                with self._lock:
+                    self._in_use -= 1
+                if self._closed:
+                    conn.close()
+                    metrics.POOL_CLOSES.inc(self.name)
+                else:
+                    self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            size, in_use = len(self._open), self._in_use
+        return {"name": self.name, "max_size": self.size, "size": size, "idle": size - in_use, "in_use": in_use, "waiters": 0}
+
+    def close(self) -> None:
+        """Close idle readers; readers still checked out close when returned."""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            metrics.POOL_CLOSES.inc(self.name)
+
+
+__all__ = ["Channel", "GroupCommitError", "ReaderPool", "WriterThread"]
@@ -0,0 +1,198 @@
+# =============================================================
+# Per-Connection Prepared Statement Cache (statement_cache.py)
+# file path: prefiq/database/engines/statement_cache.py
+#
+# Purpose:
+#   - Reuse server-side prepared statements for repeated SQL, so the
+#     server parses / plans a hot statement once per connection instead
+#     of once per request.
+#   - StatementCache is an LRU keyed by SQL text, one per physical
+#     connection, with hit / miss / eviction counters exported as
+#     prefiq_db_prepared_statements_total{engine, result}.
+#
+# Notes for Developers:
+#   - Enabled by DB_PREPARED_STATEMENTS; capacity DB_PREPARED_CACHE_SIZE.
+#   - MariaDB: the cache holds `cursor(prepared=True)` cursors; evicting
+#     one closes it (and its server statement).
+#   - asyncpg and sqlite3 prepare and cache statements themselves
+#     (statement_cache_size / cached_statements); there the cache holds
+#     no handles and only mirrors the driver's LRU for the metrics.
+#   - Only parameterized statements go through the cache; one-off DDL and
+#     transaction control keep the plain text protocol.
+# =============================================================
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from prefiq.database import metrics
+from prefiq.database.engines.async_pool import Fetch, run_statement
+
+_ATTR = "_prefiq_stmt_cache"
+
+
+def prepared_cache_size() -> int:
+    """DB_PREPARED_CACHE_SIZE when DB_PREPARED_STATEMENTS is on, else 0 (disabled)."""
+    from prefiq.settings.get_settings import load_settings
+
+    s = load_settings()
+    if not getattr(s, "DB_PREPARED_STATEMENTS", False):
+        return 0
+    try:
+        return max(0, int(getattr(s, "DB_PREPARED_CACHE_SIZE", 256)))
+    except (TypeError, ValueError):
+        return 256
+
+
+class StatementCache:
+    """
+    LRU of prepared statements for one connection, keyed by SQL text.
+    `prepare(sql)` builds the handle on a miss; `close(handle)` runs when
+    it is evicted. Without `prepare` the entries are bookkeeping only.
+    """
+
+    __slots__ = ("engine", "capacity", "hits", "misses", "evictions", "_items", "_prepare", "_close")
+
+    def __init__(
+        self,
+        engine: str,
+        capacity: int,
+        *,
+        prepare: Optional[Callable[[str], Any]] = None,
+        close: Optional[Callable[[Any], Any]] = None,
+    ) -> None:
+        self.engine = engine
+        self.capacity = max(1, int(capacity))
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._items: "OrderedDict[str, Any]" = OrderedDict()
+        self._prepare = prepare
+        self._close = close
+
+    def get(self, sql: str) -> Any:
+        """The prepared handle for `sql`, preparing (and evicting the LRU entry) on a miss."""
+        items = self._items
+        handle = items.get(sql)
+        if handle is not None:
+            items.move_to_end(sql)
+            self.hits += 1
+            metrics.PREPARED.inc(self.engine, "hit")
+            return handle
+        self.misses += 1
+        metrics.PREPARED.inc(self.engine, "miss")
+        handle = self._prepare(sql) if self._prepare is not None else True
+        items[sql] = handle
+        while len(items) > self.capacity:
+            _, old = items.popitem(last=False)
+            self.evictions += 1
+            metrics.PREPARED.inc(self.engine, "eviction")
+            self._dispose(old)
+        return handle
+
+    def discard(self, sql: str) -> None:
+        """Drop one statement (e.g. after it failed) so the next call re-prepares it."""
+        handle = self._items.pop(sql, None)
+        if handle is not None:
+            self._dispose(handle)
+
+    def clear(self) -> None:
+        items = list(self._items.values())
+        self._items.clear()
+        for handle in items:
+            self._dispose(handle)
+
+    def _dispose(self, handle: Any) -> None:
+        if self._close is None:
+            return
+        try:
+            self._close(handle)
+        except Exception:
+            pass  # the connection may already be gone
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "engine": self.engine,
+            "size": len(self._items),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, sql: object) -> bool:
+        return sql in self._items
+
+
+def cache_for(conn: Any, engine: str, capacity: int, **kwargs: Any) -> Optional[StatementCache]:
+    """
+    The StatementCache attached to `conn`, created on first use. None when
+    caching is disabled (capacity 0) or the connection object takes no attributes.
+    """
+    if capacity <= 0:
+        return None
+    cache = getattr(conn, _ATTR, None)
+    if cache is None:
+        cache = StatementCache(engine, capacity, **kwargs)
+        try:
+            setattr(conn, _ATTR, cache)
+        except (AttributeError, TypeError):
+            return None
+    return cache
+
+
+def run_prepared(cache: StatementCache, query: str, params: Any, *, fetch: Fetch = None) -> Any:
+    """
+    Execute on the cached prepared cursor for `query` (DB-API drivers with
+    cursor(prepared=True)); same contract as async_pool.run_statement.
+    The cursor stays open for the next call; on error it is dropped.
+    """
+    cur = cache.get(query)
+    try:
+        cur.execute(query, params)
+        if fetch is None:
+            return cur.rowcount
+        if fetch == "one":
+            return cur.fetchone()
+        if fetch == "all":
+            return cur.fetchall()
+        return fetch(cur)
+    except BaseException:
+        cache.discard(query)
+        raise
+
+
+def run_cached(conn: Any, query: str, params: Any = None, *, engine: str, capacity: int, fetch: Fetch = None) -> Any:
+    """
+    run_statement() through `conn`'s prepared cursor cache when caching is on
+    (capacity > 0) and the statement has parameters; plain cursor otherwise.
+    """
+    if params is not None and capacity > 0:
+        cache = cache_for(
+            conn, engine, capacity,
+            prepare=lambda _sql: conn.cursor(prepared=True),
+            close=lambda cur: cur.close(),
+        )
+        if cache is not None:
+            return run_prepared(cache, query, params, fetch=fetch)
+    return run_statement(conn, query, params, fetch=fetch)
+
+
+def track(cache: Optional[StatementCache], sql: str, params: Any) -> None:
+    """Count a lookup in a bookkeeping-only cache (drivers that prepare internally)."""
+    if cache is not None and params:
+        cache.get(sql)
+
+
+__all__ = [
+    "StatementCache",
+    "cache_for",
+    "prepared_cache_size",
+    "run_cached",
+    "run_prepared",
+    "track",
+]
@@ -0,0 +1,240 @@
+# =============================================================
+# Slow Statement Plan Capture (explain.py)
+# file path: prefiq/database/explain.py
+#
+# Purpose:
+#   - When a statement crosses the slow threshold, run the dialect's
+#     EXPLAIN for it on a background thread (never on the request path)
+#     and keep the plan per fingerprint, with flags for full table
+#     scans, filesorts and temp tables.
+#
+# Notes for Developers:
+#   - Only SELECT / WITH statements are explained; the EXPLAIN forms used
+#     (dialect.explain_sql) plan without executing.
+#   - EXPLAIN runs on the engine instance that ran the statement
+#     (QueryEvent.source), so named / routed engines are planned against
+#     their own database; get_engine() is only the fallback for events
+#     emitted without one.
+#   - Plans are cached per (engine, source, fingerprint) for DB_EXPLAIN_TTL and
+#     new captures are rate-limited to DB_EXPLAIN_PER_MINUTE, so a hot
+#     slow query costs one EXPLAIN, not thousands. The queue is bounded;
+#     work that does not fit is dropped.
+# =============================================================
+
+from __future__ import annotations
+
+import inspect
+import queue
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from prefiq.core.logger import get_logger
+from prefiq.database.instrumentation import QueryEvent
+from prefiq.database.metrics import sql_verb
+from prefiq.database.stats import fingerprint
+
+LOG = get_logger("prefiq.db.explain")
+
+# (engine label, id of the engine instance or 0, fingerprint)
+PlanKey = Tuple[str, int, str]
+_EXPLAINABLE = ("select", "with")
+
+
+@dataclass(frozen=True)
+class QueryPlan:
+    engine: str
+    fingerprint: str
+    flags: Tuple[str, ...]
+    plan: Any
+    captured_at: float = field(default_factory=time.time)
+    error: Optional[str] = None
+
+
+def _default_engine() -> Any:
+    from prefiq.database.connection import get_engine
+    return get_engine()
+
+
+def _default_dialect(engine_label: str) -> Any:
+    from prefiq.database.dialects.registry import _from_name_fragment, get_dialect
+    dialect = get_dialect()
+    # A routed/secondary engine may differ from DB_ENGINE: trust the event's label
+    return dialect if dialect.name() == engine_label else _from_name_fragment(engine_label)
+
+
+def _resolve(x: Any) -> Any:
+    if inspect.isawaitable(x):
+        from prefiq.database.loop_bridge import run_sync
+        return run_sync(x)
+    return x
+
+
+class PlanCapture:
+    """Per-fingerprint plan cache fed by a single background EXPLAIN worker."""
+
+    def __init__(
+        self,
+        *,
+        per_minute: int = 30,
+        ttl: float = 3600.0,
+        max_plans: int = 256,
+        queue_size: int = 64,
+        engine_getter: Callable[[], Any] = _default_engine,
+        dialect_getter: Callable[[str], Any] = _default_dialect,
+    ) -> None:
+        self.per_minute = max(0, int(per_minute))
+        self.ttl = float(ttl)
+        self.max_plans = max(1, int(max_plans))
+        self._engine_getter = engine_getter
+        self._dialect_getter = dialect_getter
+        self._plans: "OrderedDict[PlanKey, QueryPlan]" = OrderedDict()
+        self._inflight: Set[PlanKey] = set()
+        self._queue: "queue.Queue[Tuple[PlanKey, str, Any, Any]]" = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._tokens = float(self.per_minute)
+        self._refilled = time.monotonic()
+        self._thread: Optional[threading.Thread] = None
+        self.dropped = 0
+
+    # ---------- lookups ----------
+
+    def cached(self, engine: str, fp: str, source: Any = None) -> Optional[QueryPlan]:
+        """
+        The live plan for `fp` on engine instance `source`; without a source,
+        the freshest one captured on any `engine`-labelled instance.
+        """
+        with self._lock:
+            if source is not None:
+                plan = self._plans.get((engine, id(source), fp))
+            else:
+                plan = max(
+                    (p for (label, _, f), p in self._plans.items() if label == engine and f == fp),
+                    key=lambda p: p.captured_at,
+                    default=None,
+                )
+            if plan is None or time.time() - plan.captured_at > self.ttl:
+                return None
+            return plan
+
+    def plans(self) -> Dict[PlanKey, QueryPlan]:
+        with self._lock:
+            return dict(self._plans)
+
+    # ---------- scheduling ----------
+
+    def submit(self, event: QueryEvent) -> Optional[QueryPlan]:
+        """
+        Return the cached plan for this statement's fingerprint, or schedule
+        an EXPLAIN (subject to the rate limit) and return None.
+        """
+        if sql_verb(event.query) not in _EXPLAINABLE:
+            return None
+        source = event.source
+        key = (event.engine, id(source) if source is not None else 0, fingerprint(event.query))
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is not None and time.time() - plan.captured_at <= self.ttl:
+                self._plans.move_to_end(key)
+                return plan
+            if key in self._inflight or not self._take_token():
+                return None
+            self._inflight.add(key)
+        try:
+            self._queue.put_nowait((key, event.query, event.params, source))
+        except queue.Full:
+            with self._lock:
+                self._inflight.discard(key)
+            self.dropped += 1
+            return None
+        self._ensure_worker()
+        return None
+
+    def _take_token(self) -> bool:
+        now = time.monotonic()
+        self._tokens = min(float(self.per_minute), self._tokens + (now - self._refilled) * self.per_minute / 60.0)
+        self._refilled = now
+        if self._tokens < 1.0:
+            return False
+        self._tokens -= 1.0
+        return True
+
+    def _ensure_worker(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._work, name="prefiq-explain", daemon=True)
+                self._thread.start()
+
+    # ---------- worker ----------
+
+    def _work(self) -> None:
+        while True:
+            key, sql, params, source = self._queue.get()
+            try:
+                self._store(key, self._explain(key, sql, params, source))
+            finally:
+                with self._lock:
+                    self._inflight.discard(key)
+                self._queue.task_done()
+
+    def _explain(self, key: PlanKey, sql: str, params: Any, source: Any) -> QueryPlan:
+        engine_label, _, fp = key
+        try:
+            dialect = self._dialect_getter(engine_label)
+            explain_sql = dialect.explain_sql(sql)
+            if explain_sql is None:
+                return QueryPlan(engine_label, fp, (), None, error="EXPLAIN not supported")
+            engine = source if source is not None else self._engine_getter()
+            fetch = getattr(engine, "fetch_plan", None) or engine.fetchall
+            rows = list(_resolve(fetch(explain_sql, params)))
+            flags = tuple(dialect.plan_flags(rows))
+            return QueryPlan(engine_label, fp, flags, [tuple(r) for r in rows])
+        except Exception as e:
+            return QueryPlan(engine_label, fp, (), None, error=f"{type(e).__name__}: {e}")
+
+    def _store(self, key: PlanKey, plan: QueryPlan) -> None:
+        with self._lock:
+            self._plans[key] = plan
+            self._plans.move_to_end(key)
+            while len(self._plans) > self.max_plans:
+                self._plans.popitem(last=False)
+        if plan.error is None:
+            LOG.warning(
+                "db_query_plan",
+                extra={"engine": plan.engine, "fingerprint": plan.fingerprint, "flags": list(plan.flags), "plan": plan.plan},
+            )
+        else:
+            LOG.info("db_query_plan_failed", extra={"engine": plan.engine, "fingerprint": plan.fingerprint, "error": plan.error})
+
+    def wait(self, timeout: float = 5.0) -> bool:
+        """Block until queued EXPLAINs are done (tests / shutdown). False on timeout."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def reset(self) -> None:
+        with self._lock:
+            self._plans.clear()
+            self._tokens = float(self.per_minute)
+
+
+PLANS = PlanCapture()
+
+
+def configure(*, per_minute: Optional[int] = None, ttl: Optional[float] = None) -> None:
+    """Apply DB_EXPLAIN_* settings to the shared PlanCapture."""
+    if per_minute is not None:
+        PLANS.per_minute = max(0, int(per_minute))
+        PLANS._tokens = min(PLANS._tokens, float(PLANS.per_minute))
+    if ttl is not None:
+        PLANS.ttl = float(ttl)
+
+
+__all__ = ["PLANS", "PlanCapture", "QueryPlan", "configure"]
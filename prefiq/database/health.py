@@ -5,6 +5,8 @@ import asyncio
 import inspect
 from typing import Any, Optional
 
+from prefiq.database.loop_bridge import run_sync
+
 async def _maybe_await(x: Any) -> Any:
     """Await x if it is awaitable, otherwise return x."""
     if inspect.isawaitable(x):
@@ -38,11 +40,11 @@ def is_healthy(engine: Any, timeout: Optional[float] = 3.0) -> bool:
         res = engine.test_connection()
         if not inspect.isawaitable(res):
             return bool(res)
-        # No running loop? Safe to run our own.
+        # No running loop? Block on the shared bridge loop.
         try:
             asyncio.get_running_loop()
         except RuntimeError:
-            return asyncio.run(is_healthy_async(engine, timeout))
+            return run_sync(is_healthy_async(engine, timeout))
         # A loop IS running in this thread; we cannot block it here.
         # Best effort: schedule and fail fast to keep this function synchronous.
         asyncio.create_task(is_healthy_async(engine, timeout))
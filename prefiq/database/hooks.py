@@ -1,18 +1,99 @@
 # prefiq/database/hooks.py
+#
+# Default query subscribers. DatabaseProvider calls install(), which puts on
+# the instrumentation bus:
+#   - log_query_event: DEBUG line per statement (only while DEBUG is enabled)
+#   - log_slow_query:  WARNING for statements over the engine's slow threshold,
+#                      with the fingerprint's EXPLAIN plan once captured
+#   - metrics.record_event: query counters / durations for /metrics
+#                      (DB_QUERY_METRICS, on by default)
+#   - STATS.record:    per-fingerprint aggregation (DB_QUERY_STATS, opt-in:
+#                      it fingerprints every statement)
 
+import logging
 from typing import Optional, Any
+
 from prefiq.core.logger import get_logger
+from prefiq.database import explain, metrics
+from prefiq.database.instrumentation import QueryEvent, subscribe, unsubscribe
+from prefiq.database.stats import STATS, fingerprint, slow_threshold_ms
+from prefiq.settings.get_settings import load_settings
 
 log = get_logger("prefiq.db")
 
+_ENGINES = ("mariadb", "mysql", "postgres", "sqlite")
+_explain_slow = True
+
+
 def before_execute(query: str, params: Optional[tuple] = None, stage: str = "before") -> None:
-    try:
+    """Legacy single-hook form (AbstractEngine.set_before_execute_hook)."""
+    if log.isEnabledFor(logging.DEBUG):
         log.debug("db_before_execute", extra={"query": query, "params": params})
-    except (ValueError, TypeError):
-        pass
+
 
 def after_execute(query: str, params: Optional[tuple] = None, stage: str = "after") -> None:
-    try:
+    """Legacy single-hook form (AbstractEngine.set_after_execute_hook)."""
+    if log.isEnabledFor(logging.DEBUG):
         log.debug("db_after_execute", extra={"query": query, "params": params})
-    except (ValueError, TypeError):
-        pass
+
+
+def log_query_event(event: QueryEvent) -> None:
+    extra: dict[str, Any] = {
+        "engine": event.engine,
+        "query": event.query,
+        "params": event.params,
+        "elapsed_ms": round(event.elapsed_ms, 3),
+        "rowcount": event.rowcount,
+    }
+    if event.error is not None:
+        extra["error"] = repr(event.error)
+    log.debug("db_query", extra=extra)
+
+
+def log_slow_query(event: QueryEvent) -> None:
+    # The subscription gate uses the lowest threshold; apply the engine's own here
+    threshold = slow_threshold_ms(event.engine)
+    if event.elapsed_ms < threshold:
+        return
+    extra: dict[str, Any] = {
+        "engine": event.engine,
+        "fingerprint": fingerprint(event.query),
+        "elapsed_ms": round(event.elapsed_ms, 3),
+        "threshold_ms": threshold,
+        "rowcount": event.rowcount,
+    }
+    if _explain_slow and event.error is None:
+        # Cached plan if this fingerprint was explained recently; otherwise the
+        # worker captures one and logs it as db_query_plan
+        plan = explain.PLANS.submit(event)
+        if plan is not None and plan.error is None:
+            extra["plan_flags"] = list(plan.flags)
+            extra["plan"] = plan.plan
+    log.warning("db_query_slow", extra=extra)
+
+
+def install() -> None:
+    """Subscribe the default query subscribers (idempotent: re-subscribing replaces them)."""
+    global _explain_slow
+    s = load_settings()
+    _explain_slow = bool(getattr(s, "DB_EXPLAIN_SLOW", True))
+    explain.configure(
+        per_minute=getattr(s, "DB_EXPLAIN_PER_MINUTE", None),
+        ttl=getattr(s, "DB_EXPLAIN_TTL", None),
+    )
+    subscribe(log_query_event, logger=log, level=logging.DEBUG)
+    subscribe(
+        log_slow_query,
+        logger=log,
+        level=logging.WARNING,
+        min_elapsed_ms=min(slow_threshold_ms(e) for e in _ENGINES),
+    )
+    if getattr(s, "DB_QUERY_METRICS", True):
+        subscribe(metrics.record_event)
+    else:
+        unsubscribe(metrics.record_event)
+    if getattr(s, "DB_QUERY_STATS", False):
+        STATS.max_statements = int(getattr(s, "DB_QUERY_STATS_MAX", STATS.max_statements))
+        subscribe(STATS.record)
+    else:
+        unsubscribe(STATS.record)
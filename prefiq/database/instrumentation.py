@@ -0,0 +1,223 @@
+# =============================================================
+# Query Instrumentation Bus (instrumentation.py)
+# file path: prefiq/database/instrumentation.py
+#
+# Purpose:
+#   - Fan statement events out to any number of subscribers (loggers,
+#     profilers, tracing) instead of the single before/after hook slot
+#     on AbstractEngine.
+#   - Each subscription can be gated by a logger level, a minimum elapsed
+#     time and a sampling rate.
+#
+# Notes for Developers:
+#   - Engines call AbstractEngine._before() / _after(); those check the
+#     bus's subscriber tuples and only build a QueryEvent once some
+#     subscription accepts it. With nobody interested (no subscribers,
+#     level disabled, below threshold, sampled out) nothing is allocated.
+#   - Subscribers run inline on the executing thread: keep them cheap.
+#     Exceptions they raise are logged and swallowed.
+# =============================================================
+
+from __future__ import annotations
+
+import logging
+import random
+import threading
+from typing import Any, Callable, Optional, Sequence, Tuple, Union
+
+from prefiq.core.logger import get_logger
+
+LOG = get_logger("prefiq.database.instrumentation")
+
+BEFORE = "before"
+AFTER = "after"
+
+
+class QueryEvent:
+    """
+    One statement as seen by subscribers. `elapsed_ns`/`rowcount`/`error` are
+    set on 'after'; `source` is the engine instance that ran it (None when
+    emitted by hand), so follow-up work targets the same database.
+    """
+
+    __slots__ = ("engine", "stage", "query", "params", "elapsed_ns", "rowcount", "error", "source")
+
+    def __init__(
+        self,
+        engine: str,
+        stage: str,
+        query: str,
+        params: Any,
+        elapsed_ns: int = 0,
+        rowcount: int = -1,
+        error: Optional[BaseException] = None,
+        source: Any = None,
+    ) -> None:
+        self.engine = engine
+        self.stage = stage
+        self.query = query
+        self.params = params
+        self.elapsed_ns = elapsed_ns
+        self.rowcount = rowcount
+        self.error = error
+        self.source = source
+
+    @property
+    def elapsed_ms(self) -> float:
+        return self.elapsed_ns / 1_000_000
+
+    def __repr__(self) -> str:
+        return f"QueryEvent({self.engine}, {self.stage}, {self.query[:60]!r}, {self.elapsed_ms:.3f}ms)"
+
+
+Subscriber = Callable[[QueryEvent], None]
+
+
+class Subscription:
+    """A subscriber plus the gates deciding which events it sees."""
+
+    __slots__ = ("fn", "stages", "logger", "level", "sample", "min_elapsed_ns")
+
+    def __init__(
+        self,
+        fn: Subscriber,
+        stages: Sequence[str],
+        logger: Optional[logging.Logger],
+        level: int,
+        sample: float,
+        min_elapsed_ns: int,
+    ) -> None:
+        self.fn = fn
+        self.stages = tuple(stages)
+        self.logger = logger
+        self.level = level
+        self.sample = sample
+        self.min_elapsed_ns = min_elapsed_ns
+
+    def accepts(self, elapsed_ns: Optional[int] = None) -> bool:
+        # No elapsed time ('before' events): only the level and sampling gates apply
+        if elapsed_ns is not None and elapsed_ns < self.min_elapsed_ns:
+            return False
+        if self.logger is not None and not self.logger.isEnabledFor(self.level):
+            return False
+        return self.sample >= 1.0 or random.random() < self.sample
+
+
+class InstrumentationBus:
+    """
+    Subscriber registry. `before` / `after` are immutable tuples swapped on
+    (un)subscribe, so emitters iterate them without locking.
+    """
+
+    def __init__(self) -> None:
+        self.before: Tuple[Subscription, ...] = ()
+        self.after: Tuple[Subscription, ...] = ()
+        self._lock = threading.Lock()
+
+    def subscribe(
+        self,
+        fn: Subscriber,
+        *,
+        stages: Sequence[str] = (AFTER,),
+        logger: Union[logging.Logger, str, None] = None,
+        level: int = logging.NOTSET,
+        sample: float = 1.0,
+        min_elapsed_ms: float = 0.0,
+    ) -> Subscription:
+        """
+        Register `fn(event)`; subscribing the same function again replaces it.
+
+        Args:
+            stages: "before" and/or "after" (default: after only).
+            logger, level: only deliver while `logger.isEnabledFor(level)`.
+            sample: fraction of events delivered (0..1), decided per event.
+            min_elapsed_ms: only deliver 'after' events at least this slow.
+        """
+        for stage in stages:
+            if stage not in (BEFORE, AFTER):
+                raise ValueError(f"Unknown instrumentation stage: {stage!r}")
+        if isinstance(logger, str):
+            logger = logging.getLogger(logger)
+        sub = Subscription(
+            fn,
+            stages,
+            logger if level > logging.NOTSET else None,
+            level,
+            max(0.0, min(1.0, float(sample))),
+            int(min_elapsed_ms * 1_000_000),
+        )
+        with self._lock:
+            self._drop(fn)
+            if BEFORE in sub.stages:
+                self.before = self.before + (sub,)
+            if AFTER in sub.stages:
+                self.after = self.after + (sub,)
+        return sub
+
+    def unsubscribe(self, fn: Union[Subscriber, Subscription]) -> None:
+        with self._lock:
+            self._drop(fn.fn if isinstance(fn, Subscription) else fn)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.before = self.after = ()
+
+    def _drop(self, fn: Subscriber) -> None:
+        self.before = tuple(s for s in self.before if s.fn is not fn)
+        self.after = tuple(s for s in self.after if s.fn is not fn)
+
+    # ---------- emitting ----------
+
+    def emit_before(self, engine: str, query: str, params: Any, source: Any = None) -> None:
+        event = None
+        for sub in self.before:
+            if not sub.accepts():
+                continue
+            if event is None:
+                event = QueryEvent(engine, BEFORE, query, params, source=source)
+            _deliver(sub, event)
+
+    def emit_after(
+        self,
+        engine: str,
+        query: str,
+        params: Any,
+        elapsed_ns: int,
+        rowcount: int = -1,
+        error: Optional[BaseException] = None,
+        source: Any = None,
+    ) -> None:
+        event = None
+        for sub in self.after:
+            if not sub.accepts(elapsed_ns):
+                continue
+            if event is None:
+                event = QueryEvent(engine, AFTER, query, params, elapsed_ns, rowcount, error, source)
+            _deliver(sub, event)
+
+
+def _deliver(sub: Subscription, event: QueryEvent) -> None:
+    try:
+        sub.fn(event)
+    except Exception as e:
+        LOG.warning(
+            "instrumentation_subscriber_failed",
+            extra={"subscriber": getattr(sub.fn, "__qualname__", repr(sub.fn)), "error": str(e)},
+        )
+
+
+BUS = InstrumentationBus()
+subscribe = BUS.subscribe
+unsubscribe = BUS.unsubscribe
+
+
+__all__ = [
+    "AFTER",
+    "BEFORE",
+    "BUS",
+    "InstrumentationBus",
+    "QueryEvent",
+    "Subscription",
+    "subscribe",
+    "unsubscribe",
+]
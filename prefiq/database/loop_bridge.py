@@ -0,0 +1,204 @@
+# =============================================================
+# Loop Bridge (loop_bridge.py)
+# file path: prefiq/database/loop_bridge.py
+#
+# Purpose:
+#   - One long-lived event loop on a daemon thread that every sync caller
+#     submits coroutines to, instead of asyncio.run() / a throwaway loop
+#     per call.
+#   - Async pools are bound to the loop they were created on; because the
+#     bridge loop lives for the whole process, pools used from sync code
+#     survive between calls.
+#
+# Notes for Developers:
+#   - run_sync() blocks the calling thread until the coroutine finishes.
+#     Never call it from a coroutine running *on* the bridge loop (it would
+#     deadlock); that raises RuntimeError instead.
+#   - Modules that keep per-loop resources register an async cleanup with
+#     on_shutdown(); shutdown() runs them on the bridge loop, then stops it.
+#     shutdown() is registered with atexit.
+# =============================================================
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import concurrent.futures
+import threading
+from typing import Any, AsyncIterator, Awaitable, Callable, Coroutine, Iterator, List, Optional, Tuple, TypeVar
+
+from prefiq.core.logger import get_logger
+
+LOG = get_logger("prefiq.database.loop_bridge")
+
+T = TypeVar("T")
+
+ShutdownHook = Callable[[], Awaitable[Any]]
+
+
+class LoopBridge:
+    """A lazily started event loop running forever on its own daemon thread."""
+
+    def __init__(self, name: str = "prefiq-db-loop") -> None:
+        self.name = name
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._hooks: List[ShutdownHook] = []
+
+    # ---------- introspection ----------
+
+    @property
+    def running(self) -> bool:
+        return self._loop is not None and self._loop.is_running()
+
+    def in_bridge_thread(self) -> bool:
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    # ---------- lifecycle ----------
+
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Return the bridge loop, starting its thread on first use."""
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            return loop
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                ready = threading.Event()
+                loop = asyncio.new_event_loop()
+
+                def _serve() -> None:
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+
+                thread = threading.Thread(target=_serve, name=self.name, daemon=True)
+                thread.start()
+                ready.wait()
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    def on_shutdown(self, hook: ShutdownHook) -> None:
+        """Register an async cleanup to run on the bridge loop before it stops."""
+        if hook not in self._hooks:
+            self._hooks.append(hook)
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """Run shutdown hooks, cancel leftover tasks, stop the loop and join its thread."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop, self._thread = None, None
+        if loop is None or loop.is_closed():
+            return
+
+        async def _drain() -> None:
+            for hook in list(self._hooks):
+                try:
+                    await hook()
+                except Exception as e:  # cleanup is best-effort
+                    LOG.warning("loop_bridge_hook_failed", extra={"hook": getattr(hook, "__qualname__", repr(hook)), "error": str(e)})
+            current = asyncio.current_task()
+            pending = [t for t in asyncio.all_tasks() if t is not current]
+            for t in pending:
+                t.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        if loop.is_running() and (thread is None or threading.current_thread() is not thread):
+            try:
+                asyncio.run_coroutine_threadsafe(_drain(), loop).result(timeout)
+            except (concurrent.futures.TimeoutError, RuntimeError) as e:
+                LOG.warning("loop_bridge_drain_failed", extra={"error": str(e)})
+            loop.call_soon_threadsafe(loop.stop)
+            if thread is not None:
+                thread.join(timeout)
+        if not loop.is_running():
+            loop.close()
+
+    # ---------- submission ----------
+
+    def submit(self, coro: Coroutine[Any, Any, T]) -> "concurrent.futures.Future[T]":
+        """Schedule `coro` on the bridge loop; returns a concurrent Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop())
+
+    def run_sync(self, coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+        """Run `coro` on the bridge loop and block this thread for its result."""
+        if self.in_bridge_thread():
+            if asyncio.iscoroutine(coro):
+                coro.close()
+            raise RuntimeError("run_sync() called from the bridge loop itself; await the coroutine instead")
+        if not asyncio.iscoroutine(coro):
+            coro = _as_coroutine(coro)
+        fut = self.submit(coro)  # type: ignore[arg-type]
+        try:
+            return fut.result(timeout)
+        except concurrent.futures.TimeoutError:
+            fut.cancel()
+            raise TimeoutError(f"{self.name}: coroutine did not finish within {timeout}s") from None
+
+
+async def _as_coroutine(aw: Awaitable[T]) -> T:
+    return await aw
+
+
+# ---------- process-wide bridge ----------
+
+_bridge = LoopBridge()
+
+
+def get_bridge() -> LoopBridge:
+    return _bridge
+
+
+def run_sync(coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+    """Block until `coro` finishes on the shared database loop and return its result."""
+    return _bridge.run_sync(coro, timeout)
+
+
+def submit(coro: Coroutine[Any, Any, T]) -> "concurrent.futures.Future[T]":
+    """Fire `coro` on the shared database loop without waiting."""
+    return _bridge.submit(coro)
+
+
+def iter_sync(agen: AsyncIterator[T], *, chunk: int = 500, timeout: Optional[float] = None) -> Iterator[T]:
+    """
+    Consume an async iterator from sync code on the shared loop, pulling up to
+    `chunk` items per hop so the thread handoff is amortized over a batch.
+    The async iterator is closed when the sync one is (including early break).
+    """
+    chunk = max(1, int(chunk))
+
+    async def _take() -> Tuple[List[T], bool]:
+        out: List[T] = []
+        try:
+            while len(out) < chunk:
+                out.append(await agen.__anext__())
+        except StopAsyncIteration:
+            return out, True
+        return out, False
+
+    done = False
+    try:
+        while not done:
+            items, done = _bridge.run_sync(_take(), timeout)
+            yield from items
+    finally:
+        aclose = getattr(agen, "aclose", None)
+        if aclose is not None and not done:
+            _bridge.run_sync(aclose(), timeout)
+
+
+def on_shutdown(hook: ShutdownHook) -> None:
+    """Register an async cleanup for the shared loop (e.g. closing its pools)."""
+    _bridge.on_shutdown(hook)
+
+
+def shutdown(timeout: float = 10.0) -> None:
+    """Stop the shared database loop (runs registered cleanups first)."""
+    _bridge.shutdown(timeout)
+
+
+atexit.register(shutdown)
+
+
+__all__ = ["LoopBridge", "get_bridge", "run_sync", "submit", "iter_sync", "on_shutdown", "shutdown"]
@@ -0,0 +1,356 @@
+# =============================================================
+# Database Metrics (metrics.py)
+# file path: prefiq/database/metrics.py
+#
+# Purpose:
+#   - Process-wide registry of counters, gauges and histograms for the
+#     connection pools and engines, rendered in the Prometheus text
+#     exposition format (served at /metrics by prefiq.http.app).
+#
+# Notes for Developers:
+#   - Recording is a dict lookup plus a lock; safe from any thread.
+#   - Pool gauges (size / idle / in_use / waiters / max_size) are sampled
+#     at scrape time from sources registered with register_pool_source(),
+#     so the hot path never updates them.
+#   - Keep label values low-cardinality (pool / engine names, SQL verbs).
+#   - Query counters / durations are fed by record_event, an instrumentation
+#     subscriber installed by prefiq.database.hooks.install() (DB_QUERY_METRICS);
+#     engines never call into this module per statement on their own.
+# =============================================================
+
+from __future__ import annotations
+
+import bisect
+import math
+import re
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+CHECKOUT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _num(v: float) -> str:
+    if v == math.inf:
+        return "+Inf"
+    if float(v).is_integer():
+        return str(int(v))
+    return repr(float(v))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Sequence[str]) -> LabelValues:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name}: expected labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(v) for v in labels)
+
+    def samples(self) -> Iterable[str]:  # pragma: no cover - overridden
+        return ()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, v in items:
+            yield f"{self.name}{_labels(self.labelnames, key)} {_num(v)}"
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, *labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, v in items:
+            yield f"{self.name}{_labels(self.labelnames, key)} {_num(v)}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = QUERY_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+        # per label set: (non-cumulative bucket counts incl. +Inf, [sum])
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        key = self._key(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][idx] += 1
+            series[1][0] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(self._key(labels))
+        return sum(series[0]) if series else 0
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted((k, list(c), s[0]) for k, (c, s) in self._series.items())
+        for key, counts, total in items:
+            running = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                running += n
+                le = f'le="{_num(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, key, le)} {running}"
+            yield f"{self.name}_sum{_labels(self.labelnames, key)} {_num(total)}"
+            yield f"{self.name}_count{_labels(self.labelnames, key)} {running}"
+
+
+Collector = Callable[[], None]
+
+
+class MetricsRegistry:
+    """Named metrics plus scrape-time collectors; render() emits Prometheus text."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Collector] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        """Add a metric; registering a name twice returns the existing one."""
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))  # type: ignore[return-value]
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help, labelnames))  # type: ignore[return-value]
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = QUERY_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))  # type: ignore[return-value]
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def add_collector(self, fn: Collector) -> None:
+        """Add a callback run before each render() (e.g. to sample gauges)."""
+        with self._lock:
+            if fn not in self._collectors:
+                self._collectors.append(fn)
+
+    def collect(self) -> None:
+        for fn in list(self._collectors):
+            try:
+                fn()
+            except Exception:  # a broken collector must not break the scrape
+                continue
+
+    def render(self) -> str:
+        self.collect()
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines: List[str] = []
+        for m in metrics:
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# ---------- pool metrics ----------
+
+POOL_SIZE = REGISTRY.gauge("prefiq_db_pool_size", "Open connections (idle + checked out)", ("pool",))
+POOL_MAX_SIZE = REGISTRY.gauge("prefiq_db_pool_max_size", "Configured maximum connections", ("pool",))
+POOL_IDLE = REGISTRY.gauge("prefiq_db_pool_idle", "Idle connections", ("pool",))
+POOL_IN_USE = REGISTRY.gauge("prefiq_db_pool_in_use", "Connections checked out", ("pool",))
+POOL_WAITERS = REGISTRY.gauge("prefiq_db_pool_waiters", "Callers waiting for a connection", ("pool",))
+POOL_CHECKOUT_WAIT = REGISTRY.histogram(
+    "prefiq_db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    ("pool",),
+    CHECKOUT_BUCKETS,
+)
+POOL_CONNECTS = REGISTRY.counter("prefiq_db_pool_connects_total", "Physical connections opened", ("pool",))
+POOL_CLOSES = REGISTRY.counter("prefiq_db_pool_closes_total", "Physical connections closed", ("pool",))
+POOL_EVICTIONS = REGISTRY.counter("prefiq_db_pool_evictions_total", "Connections evicted by the pool", ("pool", "reason"))
+POOL_PING_FAILURES = REGISTRY.counter("prefiq_db_pool_ping_failures_total", "Failed liveness pings", ("pool",))
+POOL_TIMEOUTS = REGISTRY.counter("prefiq_db_pool_timeouts_total", "Checkouts that gave up waiting", ("pool",))
+
+# ---------- query metrics ----------
+
+QUERIES = REGISTRY.counter("prefiq_db_queries_total", "Statements executed", ("engine", "verb"))
+QUERY_DURATION = REGISTRY.histogram(
+    "prefiq_db_query_duration_seconds", "Statement latency", ("engine",), QUERY_BUCKETS
+)
+PREPARED = REGISTRY.counter(
+    "prefiq_db_prepared_statements_total",
+    "Per-connection prepared statement cache lookups (hit / miss) and evictions",
+    ("engine", "result"),
+)
+
+_VERBS = frozenset({
+    "select", "insert", "update", "delete", "replace", "with",
+    "copy", "load", "begin", "start", "commit", "rollback",
+})
+
+
+# Anchored at the start: only the leading word is scanned, never the whole statement
+_LEADING_WORD = re.compile(r"[\s(]*([A-Za-z]{1,8})\b").match
+
+
+def sql_verb(sql: str) -> str:
+    """First keyword of a statement, folded into a small fixed set for labelling."""
+    m = _LEADING_WORD(sql)
+    if m is None:
+        return "other"
+    verb = m.group(1).lower()
+    return verb if verb in _VERBS else "other"
+
+
+def record_query(engine: str, sql: str, seconds: float) -> None:
+    QUERIES.inc(engine, sql_verb(sql))
+    QUERY_DURATION.observe(max(0.0, seconds), engine)
+
+
+def record_event(event: Any) -> None:
+    """Instrumentation subscriber: count and time one finished statement."""
+    record_query(event.engine, event.query, event.elapsed_ns / 1e9)
+
+
+def observe_checkout(pool: str, seconds: float) -> None:
+    POOL_CHECKOUT_WAIT.observe(max(0.0, seconds), pool)
+
+
+# ---------- pool gauges (sampled at scrape time) ----------
+
+PoolSource = Callable[[], Iterable[Dict[str, Any]]]
+_pool_sources: List[PoolSource] = []
+_POOL_GAUGES = (
+    (POOL_SIZE, "size"),
+    (POOL_IDLE, "idle"),
+    (POOL_IN_USE, "in_use"),
+    (POOL_WAITERS, "waiters"),
+    (POOL_MAX_SIZE, "max_size"),
+)
+
+
+def register_pool_source(fn: PoolSource) -> None:
+    """
+    Register a callable returning the stats() dicts of live pools (each with
+    a "name" key). Pools sharing a name (one per event loop) are summed.
+    """
+    if fn not in _pool_sources:
+        _pool_sources.append(fn)
+
+
+def _collect_pools() -> None:
+    totals: Dict[str, Dict[str, float]] = {}
+    for source in list(_pool_sources):
+        try:
+            stats_list = list(source())
+        except Exception:
+            continue
+        for stats in stats_list:
+            agg = totals.setdefault(str(stats.get("name", "pool")), {})
+            for _, key in _POOL_GAUGES:
+                agg[key] = agg.get(key, 0.0) + float(stats.get(key, 0) or 0)
+    for gauge, key in _POOL_GAUGES:
+        gauge.clear()  # pools that went away drop out of the scrape
+        for name, agg in totals.items():
+            gauge.set(agg[key], name)
+
+
+REGISTRY.add_collector(_collect_pools)
+
+
+def render() -> str:
+    """Prometheus text exposition of every database metric."""
+    return REGISTRY.render()
+
+
+__all__ = [
+    "CONTENT_TYPE",
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "MetricsRegistry",
+    "REGISTRY",
+    "observe_checkout",
+    "record_event",
+    "record_query",
+    "register_pool_source",
+    "render",
+    "sql_verb",
+]
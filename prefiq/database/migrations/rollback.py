@@ -6,6 +6,7 @@ from typing import Optional, Type, Iterable
 
 from prefiq.database.migrations.discover import discover_all
 from prefiq.database.migrations.base import Migrations
+from prefiq.database.loop_bridge import run_sync
 from prefiq.database.schemas import queries as q
 
 PROTECTED_MIGRATIONS = {"cortex": ["migrations"]}
@@ -17,8 +18,7 @@ def _is_awaitable(x) -> bool:
 
 def _await(x):
     if _is_awaitable(x):
-        import asyncio
-        return asyncio.run(x)
+        return run_sync(x)
     return x
 
 
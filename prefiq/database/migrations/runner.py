@@ -12,6 +12,7 @@ from prefiq.database.migrations.discover import discover_all
 from prefiq.database.migrations.hashing import compute_callable_hash
 from prefiq.database.schemas.builder import ensure_migrations_table
 from prefiq.database.dialects.registry import get_dialect
+from prefiq.database.loop_bridge import run_sync
 from prefiq.database.schemas import queries as q
 
 PROTECTED_TABLES = {"migrations"}
@@ -23,8 +24,7 @@ def _engine():
 
 def _await(x: Any) -> Any:
     if inspect.isawaitable(x) or inspect.iscoroutine(x):
-        import asyncio
-        return asyncio.run(x)
+        return run_sync(x)
     return x
 
 
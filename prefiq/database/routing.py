@@ -0,0 +1,490 @@
+# =============================================================
+# Read/Write Routing (routing.py)
+# file path: prefiq/database/routing.py
+#
+# Purpose:
+#   - RoutingEngine: one engine facade over a primary and N read replicas.
+#     Writes, transactions and locking reads go to the primary; plain
+#     SELECTs are spread over the replicas, weighted by their observed
+#     latency (EWMA) and recent failures.
+#   - Read-your-writes: once a scope (an HTTP request, see
+#     RoutingScopeMiddleware) has written, the rest of it reads from the
+#     primary too.
+#   - Enabled with DB_READ_ROUTING=true: get_engine() then returns a
+#     RoutingEngine whose primary is PRIMARY_DB_* (or the plain DB_*
+#     engine when no PRIMARY_DB_ENGINE is set) and whose replicas are the
+#     named engines in DB_REPLICAS (default: every REPLICA<n>_DB_ENGINE).
+#
+# Notes for Developers:
+#   - A replica that raises is retried on the primary. Only when the
+#     primary succeeds is the replica benched (DB_REPLICA_COOLDOWN_S,
+#     doubling per repeat failure) - a bad statement fails on both and
+#     does not count against the replica.
+#   - Outside a routing_scope() a write does not pin anything (there is no
+#     scope to end, so it would pin the thread / task for good); only the
+#     reads inside begin() ... commit() / transaction() go to the primary.
+#     Scripts that need read-your-writes wrap their work in routing_scope().
+#   - Streams (iterate / aiterate / copy_out) are accounted like plain
+#     reads: the replica's latency is the time to the first row, and a
+#     replica failing before it is retried on the primary.
+#   - Replica engines are built lazily (get_engine_named) on first use;
+#     members should share DB_MODE with the primary.
+# =============================================================
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import os
+import random
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from prefiq.core.logger import get_logger
+from prefiq.database.engines.abstract_engine import AbstractEngine, DescribeHook
+
+LOG = get_logger("prefiq.database.routing")
+
+EWMA_ALPHA = 0.2
+_PRIOR_LATENCY = 0.005  # s: unmeasured replicas start out looking fast
+_MIN_LATENCY = 0.0005
+_MAX_BACKOFF = 16
+
+_READ_VERBS = frozenset(("select", "show", "explain", "describe", "desc", "values", "with"))
+_LOCKING = re.compile(r"\bFOR\s+(?:NO\s+KEY\s+)?(?:UPDATE|SHARE|KEY\s+SHARE)\b|\bLOCK\s+IN\s+SHARE\s+MODE\b", re.I)
+_WRITING_CTE = re.compile(r"\b(?:INSERT|UPDATE|DELETE|MERGE)\b", re.I)
+_REPLICA_KEY = re.compile(r"(REPLICA\d*)_DB_ENGINE", re.I)
+_END = object()
+
+
+def is_read_only(sql: str) -> bool:
+    """True for statements a replica can answer (no locking reads, no writing CTEs)."""
+    head = sql.lstrip(" \t\r\n(").split(None, 1)
+    verb = head[0].lower() if head else ""
+    if verb not in _READ_VERBS or _LOCKING.search(sql):
+        return False
+    return verb != "with" or not _WRITING_CTE.search(sql)
+
+
+# ---------- read-your-writes scope ----------
+
+class _Scope:
+    __slots__ = ("wrote", "implicit")
+
+    def __init__(self, wrote: bool = False, implicit: bool = False) -> None:
+        self.wrote = wrote
+        self.implicit = implicit  # opened by begin() outside any routing_scope()
+
+
+# Mutable holder: threadpool hops copy the context but share the object
+_SCOPE: ContextVar[Optional[_Scope]] = ContextVar("prefiq_db_routing", default=None)
+
+
+@contextmanager
+def routing_scope() -> Iterator[None]:
+    """A fresh read-your-writes scope (one per request)."""
+    token = _SCOPE.set(_Scope())
+    try:
+        yield
+    finally:
+        _SCOPE.reset(token)
+
+
+def mark_primary() -> None:
+    """Pin the rest of the current scope to the primary (no-op outside a scope)."""
+    scope = _SCOPE.get()
+    if scope is not None:
+        scope.wrote = True
+
+
+def _begin_primary() -> None:
+    # begin() outside a scope: reads go to the primary until commit / rollback
+    if _SCOPE.get() is None:
+        _SCOPE.set(_Scope(True, implicit=True))
+    else:
+        mark_primary()
+
+
+def _end_primary() -> None:
+    scope = _SCOPE.get()
+    if scope is not None and scope.implicit:
+        _SCOPE.set(None)
+
+
+class _PrimaryTransaction:
+    """The primary's transaction() (sync or async), with reads inside the block on the primary."""
+
+    __slots__ = ("_cm", "_token")
+
+    def __init__(self, cm: Any) -> None:
+        self._cm = cm
+        self._token = None
+
+    def _enter(self) -> None:
+        if _SCOPE.get() is None:
+            self._token = _SCOPE.set(_Scope(True))
+        else:
+            mark_primary()
+
+    def _exit(self) -> None:
+        if self._token is not None:
+            _SCOPE.reset(self._token)
+            self._token = None
+
+    def __enter__(self) -> Any:
+        self._enter()
+        try:
+            return self._cm.__enter__()
+        except BaseException:
+            self._exit()
+            raise
+
+    def __exit__(self, *exc: Any) -> Any:
+        try:
+            return self._cm.__exit__(*exc)
+        finally:
+            self._exit()
+
+    async def __aenter__(self) -> Any:
+        self._enter()
+        try:
+            return await self._cm.__aenter__()
+        except BaseException:
+            self._exit()
+            raise
+
+    async def __aexit__(self, *exc: Any) -> Any:
+        try:
+            return await self._cm.__aexit__(*exc)
+        finally:
+            self._exit()
+
+
+def pinned_to_primary() -> bool:
+    scope = _SCOPE.get()
+    return scope is not None and scope.wrote
+
+
+class RoutingScopeMiddleware:
+    """Pure ASGI middleware: one routing_scope() per HTTP / websocket request."""
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope.get("type") not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+        with routing_scope():
+            await self.app(scope, receive, send)
+
+
+# ---------- replicas ----------
+
+class _Replica:
+    __slots__ = ("name", "engine", "ewma", "failures", "down_until", "reads")
+
+    def __init__(self, spec: Any, index: int) -> None:
+        self.name = spec if isinstance(spec, str) else f"replica{index + 1}"
+        self.engine = None if isinstance(spec, str) else spec
+        self.ewma = _PRIOR_LATENCY
+        self.failures = 0
+        self.down_until = 0.0
+        self.reads = 0
+
+    def weight(self) -> float:
+        return 1.0 / (max(self.ewma, _MIN_LATENCY) * (1 + self.failures))
+
+    def ok(self, seconds: float) -> None:
+        self.ewma += EWMA_ALPHA * (seconds - self.ewma)
+        self.failures = 0
+        self.reads += 1
+
+    def fail(self, cooldown: float) -> None:
+        self.failures += 1
+        self.down_until = time.monotonic() + cooldown * min(2 ** (self.failures - 1), _MAX_BACKOFF)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "healthy": time.monotonic() >= self.down_until,
+            "latency_ms": round(self.ewma * 1000, 3),
+            "failures": self.failures,
+            "reads": self.reads,
+        }
+
+
+class RoutingEngine(AbstractEngine):
+    """
+    Primary/replica facade with the usual engine API. `primary` and
+    `replicas` are engines or named-engine names (PRIMARY -> PRIMARY_DB_*).
+    Anything not routed here (pool_stats, db_path, session, ...) is the
+    primary's.
+    """
+
+    engine_label = "routing"
+
+    def __init__(self, primary: Any, replicas: Sequence[Any] = (), *, cooldown: float = 30.0) -> None:
+        super().__init__()
+        self._primary_spec = primary
+        self._primary = None if isinstance(primary, str) else primary
+        self.replicas: List[_Replica] = [_Replica(r, i) for i, r in enumerate(replicas)]
+        self.cooldown = cooldown
+
+    # ---------- members ----------
+
+    @property
+    def primary(self) -> Any:
+        if self._primary is None:
+            from prefiq.database.connection import get_engine_named
+            self._primary = get_engine_named(self._primary_spec)
+        return self._primary
+
+    @property
+    def is_async(self) -> bool:
+        return inspect.iscoroutinefunction(getattr(type(self.primary), "fetchall", None))
+
+    def _member(self, replica: _Replica) -> Any:
+        if replica.engine is None:
+            from prefiq.database.connection import get_engine_named
+            replica.engine = get_engine_named(replica.name)
+        return replica.engine
+
+    def _pick(self) -> Optional[_Replica]:
+        now = time.monotonic()
+        healthy = [r for r in self.replicas if now >= r.down_until]
+        if not healthy:
+            return None
+        if len(healthy) == 1:
+            return healthy[0]
+        return random.choices(healthy, weights=[r.weight() for r in healthy])[0]
+
+    def _replica_for(self, query: str) -> Optional[_Replica]:
+        """The replica to read `query` from, or None for the primary (pins the scope for writes)."""
+        if not is_read_only(query):
+            mark_primary()
+            return None
+        if not self.replicas or pinned_to_primary():
+            return None
+        return self._pick()
+
+    def _bench(self, replica: _Replica, error: BaseException) -> None:
+        replica.fail(self.cooldown)
+        LOG.warning("db_replica_down", extra={
+            "replica": replica.name, "failures": replica.failures, "error": f"{type(error).__name__}: {error}",
+        })
+
+    # ---------- routed reads ----------
+
+    def _read(self, method: str, query: str, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+        replica = self._replica_for(query)
+        if replica is None:
+            return getattr(self.primary, method)(query, *args, **kwargs)
+        if self.is_async:
+            return self._aread(replica, method, query, args, kwargs)
+        started = time.perf_counter()
+        try:
+            result = getattr(self._member(replica), method)(query, *args, **kwargs)
+        except Exception as e:
+            result = getattr(self.primary, method)(query, *args, **kwargs)  # raises for bad SQL
+            self._bench(replica, e)
+            return result
+        replica.ok(time.perf_counter() - started)
+        return result
+
+    async def _aread(self, replica: _Replica, method: str, query: str, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+        started = time.perf_counter()
+        try:
+            result = getattr(self._member(replica), method)(query, *args, **kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+        except Exception as e:
+            result = await getattr(self.primary, method)(query, *args, **kwargs)
+            self._bench(replica, e)
+            return result
+        replica.ok(time.perf_counter() - started)
+        return result
+
+    def _stream(self, query: str, open_stream: Callable[[Any], Any]) -> Iterator[Any]:
+        """
+        A sync stream from a replica, timed to its first item. Failing before
+        that, it is retried on the primary (the replica is benched only if the
+        primary succeeds); failing mid-stream, the replica is benched.
+        """
+        replica = self._replica_for(query)
+        if replica is None:
+            yield from open_stream(self.primary)
+            return
+        started = time.perf_counter()
+        try:
+            it = iter(open_stream(self._member(replica)))
+            first = next(it, _END)
+        except Exception as e:
+            it = iter(open_stream(self.primary))
+            first = next(it, _END)  # raises for bad SQL
+            self._bench(replica, e)
+            replica = None
+        else:
+            replica.ok(time.perf_counter() - started)
+        if first is _END:
+            return
+        yield first
+        try:
+            yield from it
+        except Exception as e:
+            if replica is not None:
+                self._bench(replica, e)
+            raise
+
+    async def _astream(self, query: str, open_stream: Callable[[Any], Any]) -> AsyncIterator[Any]:
+        """Async counterpart of _stream()."""
+        replica = self._replica_for(query)
+        if replica is None:
+            async for item in open_stream(self.primary):
+                yield item
+            return
+        started = time.perf_counter()
+        try:
+            it = open_stream(self._member(replica)).__aiter__()
+            first = await it.__anext__()
+        except StopAsyncIteration:
+            replica.ok(time.perf_counter() - started)
+            return
+        except Exception as e:
+            it = open_stream(self.primary).__aiter__()
+            try:
+                first = await it.__anext__()  # raises for bad SQL
+            except StopAsyncIteration:
+                first = _END
+            self._bench(replica, e)
+            replica = None
+        else:
+            replica.ok(time.perf_counter() - started)
+        if first is _END:
+            return
+        yield first
+        try:
+            async for item in it:
+                yield item
+        except Exception as e:
+            if replica is not None:
+                self._bench(replica, e)
+            raise
+
+    def fetchone(self, query: str, params: Optional[tuple] = None, **kwargs: Any) -> Any:
+        return self._read("fetchone", query, (params,), kwargs)
+
+    def fetchall(self, query: str, params: Optional[tuple] = None, **kwargs: Any) -> Any:
+        return self._read("fetchall", query, (params,), kwargs)
+
+    def iterate(
+        self, query: str, params: Optional[tuple] = None, *, batch_size: int = 1000, describe: DescribeHook = None
+    ) -> Iterator[Any]:
+        return self._stream(query, lambda eng: eng.iterate(query, params, batch_size=batch_size, describe=describe))
+
+    def aiterate(
+        self, query: str, params: Optional[tuple] = None, *, batch_size: int = 1000, describe: DescribeHook = None
+    ) -> AsyncIterator[Any]:
+        return self._astream(query, lambda eng: eng.aiterate(query, params, batch_size=batch_size, describe=describe))
+
+    def copy_out(self, query: str, params: Optional[tuple] = None, **kwargs: Any) -> Any:
+        stream = self._astream if self.is_async else self._stream
+        return stream(query, lambda eng: eng.copy_out(query, params, **kwargs))
+
+    def fetch_plan(self, explain_sql: str, params: Optional[tuple] = None) -> Any:
+        return self.primary.fetch_plan(explain_sql, params)
+
+    # ---------- primary only ----------
+
+    def execute(self, query: str, params: Optional[tuple] = None) -> Any:
+        mark_primary()
+        return self.primary.execute(query, params)
+
+    def executemany(self, query: str, param_list: Sequence[tuple]) -> Any:
+        mark_primary()
+        return self.primary.executemany(query, param_list)
+
+    def copy_in(self, *args: Any, **kwargs: Any) -> Any:
+        mark_primary()
+        return self.primary.copy_in(*args, **kwargs)
+
+    def begin(self) -> Any:
+        _begin_primary()
+        return self.primary.begin()
+
+    def commit(self) -> Any:
+        _end_primary()
+        return self.primary.commit()
+
+    def rollback(self) -> Any:
+        _end_primary()
+        return self.primary.rollback()
+
+    def transaction(self) -> Any:
+        return _PrimaryTransaction(self.primary.transaction())
+
+    def connect(self) -> Any:
+        return self.primary.connect()
+
+    def test_connection(self) -> Any:
+        return self.primary.test_connection()
+
+    def close(self) -> Any:
+        members = [self._primary] + [r.engine for r in self.replicas]
+        pending = []
+        for eng in members:
+            if eng is None or not hasattr(eng, "close"):
+                continue
+            res = eng.close()
+            if inspect.isawaitable(res):
+                pending.append(res)
+        if pending:
+            return asyncio.gather(*pending)
+        return None
+
+    def routing_stats(self) -> Dict[str, Any]:
+        return {"pinned": pinned_to_primary(), "replicas": [r.stats() for r in self.replicas]}
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("__") or name in ("_primary", "_primary_spec", "replicas"):
+            raise AttributeError(name)
+        return getattr(self.primary, name)
+
+
+# ---------- settings ----------
+
+def replica_names(s: Any) -> List[str]:
+    """DB_REPLICAS, or every REPLICA<n>_DB_ENGINE in the environment / .env extras."""
+    raw = str(getattr(s, "DB_REPLICAS", "") or "").strip()
+    if raw:
+        return [n.strip().upper() for n in raw.split(",") if n.strip()]
+    found = set()
+    for key in list(os.environ) + list(getattr(s, "model_extra", None) or {}):
+        m = _REPLICA_KEY.fullmatch(key)
+        if m:
+            found.add(m.group(1).upper())
+    return sorted(found, key=lambda n: (len(n), n))
+
+
+def routing_from_settings(s: Any, default_primary: Any) -> RoutingEngine:
+    """The DB_READ_ROUTING engine; `default_primary()` builds the DB_* engine when PRIMARY_DB_ENGINE is unset."""
+    from prefiq.database.connection import _read_named_env
+
+    name = str(getattr(s, "DB_PRIMARY", "PRIMARY") or "PRIMARY").upper()
+    primary = name if "DB_ENGINE" in _read_named_env(name) else default_primary()
+    return RoutingEngine(primary, replica_names(s), cooldown=float(getattr(s, "DB_REPLICA_COOLDOWN_S", 30.0)))
+
+
+__all__ = [
+    "RoutingEngine",
+    "RoutingScopeMiddleware",
+    "is_read_only",
+    "mark_primary",
+    "pinned_to_primary",
+    "replica_names",
+    "routing_from_settings",
+    "routing_scope",
+]
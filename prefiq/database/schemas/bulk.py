@@ -0,0 +1,96 @@
+# prefiq/database/schemas/bulk.py
+"""
+Backend-neutral helpers for multi-row INSERT statements.
+
+Each backend's queries.insert_many() uses chunk_rows() to cut an iterable of
+row dicts into bounded chunks (never materializing the whole input) and
+values_clause() to render the placeholders; the backend adds its own quoting
+and conflict clause. iterate_rows() streams a SELECT from either kind of
+engine for the backends' iterate() helpers.
+"""
+
+from __future__ import annotations
+
+import inspect
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from prefiq.database.loop_bridge import iter_sync
+
+ON_CONFLICT = (None, "ignore", "update")
+
+
+def check_conflict(on_conflict: Optional[str], conflict_columns: Sequence[str], *, needs_target: bool) -> None:
+    if on_conflict not in ON_CONFLICT:
+        raise ValueError(f"on_conflict must be one of {ON_CONFLICT!r}, got {on_conflict!r}")
+    if on_conflict == "update" and needs_target and not conflict_columns:
+        raise ValueError("on_conflict='update' requires conflict_columns on this backend")
+
+
+def rows_per_chunk(chunk_size: int, ncols: int, max_params: int) -> int:
+    """Largest chunk <= chunk_size whose placeholder count fits the backend limit."""
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be >= 1")
+    return max(1, min(chunk_size, max_params // max(1, ncols)))
+
+
+def chunk_rows(
+    rows: Iterable[Mapping[str, Any]],
+    chunk_size: int,
+    max_params: int,
+) -> Iterator[Tuple[List[str], List[Any]]]:
+    """
+    Yield (columns, flat_params) per chunk. Columns come from the first row;
+    every later row must have the same keys.
+    """
+    it = iter(rows)
+    first = next(it, None)
+    if first is None:
+        return
+    columns = list(first.keys())
+    if not columns:
+        raise ValueError("insert_many() received a row without values")
+    colset = set(columns)
+    per_chunk = rows_per_chunk(chunk_size, len(columns), max_params)
+
+    def _flat(chunk: Iterable[Mapping[str, Any]]) -> List[Any]:
+        out: List[Any] = []
+        for row in chunk:
+            if row.keys() != colset:
+                raise ValueError(
+                    f"insert_many() rows must share the same columns: expected {sorted(colset)}, got {sorted(row.keys())}"
+                )
+            out.extend(row[c] for c in columns)
+        return out
+
+    pending: List[Mapping[str, Any]] = [first]
+    pending.extend(islice(it, per_chunk - 1))
+    while pending:
+        yield columns, _flat(pending)
+        pending = list(islice(it, per_chunk))
+
+
+def values_clause(nrows: int, ncols: int, placeholder: str) -> str:
+    group = "(" + ", ".join([placeholder] * ncols) + ")"
+    return ", ".join([group] * nrows)
+
+
+def affected(result: Any) -> int:
+    """Normalize an engine's execute() result (rowcount or a status tag like 'INSERT 0 5')."""
+    if isinstance(result, bool):
+        return int(result)
+    if isinstance(result, int):
+        return max(result, 0)
+    if isinstance(result, str):
+        tail = result.rsplit(" ", 1)[-1]
+        return int(tail) if tail.isdigit() else 0
+    return 0
+
+
+def iterate_rows(eng: Any, sql: str, params: tuple, batch_size: int) -> Iterator[tuple]:
+    """Stream `sql`'s rows: async engines via aiterate() on the shared loop, sync ones via iterate()."""
+    if inspect.iscoroutinefunction(getattr(eng, "fetchall", None)) and hasattr(eng, "aiterate"):
+        return iter_sync(eng.aiterate(sql, params, batch_size=batch_size), chunk=batch_size)
+    if hasattr(eng, "iterate"):
+        return eng.iterate(sql, params, batch_size=batch_size)
+    return iter(eng.fetchall(sql, params) or [])
@@ -1,31 +1,16 @@
 # prefiq/database/schemas/mysql_like/builder.py
 from __future__ import annotations
-import asyncio
 import inspect
 from typing import Callable, Any, Iterable
 
 from prefiq.database.schemas.mysql_like.blueprint import TableBlueprint, q
 from prefiq.database.connection_manager import get_engine
+from prefiq.database.loop_bridge import run_sync
 
 
 def _run(coro):
-    try:
-        asyncio.get_running_loop()
-    except RuntimeError:
-        return asyncio.run(coro)
-    # Already in a loop: run in a temp thread/loop
-    from concurrent.futures import ThreadPoolExecutor
-
-    def _runner():
-        loop = asyncio.new_event_loop()
-        try:
-            asyncio.set_event_loop(loop)
-            return loop.run_until_complete(coro)
-        finally:
-            loop.close()
-
-    with ThreadPoolExecutor(max_workers=1) as ex:
-        return ex.submit(_runner).result()
+    # Shared long-lived loop: pooled async connections survive between calls
+    return run_sync(coro)
 
 
 def _call(meth, *args):
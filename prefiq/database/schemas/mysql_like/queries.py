@@ -1,30 +1,20 @@
 from __future__ import annotations
-import asyncio
 import inspect
-from typing import Optional
+from typing import Any, Dict, Iterable, Iterator, Mapping, Optional, Sequence, Tuple
 from prefiq.database.connection_manager import get_engine
+from prefiq.database.loop_bridge import run_sync
+from prefiq.database.schemas.bulk import affected, check_conflict, chunk_rows, iterate_rows, values_clause
+
+# Prepared-statement placeholder limit (MySQL / MariaDB protocol)
+_MAX_PARAMS = 65535
 
 def q(name: str) -> str:
     return f"`{name}`"
 
 def _run(coro):
-    try:
-        asyncio.get_running_loop()
-    except RuntimeError:
-        return asyncio.run(coro)
-
-    from concurrent.futures import ThreadPoolExecutor
-
-    def _runner():
-        loop = asyncio.new_event_loop()
-        try:
-            asyncio.set_event_loop(loop)
-            return loop.run_until_complete(coro)
-        finally:
-            loop.close()
+    # Shared long-lived loop: pooled async connections survive between calls
+    return run_sync(coro)
 
-    with ThreadPoolExecutor(max_workers=1) as ex:
-        return ex.submit(_runner).result()
 
 def _call(meth, *args):
     res = meth(*args)
@@ -41,6 +31,51 @@ def insert(table_name: str, values: dict) -> None:
     sql = f"INSERT INTO {tname} ({cols}) VALUES ({ph})"
     _call(get_engine().execute, sql, tuple(values.values()))
 
+def _insert_many_sql(tname: str, columns: Sequence[str], nrows: int, on_conflict: Optional[str],
+                     update_columns: Optional[Sequence[str]]) -> str:
+    cols = ", ".join(q(c) for c in columns)
+    verb = "INSERT IGNORE INTO" if on_conflict == "ignore" else "INSERT INTO"
+    sql = f"{verb} {tname} ({cols}) VALUES {values_clause(nrows, len(columns), '%s')}"
+    if on_conflict == "update":
+        upd = list(update_columns or columns)
+        sql += " ON DUPLICATE KEY UPDATE " + ", ".join(f"{q(c)} = VALUES({q(c)})" for c in upd)
+    return sql
+
+def _compiled_chunks(tname: str, rows: Iterable[Mapping[str, Any]], chunk_size: int,
+                     on_conflict: Optional[str], update_columns: Optional[Sequence[str]]):
+    compiled: Dict[Tuple[int, int], str] = {}
+    for columns, params in chunk_rows(rows, chunk_size, _MAX_PARAMS):
+        shape = (len(columns), len(params) // len(columns))
+        sql = compiled.get(shape)
+        if sql is None:
+            sql = compiled[shape] = _insert_many_sql(tname, columns, shape[1], on_conflict, update_columns)
+        yield sql, tuple(params)
+
+def insert_many(table_name: str, rows: Iterable[Mapping[str, Any]], *, chunk_size: int = 500,
+                on_conflict: Optional[str] = None, conflict_columns: Sequence[str] = (),
+                update_columns: Optional[Sequence[str]] = None) -> list[int]:
+    # MySQL/MariaDB upserts match on any unique key; conflict_columns is accepted for API parity
+    check_conflict(on_conflict, conflict_columns, needs_target=False)
+    chunks = _compiled_chunks(q(table_name), rows, chunk_size, on_conflict, update_columns)
+    eng = get_engine()
+    cm = eng.transaction()
+    if hasattr(cm, "__aenter__"):
+        # Through the engine: its pool executor, the pinned connection and the statement bracket
+        async def _load() -> list[int]:
+            counts: list[int] = []
+            async with cm:
+                for sql, params in chunks:
+                    counts.append(affected(await eng.execute(sql, params)))
+            return counts
+        return _run(_load())
+
+    counts: list[int] = []
+    with cm as cur:
+        for sql, params in chunks:
+            cur.execute(sql, params)
+            counts.append(max(cur.rowcount, 0))
+    return counts
+
 def update(table_name: str, values: dict, where: str, params: tuple) -> None:
     if not values:
         raise ValueError("update() received empty values")
@@ -64,6 +99,12 @@ def select_all(table_name: str, columns: str = "*", where: Optional[str] = None,
     sql = f"SELECT {columns} FROM {tname}" + (f" WHERE {where}" if where else "")
     return _call(get_engine().fetchall, sql, params)
 
+def select_iter(table_name: str, columns: str = "*", where: Optional[str] = None, params: tuple = (),
+                batch_size: int = 1000) -> Iterator[tuple]:
+    tname = q(table_name)
+    sql = f"SELECT {columns} FROM {tname}" + (f" WHERE {where}" if where else "")
+    return iterate_rows(get_engine(), sql, params, batch_size)
+
 def count(table_name: str, where: Optional[str] = None, params: tuple = ()) -> int:
     tname = q(table_name)
     sql = f"SELECT COUNT(*) FROM {tname}" + (f" WHERE {where}" if where else "")
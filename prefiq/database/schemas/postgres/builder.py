@@ -1,27 +1,17 @@
 from __future__ import annotations
-import asyncio
 import inspect
 from typing import Callable, Any, Iterable
 
 from prefiq.database.schemas.postgres.blueprint import TableBlueprint, q
 from prefiq.database.connection_manager import get_engine
+from prefiq.database.loop_bridge import run_sync
 
 
 # ── small awaitable adapter (works for sync/async engines) ──────────────────
 
 def _run(coro):
-    try:
-        asyncio.get_running_loop()
-    except RuntimeError:
-        return asyncio.run(coro)
-    # Already inside a running loop; spin a quick task and wait
-    return _in_loop(coro)
-
-def _in_loop(coro):
-    # Fire-and-wait helper when a loop exists
-    fut = asyncio.ensure_future(coro)
-    loop = asyncio.get_running_loop()
-    return loop.run_until_complete(fut)
+    # Shared long-lived loop (never run_until_complete on an already-running loop)
+    return run_sync(coro)
 
 def _call(fn: Callable, *args, **kwargs):
     res = fn(*args, **kwargs)
@@ -1,26 +1,21 @@
 # prefiq/database/schemas/postgres/queries.py
 from __future__ import annotations
-from typing import Any, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, Mapping, Optional, Sequence, Tuple
 from prefiq.database.connection_manager import get_engine
+from prefiq.database.loop_bridge import run_sync
+from prefiq.database.statements import compile_statement
+from prefiq.database.schemas.bulk import affected, check_conflict, chunk_rows, iterate_rows, values_clause
+
+# asyncpg caps bind arguments at 32767 (server limit is 65535)
+_MAX_PARAMS = 32767
 
 def q(name: str) -> str:
     return f"\"{name}\""
 
-def _map_placeholders(sql: str, n: int) -> str:
-    # convert %s to $1,$2,... to align with asyncpg parameter style
-    out = []
-    idx = 1
-    i = 0
-    while i < len(sql) and idx <= n:
-        if sql[i:i+2] == "%s":
-            out.append(f"${idx}")
-            idx += 1
-            i += 2
-        else:
-            out.append(sql[i])
-            i += 1
-    out.append(sql[i:])
-    return "".join(out)
+def _prep(eng: Any, sql: str) -> str:
+    # psycopg2 (paramstyle "format") takes %s natively; asyncpg needs $n
+    style = "format" if getattr(eng, "paramstyle", None) == "format" else "numeric"
+    return compile_statement(style, sql).sql
 
 def insert(table_name: str, values: dict) -> None:
     if not values:
@@ -29,8 +24,59 @@ def insert(table_name: str, values: dict) -> None:
     cols = ", ".join(q(k) for k in values)
     ph  = ", ".join(["%s"] * len(values))
     sql = f"INSERT INTO {tname} ({cols}) VALUES ({ph})"
-    sql = _map_placeholders(sql, len(values))
-    get_engine().execute(sql, tuple(values.values()))
+    eng = get_engine()
+    sql = _prep(eng, sql)
+    eng.execute(sql, tuple(values.values()))
+
+def _insert_many_sql(tname: str, columns: Sequence[str], nrows: int, on_conflict: Optional[str],
+                     conflict_columns: Sequence[str], update_columns: Optional[Sequence[str]]) -> str:
+    cols = ", ".join(q(c) for c in columns)
+    sql = f"INSERT INTO {tname} ({cols}) VALUES {values_clause(nrows, len(columns), '%s')}"
+    target = f" ({', '.join(q(c) for c in conflict_columns)})" if conflict_columns else ""
+    if on_conflict == "ignore":
+        sql += f" ON CONFLICT{target} DO NOTHING"
+    elif on_conflict == "update":
+        upd = [c for c in (update_columns or columns) if c not in conflict_columns]
+        if upd:
+            sql += f" ON CONFLICT{target} DO UPDATE SET " + ", ".join(f"{q(c)} = EXCLUDED.{q(c)}" for c in upd)
+        else:
+            sql += f" ON CONFLICT{target} DO NOTHING"
+    return sql
+
+def insert_many(table_name: str, rows: Iterable[Mapping[str, Any]], *, chunk_size: int = 500,
+                on_conflict: Optional[str] = None, conflict_columns: Sequence[str] = (),
+                update_columns: Optional[Sequence[str]] = None) -> list[int]:
+    check_conflict(on_conflict, conflict_columns, needs_target=True)
+    tname = q(table_name)
+    eng = get_engine()
+    compiled: Dict[Tuple[int, int], str] = {}
+
+    def _chunks():
+        for columns, params in chunk_rows(rows, chunk_size, _MAX_PARAMS):
+            shape = (len(columns), len(params) // len(columns))
+            sql = compiled.get(shape)
+            if sql is None:
+                sql = _insert_many_sql(tname, columns, shape[1], on_conflict, conflict_columns, update_columns)
+                sql = compiled[shape] = _prep(eng, sql)
+            yield sql, tuple(params)
+
+    cm = eng.transaction()
+    if hasattr(cm, "__aenter__"):
+        # Through the engine (pinned connection, statement bracket), not the raw asyncpg one
+        async def _load() -> list[int]:
+            counts: list[int] = []
+            async with cm:
+                for sql, params in _chunks():
+                    counts.append(affected(await eng.aexecute(sql, params)))
+            return counts
+        return run_sync(_load())
+
+    counts: list[int] = []
+    with cm as cur:
+        for sql, params in _chunks():
+            cur.execute(sql, params)
+            counts.append(max(cur.rowcount, 0))
+    return counts
 
 def update(table_name: str, values: dict, where: str, params: tuple) -> None:
     if not values:
@@ -38,30 +84,43 @@ def update(table_name: str, values: dict, where: str, params: tuple) -> None:
     tname = q(table_name)
     set_clause = ", ".join(f"{q(k)} = %s" for k in values)
     sql = f"UPDATE {tname} SET {set_clause} WHERE {where}"
-    sql = _map_placeholders(sql, len(values) + len(params))
-    get_engine().execute(sql, tuple(values.values()) + params)
+    eng = get_engine()
+    sql = _prep(eng, sql)
+    eng.execute(sql, tuple(values.values()) + params)
 
 def delete(table_name: str, where: str, params: tuple) -> None:
     tname = q(table_name)
     sql = f"DELETE FROM {tname} WHERE {where}"
-    sql = _map_placeholders(sql, len(params))
-    get_engine().execute(sql, params)
+    eng = get_engine()
+    sql = _prep(eng, sql)
+    eng.execute(sql, params)
 
 def select_one(table_name: str, columns: str, where: str, params: tuple) -> Optional[tuple]:
     tname = q(table_name)
     sql = f"SELECT {columns} FROM {tname} WHERE {where} LIMIT 1"
-    sql = _map_placeholders(sql, len(params))
-    return get_engine().fetchone(sql, params)
+    eng = get_engine()
+    sql = _prep(eng, sql)
+    return eng.fetchone(sql, params)
 
 def select_all(table_name: str, columns: str = "*", where: Optional[str] = None, params: tuple = ()) -> list[tuple]:
     tname = q(table_name)
     sql = f"SELECT {columns} FROM {tname}" + (f" WHERE {where}" if where else "")
-    sql = _map_placeholders(sql, len(params))
-    return get_engine().fetchall(sql, params)
+    eng = get_engine()
+    sql = _prep(eng, sql)
+    return eng.fetchall(sql, params)
+
+def select_iter(table_name: str, columns: str = "*", where: Optional[str] = None, params: tuple = (),
+                batch_size: int = 1000) -> Iterator[tuple]:
+    tname = q(table_name)
+    sql = f"SELECT {columns} FROM {tname}" + (f" WHERE {where}" if where else "")
+    eng = get_engine()
+    sql = _prep(eng, sql)
+    return iterate_rows(eng, sql, params, batch_size)
 
 def count(table_name: str, where: Optional[str] = None, params: tuple = ()) -> int:
     tname = q(table_name)
     sql = f"SELECT COUNT(*) FROM {tname}" + (f" WHERE {where}" if where else "")
-    sql = _map_placeholders(sql, len(params))
-    row = get_engine().fetchone(sql, params)
+    eng = get_engine()
+    sql = _prep(eng, sql)
+    row = eng.fetchone(sql, params)
     return row[0] if row else 0
@@ -1,7 +1,7 @@
 # prefiq/database/schemas/queries.py
 
 from __future__ import annotations
-from typing import Optional
+from typing import Any, Iterable, Iterator, Mapping, Optional, Sequence
 from prefiq.database.schemas.router import impl
 
 def _qry():
@@ -11,6 +11,19 @@ def _qry():
 def insert(table_name: str, values: dict) -> None:
     _qry().insert(table_name, values)
 
+def insert_many(table_name: str, rows: Iterable[Mapping[str, Any]], *, chunk_size: int = 500,
+                on_conflict: Optional[str] = None, conflict_columns: Sequence[str] = (),
+                update_columns: Optional[Sequence[str]] = None) -> list[int]:
+    """
+    Insert many rows (dicts sharing the same keys) with one multi-row INSERT per
+    chunk, all inside a single transaction. `rows` may be any iterable; it is
+    consumed chunk by chunk. on_conflict: None | "ignore" | "update" (upsert on
+    `conflict_columns`, updating `update_columns` or every other column).
+    Returns the affected-row count reported for each chunk.
+    """
+    return _qry().insert_many(table_name, rows, chunk_size=chunk_size, on_conflict=on_conflict,
+                              conflict_columns=conflict_columns, update_columns=update_columns)
+
 def update(table_name: str, values: dict, where: str, params: tuple) -> None:
     _qry().update(table_name, values, where, params)
 
@@ -23,5 +36,10 @@ def select_one(table_name: str, columns: str, where: str, params: tuple) -> Opti
 def select_all(table_name: str, columns: str = "*", where: Optional[str] = None, params: tuple = ()) -> list[tuple]:
     return _qry().select_all(table_name, columns, where, params)
 
+def select_iter(table_name: str, columns: str = "*", where: Optional[str] = None, params: tuple = (),
+                batch_size: int = 1000) -> Iterator[tuple]:
+    """Like select_all(), but streams rows in bounded batches instead of building a list."""
+    return _qry().select_iter(table_name, columns, where, params, batch_size)
+
 def count(table_name: str, where: Optional[str] = None, params: tuple = ()) -> int:
     return _qry().count(table_name, where, params)
@@ -1,9 +1,20 @@
 # prefiq/database/schemas/sqlite/builder.py
 from __future__ import annotations
+import inspect
 from typing import Callable, Any, Iterable, Sequence
 
 from prefiq.database.schemas.sqlite.blueprint import TableBlueprint, q
 from prefiq.database.connection_manager import get_engine
+from prefiq.database.loop_bridge import run_sync
+
+
+def _call(meth, *args):
+    # Async engines (DB_MODE=async): run on the shared database loop
+    res = meth(*args)
+    if inspect.isawaitable(res):
+        return run_sync(res)
+    return res
+
 
 def _as_list(columns: Iterable[str] | str) -> list[str]:
     if isinstance(columns, str):
@@ -21,14 +32,14 @@ def create(table_name: str, schema_callback: Callable[[TableBlueprint], Any]) ->
 
     # Create table first
     sql = f"CREATE TABLE IF NOT EXISTS {tname} (\n  {table.build_columns()}\n);"
-    eng.execute(sql)
+    _call(eng.execute, sql)
 
     # Then create indexes captured by the blueprint
     for iname, cols in table.index_meta:
         createIndex(table_name, iname, cols)
 
 def dropIfExists(table_name: str) -> None:
-    get_engine().execute(f"DROP TABLE IF EXISTS {q(table_name)};")
+    _call(get_engine().execute, f"DROP TABLE IF EXISTS {q(table_name)};")
 
 def createIndex(table_name: str, index_name: str | None, columns: Iterable[str] | str) -> None:
     cols = _as_list(columns)
@@ -37,8 +48,8 @@ def createIndex(table_name: str, index_name: str | None, columns: Iterable[str]
     t = q(table_name)
     i = q(iname)
     col_sql = ", ".join(q(c) for c in cols)
-    get_engine().execute(f"CREATE INDEX IF NOT EXISTS {i} ON {t} ({col_sql});")
+    _call(get_engine().execute, f"CREATE INDEX IF NOT EXISTS {i} ON {t} ({col_sql});")
 
 def dropIndexIfExists(index_name: str, table_name: str | None = None) -> None:
     # table_name unused for sqlite
-    get_engine().execute(f"DROP INDEX IF EXISTS {q(index_name)};")
+    _call(get_engine().execute, f"DROP INDEX IF EXISTS {q(index_name)};")
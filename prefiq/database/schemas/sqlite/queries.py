@@ -1,9 +1,16 @@
 # prefiq/database/schemas/sqlite/queries.py
 from __future__ import annotations
-from typing import Any, Optional, Tuple
+from contextlib import nullcontext
+from typing import Any, Dict, Iterable, Iterator, Mapping, Optional, Sequence, Tuple
 import inspect
+import sqlite3
 
 from prefiq.database.connection_manager import get_engine
+from prefiq.database.loop_bridge import run_sync
+from prefiq.database.schemas.bulk import affected, check_conflict, chunk_rows, iterate_rows, values_clause
+
+# SQLITE_MAX_VARIABLE_NUMBER: 999 before 3.32, 32766 since
+_MAX_PARAMS = 32766 if sqlite3.sqlite_version_info >= (3, 32, 0) else 999
 
 def q(name: str) -> str:
     # minimal identifier quoting for SQLite
@@ -11,26 +18,48 @@ def q(name: str) -> str:
 
 # --- internal helpers to be compatible with both real engines and test fakes ---
 
+# (engine type, method name) -> accepts a params argument; filled on first call
+_ACCEPTS_PARAMS: Dict[Any, Optional[bool]] = {}
+
+def _accepts_params(method: Any) -> Optional[bool]:
+    owner = getattr(method, "__self__", None)
+    key = (type(owner), getattr(method, "__name__", None)) if owner is not None else method
+    try:
+        return _ACCEPTS_PARAMS[key]
+    except KeyError:
+        pass
+    try:
+        # Count user-facing parameters (bound methods already exclude 'self')
+        ok: Optional[bool] = len(inspect.signature(method).parameters) >= 2
+    except (TypeError, ValueError):
+        ok = None  # not introspectable: decide per call
+    if len(_ACCEPTS_PARAMS) >= 256:
+        _ACCEPTS_PARAMS.clear()
+    _ACCEPTS_PARAMS[key] = ok
+    return ok
+
 def _call_with_optional_params(method: Any, sql: str, params: Tuple[Any, ...] | list[Any] | None):
     """
     Call an engine method that may or may not accept a 'params' argument.
-    Tries (sql, params) first if supported; otherwise falls back to (sql).
+    The signature is inspected once per engine type and method, then cached.
+    Async engines' coroutines are run on the shared database loop.
     """
+    res = _invoke(method, sql, params)
+    if inspect.isawaitable(res):
+        return run_sync(res)
+    return res
+
+def _invoke(method: Any, sql: str, params: Tuple[Any, ...] | list[Any] | None):
+    ok = _accepts_params(method)
+    if ok:
+        return method(sql, params or ())
+    if ok is False:
+        return method(sql)
+    # If introspection fails, try best-effort fallbacks
     try:
-        sig = inspect.signature(method)
-        # Count user-facing parameters (exclude 'self')
-        num_params = len(sig.parameters)
-        # Most engines expose method(self, sql[, params])
-        if num_params >= 2:
-            return method(sql, params or ())
-        else:
-            return method(sql)
-    except (TypeError, ValueError):
-        # If introspection fails or call signature mismatches, try best-effort fallbacks
-        try:
-            return method(sql, params or ())
-        except TypeError:
-            return method(sql)
+        return method(sql, params or ())
+    except TypeError:
+        return method(sql)
 
 def _exec(sql: str, params: Tuple[Any, ...] = ()) -> None:
     eng = get_engine()
@@ -68,6 +97,57 @@ def insert(table_name: str, values: dict) -> None:
     sql = f"INSERT INTO {tname} ({cols}) VALUES ({ph})"
     _exec(sql, tuple(values.values()))
 
+def _insert_many_sql(tname: str, columns: Sequence[str], nrows: int, on_conflict: Optional[str],
+                     conflict_columns: Sequence[str], update_columns: Optional[Sequence[str]]) -> str:
+    cols = ", ".join(q(c) for c in columns)
+    verb = "INSERT OR IGNORE INTO" if on_conflict == "ignore" else "INSERT INTO"
+    sql = f"{verb} {tname} ({cols}) VALUES {values_clause(nrows, len(columns), '?')}"
+    if on_conflict == "update":
+        target = ", ".join(q(c) for c in conflict_columns)
+        upd = [c for c in (update_columns or columns) if c not in conflict_columns]
+        if upd:
+            sql += f" ON CONFLICT ({target}) DO UPDATE SET " + ", ".join(f"{q(c)} = excluded.{q(c)}" for c in upd)
+        else:
+            sql += f" ON CONFLICT ({target}) DO NOTHING"
+    return sql
+
+def insert_many(table_name: str, rows: Iterable[Mapping[str, Any]], *, chunk_size: int = 500,
+                on_conflict: Optional[str] = None, conflict_columns: Sequence[str] = (),
+                update_columns: Optional[Sequence[str]] = None) -> list[int]:
+    check_conflict(on_conflict, conflict_columns, needs_target=True)
+    tname = q(table_name)
+    eng = get_engine()
+    method = getattr(eng, "execute", None)
+    if method is None:
+        raise RuntimeError("Engine has no 'execute' method")
+    tx = getattr(eng, "transaction", None)
+    compiled: Dict[Tuple[int, int], str] = {}
+
+    def _chunks() -> Iterator[Tuple[str, tuple]]:
+        for columns, params in chunk_rows(rows, chunk_size, _MAX_PARAMS):
+            shape = (len(columns), len(params) // len(columns))
+            sql = compiled.get(shape)
+            if sql is None:
+                sql = compiled[shape] = _insert_many_sql(tname, columns, shape[1], on_conflict,
+                                                         conflict_columns, update_columns)
+            yield sql, tuple(params)
+
+    cm = tx() if tx is not None else nullcontext()
+    if hasattr(cm, "__aenter__"):
+        async def _load() -> list[int]:
+            out: list[int] = []
+            async with cm:
+                for sql, params in _chunks():
+                    out.append(affected(await method(sql, params)))
+            return out
+        return run_sync(_load())
+
+    counts: list[int] = []
+    with cm:
+        for sql, params in _chunks():
+            counts.append(affected(_call_with_optional_params(method, sql, params)))
+    return counts
+
 def update(table_name: str, values: dict, where: str, params: tuple) -> None:
     if not values:
         raise ValueError("update() received empty values")
@@ -91,6 +171,12 @@ def select_all(table_name: str, columns: str = "*", where: Optional[str] = None,
     sql = f"SELECT {columns} FROM {tname}" + (f" WHERE {where}" if where else "")
     return _fetchall(sql, params or ())
 
+def select_iter(table_name: str, columns: str = "*", where: Optional[str] = None, params: tuple = (),
+                batch_size: int = 1000) -> Iterator[tuple]:
+    tname = q(table_name)
+    sql = f"SELECT {columns} FROM {tname}" + (f" WHERE {where}" if where else "")
+    return iterate_rows(get_engine(), sql, params or (), batch_size)
+
 def count(table_name: str, where: Optional[str] = None, params: tuple = ()) -> int:
     tname = q(table_name)
     sql = f"SELECT COUNT(*) FROM {tname}" + (f" WHERE {where}" if where else "")
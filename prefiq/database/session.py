@@ -0,0 +1,57 @@
+# prefiq/database/session.py
+
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, Callable, Optional
+
+from prefiq.database.connection import get_engine, get_engine_named
+
+
+# ----- connection affinity ---------------------------------------------------
+
+@asynccontextmanager
+async def db_session(engine_name: Optional[str] = None) -> AsyncGenerator[Any, None]:
+    """
+    Pin one pooled connection to the current context and yield the engine.
+    Every engine call inside the block (including begin/commit/rollback) runs on
+    that connection. Engines without session support are yielded unchanged.
+    """
+    eng = get_engine_named(engine_name) if engine_name else get_engine()
+    session = getattr(eng, "session", None)
+    if session is None:
+        yield eng
+        return
+    async with session():
+        yield eng
+
+
+# ----- FastAPI-friendly dependency (optional) -------------------------------
+
+async def db_session_dependency() -> AsyncGenerator[Any, None]:
+    """
+    FastAPI dependency: one pinned connection of the default engine per request.
+
+        @router.get("/items")
+        async def items(db = Depends(db_session_dependency)):
+            return await db.fetchall("SELECT ...")
+    """
+    async with db_session() as eng:
+        yield eng
+
+
+def named_db_session_dependency(engine_name: str) -> Callable[[], AsyncGenerator[Any, None]]:
+    """Build a per-request session dependency for a named engine (e.g. 'ANALYTICS')."""
+
+    async def _dependency() -> AsyncGenerator[Any, None]:
+        async with db_session(engine_name) as eng:
+            yield eng
+
+    return _dependency
+
+
+__all__ = [
+    "db_session",
+    "db_session_dependency",
+    "named_db_session_dependency",
+]
@@ -0,0 +1,169 @@
+# =============================================================
+# Compiled Statement Cache (statements.py)
+# file path: prefiq/database/statements.py
+#
+# Purpose:
+#   - Translate a statement's placeholders to a driver's paramstyle once
+#     and reuse the result: compile_statement(paramstyle, sql) is
+#     LRU-cached on (paramstyle, sql).
+#   - Source placeholders are the internal `%s` (positional) or `:name`
+#     (named). Targets: "qmark" (?), "format" (%s), "numeric" ($1, $2 ...)
+#     and "named" (left as-is, params passed as a dict).
+#   - Named statements carry a precomputed extractor: stmt.bind(mapping)
+#     returns the positional tuple in placeholder order.
+#
+# Notes for Developers:
+#   - String literals, quoted identifiers and comments are skipped, so a
+#     '%s' or ':x' inside quotes is never rewritten; `::type` casts are
+#     not parameters.
+#   - Mixing `%s` and `:name` in one statement is a ValueError.
+#   - Statements over MAX_CACHED_SQL characters are not cached: callers
+#     building bulk SQL keep their own per-shape cache.
+#   - With "numeric", a repeated :name reuses its $n; other styles repeat
+#     the value.
+# =============================================================
+
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+PARAMSTYLES = ("qmark", "format", "numeric", "named")
+
+# Longer statements (multi-row bulk INSERTs) are compiled but not cached
+MAX_CACHED_SQL = 8192
+
+# Driver paramstyle per engine_label (overridden by an engine's own `paramstyle`)
+ENGINE_PARAMSTYLES: Dict[str, str] = {
+    "sqlite": "qmark",
+    "mariadb": "format",
+    "mysql": "format",
+    "postgres": "numeric",  # asyncpg; the psycopg2 engine declares "format"
+}
+
+_TOKEN = re.compile(
+    r"""'(?:[^'\\]|''|\\.)*'"""     # string literal
+    r'''|"(?:[^"]|"")*"'''          # quoted identifier
+    r"|`[^`]*`"                     # backtick identifier
+    r"|--[^\n]*|/\*.*?\*/"          # comments
+    r"|%%"                          # escaped percent
+    r"|(%s)"                        # positional placeholder
+    r"|(?<![:\w]):([A-Za-z_]\w*)",  # named placeholder (not ::cast)
+    re.S,
+)
+
+
+def _identity(params: Any) -> Any:
+    return params
+
+
+class CompiledStatement:
+    """Translated SQL plus the binder that turns caller params into driver params."""
+
+    __slots__ = ("sql", "names", "bind")
+
+    def __init__(self, sql: str, names: Tuple[str, ...], bind: Callable[[Any], Any]) -> None:
+        self.sql = sql
+        self.names = names
+        self.bind = bind
+
+    def __repr__(self) -> str:
+        return f"CompiledStatement({self.sql!r}, names={self.names!r})"
+
+
+def _render(paramstyle: str, n: int) -> str:
+    if paramstyle == "qmark":
+        return "?"
+    if paramstyle == "numeric":
+        return f"${n}"
+    return "%s"
+
+
+def compile_statement(paramstyle: str, sql: str) -> CompiledStatement:
+    """Translate `sql` to `paramstyle`; cached, so repeat calls are a dict lookup."""
+    if len(sql) > MAX_CACHED_SQL:
+        return _compile(paramstyle, sql)
+    return _cached(paramstyle, sql)
+
+
+def _compile(paramstyle: str, sql: str) -> CompiledStatement:
+    if paramstyle not in PARAMSTYLES:
+        raise ValueError(f"paramstyle must be one of {', '.join(PARAMSTYLES)}")
+
+    out = []
+    names: list[str] = []
+    slots: Dict[str, int] = {}
+    positional = 0
+    last = 0
+    for m in _TOKEN.finditer(sql):
+        pos, name = m.group(1), m.group(2)
+        if pos is None and name is None:
+            continue
+        if pos is not None:
+            positional += 1
+            if paramstyle == "named":
+                continue
+            out.append(sql[last:m.start()])
+            out.append(_render(paramstyle, positional))
+        else:
+            names.append(name)
+            if paramstyle == "named":
+                continue
+            out.append(sql[last:m.start()])
+            if paramstyle == "numeric":
+                out.append(f"${slots.setdefault(name, len(slots) + 1)}")
+            else:
+                out.append(_render(paramstyle, len(names)))
+        last = m.end()
+    out.append(sql[last:])
+
+    if positional and names:
+        raise ValueError("cannot mix positional (%s) and named (:name) placeholders")
+
+    if not names:
+        return CompiledStatement("".join(out), (), _identity)
+    if paramstyle == "named":
+        return CompiledStatement(sql, tuple(dict.fromkeys(names)), _as_dict)
+
+    order = tuple(slots) if paramstyle == "numeric" else tuple(names)
+
+    def bind(params: Optional[Mapping[str, Any]]) -> Optional[Tuple[Any, ...]]:
+        if params is None:
+            return None
+        get = params.get
+        return tuple([get(n) for n in order])
+
+    return CompiledStatement("".join(out), order, bind)
+
+
+_cached = lru_cache(maxsize=2048)(_compile)
+
+
+def _as_dict(params: Optional[Mapping[str, Any]]) -> Optional[Dict[str, Any]]:
+    return None if params is None else {str(k): v for k, v in params.items()}
+
+
+def paramstyle_for(engine: Any) -> str:
+    """The engine's declared `paramstyle`, else the default for its engine_label."""
+    style = getattr(engine, "paramstyle", None)
+    if style in PARAMSTYLES:
+        return style
+    return ENGINE_PARAMSTYLES.get(getattr(engine, "engine_label", ""), "named")
+
+
+def prepare(engine: Any, sql: str, params: Any = None) -> Tuple[str, Any]:
+    """One-call form for query paths: (driver sql, driver params) for `engine`."""
+    stmt = compile_statement(paramstyle_for(engine), sql)
+    return stmt.sql, stmt.bind(params)
+
+
+__all__ = [
+    "CompiledStatement",
+    "ENGINE_PARAMSTYLES",
+    "MAX_CACHED_SQL",
+    "PARAMSTYLES",
+    "compile_statement",
+    "paramstyle_for",
+    "prepare",
+]
@@ -0,0 +1,183 @@
+# =============================================================
+# Per-Statement Query Statistics (stats.py)
+# file path: prefiq/database/stats.py
+#
+# Purpose:
+#   - pg_stat_statements-style aggregation inside the process: every
+#     statement is normalized to a fingerprint (literals -> ?, IN-lists
+#     and multi-row VALUES collapsed) and counted per fingerprint.
+#   - Per fingerprint: calls, errors, rows, total / mean / max time and
+#     p50 / p95 / p99 from a fixed-size reservoir sample.
+#   - Slow thresholds (DB_SLOW_QUERY_MS, DB_SLOW_QUERY_MS_<ENGINE>).
+#
+# Notes for Developers:
+#   - Memory is bounded: at most `max_statements` fingerprints, each
+#     with at most RESERVOIR latency samples. When full, the least-called
+#     tenth is evicted (like pg_stat_statements' dealloc).
+#   - QueryStats.record is an instrumentation subscriber; it is installed
+#     by prefiq.database.hooks.install() when DB_QUERY_STATS is on.
+# =============================================================
+
+from __future__ import annotations
+
+import math
+import random
+import re
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from prefiq.database.instrumentation import QueryEvent
+from prefiq.settings.get_settings import load_settings
+
+RESERVOIR = 128
+DEFAULT_SLOW_MS = 500.0
+
+_COMMENT = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRING = re.compile(r"[eEnNxXbB]?'(?:[^'\\]|''|\\.)*'")
+_NUMBER = re.compile(r"(?<![\w$.])[-+]?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|%\(\w+\)s|\$\d+|(?<![:\w]):\w+")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.I)
+_ROW = r"\(\s*\?(?:\s*,\s*\?)*\s*\)"
+_VALUES = re.compile(rf"({_ROW})(?:\s*,\s*{_ROW})+")
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(sql: str) -> str:
+    """
+    Normalize a statement so calls differing only in literals share a key:
+        SELECT * FROM t WHERE id IN (1, 2, 3) AND name = 'x'
+        -> SELECT * FROM t WHERE id IN (...) AND name = ?
+    """
+    s = _COMMENT.sub(" ", sql)
+    s = _STRING.sub("?", s)
+    s = _PLACEHOLDER.sub("?", s)
+    s = _NUMBER.sub("?", s)
+    s = _IN_LIST.sub("IN (...)", s)
+    s = _VALUES.sub(r"\1, ...", s)
+    return _SPACE.sub(" ", s).strip().rstrip(";").rstrip()
+
+
+def slow_threshold_ms(engine: str) -> float:
+    """DB_SLOW_QUERY_MS_<ENGINE> if set, else DB_SLOW_QUERY_MS (default 500)."""
+    s = load_settings()
+    val = getattr(s, f"DB_SLOW_QUERY_MS_{engine.upper()}", None)
+    if val is None:
+        val = getattr(s, "DB_SLOW_QUERY_MS", DEFAULT_SLOW_MS)
+    try:
+        return float(val)
+    except (TypeError, ValueError):
+        return DEFAULT_SLOW_MS
+
+
+def _percentile(sorted_ns: List[int], q: float) -> float:
+    if not sorted_ns:
+        return 0.0
+    idx = min(len(sorted_ns) - 1, max(0, math.ceil(q * len(sorted_ns)) - 1))
+    return sorted_ns[idx] / 1_000_000
+
+
+class _Entry:
+    __slots__ = ("engine", "query", "calls", "errors", "rows", "total_ns", "max_ns", "samples")
+
+    def __init__(self, engine: str, query: str) -> None:
+        self.engine = engine
+        self.query = query
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.samples: List[int] = []
+
+    def add(self, elapsed_ns: int, rowcount: int, failed: bool) -> None:
+        self.calls += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+        if failed:
+            self.errors += 1
+        elif rowcount > 0:
+            self.rows += rowcount
+        # Algorithm R: a uniform sample of every call so far
+        if len(self.samples) < RESERVOIR:
+            self.samples.append(elapsed_ns)
+        else:
+            j = random.randrange(self.calls)
+            if j < RESERVOIR:
+                self.samples[j] = elapsed_ns
+
+    def as_dict(self) -> Dict[str, Any]:
+        ordered = sorted(self.samples)
+        return {
+            "engine": self.engine,
+            "query": self.query,
+            "calls": self.calls,
+            "errors": self.errors,
+            "rows": self.rows,
+            "total_ms": round(self.total_ns / 1_000_000, 3),
+            "mean_ms": round(self.total_ns / self.calls / 1_000_000, 3) if self.calls else 0.0,
+            "p50_ms": round(_percentile(ordered, 0.50), 3),
+            "p95_ms": round(_percentile(ordered, 0.95), 3),
+            "p99_ms": round(_percentile(ordered, 0.99), 3),
+            "max_ms": round(self.max_ns / 1_000_000, 3),
+        }
+
+
+ORDER_KEYS = ("total_ms", "mean_ms", "calls", "p95_ms", "p99_ms", "max_ms", "rows", "errors")
+
+
+class QueryStats:
+    """Bounded per-fingerprint aggregator; record() is the bus subscriber."""
+
+    def __init__(self, max_statements: int = 500) -> None:
+        self.max_statements = max(1, int(max_statements))
+        self._entries: Dict[tuple, _Entry] = {}
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def record(self, event: QueryEvent) -> None:
+        key = (event.engine, fingerprint(event.query))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if len(self._entries) >= self.max_statements:
+                    self._evict()
+                entry = self._entries[key] = _Entry(key[0], key[1])
+            entry.add(event.elapsed_ns, event.rowcount, event.error is not None)
+
+    def _evict(self) -> None:
+        victims = sorted(self._entries.items(), key=lambda kv: kv[1].calls)
+        for key, _ in victims[: max(1, len(victims) // 10)]:
+            del self._entries[key]
+            self.evicted += 1
+
+    def snapshot(self, *, order_by: str = "total_ms", limit: Optional[int] = 50) -> List[Dict[str, Any]]:
+        """Per-statement rows, largest `order_by` first."""
+        if order_by not in ORDER_KEYS:
+            raise ValueError(f"order_by must be one of {', '.join(ORDER_KEYS)}")
+        with self._lock:
+            rows = [e.as_dict() for e in self._entries.values()]
+        rows.sort(key=lambda r: r[order_by], reverse=True)
+        return rows[:limit] if limit else rows
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+STATS = QueryStats()
+
+
+__all__ = [
+    "ORDER_KEYS",
+    "QueryStats",
+    "STATS",
+    "fingerprint",
+    "slow_threshold_ms",
+]
@@ -1,16 +1,35 @@
 # prefiq/http/app.py
 from __future__ import annotations
 
+import hmac
 import inspect
 from pathlib import Path
+from typing import Optional
 
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, Response
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException, Query
 
 from prefiq.core.bootstrap import main as bootstrap_main
 from prefiq.core.application import Application
+from prefiq.database import metrics as db_metrics
 from prefiq.database.connection_manager import connection_manager
+from prefiq.database.explain import PLANS
+from prefiq.database.routing import RoutingScopeMiddleware
+from prefiq.database.stats import ORDER_KEYS, STATS
+from prefiq.settings.get_settings import load_settings
+
+
+def _require_debug_token(x_debug_token: Optional[str], authorization: Optional[str]) -> None:
+    """/_debug/* routes exist only when DB_DEBUG_TOKEN is set, and require it."""
+    expected = getattr(load_settings(), "DB_DEBUG_TOKEN", "") or ""
+    if not expected:
+        raise HTTPException(status_code=404)
+    given = x_debug_token or ""
+    if not given and authorization and authorization.lower().startswith("bearer "):
+        given = authorization[7:].strip()
+    if not hmac.compare_digest(given.encode(), expected.encode()):
+        raise HTTPException(status_code=401, detail="invalid debug token")
 
 
 def _prepare_http_app(app: FastAPI) -> FastAPI:
@@ -29,6 +48,9 @@ def _prepare_http_app(app: FastAPI) -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    # Read-your-writes: a request that wrote reads from the primary afterwards
+    if getattr(load_settings(), "DB_READ_ROUTING", False):
+        app.add_middleware(RoutingScopeMiddleware)
 
     # ---- default routes ----
     @app.get("/favicon.ico", include_in_schema=False)
@@ -52,9 +74,55 @@ def _prepare_http_app(app: FastAPI) -> FastAPI:
             ok = False
         return {"ok": ok}
 
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return Response(db_metrics.render(), media_type=db_metrics.CONTENT_TYPE)
+
+    @app.get("/_debug/queries", include_in_schema=False)
+    async def debug_queries(
+        order_by: str = Query("total_ms"),
+        limit: int = Query(50, ge=1, le=1000),
+        reset: bool = Query(False),
+        x_debug_token: Optional[str] = Header(None),
+        authorization: Optional[str] = Header(None),
+    ):
+        _require_debug_token(x_debug_token, authorization)
+        if order_by not in ORDER_KEYS:
+            raise HTTPException(status_code=400, detail=f"order_by must be one of {', '.join(ORDER_KEYS)}")
+        rows = STATS.snapshot(order_by=order_by, limit=limit)
+        for row in rows:
+            plan = PLANS.cached(row["engine"], row["query"])
+            if plan is not None:
+                row["plan_flags"] = list(plan.flags)
+        body = {"statements": rows, "tracked": len(STATS), "evicted": STATS.evicted}
+        if reset:
+            STATS.reset()
+        return body
+
+    # ---- pool warmup + SQLite maintenance on the serving loop (pools are per event loop) ----
+    @app.on_event("startup")
+    async def _warm_services():
+        try:
+            from prefiq.providers.database_provider import warm_pools
+            await warm_pools()
+        except (ModuleNotFoundError, ImportError, AttributeError, TypeError, ValueError):
+            pass
+        try:
+            from prefiq.providers.maintenance_provider import start_maintenance
+            start_maintenance()
+        except (ModuleNotFoundError, ImportError, AttributeError, TypeError, ValueError):
+            pass
+
     # ---- centralized shutdown (runs while event loop is alive) ----
     @app.on_event("shutdown")
     async def _close_services():
+        # 0) stop background SQLite maintenance before the engine goes away
+        try:
+            from prefiq.providers.maintenance_provider import stop_maintenance
+            await stop_maintenance()
+        except (ModuleNotFoundError, ImportError, AttributeError, TypeError, ValueError):
+            pass
+
         # 1) close via connection manager
         try:
             eng = connection_manager.get_engine()
@@ -74,6 +142,13 @@ def _prepare_http_app(app: FastAPI) -> FastAPI:
         except (ModuleNotFoundError, ImportError, AttributeError, TypeError, ValueError):
             pass
 
+        # 3) best-effort: close asyncpg pools bound to this loop
+        try:
+            from prefiq.database.engines.postgres.pool import close_pool as close_pg_pool  # type: ignore
+            await close_pg_pool()
+        except (ModuleNotFoundError, ImportError, AttributeError, TypeError, ValueError):
+            pass
+
     setattr(app, "_prefiq_prepared", True)
     return app
 
@@ -12,13 +12,13 @@ from prefiq.core.application import BaseProvider, register_provider
 from prefiq.settings.get_settings import load_settings
 from prefiq.database.connection import get_engine
 from prefiq.database.engines.abstract_engine import AbstractEngine
-from prefiq.database.hooks import before_execute, after_execute
+from prefiq.database.hooks import install as install_query_logging
 
 
 @register_provider
 class DatabaseProvider(BaseProvider):
     """
-    Binds 'db' (engine singleton) into the container and attaches hooks.
+    Binds 'db' (engine singleton) into the container and subscribes the query loggers.
     Centralized shutdown is handled by FastAPI's shutdown event.
     atexit is only registered for SYNC engines (no async work during interpreter finalization).
     """
@@ -26,14 +26,9 @@ class DatabaseProvider(BaseProvider):
     def register(self) -> None:
         engine: AbstractEngine[Any] = get_engine()
 
-        # Attach optional hooks if engine supports them
-        try:
-            if hasattr(engine, "set_before_execute_hook") and callable(getattr(engine, "set_before_execute_hook")):
-                engine.set_before_execute_hook(before_execute)
-            if hasattr(engine, "set_after_execute_hook") and callable(getattr(engine, "set_after_execute_hook")):
-                engine.set_after_execute_hook(after_execute)
-        except (ValueError, TypeError):
-            pass
+        # Query logging goes through the instrumentation bus: nothing is built
+        # per statement unless DEBUG is on or a statement is slow
+        install_query_logging()
 
         self.app.bind("db", engine)
 
@@ -50,54 +45,21 @@ class DatabaseProvider(BaseProvider):
         Best-effort warmup — but ONLY for the active engine (or explicit test flags).
         Previously this always tried MariaDB prewarm if DB_POOL_WARMUP>0, which caused
         MariaDB connection attempts even on SQLite.
-        """
-        s = self._get_settings_safe()
 
-        # Resolve warmup count from settings or env
-        warm = 0
-        try:
-            if s and hasattr(s, "DB_POOL_WARMUP"):
-                warm = int(getattr(s, "DB_POOL_WARMUP") or 0)
-            else:
-                warm = int(os.getenv("DB_POOL_WARMUP", "0") or "0")
-        except (ValueError, TypeError):
-            warm = 0
-
-        if warm <= 0:
+        Pools live per event loop. Without a running loop the warmup goes to the
+        shared bridge loop that sync callers use (fire-and-forget); the HTTP
+        startup hook warms the serving loop separately (see warm_pools()).
+        """
+        coro = _warmup_coroutine(self._get_settings_safe())
+        if coro is None:
             return
-
-        engine_name = (str(getattr(s, "DB_ENGINE", "")).lower() if s else os.getenv("DB_ENGINE", "")).lower()
-        test_pg = bool(getattr(s, "DB_TEST_PG", False)) if s else (os.getenv("DB_TEST_PG", "0") not in ("0", "", "false", "False"))
-        test_mysql = bool(getattr(s, "DB_TEST_MYSQL", False)) if s else (os.getenv("DB_TEST_MYSQL", "0") not in ("0", "", "false", "False"))
-
-        coro: Optional[object] = None
-
         try:
-            # MariaDB / MySQL warmup
-            if engine_name in ("mariadb", "mysql") or test_mysql:
-                from prefiq.database.engines.mariadb.pool import prewarm as _mariadb_prewarm  # lazy import
-                coro = _mariadb_prewarm(warm)
-
-            # Postgres warmup
-            elif engine_name in ("postgres", "postgresql") or test_pg:
-                from prefiq.database.engines.postgres.pool import prewarm as _pg_prewarm  # lazy import
-                coro = _pg_prewarm(warm)
-
-            # SQLite or anything else: no warmup needed / supported
-            else:
-                coro = None
-
-        except (ModuleNotFoundError, ImportError, AttributeError, ValueError, TypeError):
-            coro = None
-
-        # Run warmup if applicable
-        if coro and inspect.isawaitable(coro):
-            try:
-                asyncio.get_running_loop()
-            except RuntimeError:
-                asyncio.run(coro)
-            else:
-                asyncio.create_task(coro)
+            asyncio.get_running_loop()
+        except RuntimeError:
+            from prefiq.database.loop_bridge import submit
+            submit(_quiet(coro))
+        else:
+            asyncio.create_task(_quiet(coro))
 
     def _get_settings_safe(self):
         try:
@@ -128,3 +90,59 @@ class DatabaseProvider(BaseProvider):
                     return
         except Exception:
             pass
+
+
+def _warmup_coroutine(s: Any) -> Optional[Any]:
+    """Build the prewarm coroutine for the active engine, or None if not applicable."""
+    # Resolve warmup count from settings or env
+    warm = 0
+    try:
+        if s and hasattr(s, "DB_POOL_WARMUP"):
+            warm = int(getattr(s, "DB_POOL_WARMUP") or 0)
+        else:
+            warm = int(os.getenv("DB_POOL_WARMUP", "0") or "0")
+    except (ValueError, TypeError):
+        warm = 0
+
+    if warm <= 0:
+        return None
+
+    engine_name = (str(getattr(s, "DB_ENGINE", "")).lower() if s else os.getenv("DB_ENGINE", "")).lower()
+    test_pg = bool(getattr(s, "DB_TEST_PG", False)) if s else (os.getenv("DB_TEST_PG", "0") not in ("0", "", "false", "False"))
+    test_mysql = bool(getattr(s, "DB_TEST_MYSQL", False)) if s else (os.getenv("DB_TEST_MYSQL", "0") not in ("0", "", "false", "False"))
+
+    try:
+        # MariaDB / MySQL warmup
+        if engine_name in ("mariadb", "mysql") or test_mysql:
+            from prefiq.database.engines.mariadb.pool import prewarm as _mariadb_prewarm  # lazy import
+            return _mariadb_prewarm(warm)
+
+        # Postgres warmup
+        if engine_name in ("postgres", "postgresql") or test_pg:
+            from prefiq.database.engines.postgres.pool import prewarm as _pg_prewarm  # lazy import
+            return _pg_prewarm(warm)
+
+    except (ModuleNotFoundError, ImportError, AttributeError, ValueError, TypeError):
+        return None
+
+    # SQLite or anything else: no warmup needed / supported
+    return None
+
+
+async def _quiet(coro: Any) -> None:
+    try:
+        await coro
+    except Exception:
+        # Warmup is an optimisation; the first query will connect instead.
+        pass
+
+
+async def warm_pools() -> None:
+    """Prewarm the active engine's pool on the running (serving) event loop."""
+    try:
+        s = load_settings()
+    except Exception:
+        s = None
+    coro = _warmup_coroutine(s)
+    if coro is not None:
+        await _quiet(coro)
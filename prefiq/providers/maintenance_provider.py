@@ -0,0 +1,78 @@
+# prefiq/providers/maintenance_provider.py
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Optional
+
+from prefiq.core.application import BaseProvider, register_provider
+from prefiq.core.logger import get_logger
+from prefiq.settings.get_settings import load_settings
+
+LOG = get_logger("prefiq.providers.maintenance")
+
+_scheduler: Optional[Any] = None
+
+
+def build_scheduler(engine: Any = None, s: Any = None) -> Optional[Any]:
+    """A MaintenanceScheduler for the active SQLite file engine, or None (other engines, :memory:, disabled)."""
+    s = s or load_settings()
+    if not getattr(s, "DB_SQLITE_MAINTENANCE", True):
+        return None
+    if engine is None:
+        from prefiq.database.connection import get_engine
+        engine = get_engine()
+    if getattr(engine, "engine_label", "") != "sqlite":
+        return None
+    path = getattr(engine, "db_path", None)
+    if not path or path == ":memory:":
+        return None
+    from prefiq.database.engines.sqlite.maintenance import MaintenanceScheduler
+    return MaintenanceScheduler(
+        path,
+        interval=getattr(s, "DB_SQLITE_MAINTENANCE_INTERVAL_S", 60.0),
+        wal_limit_mb=getattr(s, "DB_SQLITE_WAL_LIMIT_MB", 64.0),
+        optimize_every=getattr(s, "DB_SQLITE_OPTIMIZE_EVERY_S", 3600.0),
+        vacuum_pages=getattr(s, "DB_SQLITE_VACUUM_PAGES", 256),
+        backup_dir=getattr(s, "DB_SQLITE_BACKUP_DIR", "") or None,
+        backup_every=getattr(s, "DB_SQLITE_BACKUP_EVERY_S", 86400.0),
+        backup_keep=getattr(s, "DB_SQLITE_BACKUP_KEEP", 7),
+        backup_pages=getattr(s, "DB_SQLITE_BACKUP_PAGES", 1024),
+        backup_rate_mb=getattr(s, "DB_SQLITE_BACKUP_RATE_MB", 0.0),
+        activity=getattr(engine, "activity", None),
+    )
+
+
+@register_provider
+class MaintenanceProvider(BaseProvider):
+    """
+    Binds 'db.maintenance' (the SQLite MaintenanceScheduler, or None) and
+    starts it on the running loop. Under the HTTP app the startup hook
+    calls start_maintenance() on the serving loop instead.
+    """
+
+    def register(self) -> None:
+        global _scheduler
+        try:
+            _scheduler = build_scheduler()
+        except Exception as e:
+            LOG.warning("sqlite_maintenance_unavailable", extra={"error": f"{type(e).__name__}: {e}"})
+            _scheduler = None
+        self.app.bind("db.maintenance", _scheduler)
+
+    def boot(self) -> None:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return  # no serving loop yet
+        start_maintenance()
+
+
+def start_maintenance() -> None:
+    """Start the scheduler on the running loop (no-op without one or for non-SQLite engines)."""
+    if _scheduler is not None:
+        _scheduler.start()
+
+
+async def stop_maintenance() -> None:
+    if _scheduler is not None:
+        await _scheduler.stop()
@@ -34,6 +34,50 @@ class Settings(BaseSettings):
         1, ge=0, description="Number of connections to prewarm in async pool"
     )
 
+    # Async pool sizing / eviction (per event loop)
+    DB_POOL_SIZE: int = Field(5, ge=1, description="Max connections checked out at once")
+    DB_POOL_MIN_IDLE: int = Field(0, ge=0, description="Idle connections kept warm by the reaper")
+    DB_POOL_ACQUIRE_TIMEOUT: float = Field(30.0, gt=0, description="Seconds to wait for a free connection")
+    DB_POOL_MAX_LIFETIME: float = Field(3600.0, gt=0, description="Recycle connections older than this (s)")
+    DB_POOL_IDLE_TIMEOUT: float = Field(600.0, gt=0, description="Close idle connections above min_idle after (s)")
+    DB_POOL_PING_AFTER: float = Field(30.0, ge=0, description="Ping on checkout only if idle longer than (s)")
+    DB_POOL_REAP_INTERVAL: float = Field(30.0, gt=0, description="Seconds between background reaper passes")
+    DB_PG_STATEMENT_CACHE_SIZE: int = Field(100, ge=0, description="asyncpg prepared statements cached per connection")
+    DB_PREPARED_STATEMENTS: bool = Field(False, description="Reuse server-side prepared statements per connection")
+    DB_PREPARED_CACHE_SIZE: int = Field(256, ge=1, description="Prepared statements kept per connection (LRU)")
+    DB_READ_ROUTING: bool = Field(False, description="get_engine() routes writes to the primary and reads to replicas")
+    DB_PRIMARY: str = Field("PRIMARY", description="Named engine for writes (<NAME>_DB_*); unset = the DB_* engine")
+    DB_REPLICAS: str = Field("", description="Comma-separated named read replicas (empty = every REPLICA<n>_DB_ENGINE)")
+    DB_REPLICA_COOLDOWN_S: float = Field(30.0, gt=0, description="Seconds a failing replica sits out (doubles per repeat)")
+    DB_SQLITE_READERS: int = Field(0, ge=0, description="SQLite read-only WAL connections (sync: 0 = one shared connection; async: 0 = 2)")
+    DB_SQLITE_GROUP_COMMIT_MS: float = Field(0.0, ge=0, description="Coalesce SQLite autocommit writes per window (ms, 0 = off)")
+    DB_SQLITE_GROUP_COMMIT_MAX: int = Field(200, ge=1, description="Max writes per SQLite group commit")
+    DB_SQLITE_PROFILE: Literal["oltp", "read_heavy", "bulk_load"] = Field("oltp", description="SQLite PRAGMA tuning profile")
+    DB_SQLITE_MAINTENANCE: bool = Field(True, description="Background WAL checkpoint / optimize / incremental vacuum")
+    DB_SQLITE_MAINTENANCE_INTERVAL_S: float = Field(60.0, gt=0, description="Seconds between SQLite maintenance ticks")
+    DB_SQLITE_WAL_LIMIT_MB: float = Field(64.0, ge=0, description="Checkpoint once the -wal file passes this size")
+    DB_SQLITE_OPTIMIZE_EVERY_S: float = Field(3600.0, ge=0, description="PRAGMA optimize interval (0 = never)")
+    DB_SQLITE_VACUUM_PAGES: int = Field(256, ge=0, description="Pages per idle incremental_vacuum slice (0 = off)")
+    DB_SQLITE_BACKUP_DIR: str = Field("", description="Scheduled compressed SQLite backups go here (empty = off)")
+    DB_SQLITE_BACKUP_EVERY_S: float = Field(86400.0, gt=0, description="Seconds between scheduled SQLite backups")
+    DB_SQLITE_BACKUP_KEEP: int = Field(7, ge=1, description="Scheduled backup archives kept")
+    DB_SQLITE_BACKUP_PAGES: int = Field(1024, ge=0, description="Pages copied per backup step (0 = all at once)")
+    DB_SQLITE_BACKUP_RATE_MB: float = Field(0.0, ge=0, description="Backup copy rate limit in MB/s (0 = unlimited)")
+
+    # Query diagnostics (slow log, per-statement stats, debug route)
+    DB_SLOW_QUERY_MS: float = Field(500.0, ge=0, description="Log statements slower than this (ms)")
+    DB_SLOW_QUERY_MS_MARIADB: Optional[float] = Field(None, ge=0, description="Per-engine override of DB_SLOW_QUERY_MS")
+    DB_SLOW_QUERY_MS_MYSQL: Optional[float] = Field(None, ge=0, description="Per-engine override of DB_SLOW_QUERY_MS")
+    DB_SLOW_QUERY_MS_POSTGRES: Optional[float] = Field(None, ge=0, description="Per-engine override of DB_SLOW_QUERY_MS")
+    DB_SLOW_QUERY_MS_SQLITE: Optional[float] = Field(None, ge=0, description="Per-engine override of DB_SLOW_QUERY_MS")
+    DB_QUERY_METRICS: bool = Field(True, description="Count and time statements for /metrics")
+    DB_QUERY_STATS: bool = Field(False, description="Aggregate per-statement stats (prefiq doctor queries); fingerprints every statement")
+    DB_QUERY_STATS_MAX: int = Field(500, ge=1, description="Distinct statement fingerprints kept")
+    DB_DEBUG_TOKEN: str = Field("", description="Token for /_debug/* routes; empty disables them")
+    DB_EXPLAIN_SLOW: bool = Field(True, description="EXPLAIN slow SELECTs in the background")
+    DB_EXPLAIN_PER_MINUTE: int = Field(30, ge=0, description="Max new EXPLAIN captures per minute")
+    DB_EXPLAIN_TTL: float = Field(3600.0, gt=0, description="Seconds a captured plan is reused per fingerprint")
+
     # --- test toggles (read from env or .env) ---
     DB_TEST_PG: bool = False
     DB_TEST_MYSQL: bool = False
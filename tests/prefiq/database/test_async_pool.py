@@ -0,0 +1,340 @@
+# tests/prefiq/database/test_async_pool.py
+from __future__ import annotations
+
+import asyncio
+import itertools
+
+import pytest
+
+from prefiq.database.engines.async_pool import AsyncConnectionPool, PoolOptions, PoolTimeoutError
+
+
+class FakeError(Exception):
+    pass
+
+
+class FakeConn:
+    _ids = itertools.count(1)
+
+    def __init__(self) -> None:
+        self.id = next(self._ids)
+        self.pings = 0
+        self.closed = False
+        self.alive = True
+
+    def ping(self) -> None:
+        self.pings += 1
+        if not self.alive:
+            raise FakeError("gone away")
+
+    def close(self) -> None:
+        self.closed = True
+
+
+async def _inline(func, *args):
+    return func(*args)
+
+
+def _pool(**opts) -> tuple[AsyncConnectionPool, list[FakeConn]]:
+    made: list[FakeConn] = []
+
+    def connect() -> FakeConn:
+        c = FakeConn()
+        made.append(c)
+        return c
+
+    pool = AsyncConnectionPool(
+        connect,
+        ping=lambda c: c.ping(),
+        close=lambda c: c.close(),
+        errors=(FakeError,),
+        run_blocking=_inline,
+        options=PoolOptions(**opts),
+        name="test",
+    )
+    return pool, made
+
+
+def test_reuses_idle_connection_without_ping():
+    async def main():
+        pool, made = _pool(max_size=2, ping_after=60)
+        c1 = await pool.acquire()
+        await pool.release(c1)
+        c2 = await pool.acquire()
+        await pool.release(c2)
+        await pool.close()
+        return c1, c2, made
+
+    c1, c2, made = asyncio.run(main())
+    assert c1 is c2
+    assert len(made) == 1
+    assert c1.pings == 0
+
+
+def test_waiters_are_served_fifo_and_time_out():
+    async def main():
+        pool, _ = _pool(max_size=1)
+        held = await pool.acquire()
+        order: list[str] = []
+
+        async def worker(tag: str):
+            conn = await pool.acquire(timeout=1.0)
+            order.append(tag)
+            await pool.release(conn)
+
+        tasks = [asyncio.create_task(worker(t)) for t in ("a", "b", "c")]
+        await asyncio.sleep(0)
+        assert pool.stats()["waiters"] == 3
+        await pool.release(held)
+        await asyncio.gather(*tasks)
+
+        held = await pool.acquire()
+        with pytest.raises(PoolTimeoutError):
+            await pool.acquire(timeout=0.01)
+        await pool.release(held)
+        stats = pool.stats()
+        await pool.close()
+        return order, stats
+
+    order, stats = asyncio.run(main())
+    assert order == ["a", "b", "c"]
+    assert stats["in_use"] == 0 and stats["waiters"] == 0
+
+
+def test_stale_idle_connection_is_pinged_and_replaced():
+    async def main():
+        pool, made = _pool(max_size=1, ping_after=0)
+        c1 = await pool.acquire()
+        await pool.release(c1)
+        c1.alive = False
+        c2 = await pool.acquire()
+        await pool.release(c2)
+        await pool.close()
+        return c1, c2, made
+
+    c1, c2, made = asyncio.run(main())
+    assert c1 is not c2 and c1.closed
+    assert len(made) == 2
+
+
+def test_reaper_evicts_expired_and_keeps_min_idle():
+    async def main():
+        pool, made = _pool(max_size=3, min_idle=1, max_lifetime=0.01, reap_interval=3600)
+        await pool.prewarm(2)
+        await asyncio.sleep(0.02)
+        await pool.reap()
+        stats = pool.stats()
+        await pool.close()
+        return stats, made
+
+    stats, made = asyncio.run(main())
+    assert stats["idle"] == 1
+    assert [c.closed for c in made[:2]] == [True, True]
+    assert len(made) == 3
+
+
+def test_pinned_scope_reuses_one_checkout():
+    from contextvars import ContextVar
+
+    from prefiq.database.engines.async_pool import pin_implicit, pinned, unpin_implicit
+
+    var = ContextVar("test_pin", default=None)
+
+    async def main():
+        pool, made = _pool(max_size=2)
+        seen = []
+        async with pinned(var, pool) as outer:
+            async with pinned(var, pool) as inner:
+                seen.append(inner.raw)
+            seen.append(outer.raw)
+            assert pool.stats()["in_use"] == 1
+        assert var.get() is None
+
+        pin = await pin_implicit(var, pool)
+        pin.in_tx = True  # left open: must not go back to the pool
+        await unpin_implicit(var, pin)
+        stats = pool.stats()
+        await pool.close()
+        return seen, pin, stats, made
+
+    seen, pin, stats, made = asyncio.run(main())
+    assert seen[0] is seen[1]
+    assert pin.raw.closed
+    assert pin.raw is seen[0]  # the idle connection was reused, then dropped
+    assert stats["in_use"] == 0 and stats["idle"] == 0
+    assert len(made) == 1
+
+
+def test_unit_of_work_runs_in_one_hop_on_pool_executor():
+    import sqlite3
+    import threading
+
+    from prefiq.database.engines.async_pool import run_statement
+
+    async def main():
+        pool = AsyncConnectionPool(
+            lambda: sqlite3.connect(":memory:", check_same_thread=False),
+            ping=lambda c: c.execute("SELECT 1"),
+            close=lambda c: c.close(),
+            errors=(sqlite3.Error,),
+            options=PoolOptions(max_size=2),
+            name="unit",
+        )
+        conn = await pool.acquire()
+        hops = []
+        real_run = pool._run_blocking
+
+        async def counting(func, *args):
+            hops.append(func)
+            return await real_run(func, *args)
+
+        pool._run_blocking = counting
+        thread = await pool.run(lambda: threading.current_thread().name)
+        rows = await pool.run(run_statement, conn, "SELECT ?, ?", (1, 2), fetch="all")
+        unit_hops = len(hops)
+        await pool.release(conn)
+        stats = pool.stats()
+        await pool.close()
+        return thread, rows, unit_hops, stats, pool
+
+    thread, rows, unit_hops, stats, pool = asyncio.run(main())
+    assert thread.startswith("prefiq-unit")
+    assert rows == [(1, 2)]
+    assert unit_hops == 2  # one per run() call: no separate cursor/execute/fetch/close hops
+    assert 1 <= stats["threads"] <= 2
+    assert pool._executor is None  # shut down with the pool
+
+
+def test_pin_exit_in_another_context_still_releases():
+    from contextvars import ContextVar
+
+    from prefiq.database.engines.async_pool import pinned
+
+    var = ContextVar("test_pin", default=None)
+
+    async def main():
+        pool, _ = _pool(max_size=1)
+        scope = pinned(var, pool)
+        await scope.__aenter__()
+        # e.g. an async generator finalised by another task: the token is foreign there
+        await asyncio.create_task(scope.__aexit__(None, None, None))
+        stats = pool.stats()
+        await pool.close()
+        return stats
+
+    assert asyncio.run(main())["in_use"] == 0
+
+
+class _SerialConn:
+    """pymysql stand-in that records how many statements overlap on it."""
+
+    def __init__(self) -> None:
+        import threading
+
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+
+    def cursor(self, *args, **kwargs):
+        return _SerialCursor(self)
+
+    def commit(self) -> None:
+        pass
+
+    def ping(self, reconnect=False) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class _SerialCursor:
+    rowcount = 1
+
+    def __init__(self, conn: _SerialConn) -> None:
+        self.conn = conn
+        self.rows = [(1,), (2,)]
+
+    def execute(self, query, params=None) -> None:
+        import time
+
+        with self.conn.lock:
+            self.conn.active += 1
+            self.conn.peak = max(self.conn.peak, self.conn.active)
+        time.sleep(0.01)
+        with self.conn.lock:
+            self.conn.active -= 1
+
+    def fetchone(self):
+        return self.rows[0]
+
+    def fetchmany(self, size):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def close(self) -> None:
+        pass
+
+
+def test_gathered_tasks_in_a_session_take_turns_on_the_pin(monkeypatch):
+    pytest.importorskip("pymysql")
+    from prefiq.database.engine_config import EngineConfig
+    from prefiq.database.engines.mysql import pool as mysql_pool
+    from prefiq.database.engines.mysql.async_engine import AsyncMysqlEngine
+
+    conns: list[_SerialConn] = []
+
+    def connect(**kwargs):
+        conns.append(_SerialConn())
+        return conns[-1]
+
+    monkeypatch.setattr(mysql_pool.pymysql, "connect", connect)
+    eng = AsyncMysqlEngine(EngineConfig(engine="mysql", host="db", pool_size=4))
+
+    async def main():
+        async with eng.session():
+            rows = await asyncio.gather(*(eng.fetchone("SELECT 1") for _ in range(6)))
+            with pytest.raises(RuntimeError, match="open stream"):
+                async for _ in eng.aiterate("SELECT n FROM t"):
+                    await eng.execute("UPDATE t SET n = n")  # same task, stream still open
+        await eng.close()
+        return rows
+
+    assert asyncio.run(main()) == [(1,)] * 6
+    assert len(conns) == 1 and conns[0].peak == 1
+
+
+@pytest.mark.parametrize("engine, driver, engine_class", [
+    ("mariadb", "mariadb", "AsyncMariaDBEngine"),
+    ("mysql", "pymysql", "AsyncMysqlEngine"),
+])
+def test_differently_configured_engines_get_their_own_pools(monkeypatch, engine, driver, engine_class):
+    pytest.importorskip(driver)
+    import importlib
+
+    from prefiq.database.engine_config import EngineConfig
+
+    pool_module = importlib.import_module(f"prefiq.database.engines.{engine}.pool")
+    Engine = getattr(importlib.import_module(f"prefiq.database.engines.{engine}.async_engine"), engine_class)
+    opened: list[dict] = []
+
+    def connect(**kwargs):
+        opened.append(kwargs)
+        return _SerialConn()
+
+    monkeypatch.setattr(getattr(pool_module, driver), "connect", connect)
+    main_db = Engine(EngineConfig(name="MAIN", engine=engine, host="db1", database="app", pool_size=2))
+    reports = Engine(EngineConfig(name="REPORTS", engine=engine, host="db2", database="olap", pool_size=3))
+
+    async def main():
+        await main_db.fetchone("SELECT 1")
+        await reports.fetchone("SELECT 1")
+        async with reports.session():
+            await main_db.fetchone("SELECT 1")  # not pinned to the reports connection
+        stats = main_db.pool_stats()
+        await main_db.close()
+        return stats
+
+    stats = asyncio.run(main())
+    assert [(c["host"], c["database"]) for c in opened] == [("db1", "app"), ("db2", "olap")]
+    assert stats["db1:3306/app"]["max_size"] == 2 and stats["db2:3306/olap"]["max_size"] == 3
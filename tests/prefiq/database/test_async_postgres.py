@@ -0,0 +1,206 @@
+# tests/prefiq/database/test_async_postgres.py
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("asyncpg")
+
+from prefiq.database import instrumentation
+from prefiq.database.engines.abstract_engine import AbstractEngine
+from prefiq.database.engines.postgres import pool as pg_pool
+from prefiq.database.engines.postgres.async_engine import AsyncPostgresEngine
+
+
+class _Tx:
+    def __init__(self, conn: "_Conn") -> None:
+        self.conn = conn
+
+    async def start(self) -> None:
+        self.conn.log.append("BEGIN")
+
+    async def commit(self) -> None:
+        self.conn.log.append("COMMIT")
+
+    async def rollback(self) -> None:
+        self.conn.log.append("ROLLBACK")
+
+
+class _Cursor:
+    def __init__(self, rows: list) -> None:
+        self.rows = rows
+
+    async def fetch(self, n: int) -> list:
+        batch, self.rows = self.rows[:n], self.rows[n:]
+        return batch
+
+
+class _Conn:
+    """asyncpg.Connection stand-in: one operation at a time, like the real one."""
+
+    def __init__(self) -> None:
+        self.log: list = []
+        self.busy = False
+        self.closed = False
+
+    async def _op(self, entry: str) -> None:
+        if self.busy:
+            raise RuntimeError("another operation is in progress")
+        self.busy = True
+        try:
+            await asyncio.sleep(0.001)
+            self.log.append(entry)
+        finally:
+            self.busy = False
+
+    def transaction(self) -> _Tx:
+        return _Tx(self)
+
+    async def execute(self, sql, *args):
+        await self._op(sql)
+        return "UPDATE 1"
+
+    async def executemany(self, sql, args) -> None:
+        await self._op(sql)
+
+    async def fetchrow(self, sql, *args):
+        await self._op(sql)
+        return None
+
+    async def cursor(self, sql, *args):
+        return _Cursor([{"n": i} for i in range(5)])  # Record-like: .values()
+
+    async def copy_records_to_table(self, name, *, records, columns=None, schema_name=None):
+        return f"COPY {len(list(records))}"
+
+    async def copy_to_table(self, name, **kwargs):
+        return "COPY 3"
+
+    async def close(self, timeout=None) -> None:
+        self.closed = True
+
+    def terminate(self) -> None:
+        self.closed = True
+
+
+class _Pool:
+    def __init__(self) -> None:
+        self.made: list = []
+        self.idle: list = []
+
+    async def acquire(self, timeout=None):
+        if self.idle:
+            return self.idle.pop()
+        self.made.append(_Conn())
+        return self.made[-1]
+
+    async def release(self, conn) -> None:
+        self.idle.append(conn)
+
+    def get_max_size(self) -> int:
+        return 4
+
+    def get_size(self) -> int:
+        return len(self.made)
+
+    def get_idle_size(self) -> int:
+        return len(self.idle)
+
+    async def close(self) -> None:
+        pass
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    fake = _Pool()
+
+    async def create(cfg):
+        return fake
+
+    monkeypatch.setattr(pg_pool, "_create", create)
+    bus = instrumentation.InstrumentationBus()
+    monkeypatch.setattr("prefiq.database.engines.abstract_engine.BUS", bus)
+    events: list = []
+    bus.subscribe(events.append)
+    return AsyncPostgresEngine(), fake, events
+
+
+def test_session_pin_is_shared_one_operation_at_a_time(engine):
+    eng, fake, events = engine
+
+    async def main():
+        async with eng.session():
+            await asyncio.gather(*(eng.aexecute(f"UPDATE t SET n = {i}") for i in range(4)))
+            streamed = []
+            async for row in eng.aiterate("SELECT n FROM t", batch_size=2):
+                streamed.append(row)
+                await eng.aexecute("UPDATE t SET seen = 1")  # between batches, same connection
+        async with eng.transaction():
+            await eng.aexecute("DELETE FROM t")
+        await eng.aclose()
+        return streamed
+
+    streamed = asyncio.run(main())
+    assert streamed == [(i,) for i in range(5)]
+    assert len(fake.made) == 1  # one pinned connection, returned and reused
+    log = fake.made[0].log
+    assert log[-3:] == ["BEGIN", "DELETE FROM t", "COMMIT"]
+    assert [e.query for e in events].count("SELECT n FROM t") == 1
+    stream = next(e for e in events if e.query == "SELECT n FROM t")
+    assert stream.rowcount == 5 and stream.error is None
+
+
+def test_bulk_copy_is_bracketed(engine, tmp_path):
+    eng, fake, events = engine
+    path = tmp_path / "in.csv"
+    path.write_text("id\n1\n2\n3\n")
+
+    async def main():
+        loaded = await eng.acopy_in("app.items", ["id", "name"], [(1, "a"), (2, "b")])
+        from_csv = await eng.acopy_in_csv("items", ["id"], str(path))
+        await eng.aclose()
+        return loaded, from_csv
+
+    assert asyncio.run(main()) == (2, 3)
+    assert [(e.query, e.rowcount) for e in events] == [
+        ('COPY "app"."items" ("id", "name") FROM STDIN (FORMAT binary)', 2),
+        ('COPY "items" ("id") FROM STDIN (FORMAT csv)', 3),
+    ]
+
+
+def test_insert_many_runs_through_the_engine(engine, monkeypatch):
+    from prefiq.database import connection
+    from prefiq.database.loop_bridge import run_sync
+    from prefiq.database.schemas.postgres import queries
+
+    eng, fake, events = engine
+    monkeypatch.setattr(connection, "_engine_singleton", eng)
+    try:
+        counts = queries.insert_many("items", ({"name": f"n{i}"} for i in range(5)), chunk_size=2)
+    finally:
+        run_sync(eng.aclose())
+    assert counts == [1, 1, 1]  # the fake reports 'UPDATE 1' per statement
+    assert [e.query for e in events] == ['INSERT INTO "items" ("name") VALUES ($1), ($2)'] * 2 + [
+        'INSERT INTO "items" ("name") VALUES ($1)'
+    ]
+    (conn,) = fake.made
+    assert conn.log[0] == "BEGIN" and conn.log[-1] == "COMMIT"
+
+
+def test_engine_hooks_and_executemany(engine):
+    eng, fake, events = engine
+    assert isinstance(eng, AbstractEngine)
+    seen: list = []
+    eng.set_before_execute_hook(lambda q, p, stage: seen.append((stage, q)))
+    eng.set_after_execute_hook(lambda q, p, stage: seen.append((stage, q)))
+
+    async def main():
+        count = await eng.aexecutemany("INSERT INTO t VALUES ($1)", [(1,), (2,), (3,)])
+        await eng.aclose()
+        return count
+
+    assert asyncio.run(main()) == 3
+    assert seen == [("before", "INSERT INTO t VALUES ($1)"), ("after", "INSERT INTO t VALUES ($1)")]
+    assert [(e.query, e.rowcount) for e in events] == [("INSERT INTO t VALUES ($1)", 3)]
+    assert fake.made[0].log == ["INSERT INTO t VALUES ($1)"]
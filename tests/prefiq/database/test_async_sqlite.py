@@ -0,0 +1,114 @@
+# tests/prefiq/database/test_async_sqlite.py
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from prefiq.database.engines.sqlite.async_engine import AsyncSQLiteEngine
+
+
+def test_factory_returns_async_sqlite_engine():
+    from prefiq.database.connection import _create_engine_for
+
+    assert isinstance(_create_engine_for("sqlite", "async"), AsyncSQLiteEngine)
+
+
+def test_lazy_connect_pool_and_hooks(tmp_path):
+    eng = AsyncSQLiteEngine(str(tmp_path / "a.db"), readers=2)
+    seen = []
+    eng.set_after_execute_hook(lambda q, p, stage: seen.append(q))
+
+    async def main():
+        await eng.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, n INTEGER)")
+        await eng.executemany("INSERT INTO t (n) VALUES (?)", [(i,) for i in range(50)])
+        totals = await asyncio.gather(*(eng.fetchone("SELECT SUM(n) FROM t WHERE n >= ?", (i,)) for i in range(8)))
+        rows = [r[0] async for r in eng.aiterate("SELECT n FROM t ORDER BY n", batch_size=7)]
+        return [t[0] for t in totals], rows, eng.pool_stats()
+
+    try:
+        totals, rows, stats = asyncio.run(main())
+    finally:
+        asyncio.run(eng.close())
+    assert totals[0] == sum(range(50)) and totals[7] == sum(range(7, 50))
+    assert rows == list(range(50))
+    assert stats["max_size"] == 2 and stats["in_use"] == 0
+    assert seen[0].startswith("CREATE TABLE") and len(seen) == 11
+
+
+def test_transaction_is_bound_to_its_context(tmp_path):
+    eng = AsyncSQLiteEngine(str(tmp_path / "a.db"))
+
+    async def main():
+        await eng.execute("CREATE TABLE t (n INTEGER)")
+        with pytest.raises(RuntimeError):
+            async with eng.transaction():
+                await eng.execute("INSERT INTO t (n) VALUES (1)")
+                assert (await eng.fetchone("SELECT COUNT(*) FROM t"))[0] == 1  # sees its own write
+                raise RuntimeError("boom")
+
+        # A task started outside the transaction does not join it
+        go = asyncio.Event()
+
+        async def outsider():
+            await go.wait()
+            await eng.execute("INSERT INTO t (n) VALUES (3)")
+
+        other = asyncio.ensure_future(outsider())
+        async with eng.transaction():
+            await eng.execute("INSERT INTO t (n) VALUES (2)")
+            go.set()
+            await asyncio.sleep(0.05)
+            assert not other.done()  # queued behind the transaction, loop not blocked
+            assert (await eng.fetchone("SELECT COUNT(*) FROM t"))[0] == 1
+        await other
+        return [r[0] for r in await eng.fetchall("SELECT n FROM t ORDER BY n")]
+
+    try:
+        assert asyncio.run(main()) == [2, 3]
+    finally:
+        asyncio.run(eng.close())
+
+
+def test_tasks_spawned_in_a_transaction_join_it(tmp_path):
+    eng = AsyncSQLiteEngine(str(tmp_path / "a.db"))
+
+    async def main():
+        await eng.execute("CREATE TABLE t (n INTEGER)")
+        with pytest.raises(RuntimeError):
+            async with eng.transaction():
+                await asyncio.gather(*(eng.execute("INSERT INTO t (n) VALUES (?)", (i,)) for i in range(4)))
+                await asyncio.wait_for(eng.execute("INSERT INTO t (n) VALUES (9)"), 5)
+                counted, rows = await asyncio.gather(
+                    eng.fetchone("SELECT COUNT(*) FROM t"), asyncio.wait_for(eng.fetchall("SELECT n FROM t"), 5)
+                )
+                assert counted[0] == 5 and len(rows) == 5
+                raise RuntimeError("roll it all back")
+        assert (await eng.fetchone("SELECT COUNT(*) FROM t"))[0] == 0
+
+        async with eng.transaction():
+            await asyncio.gather(eng.execute("INSERT INTO t (n) VALUES (1)"), eng.execute("INSERT INTO t (n) VALUES (2)"))
+        return (await eng.fetchone("SELECT COUNT(*) FROM t"))[0]
+
+    try:
+        assert asyncio.run(asyncio.wait_for(main(), 10)) == 2
+    finally:
+        asyncio.run(eng.close())
+
+
+def test_schema_queries_run_async_engine_on_the_bridge(tmp_path, monkeypatch):
+    from prefiq.database import connection
+    from prefiq.database.loop_bridge import run_sync
+    from prefiq.database.schemas.sqlite import builder, queries
+
+    monkeypatch.setenv("TESTING", "1")
+    monkeypatch.setenv("DB_ENGINE", "sqlite")
+    eng = AsyncSQLiteEngine(str(tmp_path / "a.db"))
+    monkeypatch.setattr(connection, "_engine_singleton", eng)
+    try:
+        builder.create("items", lambda t: (t.id(), t.string("name")))
+        assert queries.insert_many("items", ({"name": f"n{i}"} for i in range(5)), chunk_size=2) == [2, 2, 1]
+        assert queries.count("items") == 5
+        assert [r[0] for r in queries.select_iter("items", "name", batch_size=2)][-1] == "n4"
+    finally:
+        run_sync(eng.close())
@@ -0,0 +1,53 @@
+# tests/prefiq/database/test_bulk_insert.py
+from __future__ import annotations
+
+import pytest
+
+from prefiq.database import connection
+from prefiq.database.engines.sqlite.sync_engine import SQLiteEngine
+from prefiq.database.schemas import queries
+
+
+@pytest.fixture()
+def sqlite_engine(tmp_path, monkeypatch):
+    monkeypatch.setenv("TESTING", "1")
+    monkeypatch.setenv("DB_ENGINE", "sqlite")
+    eng = SQLiteEngine(str(tmp_path / "bulk.sqlite"))
+    eng.execute("CREATE TABLE items (sku TEXT PRIMARY KEY, qty INTEGER, note TEXT)")
+    monkeypatch.setattr(connection, "_engine_singleton", eng)
+    yield eng
+    eng.close()
+
+
+def test_insert_many_chunks_a_generator(sqlite_engine):
+    rows = ({"sku": f"s{i}", "qty": i, "note": None} for i in range(1050))
+    counts = queries.insert_many("items", rows, chunk_size=500)
+    assert counts == [500, 500, 50]
+    assert tuple(sqlite_engine.fetchone("SELECT COUNT(*), SUM(qty) FROM items")) == (1050, sum(range(1050)))
+
+
+def test_insert_many_upsert_and_ignore(sqlite_engine):
+    queries.insert_many("items", [{"sku": "a", "qty": 1, "note": "x"}, {"sku": "b", "qty": 2, "note": "y"}])
+    queries.insert_many(
+        "items",
+        [{"sku": "a", "qty": 10, "note": "new"}, {"sku": "c", "qty": 3, "note": "z"}],
+        on_conflict="update",
+        conflict_columns=("sku",),
+        update_columns=("qty",),
+    )
+    queries.insert_many("items", [{"sku": "b", "qty": 99, "note": "ignored"}], on_conflict="ignore")
+    rows = sqlite_engine.fetchall("SELECT sku, qty, note FROM items ORDER BY sku")
+    assert [tuple(r) for r in rows] == [("a", 10, "x"), ("b", 2, "y"), ("c", 3, "z")]
+
+
+def test_insert_many_is_one_transaction(sqlite_engine):
+    rows = [{"sku": f"s{i}", "qty": i, "note": None} for i in range(10)]
+    rows.append({"sku": "s0", "qty": 0, "note": None})  # duplicate key in the last chunk
+    with pytest.raises(Exception):
+        queries.insert_many("items", rows, chunk_size=4)
+    assert sqlite_engine.fetchone("SELECT COUNT(*) FROM items")[0] == 0
+
+    with pytest.raises(ValueError):
+        queries.insert_many("items", [{"sku": "x", "qty": 1, "note": None}, {"sku": "y"}])
+    with pytest.raises(ValueError):
+        queries.insert_many("items", [{"sku": "x", "qty": 1, "note": None}], on_conflict="update")
@@ -0,0 +1,120 @@
+# tests/prefiq/database/test_columnar.py
+from __future__ import annotations
+
+import asyncio
+import math
+
+import pytest
+
+from prefiq.database import columnar
+from prefiq.database.engines.sqlite.async_engine import AsyncSQLiteEngine
+from prefiq.database.engines.sqlite.sync_engine import SQLiteEngine
+
+
+def _sales(path: str) -> SQLiteEngine:
+    eng = SQLiteEngine(path)
+    eng.execute("CREATE TABLE sales (id INTEGER PRIMARY KEY, category TEXT, quantity INTEGER, price REAL)")
+    eng.executemany(
+        "INSERT INTO sales (category, quantity, price) VALUES (?, ?, ?)",
+        [("tea", 2, 1.5), ("coffee", 1, 3.0), ("tea", 4, 1.5), ("cake", None, 2.0), ("coffee", 3, 3.0)],
+    )
+    return eng
+
+
+def test_fetch_columns_streams_into_typed_arrays(tmp_path):
+    eng = _sales(str(tmp_path / "s.db"))
+    cols = eng.fetch_columns("SELECT category, quantity, price FROM sales ORDER BY id", batch_size=2)
+    assert list(cols) == ["category", "quantity", "price"]
+    assert list(cols["category"]) == ["tea", "coffee", "tea", "cake", "coffee"]
+    assert list(cols["price"]) == [1.5, 3.0, 1.5, 2.0, 3.0]
+    assert math.isnan(cols["quantity"][3])  # NULL widens the int column to float
+
+    ids = eng.fetch_columns("SELECT id FROM sales")["id"]
+    if columnar.has_numpy():
+        assert ids.dtype.kind == "i" and cols["category"].dtype == object
+    else:
+        assert ids.typecode == "q" and cols["quantity"].typecode == "d"
+
+    with pytest.raises(ValueError):
+        columnar.from_rows([(1, 2)])  # plain tuples need columns=
+    assert list(columnar.from_rows([(1, "a")], ["n", "s"])["s"]) == ["a"]
+    eng.close()
+
+
+def test_group_by_revenue_by_category(tmp_path):
+    eng = _sales(str(tmp_path / "s.db"))
+    cols = eng.fetch_columns("SELECT category, quantity * price AS revenue FROM sales")
+    report = columnar.group_by(cols["category"], cols["revenue"])
+
+    assert list(report["key"]) == ["cake", "coffee", "tea"]
+    assert list(report["count"]) == [1, 2, 2]
+    assert list(report["sum"]) == [0.0, 12.0, 9.0]  # NULL revenue is skipped
+    assert math.isnan(report["mean"][0]) and list(report["mean"][1:]) == [6.0, 4.5]
+
+    mixed = columnar.group_by(["b", None, "b"])
+    assert list(mixed["key"]) == ["b", None] and list(mixed["count"]) == [2, 1]
+    eng.close()
+
+
+def test_afetch_columns(tmp_path):
+    path = str(tmp_path / "s.db")
+    _sales(path).close()
+    eng = AsyncSQLiteEngine(path)
+
+    async def main():
+        cols = await eng.afetch_columns("SELECT category, price FROM sales ORDER BY id", batch_size=2)
+        await eng.close()
+        return cols
+
+    cols = asyncio.run(main())
+    assert len(cols["category"]) == 5 and sum(cols["price"]) == 11.0
+
+
+class _TupleCursor:
+    """pymysql SSCursor stand-in: plain tuple rows, names only in description."""
+
+    description = (("category", 253), ("revenue", 5))
+
+    def __init__(self) -> None:
+        self.rows = [("tea", 3), ("coffee", 3.5), ("tea", None), ("cake", 2)]
+
+    def execute(self, query, params=None) -> None:
+        pass
+
+    def fetchmany(self, n: int) -> list:
+        batch, self.rows = self.rows[:n], self.rows[n:]
+        return batch
+
+    def close(self) -> None:
+        pass
+
+
+class _TupleConn:
+    autocommit = True
+
+    def ping(self) -> None:
+        pass
+
+    def cursor(self, *args):
+        return _TupleCursor()
+
+
+def test_fetch_columns_names_tuple_rows_from_the_cursor(monkeypatch):
+    pytest.importorskip("pymysql")
+    from prefiq.database.engines.mysql import sync_engine as mysql_sync
+
+    monkeypatch.setattr(mysql_sync.pymysql, "connect", lambda **kw: _TupleConn())
+    eng = mysql_sync.SyncMysqlEngine()
+    eng.connect()
+    cols = eng.fetch_columns("SELECT category, revenue FROM sales", batch_size=3)
+
+    assert list(cols) == ["category", "revenue"]
+    assert list(cols["category"]) == ["tea", "coffee", "tea", "cake"]
+    # Typed per batch (float: 3.5 / NULL, then int), widened when built
+    revenue = list(cols["revenue"])
+    assert revenue[:2] == [3.0, 3.5] and math.isnan(revenue[2]) and revenue[3] == 2.0
+    assert eng.fetch_columns("SELECT category, revenue FROM sales", columns=["c", "r"]).keys() == {"c", "r"}
+
+    # An all-NULL numeric batch followed by text: NULLs come back as None
+    mixed = columnar.from_rows([(None,), (None,), ("x",)], ["v"], batch_size=2)["v"]
+    assert list(mixed) == [None, None, "x"]
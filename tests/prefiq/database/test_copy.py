@@ -0,0 +1,88 @@
+# tests/prefiq/database/test_copy.py
+from __future__ import annotations
+
+import pytest
+
+from prefiq.database import connection
+from prefiq.database.engines.copy_io import ChunkReader, encode_csv, load_data_sql
+from prefiq.database.engines.sqlite.sync_engine import SQLiteEngine
+
+
+@pytest.fixture()
+def sqlite_engine(tmp_path, monkeypatch):
+    monkeypatch.setenv("TESTING", "1")
+    monkeypatch.setenv("DB_ENGINE", "sqlite")
+    eng = SQLiteEngine(str(tmp_path / "copy.sqlite"))
+    eng.execute("CREATE TABLE ledger (id INTEGER PRIMARY KEY, party TEXT, amount INTEGER)")
+    monkeypatch.setattr(connection, "_engine_singleton", eng)
+    yield eng
+    eng.close()
+
+
+def test_encode_csv_quoting_and_nulls():
+    out = b"".join(encode_csv([(1, "a,b", None), (2, "", 'say "hi"')], batch=1))
+    assert out == b'1,"a,b",\n2,"","say ""hi"""\n'
+    reader = ChunkReader(encode_csv(((i, "x") for i in range(500)), batch=7))
+    data = b""
+    while True:
+        part = reader.read(100)
+        if not part:
+            break
+        data += part
+    assert data.count(b"\n") == 500
+
+
+def test_sqlite_copy_in_and_out_round_trip(sqlite_engine):
+    loaded = sqlite_engine.copy_in("ledger", ["id", "party", "amount"], ((i, f"p{i}", i * 3) for i in range(1, 1001)))
+    assert loaded == 1000
+    csv_bytes = b"".join(sqlite_engine.copy_out("SELECT id, party, amount FROM ledger WHERE id <= 2 ORDER BY id"))
+    assert csv_bytes == b"1,p1,3\n2,p2,6\n"
+
+
+def test_db_load_cli_falls_back_to_copy_in(sqlite_engine, tmp_path):
+    from typer.testing import CliRunner
+    from prefiq.cli.database.db import db_app
+
+    src = tmp_path / "ledger.csv"
+    src.write_text("id,party,amount\n1,acme,10\n2,,20\n", encoding="utf-8")
+    result = CliRunner().invoke(db_app, ["load", "ledger", str(src)])
+    assert result.exit_code == 0, result.output
+    rows = [tuple(r) for r in sqlite_engine.fetchall("SELECT id, party, amount FROM ledger ORDER BY id")]
+    assert rows == [(1, "acme", 10), (2, None, 20)]
+
+
+def test_load_data_sql_maps_null_token():
+    sql = load_data_sql("sales", ["id", "note"], "/tmp/x.csv", skip_lines=1, null="")
+    assert "LOAD DATA LOCAL INFILE '/tmp/x.csv' INTO TABLE `sales`" in sql
+    assert "IGNORE 1 LINES (@c0, @c1) SET `id` = NULLIF(@c0, ''), `note` = NULLIF(@c1, '')" in sql
+
+
+def test_load_data_is_bracketed_like_any_statement(monkeypatch):
+    pytest.importorskip("pymysql")
+    from prefiq.database import instrumentation
+    from prefiq.database.engines.mysql import sync_engine as mysql_sync
+
+    bus = instrumentation.InstrumentationBus()
+    monkeypatch.setattr("prefiq.database.engines.abstract_engine.BUS", bus)
+    seen = []
+    bus.subscribe(seen.append)
+    monkeypatch.setattr(mysql_sync.pymysql, "connect", lambda **kw: kw)
+    monkeypatch.setattr(mysql_sync, "run_load_data", lambda conn, sql: 2 if conn["local_infile"] else 0)
+
+    assert mysql_sync.SyncMysqlEngine().copy_in("sales", ["id"], [(1,), (2,)]) == 2
+    (event,) = seen
+    assert event.query.startswith("LOAD DATA LOCAL INFILE") and event.rowcount == 2
+
+    # A named engine loads through its own server, not the DB_* one
+    from prefiq.database.engine_config import EngineConfig
+
+    monkeypatch.setattr(mysql_sync, "run_load_data", lambda conn, sql: 1 if conn["host"] == "olap" else 0)
+    assert mysql_sync.SyncMysqlEngine(EngineConfig(engine="mysql", host="olap")).copy_in("sales", ["id"], [(1,)]) == 1
+
+
+def test_db_unload_cli_rejects_a_blank_source(sqlite_engine):
+    from typer.testing import CliRunner
+    from prefiq.cli.database.db import db_app
+
+    result = CliRunner().invoke(db_app, ["unload", "   "])
+    assert result.exit_code == 2 and "SOURCE" in result.output
@@ -0,0 +1,58 @@
+# tests/prefiq/database/test_engine_config.py
+from __future__ import annotations
+
+import dataclasses
+import os
+
+import pytest
+
+from prefiq.database import connection
+from prefiq.database.connection_manager import ConnectionManager
+from prefiq.database.engine_config import EngineConfig, engine_config
+
+
+@pytest.fixture
+def analytics(tmp_path, monkeypatch):
+    path = str(tmp_path / "analytics.db")
+    monkeypatch.setenv("ANALYTICS_DB_ENGINE", "sqlite")
+    monkeypatch.setenv("ANALYTICS_DB_MODE", "sync")
+    monkeypatch.setenv("ANALYTICS_DB_NAME", path)
+    monkeypatch.setenv("ANALYTICS_DB_SQLITE_PROFILE", "read_heavy")
+    connection.reset_engine_named("ANALYTICS")
+    yield path
+    connection.reset_engine_named("ANALYTICS")
+
+
+def test_named_config_is_resolved_once_and_frozen(analytics, monkeypatch):
+    cfg = engine_config("analytics")
+    assert engine_config("ANALYTICS") is cfg
+    assert (cfg.engine, cfg.mode, cfg.sqlite_path, cfg.sqlite_profile) == ("sqlite", "sync", analytics, "read_heavy")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        cfg.database = "elsewhere"  # type: ignore[misc]
+
+    # Later env changes do not leak into the cached config until it is reset
+    monkeypatch.setenv("ANALYTICS_DB_NAME", "other.db")
+    assert engine_config("ANALYTICS").database == analytics
+    connection.reset_engine_named("ANALYTICS")
+    assert engine_config("ANALYTICS").database == "other.db"
+
+    pg = EngineConfig.from_settings(overrides={"DB_ENGINE": "postgresql", "DB_NAME": "reports"})
+    assert pg.engine == "postgres" and pg.postgres_params()["database"] == "reports"
+    assert "password" not in repr(pg)
+
+
+def test_named_engine_and_transactions_leave_the_environment_alone(analytics, monkeypatch):
+    reloads = []
+    monkeypatch.setattr(connection, "clear_settings_cache", lambda: reloads.append(1))
+    base_name = os.environ.get("DB_NAME")
+
+    eng = connection.get_engine_named("ANALYTICS")
+    assert eng.db_path == analytics and eng._profile == "read_heavy"
+
+    mgr = ConnectionManager("ANALYTICS")
+    with mgr.transaction():
+        assert os.environ.get("DB_NAME") == base_name
+        eng.execute("CREATE TABLE t (id INTEGER)")
+        eng.execute("INSERT INTO t VALUES (1)")
+    assert eng.fetchone("SELECT COUNT(*) FROM t")[0] == 1
+    assert reloads == []
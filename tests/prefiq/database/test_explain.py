@@ -0,0 +1,80 @@
+# tests/prefiq/database/test_explain.py
+from __future__ import annotations
+
+import pytest
+
+from prefiq.database.dialects.mariadb import MariaDBDialect
+from prefiq.database.dialects.mysql import MySQLDialect
+from prefiq.database.dialects.postgres import PostgresDialect
+from prefiq.database.dialects.sqlite import SQLiteDialect
+from prefiq.database.engines.sqlite.sync_engine import SQLiteEngine
+from prefiq.database.explain import PlanCapture
+from prefiq.database.instrumentation import QueryEvent
+
+
+@pytest.fixture
+def engine(tmp_path):
+    eng = SQLiteEngine(str(tmp_path / "x.db"))
+    eng.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT)")
+    yield eng
+    eng.close()
+
+
+def _slow(sql: str, params=None) -> QueryEvent:
+    return QueryEvent("sqlite", "after", sql, params, 2_000_000_000, 0)
+
+
+def test_slow_select_is_explained_once_per_fingerprint(engine):
+    capture = PlanCapture(engine_getter=lambda: engine, dialect_getter=lambda _: SQLiteDialect())
+
+    assert capture.submit(_slow("SELECT * FROM t WHERE name = ?", ("a",))) is None
+    assert capture.wait()
+    plan = capture.submit(_slow("SELECT * FROM t WHERE name = ?", ("b",)))
+
+    assert plan is not None and plan.error is None
+    assert plan.flags == ("full_scan:t",)
+    assert capture.submit(_slow("UPDATE t SET name = 'x'")) is None
+    assert len(capture.plans()) == 1
+
+
+def test_new_captures_are_rate_limited(engine):
+    capture = PlanCapture(per_minute=1, engine_getter=lambda: engine, dialect_getter=lambda _: SQLiteDialect())
+    capture.submit(_slow("SELECT id FROM t WHERE id = 1"))
+    capture.submit(_slow("SELECT name FROM t ORDER BY name"))
+    capture.wait()
+    assert [fp for *_, fp in capture.plans()] == ["SELECT id FROM t WHERE id = ?"]
+
+
+def test_plan_runs_on_the_engine_that_ran_the_statement(engine, tmp_path):
+    other = SQLiteEngine(str(tmp_path / "other.db"))
+    other.execute("CREATE TABLE only_here (id INTEGER PRIMARY KEY, v TEXT)")
+    capture = PlanCapture(engine_getter=lambda: engine, dialect_getter=lambda _: SQLiteDialect())
+    sql = "SELECT * FROM only_here WHERE v = ?"
+    try:
+        capture.submit(QueryEvent("sqlite", "after", sql, ("a",), 2_000_000_000, 0, source=other))
+        capture.submit(QueryEvent("sqlite", "after", sql, ("a",), 2_000_000_000, 0, source=engine))
+        assert capture.wait()
+    finally:
+        other.close()
+
+    on_other = capture.cached("sqlite", sql, source=other)
+    on_default = capture.cached("sqlite", sql, source=engine)
+    assert on_other is not None and on_other.error is None
+    assert on_other.flags == ("full_scan:only_here",)
+    assert on_default is not None and "no such table" in (on_default.error or "")
+    assert len(capture.plans()) == 2
+
+
+def test_postgres_plan_flags():
+    plan = '[{"Plan": {"Node Type": "Sort", "Plans": [{"Node Type": "Seq Scan", "Relation Name": "users"}]}}]'
+    assert PostgresDialect().plan_flags([(plan,)]) == ["filesort", "full_scan:users"]
+
+
+@pytest.mark.parametrize("dialect", [MariaDBDialect(), MySQLDialect()])
+def test_mysql_like_plan_flags(dialect):
+    plan = (
+        '{"query_block": {"ordering_operation": {"using_filesort": true, '
+        '"table": {"table_name": "users", "access_type": "ALL"}}}}'
+    )
+    assert dialect.explain_sql("SELECT 1") == "EXPLAIN FORMAT=JSON SELECT 1"
+    assert dialect.plan_flags([(plan,)]) == ["filesort", "full_scan:users"]
@@ -0,0 +1,101 @@
+# tests/prefiq/database/test_instrumentation.py
+from __future__ import annotations
+
+import logging
+import sqlite3
+
+import pytest
+
+from prefiq.database import instrumentation
+from prefiq.database.engines.sqlite.sync_engine import SQLiteEngine
+
+
+@pytest.fixture
+def bus(monkeypatch):
+    fresh = instrumentation.InstrumentationBus()
+    monkeypatch.setattr("prefiq.database.engines.abstract_engine.BUS", fresh)
+    return fresh
+
+
+@pytest.fixture
+def engine(tmp_path):
+    eng = SQLiteEngine(str(tmp_path / "i.db"))
+    eng.execute("CREATE TABLE t (id INTEGER PRIMARY KEY)")
+    yield eng
+    eng.close()
+
+
+def test_after_subscribers_get_elapsed_rowcount_and_error(bus, engine):
+    a, b = [], []
+    bus.subscribe(a.append)
+    bus.subscribe(b.append, stages=("before", "after"))
+
+    assert engine.executemany("INSERT INTO t VALUES (?)", [(1,), (2,)]) == 2
+    with pytest.raises(sqlite3.IntegrityError):
+        engine.execute("INSERT INTO t VALUES (?)", (1,))
+
+    ok, failed = a
+    assert (ok.stage, ok.rowcount, ok.error) == ("after", 2, None)
+    assert ok.engine == "sqlite" and ok.elapsed_ns > 0
+    assert isinstance(failed.error, sqlite3.IntegrityError)
+    assert [e.stage for e in b] == ["before", "after", "before", "after"]
+
+
+def test_level_gate_and_sampling_skip_event_construction(bus, engine, monkeypatch):
+    built = []
+    real = instrumentation.QueryEvent
+
+    def counting(*args, **kwargs):
+        built.append(args)
+        return real(*args, **kwargs)
+
+    monkeypatch.setattr(instrumentation, "QueryEvent", counting)
+    quiet = logging.getLogger("prefiq.test.instrumentation")
+    quiet.setLevel(logging.INFO)
+    seen = []
+    bus.subscribe(seen.append, logger=quiet, level=logging.DEBUG)
+    bus.subscribe(lambda e: seen.append(e), sample=0.0)
+    bus.subscribe(lambda e: seen.append(e), min_elapsed_ms=60_000)
+
+    engine.fetchall("SELECT id FROM t")
+    assert seen == [] and built == []
+
+    quiet.setLevel(logging.DEBUG)
+    engine.fetchall("SELECT id FROM t")
+    assert len(seen) == 1 and len(built) == 1
+
+
+def test_elapsed_threshold_only_gates_after_events(bus, engine):
+    seen = []
+    bus.subscribe(seen.append, stages=("before", "after"), min_elapsed_ms=60_000)
+    engine.fetchall("SELECT id FROM t")
+    assert [e.stage for e in seen] == ["before"]
+
+
+def test_nothing_runs_per_statement_without_subscribers(bus, engine, monkeypatch):
+    from prefiq.database import metrics, stats
+
+    called = []
+
+    def forbidden(name):
+        def record(*args, **kwargs):
+            called.append(name)
+        return record
+
+    monkeypatch.setattr(instrumentation, "QueryEvent", forbidden("QueryEvent"))
+    monkeypatch.setattr(metrics, "record_query", forbidden("record_query"))
+    monkeypatch.setattr(stats, "fingerprint", forbidden("fingerprint"))
+
+    engine.execute("INSERT INTO t VALUES (?)", (7,))
+    engine.fetchall("SELECT id FROM t")
+    assert called == []
+
+
+def test_failing_subscriber_does_not_break_the_query(bus, engine):
+    def boom(event):
+        raise RuntimeError("subscriber bug")
+
+    bus.subscribe(boom)
+    assert engine.execute("INSERT INTO t VALUES (?)", (5,)) == 1
+    bus.unsubscribe(boom)
+    assert bus.after == ()
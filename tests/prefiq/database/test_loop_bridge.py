@@ -0,0 +1,57 @@
+# tests/prefiq/database/test_loop_bridge.py
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from prefiq.database.loop_bridge import LoopBridge
+
+
+async def _current_loop():
+    return asyncio.get_running_loop()
+
+
+def test_calls_share_one_long_lived_loop():
+    bridge = LoopBridge(name="test-bridge")
+    try:
+        first = bridge.run_sync(_current_loop())
+        second = bridge.run_sync(_current_loop())
+        assert first is second
+        assert bridge.running
+
+        # Also usable from a thread that already runs its own loop
+        async def caller():
+            return bridge.run_sync(_current_loop())
+
+        assert asyncio.run(caller()) is first
+    finally:
+        bridge.shutdown()
+    assert not bridge.running
+
+
+def test_shutdown_runs_hooks_on_the_bridge_loop():
+    bridge = LoopBridge(name="test-bridge")
+    seen = []
+
+    async def hook():
+        seen.append(asyncio.get_running_loop())
+
+    bridge.on_shutdown(hook)
+    loop = bridge.run_sync(_current_loop())
+    bridge.shutdown()
+    assert seen == [loop]
+    assert loop.is_closed()
+
+
+def test_run_sync_from_bridge_loop_is_rejected():
+    bridge = LoopBridge(name="test-bridge")
+
+    async def reenter():
+        return bridge.run_sync(_current_loop())
+
+    try:
+        with pytest.raises(RuntimeError):
+            bridge.run_sync(reenter())
+    finally:
+        bridge.shutdown()
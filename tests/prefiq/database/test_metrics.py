@@ -0,0 +1,89 @@
+# tests/prefiq/database/test_metrics.py
+from __future__ import annotations
+
+import asyncio
+
+from prefiq.database import instrumentation, metrics
+from prefiq.database.engines.async_pool import AsyncConnectionPool, PoolOptions
+from prefiq.database.engines.sqlite.sync_engine import SQLiteEngine
+
+
+class FakeConn:
+    def close(self) -> None:
+        pass
+
+
+async def _inline(func, *args):
+    return func(*args)
+
+
+def _line(text: str, prefix: str) -> str:
+    return next(line for line in text.splitlines() if line.startswith(prefix))
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = metrics.MetricsRegistry()
+    h = registry.histogram("t_seconds", "test", ("engine",), buckets=(0.1, 1.0))
+    for v in (0.05, 0.5, 0.5, 5.0):
+        h.observe(v, "x")
+    text = registry.render()
+
+    assert "# TYPE t_seconds histogram" in text
+    assert 't_seconds_bucket{engine="x",le="0.1"} 1' in text
+    assert 't_seconds_bucket{engine="x",le="1"} 3' in text
+    assert 't_seconds_bucket{engine="x",le="+Inf"} 4' in text
+    assert 't_seconds_count{engine="x"} 4' in text
+    assert _line(text, "t_seconds_sum").endswith(" 6.05")
+
+
+def test_sql_verb_folds_unknown_keywords():
+    assert metrics.sql_verb("  SELECT 1") == "select"
+    assert metrics.sql_verb("(select 1) union (select 2)") == "select"
+    assert metrics.sql_verb("PRAGMA journal_mode") == "other"
+    assert metrics.sql_verb("") == "other"
+    assert metrics.sql_verb("selected") == "other"
+    assert metrics.sql_verb("\n  Rollback") == "rollback"
+
+
+def test_sqlite_queries_are_counted(tmp_path, monkeypatch):
+    bus = instrumentation.InstrumentationBus()
+    bus.subscribe(metrics.record_event)
+    monkeypatch.setattr("prefiq.database.engines.abstract_engine.BUS", bus)
+    before = metrics.QUERIES.value("sqlite", "insert")
+    eng = SQLiteEngine(str(tmp_path / "m.db"))
+    try:
+        eng.execute("CREATE TABLE t (id INTEGER)")
+        eng.execute("INSERT INTO t VALUES (?)", (1,))
+        eng.fetchall("SELECT id FROM t")
+    finally:
+        eng.close()
+
+    assert metrics.QUERIES.value("sqlite", "insert") == before + 1
+    assert 'prefiq_db_queries_total{engine="sqlite",verb="select"}' in metrics.render()
+
+
+def test_pool_gauges_are_sampled_at_scrape_time():
+    async def main():
+        pool = AsyncConnectionPool(
+            FakeConn,
+            ping=lambda c: None,
+            close=lambda c: c.close(),
+            errors=(RuntimeError,),
+            run_blocking=_inline,
+            options=PoolOptions(max_size=3),
+            name="gauges",
+        )
+        held = await pool.acquire()
+        idle = await pool.acquire()
+        await pool.release(idle)
+        busy = metrics.render()
+        await pool.release(held)
+        await pool.close()
+        return busy, metrics.render()
+
+    busy, closed = asyncio.run(main())
+    assert 'prefiq_db_pool_in_use{pool="gauges"} 1' in busy
+    assert 'prefiq_db_pool_idle{pool="gauges"} 1' in busy
+    assert 'prefiq_db_pool_max_size{pool="gauges"} 3' in busy
+    assert metrics.POOL_CHECKOUT_WAIT.count("gauges") == 2
+    assert 'prefiq_db_pool_size{pool="gauges"}' not in closed  # closed pools drop out
@@ -0,0 +1,75 @@
+# tests/prefiq/database/test_prepared_statements.py
+from __future__ import annotations
+
+from prefiq.database import metrics
+from prefiq.database.engines.sqlite import sync_engine
+from prefiq.database.engines.statement_cache import StatementCache, run_cached
+
+
+class _Cursor:
+    def __init__(self, prepared: bool) -> None:
+        self.prepared = prepared
+        self.executed = 0
+        self.closed = False
+        self.rowcount = 1
+
+    def execute(self, sql, params=None):
+        self.executed += 1
+
+    def fetchone(self):
+        return (self.executed,)
+
+    def close(self):
+        self.closed = True
+
+
+class _Conn:
+    def __init__(self) -> None:
+        self.cursors: list[_Cursor] = []
+
+    def cursor(self, prepared: bool = False):
+        cur = _Cursor(prepared)
+        self.cursors.append(cur)
+        return cur
+
+
+def test_lru_evicts_and_closes_the_oldest_statement():
+    closed = []
+    cache = StatementCache("test", 2, prepare=lambda sql: sql.upper(), close=closed.append)
+    before = metrics.PREPARED.value("test", "hit")
+
+    cache.get("a")
+    cache.get("b")
+    cache.get("a")
+    cache.get("c")
+
+    assert "b" not in cache and "a" in cache and "c" in cache
+    assert closed == ["B"]
+    assert (cache.hits, cache.misses, cache.evictions) == (1, 3, 1)
+    assert metrics.PREPARED.value("test", "hit") == before + 1
+
+
+def test_prepared_cursor_is_reused_per_connection():
+    conn = _Conn()
+    for _ in range(3):
+        row = run_cached(conn, "SELECT * FROM t WHERE id = ?", (1,), engine="test", capacity=8, fetch="one")
+    assert row == (3,)
+    assert [c.prepared for c in conn.cursors] == [True]
+
+    run_cached(conn, "SELECT 1", None, engine="test", capacity=8)
+    run_cached(conn, "SELECT * FROM t WHERE id = ?", (1,), engine="test", capacity=0)
+    assert [c.prepared for c in conn.cursors] == [True, False, False]
+    assert conn.cursors[1].closed and not conn.cursors[0].closed
+
+
+def test_sqlite_engine_counts_statement_cache_hits(tmp_path, monkeypatch):
+    monkeypatch.setattr(sync_engine, "prepared_cache_size", lambda: 16)
+    eng = sync_engine.SQLiteEngine(str(tmp_path / "p.db"))
+    try:
+        eng.execute("CREATE TABLE t (id INTEGER PRIMARY KEY)")
+        for i in range(3):
+            eng.execute("INSERT INTO t VALUES (?)", (i,))
+        stats = eng._stmts.stats()
+        assert (stats["misses"], stats["hits"]) == (1, 2)
+    finally:
+        eng.close()
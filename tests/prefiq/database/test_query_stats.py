@@ -0,0 +1,66 @@
+# tests/prefiq/database/test_query_stats.py
+from __future__ import annotations
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from prefiq.database.instrumentation import QueryEvent
+from prefiq.database.stats import QueryStats, STATS, fingerprint
+
+
+def _event(sql: str, ms: float, rows: int = 1, error: Exception | None = None) -> QueryEvent:
+    return QueryEvent("sqlite", "after", sql, None, int(ms * 1_000_000), rows, error)
+
+
+def test_fingerprint_strips_literals_and_collapses_lists():
+    assert fingerprint("SELECT * FROM t WHERE id IN (1, 2, 3) AND name = 'o''k'") == (
+        "SELECT * FROM t WHERE id IN (...) AND name = ?"
+    )
+    assert fingerprint("INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s)") == "INSERT INTO t (a, b) VALUES (?, ?), ..."
+    assert fingerprint("select *  from t1 where a = $1 -- note\n") == "select * from t1 where a = ?"
+
+
+def test_aggregates_per_fingerprint_with_percentiles():
+    stats = QueryStats()
+    for i in range(1, 101):
+        stats.record(_event(f"SELECT * FROM t WHERE id = {i}", float(i)))
+    stats.record(_event("SELECT * FROM t WHERE id = 0", 1.0, error=RuntimeError("x")))
+
+    (row,) = stats.snapshot()
+    assert row["query"] == "SELECT * FROM t WHERE id = ?"
+    assert (row["calls"], row["errors"], row["rows"]) == (101, 1, 100)
+    assert row["max_ms"] == 100.0
+    assert row["p50_ms"] == 50.0 and row["p95_ms"] == 95.0 and row["p99_ms"] == 99.0
+
+
+def test_memory_is_bounded_by_evicting_rare_statements():
+    stats = QueryStats(max_statements=10)
+    for _ in range(5):
+        stats.record(_event("SELECT hot FROM t", 1.0))
+    for i in range(30):
+        stats.record(_event(f"SELECT c{i} FROM t", 1.0))
+    assert len(stats) <= 10
+    assert stats.evicted > 0
+    assert stats.snapshot(order_by="calls")[0]["query"] == "SELECT hot FROM t"
+
+
+def test_debug_route_requires_token(monkeypatch):
+    http_app = pytest.importorskip("prefiq.http.app")
+
+    class _S:
+        DB_DEBUG_TOKEN = "s3cret"
+
+    monkeypatch.setattr(http_app, "load_settings", lambda: _S)
+    app = http_app._prepare_http_app(FastAPI())
+    client = TestClient(app)
+    STATS.reset()
+    STATS.record(_event("SELECT 1", 2.0))
+
+    assert client.get("/_debug/queries").status_code == 401
+    resp = client.get("/_debug/queries", headers={"Authorization": "Bearer s3cret"})
+    assert resp.status_code == 200
+    assert resp.json()["statements"][0]["query"] == "SELECT ?"
+
+    _S.DB_DEBUG_TOKEN = ""
+    assert client.get("/_debug/queries", headers={"X-Debug-Token": "s3cret"}).status_code == 404
@@ -0,0 +1,162 @@
+# tests/prefiq/database/test_routing.py
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+from prefiq.database.engines.sqlite.async_engine import AsyncSQLiteEngine
+from prefiq.database.engines.sqlite.sync_engine import SQLiteEngine
+from prefiq.database.routing import (
+    RoutingEngine,
+    is_read_only,
+    mark_primary,
+    pinned_to_primary,
+    routing_from_settings,
+    routing_scope,
+)
+
+
+def _db(path: str, label: str) -> SQLiteEngine:
+    eng = SQLiteEngine(path)
+    eng.execute("CREATE TABLE src (name TEXT)")
+    eng.execute("INSERT INTO src VALUES (?)", (label,))
+    return eng
+
+
+class _Down:
+    def fetchone(self, query, params=None):
+        raise ConnectionError("replica unreachable")
+
+    def iterate(self, query, params=None, **kwargs):
+        raise ConnectionError("replica unreachable")
+        yield
+
+
+def test_reads_hit_replicas_until_the_scope_writes(tmp_path):
+    primary = _db(str(tmp_path / "p.db"), "primary")
+    replica = _db(str(tmp_path / "r.db"), "replica")
+    router = RoutingEngine(primary, [replica])
+    q = "SELECT name FROM src"
+
+    with routing_scope():
+        assert router.fetchone(q)[0] == "replica"
+        router.execute("INSERT INTO src VALUES ('written')")
+        assert router.fetchone(q)[0] == "primary"  # read-your-writes
+        assert [r[0] for r in router.iterate(q)] == ["primary", "written"]
+    with routing_scope():
+        assert router.fetchall(q, row_format="tuple") == [("replica",)]
+        assert list(router.fetch_columns(q)["name"]) == ["replica"]
+    assert router.routing_stats()["replicas"][0]["reads"] == 3  # fetchone, fetchall, fetch_columns' stream
+    assert router.db_path == primary.db_path  # everything else is the primary's
+    router.close()
+
+
+def test_failing_replica_is_benched_but_bad_sql_is_not(tmp_path, monkeypatch):
+    from prefiq.database import routing
+
+    primary = _db(str(tmp_path / "p.db"), "primary")
+    replica = _db(str(tmp_path / "r.db"), "replica")
+    router = RoutingEngine(primary, [_Down(), replica], cooldown=60)
+    monkeypatch.setattr(routing.random, "choices", lambda pop, weights: [pop[0]])
+
+    with routing_scope():
+        assert router.fetchone("SELECT name FROM src")[0] == "primary"  # failed over
+        assert router.fetchone("SELECT name FROM src")[0] == "replica"  # the down one sits out
+    down, up = router.routing_stats()["replicas"]
+    assert not down["healthy"] and down["failures"] == 1 and up["healthy"]
+
+    with routing_scope():
+        for _ in range(5):
+            try:
+                router.fetchone("SELECT nope FROM src")
+            except Exception:
+                pass
+    assert router.routing_stats()["replicas"][1]["failures"] == 0
+    router.close()
+
+
+def test_failing_replica_stream_fails_over_and_is_benched(tmp_path, monkeypatch):
+    from prefiq.database import routing
+
+    primary = _db(str(tmp_path / "p.db"), "primary")
+    router = RoutingEngine(primary, [_Down()], cooldown=60)
+    monkeypatch.setattr(routing.random, "choices", lambda pop, weights: [pop[0]])
+
+    with routing_scope():
+        assert [r[0] for r in router.iterate("SELECT name FROM src")] == ["primary"]
+    (down,) = router.routing_stats()["replicas"]
+    assert not down["healthy"] and down["failures"] == 1
+    router.close()
+
+
+def test_writes_outside_a_scope_pin_only_their_transaction(tmp_path):
+    primary = _db(str(tmp_path / "p.db"), "primary")
+    replica = _db(str(tmp_path / "r.db"), "replica")
+    router = RoutingEngine(primary, [replica])
+    q = "SELECT name FROM src"
+
+    mark_primary()
+    router.execute("INSERT INTO src VALUES ('written')")
+    assert not pinned_to_primary()  # no scope: nothing left pinned behind
+    assert router.fetchone(q)[0] == "replica"
+
+    router.begin()
+    assert router.fetchall(q, row_format="tuple") == [("primary",), ("written",)]
+    router.rollback()
+    with router.transaction():
+        assert router.fetchone(q)[0] == "primary"
+    assert not pinned_to_primary()
+    assert router.fetchone(q)[0] == "replica"
+    router.close()
+
+
+def test_statement_classification():
+    assert is_read_only("  select 1")
+    assert is_read_only("WITH t AS (SELECT 1) SELECT * FROM t")
+    assert not is_read_only("SELECT * FROM t FOR UPDATE")
+    assert not is_read_only("SELECT * FROM t LOCK IN SHARE MODE")
+    assert not is_read_only("WITH d AS (DELETE FROM t RETURNING *) SELECT * FROM d")
+    assert not is_read_only("INSERT INTO t VALUES (1) RETURNING id")
+    assert not is_read_only("PRAGMA wal_checkpoint")
+
+
+def test_async_members_and_settings_discovery(tmp_path, monkeypatch):
+    _db(str(tmp_path / "p.db"), "primary").close()
+    _db(str(tmp_path / "r.db"), "replica").close()
+    router = RoutingEngine(AsyncSQLiteEngine(str(tmp_path / "p.db")), [AsyncSQLiteEngine(str(tmp_path / "r.db"))])
+
+    async def main():
+        with routing_scope():
+            before = (await router.fetchone("SELECT name FROM src"))[0]
+            async with router.transaction():
+                await router.execute("INSERT INTO src VALUES ('x')")
+            after = await router.fetchall("SELECT name FROM src")
+        await router.close()
+        return before, [r[0] for r in after]
+
+    assert asyncio.run(main()) == ("replica", ["primary", "x"])
+
+    monkeypatch.setenv("REPLICA2_DB_ENGINE", "sqlite")
+    monkeypatch.setenv("REPLICA10_DB_ENGINE", "sqlite")
+    monkeypatch.setenv("REPLICA1_DB_ENGINE", "sqlite")
+    s = SimpleNamespace(DB_PRIMARY="PRIMARY", DB_REPLICAS="", DB_REPLICA_COOLDOWN_S=5.0)
+    default = object()
+    built = routing_from_settings(s, lambda: default)
+    assert built.primary is default  # no PRIMARY_DB_ENGINE: the DB_* engine writes
+    assert [r.name for r in built.replicas] == ["REPLICA1", "REPLICA2", "REPLICA10"]
+    s.DB_REPLICAS = "analytics, replica_eu"
+    assert [r.name for r in routing_from_settings(s, object).replicas] == ["ANALYTICS", "REPLICA_EU"]
+
+
+def test_scope_middleware_is_mounted_only_with_read_routing(monkeypatch):
+    import pytest
+    from fastapi import FastAPI
+
+    http_app = pytest.importorskip("prefiq.http.app")
+    from prefiq.database.routing import RoutingScopeMiddleware
+
+    for enabled in (False, True):
+        monkeypatch.setattr(http_app, "load_settings", lambda: SimpleNamespace(DB_READ_ROUTING=enabled))
+        app = http_app._prepare_http_app(FastAPI())
+        mounted = [m.cls for m in app.user_middleware]
+        assert (RoutingScopeMiddleware in mounted) is enabled
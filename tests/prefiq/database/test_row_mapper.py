@@ -0,0 +1,158 @@
+# tests/prefiq/database/test_row_mapper.py
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from prefiq.database.engines.row_mapper import compile_mapper
+from prefiq.database.engines.sqlite.async_engine import AsyncSQLiteEngine
+from prefiq.database.engines.sqlite.sync_engine import SQLiteEngine
+
+
+@dataclass
+class Item:
+    id: int
+    name: str
+    meta: dict = field(default_factory=dict)
+
+
+def _seed(eng: SQLiteEngine) -> None:
+    eng.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT, meta TEXT, price TEXT, at TEXT)")
+    eng.executemany(
+        "INSERT INTO items (name, meta, price, at) VALUES (?, ?, ?, ?)",
+        [(f"n{i}", '{"k": %d}' % i, f"{i}.10", f"2026-01-0{i + 1}T10:00:00") for i in range(3)],
+    )
+
+
+def test_mapper_is_compiled_once_per_layout():
+    conv = {"meta": "json"}
+    first = compile_mapper(["id", "meta"], "dict", conv)
+    assert compile_mapper(("id", "meta"), "DICT", {"meta": "json"}) is first
+    assert compile_mapper(["id", "meta"], "tuple", conv) is not first
+
+    assert first.many([(1, '{"a": 1}'), (2, None), (3, "not json")]) == [
+        {"id": 1, "meta": {"a": 1}}, {"id": 2, "meta": None}, {"id": 3, "meta": "not json"},
+    ]
+    nt = compile_mapper(["id", "id"], "namedtuple").one((1, 2))
+    assert nt == (1, 2) and nt._fields == ("id", "_1")
+    with pytest.raises(ValueError):
+        compile_mapper(["id"], "xml")
+    with pytest.raises(ValueError):
+        compile_mapper(["id"], "dict", {"id": "uuid"})
+
+
+def test_sqlite_engine_row_formats(tmp_path):
+    eng = SQLiteEngine(str(tmp_path / "r.db"))
+    _seed(eng)
+    q = "SELECT id, name, meta, price, at FROM items ORDER BY id"
+    conv = {"meta": "json", "price": "decimal", "at": "datetime"}
+
+    rows = eng.fetchall(q, row_format="dict", converters=conv)
+    assert rows[1] == {
+        "id": 2, "name": "n1", "meta": {"k": 1}, "price": Decimal("1.10"), "at": datetime(2026, 1, 2, 10),
+    }
+    assert eng.fetchall(q)[0]["name"] == "n0"  # default stays sqlite3.Row
+    assert eng.fetchone(q, row_format="tuple") == (1, "n0", '{"k": 0}', "0.10", "2026-01-01T10:00:00")
+    assert eng.fetchone(q, row_format="namedtuple").name == "n0"
+    assert eng.fetchone("SELECT 1 FROM items WHERE id = ?", (99,), row_format="dict") is None
+
+    # dataclass targets take the matching columns only
+    items = eng.fetchall(q, row_format=Item, converters={"meta": "json"})
+    assert items[2] == Item(id=3, name="n2", meta={"k": 2})
+    eng.close()
+
+
+def test_async_sqlite_engine_row_format(tmp_path):
+    path = str(tmp_path / "r.db")
+    _seed(SQLiteEngine(path))
+    eng = AsyncSQLiteEngine(path)
+
+    async def main():
+        rows = await eng.fetchall("SELECT id, meta FROM items ORDER BY id", row_format="dict", converters={"meta": "json"})
+        one = await eng.fetchone("SELECT id, name FROM items WHERE id = ?", (3,), row_format=Item)
+        await eng.close()
+        return rows, one
+
+    rows, one = asyncio.run(main())
+    assert [r["meta"]["k"] for r in rows] == [0, 1, 2]
+    assert one == Item(id=3, name="n2")
+
+
+class _DriverCursor:
+    """DB-API cursor stand-in for the MariaDB / MySQL drivers (tuple rows)."""
+
+    description = (("id", 3), ("meta", 253))
+
+    def __init__(self) -> None:
+        self.rows = [(1, '{"k": 1}'), (2, '{"k": 2}')]
+
+    def execute(self, query, params=None) -> None:
+        pass
+
+    def fetchone(self):
+        return self.rows[0]
+
+    def fetchall(self):
+        return list(self.rows)
+
+    def close(self) -> None:
+        pass
+
+
+class _DriverConn:
+    def __init__(self) -> None:
+        self.prepared = 0
+
+    def ping(self, *args, **kwargs) -> None:
+        pass
+
+    def commit(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def cursor(self, *args, prepared=False):
+        self.prepared += prepared
+        return _DriverCursor()
+
+
+def test_prepared_statements_shape_rows_from_the_description():
+    from prefiq.database.engines.row_mapper import row_fetcher
+    from prefiq.database.engines.statement_cache import run_cached
+
+    conn = _DriverConn()
+    for _ in range(2):
+        rows = run_cached(conn, "SELECT id, meta FROM t WHERE id > ?", (0,), engine="mariadb", capacity=8,
+                          fetch=row_fetcher("dict", {"meta": "json"}))
+        one = run_cached(conn, "SELECT id, meta FROM t", engine="mariadb", capacity=8,
+                         fetch=row_fetcher("namedtuple", one=True))
+    assert rows == [{"id": 1, "meta": {"k": 1}}, {"id": 2, "meta": {"k": 2}}]
+    assert (one.id, one.meta) == (1, '{"k": 1}')
+    assert conn.prepared == 1  # the parameterized statement stays prepared
+    assert row_fetcher(None) == "all" and row_fetcher(None, one=True) == "one"
+
+
+def test_mysql_async_engine_row_format(monkeypatch):
+    pytest.importorskip("pymysql")
+    from prefiq.database.engine_config import EngineConfig
+    from prefiq.database.engines.mysql import pool as mysql_pool
+    from prefiq.database.engines.mysql.async_engine import AsyncMysqlEngine
+
+    monkeypatch.setattr(mysql_pool.pymysql, "connect", lambda **kw: _DriverConn())
+    eng = AsyncMysqlEngine(EngineConfig(engine="mysql", host="db"))
+
+    async def main():
+        rows = await eng.fetchall("SELECT id, meta FROM t", row_format="dict", converters={"meta": "json"})
+        one = await eng.fetchone("SELECT id, meta FROM t", row_format="namedtuple")
+        plain = await eng.fetchone("SELECT id, meta FROM t")
+        await eng.close()
+        return rows, one, plain
+
+    rows, one, plain = asyncio.run(main())
+    assert [r["meta"] for r in rows] == [{"k": 1}, {"k": 2}]
+    assert one.id == 1 and plain == (1, '{"k": 1}')
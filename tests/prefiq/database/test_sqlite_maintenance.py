@@ -0,0 +1,131 @@
+# tests/prefiq/database/test_sqlite_maintenance.py
+from __future__ import annotations
+
+import asyncio
+import gzip
+import sqlite3
+
+import pytest
+
+from prefiq.database.engines.sqlite.maintenance import (
+    MaintenanceScheduler,
+    backup_archive,
+    restore_archive,
+    wal_size,
+)
+from prefiq.database.engines.sqlite.sync_engine import SQLiteEngine
+
+
+def _fill(eng: SQLiteEngine, n: int = 2000) -> None:
+    eng.execute("CREATE TABLE IF NOT EXISTS blobs (id INTEGER PRIMARY KEY, body TEXT)")
+    eng.executemany("INSERT INTO blobs (body) VALUES (?)", [("x" * 500,)] * n)
+
+
+def test_tick_checkpoints_optimizes_and_vacuums_when_idle(tmp_path):
+    path = str(tmp_path / "m.db")
+    eng = SQLiteEngine(path)
+    _fill(eng)
+    eng.execute("DELETE FROM blobs")
+    assert eng.fetchone("PRAGMA auto_vacuum")[0] == 2  # INCREMENTAL from the profile
+    assert wal_size(path) > 0
+
+    sched = MaintenanceScheduler(
+        path, wal_limit_mb=0, optimize_every=10, vacuum_pages=50, activity=eng.activity,
+    )
+    first = sched.tick(now=sched._last_optimize + 1)
+    assert first["checkpoint"] == "truncate" and "optimize" not in first
+    assert "vacuumed_pages" not in first  # no baseline yet: not known to be idle
+
+    eng.execute("UPDATE blobs SET body = 'y'")
+    busy = sched.tick(now=sched._last_optimize + 20)
+    assert busy["optimize"] and "vacuumed_pages" not in busy  # the engine wrote since the last tick
+
+    idle = sched.tick()
+    assert idle["vacuumed_pages"] == 50
+    assert eng.fetchone("SELECT COUNT(*) FROM blobs")[0] == 0
+    eng.close()
+
+
+def test_db_maintain_cli(tmp_path):
+    from typer.testing import CliRunner
+    from prefiq.cli.database.db import db_app
+
+    path = str(tmp_path / "m.db")
+    eng = SQLiteEngine(path)
+    _fill(eng, 500)
+    eng.execute("DELETE FROM blobs")
+
+    result = CliRunner().invoke(db_app, ["maintain", "--path", path, "--vacuum-pages", "0"])
+    assert result.exit_code == 0, result.output
+    assert "checkpoint=truncate" in result.output and "vacuumed 0 pages" in result.output
+    assert wal_size(path) == 0
+    freelist = sqlite3.connect(path).execute("PRAGMA freelist_count").fetchone()[0]
+    assert freelist > 0
+    eng.close()
+
+
+def test_paged_backup_archive_and_verified_restore(tmp_path):
+    path = str(tmp_path / "m.db")
+    eng = SQLiteEngine(path)
+    _fill(eng, 300)
+
+    steps = []
+    archive = str(tmp_path / "out" / "m.db.gz")
+    assert backup_archive(path, archive, pages=8, progress=lambda done, total: steps.append((done, total))) > 0
+    assert len(steps) > 1 and steps[-1][0] == steps[-1][1]
+    assert sorted(p.name for p in (tmp_path / "out").iterdir()) == ["m.db.gz"]
+
+    eng.execute("DELETE FROM blobs")
+    restore_archive(archive, path)
+    assert eng.fetchone("SELECT COUNT(*) FROM blobs")[0] == 300  # open connection sees the restore
+
+    bad = tmp_path / "bad.db.gz"
+    bad.write_bytes(gzip.compress(b"not a database" * 100))
+    with pytest.raises(ValueError):
+        restore_archive(str(bad), path)
+    assert eng.fetchone("SELECT COUNT(*) FROM blobs")[0] == 300
+    eng.close()
+
+
+def test_scheduled_backups_are_pruned(tmp_path):
+    path = str(tmp_path / "m.db")
+    eng = SQLiteEngine(path)
+    _fill(eng, 10)
+    sched = MaintenanceScheduler(path, backup_dir=str(tmp_path / "bk"), backup_keep=2, activity=lambda: 0)
+    for i in range(3):
+        sched.backup(str(tmp_path / "bk" / f"m-2026010{i}-000000.db.gz"))
+    assert "backup" not in sched.tick()  # the newest archive is recent
+    assert sorted(p.name for p in (tmp_path / "bk").iterdir()) == ["m-20260101-000000.db.gz", "m-20260102-000000.db.gz"]
+    eng.close()
+
+
+def test_without_an_activity_counter_tick_never_vacuums(tmp_path):
+    path = str(tmp_path / "m.db")
+    eng = SQLiteEngine(path)
+    _fill(eng, 200)
+    eng.execute("DELETE FROM blobs")
+    sched = MaintenanceScheduler(path, vacuum_pages=50)
+    assert "vacuumed_pages" not in sched.tick() and "vacuumed_pages" not in sched.tick()
+    eng.close()
+
+
+def test_a_failing_tick_is_logged_and_the_loop_goes_on(tmp_path, monkeypatch):
+    sched = MaintenanceScheduler(str(tmp_path / "m.db"), interval=0.1)
+    ticks = []
+
+    def tick():
+        ticks.append(1)
+        if len(ticks) == 1:
+            raise OSError("No space left on device")  # e.g. the scheduled backup
+        return {}
+
+    monkeypatch.setattr(sched, "tick", tick)
+
+    async def main():
+        sched.start()
+        while len(ticks) < 2:
+            await asyncio.sleep(0.05)
+        assert not sched._task.done()
+        await sched.stop()
+
+    asyncio.run(main())
@@ -0,0 +1,117 @@
+# tests/prefiq/database/test_sqlite_readers.py
+from __future__ import annotations
+
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from prefiq.database.engines.sqlite.sync_engine import SQLiteEngine
+from prefiq.database.engines.sqlite.wal import GroupCommitError, WriterThread
+
+
+@pytest.fixture
+def engine(tmp_path):
+    eng = SQLiteEngine(str(tmp_path / "r.db"), readers=4)
+    eng.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT)")
+    yield eng
+    eng.close()
+
+
+def test_threads_share_the_engine(engine):
+    def work(i: int) -> int:
+        engine.execute("INSERT INTO t VALUES (?, ?)", (i, f"n{i}"))
+        return engine.fetchone("SELECT COUNT(*) FROM t WHERE id = ?", (i,))[0]
+
+    with ThreadPoolExecutor(8) as pool:
+        assert list(pool.map(work, range(50))) == [1] * 50
+    assert engine.fetchone("SELECT COUNT(*) FROM t")[0] == 50
+    assert engine._writer is not None and engine.conn is None
+    assert engine._pool.stats()["size"] <= 4
+
+
+def test_readers_are_read_only(engine):
+    with engine._pool.connection() as conn:
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("INSERT INTO t VALUES (1, 'x')")
+
+
+def test_transaction_owns_the_writer_and_sees_its_own_rows(engine):
+    seen = []
+    with pytest.raises(RuntimeError):
+        with engine.transaction():
+            engine.execute("INSERT INTO t VALUES (1, 'a')")
+            seen.append(engine.fetchall("SELECT id FROM t"))
+            # Other threads read the last committed state
+            t = threading.Thread(target=lambda: seen.append(engine.fetchall("SELECT id FROM t")))
+            t.start()
+            t.join()
+            raise RuntimeError("abort")
+
+    assert [[tuple(r) for r in rows] for rows in seen] == [[(1,)], []]
+    assert engine.fetchall("SELECT id FROM t") == []
+
+    engine.begin()
+    engine.execute("INSERT INTO t VALUES (2, 'b')")
+    engine.commit()
+    assert [tuple(r) for r in engine.fetchall("SELECT id FROM t")] == [(2,)]
+
+
+def test_group_commit_coalesces_writes_and_isolates_errors(tmp_path):
+    eng = SQLiteEngine(str(tmp_path / "g.db"), group_commit_ms=20)
+    try:
+        eng.execute("CREATE TABLE t (id INTEGER PRIMARY KEY)")
+
+        def insert(i: int):
+            try:
+                return eng.execute("INSERT INTO t VALUES (?)", (i % 40,))
+            except sqlite3.IntegrityError:
+                return "dup"
+
+        with ThreadPoolExecutor(16) as pool:
+            results = list(pool.map(insert, range(48)))
+
+        assert results.count(1) == 40 and results.count("dup") == 8
+        assert eng.fetchone("SELECT COUNT(*) FROM t")[0] == 40
+        assert eng._writer.grouped == 40 and eng._writer.commits < 40
+    finally:
+        eng.close()
+
+
+def test_failed_group_commit_gives_each_caller_its_own_error(tmp_path):
+    path = str(tmp_path / "fk.db")
+
+    def connect() -> sqlite3.Connection:
+        conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    setup = connect()
+    setup.execute("CREATE TABLE parent (id INTEGER PRIMARY KEY)")
+    setup.execute(
+        "CREATE TABLE child (id INTEGER PRIMARY KEY, "
+        "parent_id INTEGER REFERENCES parent(id) DEFERRABLE INITIALLY DEFERRED)"
+    )
+    setup.close()
+
+    writer = WriterThread(connect, group_window=0.5)
+    writer.start()
+    try:
+        # The orphan only fails at COMMIT (deferred FK), taking the whole group with it
+        def insert(i: int, parent):
+            return lambda conn: conn.execute("INSERT INTO child VALUES (?, ?)", (i, parent)).rowcount
+
+        futures = [writer.submit(insert(i, 99 if i == 1 else None), group=True) for i in range(3)]
+        errors = [f.exception(timeout=5) for f in futures]
+    finally:
+        writer.close()
+
+    assert all(isinstance(e, GroupCommitError) for e in errors)
+    assert len({id(e) for e in errors}) == 3
+    cause = errors[0].__cause__
+    assert isinstance(cause, sqlite3.IntegrityError)
+    assert all(e.__cause__ is cause for e in errors)
+    conn = connect()
+    assert conn.execute("SELECT COUNT(*) FROM child").fetchone()[0] == 0
+    conn.close()
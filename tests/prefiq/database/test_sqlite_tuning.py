@@ -0,0 +1,53 @@
+# tests/prefiq/database/test_sqlite_tuning.py
+from __future__ import annotations
+
+import sqlite3
+
+import pytest
+
+from prefiq.database.engines.sqlite import tuning
+from prefiq.database.engines.sqlite.sync_engine import SQLiteEngine
+
+
+def _pragma(conn, name):
+    return conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+
+def test_profile_applies_page_size_only_to_new_database(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "x.db"))
+    tuning.apply_profile(conn, "read_heavy")
+    assert _pragma(conn, "journal_mode") == "wal"
+    assert _pragma(conn, "page_size") == 8192
+    assert _pragma(conn, "cache_size") == -65536
+    assert _pragma(conn, "busy_timeout") == 5000
+    conn.execute("CREATE TABLE t (id INTEGER)")
+
+    assert not any("page_size" in s for s in tuning.pragma_statements("read_heavy"))
+    assert tuning.pragma_statements("oltp", readonly=True) == [
+        "PRAGMA temp_store=MEMORY", "PRAGMA busy_timeout=5000",
+        "PRAGMA cache_size=-16000", f"PRAGMA mmap_size={128 * 1024 * 1024}",
+    ]
+    with pytest.raises(ValueError):
+        tuning.get_profile("fastest")
+    conn.close()
+
+
+def test_bulk_load_restores_pragmas_and_rebuilds_indexes(tmp_path):
+    eng = SQLiteEngine(str(tmp_path / "x.db"), profile="oltp")
+    eng.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT UNIQUE, tag TEXT)")
+    eng.execute("CREATE INDEX t_tag ON t (tag)")
+    conn = eng._get_conn()
+    assert _pragma(conn, "synchronous") == 1  # NORMAL
+
+    with eng.bulk_load(tables=["t"]):
+        assert _pragma(conn, "synchronous") == 0
+        assert _pragma(conn, "cache_size") == -262144
+        names = [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")]
+        assert "t_tag" not in names and names  # the UNIQUE autoindex stays
+        eng.copy_in("t", ["name", "tag"], [(f"n{i}", f"g{i % 3}") for i in range(50)])
+
+    assert _pragma(conn, "synchronous") == 1
+    assert _pragma(conn, "cache_size") == -16000
+    assert eng.fetchone("SELECT COUNT(*) FROM t WHERE tag = ?", ("g1",))[0] == 17
+    assert eng.fetchone("SELECT 1 FROM sqlite_master WHERE name = 't_tag'") is not None
+    eng.close()
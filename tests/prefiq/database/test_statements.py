@@ -0,0 +1,46 @@
+# tests/prefiq/database/test_statements.py
+from __future__ import annotations
+
+import pytest
+
+from prefiq.database import statements
+from prefiq.database.engines.sqlite.sync_engine import SQLiteEngine
+from prefiq.database.statements import compile_statement, paramstyle_for, prepare
+
+
+def test_translates_placeholders_outside_quotes():
+    sql = "SELECT '%s', x::int FROM \"t:x\" WHERE a = %s AND b = %s -- %s"
+    assert compile_statement("numeric", sql).sql == (
+        "SELECT '%s', x::int FROM \"t:x\" WHERE a = $1 AND b = $2 -- %s"
+    )
+    assert compile_statement("qmark", sql).sql.count("?") == 2
+    assert compile_statement("format", sql).sql == sql
+    with pytest.raises(ValueError):
+        compile_statement("qmark", "SELECT %s, :a")
+
+
+def test_named_params_bind_positionally():
+    stmt = compile_statement("qmark", "UPDATE t SET a = :a WHERE id = :id OR parent = :id")
+    assert stmt.sql == "UPDATE t SET a = ? WHERE id = ? OR parent = ?"
+    assert stmt.bind({"id": 7, "a": "x"}) == ("x", 7, 7)
+
+    numeric = compile_statement("numeric", "UPDATE t SET a = :a WHERE id = :id OR parent = :id")
+    assert numeric.sql == "UPDATE t SET a = $1 WHERE id = $2 OR parent = $2"
+    assert numeric.bind({"id": 7}) == (None, 7)
+
+    named = compile_statement("named", "SELECT :a")
+    assert named.sql == "SELECT :a" and named.bind({"a": 1}) == {"a": 1}
+
+
+def test_repeat_calls_hit_the_cache(tmp_path):
+    statements._cached.cache_clear()
+    eng = SQLiteEngine(str(tmp_path / "s.db"))
+    try:
+        assert paramstyle_for(eng) == "qmark"
+        for i in range(3):
+            sql, params = prepare(eng, "SELECT :v + 1", {"v": i})
+            assert tuple(eng.fetchone(sql, params)) == (i + 1,)
+        info = statements._cached.cache_info()
+        assert (info.misses, info.hits) == (1, 2)
+    finally:
+        eng.close()
@@ -0,0 +1,50 @@
+# tests/prefiq/database/test_streaming.py
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from prefiq.database import connection
+from prefiq.database.engines.sqlite.sync_engine import SQLiteEngine
+from prefiq.database.schemas import queries
+
+
+@pytest.fixture()
+def sqlite_engine(tmp_path, monkeypatch):
+    monkeypatch.setenv("TESTING", "1")
+    monkeypatch.setenv("DB_ENGINE", "sqlite")
+    eng = SQLiteEngine(str(tmp_path / "stream.sqlite"))
+    eng.execute("CREATE TABLE sales (id INTEGER PRIMARY KEY, amount INTEGER)")
+    eng.executemany("INSERT INTO sales (id, amount) VALUES (?, ?)", [(i, i * 10) for i in range(1, 251)])
+    monkeypatch.setattr(connection, "_engine_singleton", eng)
+    yield eng
+    eng.close()
+
+
+def test_iterate_yields_all_rows_in_batches(sqlite_engine):
+    rows = sqlite_engine.iterate("SELECT id FROM sales ORDER BY id", batch_size=7)
+    assert not isinstance(rows, list)
+    assert [r[0] for r in rows] == list(range(1, 251))
+
+
+def test_select_iter_respects_where(sqlite_engine):
+    it = queries.select_iter("sales", "id, amount", "amount > ?", (2400,), batch_size=3)
+    assert [tuple(r) for r in it] == [(241 + i, (241 + i) * 10) for i in range(10)]
+
+
+def test_async_sqlite_aiterate(tmp_path):
+    pytest.importorskip("aiosqlite")
+    from prefiq.database.engines.sqlite.async_engine import AsyncSQLiteEngine
+
+    async def main():
+        eng = AsyncSQLiteEngine(str(tmp_path / "astream.sqlite"))
+        await eng.connect()
+        try:
+            await eng.execute("CREATE TABLE t (n INTEGER)")
+            await eng.executemany("INSERT INTO t (n) VALUES (?)", [(i,) for i in range(100)])
+            return [r[0] async for r in eng.aiterate("SELECT n FROM t ORDER BY n", batch_size=9)]
+        finally:
+            await eng.close()
+
+    assert asyncio.run(main()) == list(range(100))
@@ -0,0 +1,152 @@
+# tests/prefiq/database/test_sync_postgres.py
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+pytest.importorskip("psycopg2")
+
+from prefiq.database.engines.postgres.sync_engine import SyncPostgresEngine
+
+
+class _Cursor:
+    rowcount = -1
+    description = (("n",),)
+
+    def __init__(self, conn: "_Conn", name=None) -> None:
+        self.conn = conn
+        self.name = name
+        self.itersize = 2000
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __iter__(self):
+        return iter([(i,) for i in range(5)])
+
+    def fetchone(self):
+        return (0,)
+
+    def execute(self, query, params=None):
+        # Whether a statement ran inside BEGIN ... COMMIT on this connection
+        self.conn.log.append((query, params, self.conn.autocommit))
+        self.rowcount = 3
+
+    def executemany(self, query, seq):
+        self.rowcount = len(list(seq))
+
+
+class _Conn:
+    closed = 0
+
+    def __init__(self) -> None:
+        self.autocommit = True
+        self.log: list = []
+
+    def cursor(self, name=None):
+        return _Cursor(self, name)
+
+    def commit(self):
+        self.log.append("COMMIT")
+        self.autocommit = True
+
+    def rollback(self):
+        self.log.append("ROLLBACK")
+        self.autocommit = True
+
+
+class _Pool:
+    def __init__(self) -> None:
+        self.made: list = []
+        self.idle: list = []
+
+    def getconn(self):
+        if self.idle:
+            return self.idle.pop()
+        self.made.append(_Conn())
+        return self.made[-1]
+
+    def putconn(self, conn, close=False):
+        self.idle.append(conn)
+
+    def closeall(self):
+        pass
+
+
+@pytest.fixture
+def engine():
+    eng = SyncPostgresEngine()
+    eng._pool = _Pool()
+    yield eng, eng._pool
+    eng.close()
+
+
+def test_writes_return_the_affected_row_count(engine):
+    eng, _ = engine
+    assert eng.execute("UPDATE t SET n = %s", (1,)) == 3
+    assert eng.executemany("INSERT INTO t VALUES (%s)", [(1,), (2,)]) == 2
+
+
+def test_format_placeholders_reach_the_driver_unchanged(engine):
+    eng, pool = engine
+    eng.fetchone("SELECT n FROM t WHERE a = %s AND b = %s", [1, "x"])
+    assert pool.made[0].log == [("SELECT n FROM t WHERE a = %s AND b = %s", (1, "x"), True)]
+
+
+def test_transaction_pins_one_connection_and_commits_or_rolls_back(engine):
+    eng, pool = engine
+    with eng.transaction() as cur:
+        cur.execute("INSERT INTO t VALUES (%s)", (1,))
+        eng.execute("UPDATE t SET n = 2")  # same thread: joins the transaction
+    with pytest.raises(RuntimeError):
+        with eng.transaction():
+            eng.execute("DELETE FROM t")
+            raise RuntimeError("boom")
+    (conn,) = pool.made
+    assert conn.log == [
+        ("INSERT INTO t VALUES (%s)", (1,), False),
+        ("UPDATE t SET n = 2", None, False),
+        "COMMIT",
+        ("DELETE FROM t", None, False),
+        "ROLLBACK",
+    ]
+    assert len(pool.idle) == len(pool.made) and getattr(eng._local, "conn", None) is None
+
+
+def test_iterate_streams_on_its_own_connection(engine):
+    eng, pool = engine
+    stream = eng.iterate("SELECT n FROM t", batch_size=2)
+    assert next(stream) == (0,)
+    eng.execute("UPDATE t SET seen = 1")  # not part of the stream's transaction
+    assert [r for r in stream] == [(i,) for i in range(1, 5)]
+
+    reader, writer = pool.made
+    assert reader.log == [("SELECT n FROM t", None, False), "COMMIT"]
+    assert writer.log == [("UPDATE t SET seen = 1", None, True)]
+    assert getattr(eng._local, "conn", None) is None and len(pool.idle) == 2
+
+
+def test_closing_a_stream_early_or_on_another_thread_returns_its_connection(engine):
+    eng, pool = engine
+    stream = eng.iterate("SELECT n FROM t")
+    assert next(stream) == (0,)
+    # Starlette's iterate_in_threadpool resumes the generator on another thread
+    worker = threading.Thread(target=lambda: next(stream))
+    worker.start()
+    worker.join()
+    stream.close()  # break out of the loop: GeneratorExit
+    assert pool.made[0].log[-1] == "ROLLBACK"
+    assert len(pool.idle) == len(pool.made) and getattr(eng._local, "conn", None) is None
+
+    with eng.transaction():
+        eng.execute("INSERT INTO t VALUES (1)")
+        assert len(list(eng.iterate("SELECT n FROM t"))) == 5  # joins the open transaction
+    assert pool.made[0].log[-3:] == [
+        ("INSERT INTO t VALUES (1)", None, False),
+        ("SELECT n FROM t", None, False),
+        "COMMIT",
+    ]